@@ -14,13 +14,33 @@ from PIL import Image
 import zipfile
 import io
 import tempfile
+import time
+import re
+from functools import partial
+import pandas as pd
 
 # Import der Backend-Komponenten
 from src.extractors.entity_extractor import EntityExtractor
 from src.utils.merger import EntityMerger
+from src.utils.merge_pipeline import MergePipeline
+from src.utils.snapshot import AnalysisSnapshot
+from src.utils.entity_store import EntityStore
+from src.utils.output_loader import load_output
+from src.utils.filter_index import CharacterFilterIndex
+from src.utils.name_index import NameTrigramIndex
+from src.utils.search_index import MentionSearchIndex
 from src.utils.exporter import JSONExporter
 from src.utils.sillytavern_exporter import SillyTavernExporter
 from src.models import Character, Item, Location
+from src.models.codec import dumps, encode_entity, encode_mapping, to_record
+
+# Download-Daten erst beim Klick erzeugen, wenn st.download_button Funktionen annimmt (ab Streamlit 1.52);
+# sonst würden geladene Ergebnisse bei jedem Neuaufbau samt aller Erwähnungen kodiert
+DEFERRED_DOWNLOADS = tuple(int(part) for part in re.findall(r"\d+", st.__version__)[:2]) >= (1, 52)
+
+# Kleinster Ähnlichkeitsschwellwert des Schiebereglers (bis hierhin wird ohne Neuberechnung neu gruppiert,
+# auch nach dem Öffnen eines Snapshots)
+MIN_SIMILARITY_THRESHOLD = AnalysisSnapshot.MIN_SCORE
 
 # Konfiguration
 st.set_page_config(
@@ -65,11 +85,48 @@ if 'locations' not in st.session_state:
     st.session_state.locations = {}
 if 'dialog_data' not in st.session_state:
     st.session_state.dialog_data = {}
+# Alle Gesprächszüge der Analyse (dialog_data enthält nur Stichproben pro Sprecher)
+if 'timeline' not in st.session_state:
+    st.session_state.timeline = None
 if 'selected_characters' not in st.session_state:
     st.session_state.selected_characters = set()
 if 'character_images' not in st.session_state:
     st.session_state.character_images = {}
 
+# Unzusammengeführte Entitäten und Ähnlichkeitsgraphen für das Neu-Gruppieren
+if 'raw_entities' not in st.session_state:
+    st.session_state.raw_entities = {}
+if 'similarity_graphs' not in st.session_state:
+    st.session_state.similarity_graphs = {}
+if 'merged_threshold' not in st.session_state:
+    st.session_state.merged_threshold = None
+if 'threshold_preview' not in st.session_state:
+    st.session_state.threshold_preview = {}
+if 'merge_report' not in st.session_state:
+    st.session_state.merge_report = {}
+if 'similarity_threshold' not in st.session_state:
+    st.session_state.similarity_threshold = 80
+if 'snapshot_data' not in st.session_state:
+    st.session_state.snapshot_data = None
+if 'snapshot_error' not in st.session_state:
+    st.session_state.snapshot_error = None
+if 'open_error' not in st.session_state:
+    st.session_state.open_error = None
+# Geöffnete Entitäts-Datenbank (bleibt offen, solange ihre Erwähnungen angezeigt werden)
+if 'entity_store' not in st.session_state:
+    st.session_state.entity_store = None
+# Volltextindex über Erwähnungen und Dialogzeilen (bei der ersten Suche aufgebaut)
+if 'search_index' not in st.session_state:
+    st.session_state.search_index = None
+# Trigramm-Index über Namen und Aliase (neu aufgebaut, wenn sich die Charaktere ändern)
+if 'name_index' not in st.session_state:
+    st.session_state.name_index = None
+# Stand der Analyse: zählt bei jeder neuen Charaktermenge hoch, der Filterindex gehört zu einem Stand
+if 'analysis_version' not in st.session_state:
+    st.session_state.analysis_version = 0
+if 'filter_index' not in st.session_state:
+    st.session_state.filter_index = None
+
 # Filter-States initialisieren
 if 'filter_search' not in st.session_state:
     st.session_state.filter_search = ""
@@ -85,13 +142,196 @@ if 'filter_sort_by' not in st.session_state:
     st.session_state.filter_sort_by = "Name"
 
 
-def analyze_stories(input_dir: Path, similarity_threshold: int = 80):
+def use_entity_store(store: Optional[EntityStore]):
+    """Schließt die bisher geöffnete Entitäts-Datenbank und merkt sich die neue (oder keine)"""
+    if st.session_state.entity_store is not None and st.session_state.entity_store is not store:
+        st.session_state.entity_store.close()
+    st.session_state.entity_store = store
+
+
+def store_analysis(extractor: EntityExtractor, merger: EntityMerger, similarity_threshold: int):
+    """Speichert rohe Entitäten und Ähnlichkeitsgraphen im Session State und führt zusammen"""
+    use_entity_store(None)
+    st.session_state.raw_entities = {
+        "characters": extractor.characters,
+        "items": extractor.items,
+        "locations": extractor.locations
+    }
+    # Graphen bis zum kleinsten Schwellwert, damit der Schieberegler ohne Neuberechnung auskommt
+    pipeline = MergePipeline(merger)
+    st.session_state.similarity_graphs = pipeline.build_graphs(
+        st.session_state.raw_entities, MIN_SIMILARITY_THRESHOLD)
+    st.session_state.merge_report = pipeline.report
+    # Anzahl Charaktere je Schwellwert für die Vorschau (ein Union-Find-Durchlauf)
+    st.session_state.threshold_preview = st.session_state.similarity_graphs["characters"].component_counts(
+        range(MIN_SIMILARITY_THRESHOLD, 101))
+    st.session_state.merger = merger
+    st.session_state.dialog_data = extractor.get_dialog_data()
+    st.session_state.timeline = extractor.timeline
+    st.session_state.snapshot_data = None
+    apply_similarity_threshold(similarity_threshold)
+    st.session_state.analyzed = True
+
+
+def load_analysis(snapshot_file):
+    """Öffnet einen gespeicherten Snapshot (Callback, läuft vor dem Neuaufbau der Seite)"""
+    try:
+        snapshot = AnalysisSnapshot.from_bytes(snapshot_file.getvalue())
+    except ValueError as e:
+        st.session_state.snapshot_error = str(e)
+        return
+    
+    use_entity_store(None)
+    st.session_state.characters = snapshot.merged.get("characters", {})
+    st.session_state.story_items = snapshot.merged.get("items", {})
+    st.session_state.locations = snapshot.merged.get("locations", {})
+    st.session_state.dialog_data = snapshot.dialog_data
+    st.session_state.timeline = snapshot.timeline
+    st.session_state.merge_report = snapshot.merge_report
+    st.session_state.merger = snapshot.create_merger()
+    
+    # Rohe Entitäten werden erst beim Neu-Gruppieren dekodiert
+    if snapshot.regroupable:
+        st.session_state.raw_entities = snapshot.raw_entities
+        st.session_state.similarity_graphs = snapshot.similarity_graphs
+        min_score = max(snapshot.similarity_graphs["characters"].min_score, MIN_SIMILARITY_THRESHOLD)
+        st.session_state.threshold_preview = snapshot.similarity_graphs["characters"].component_counts(
+            range(min_score, 101))
+    else:
+        st.session_state.raw_entities = {}
+        st.session_state.similarity_graphs = {}
+        st.session_state.threshold_preview = {}
+    
+    # Schieberegler auf den Schwellwert des Snapshots setzen, damit nicht sofort neu gruppiert wird
+    st.session_state.merged_threshold = snapshot.threshold
+    st.session_state.similarity_threshold = snapshot.threshold
+    st.session_state.selected_characters = set()
+    st.session_state.snapshot_data = None
+    st.session_state.snapshot_error = None
+    st.session_state.search_index = None
+    st.session_state.name_index = None
+    st.session_state.analysis_version += 1
+    st.session_state.analyzed = True
+
+
+def show_merged(merged: Dict[str, Dict], dialog_data: Dict, similarity_threshold: int,
+                store: Optional[EntityStore] = None):
+    """
+    Übernimmt zusammengeführte Entitäten ohne Ähnlichkeitsgraphen (es wird nicht neu gruppiert)
+    
+    ``store`` bleibt geöffnet, weil die Erwähnungen der Entitäten erst beim Anzeigen gelesen werden.
+    """
+    use_entity_store(store)
+    st.session_state.characters = merged.get("characters", {})
+    st.session_state.story_items = merged.get("items", {})
+    st.session_state.locations = merged.get("locations", {})
+    st.session_state.dialog_data = dialog_data
+    st.session_state.timeline = None
+    st.session_state.merge_report = {}
+    st.session_state.merger = EntityMerger(similarity_threshold)
+    
+    st.session_state.raw_entities = {}
+    st.session_state.similarity_graphs = {}
+    st.session_state.threshold_preview = {}
+    st.session_state.merged_threshold = similarity_threshold
+    st.session_state.similarity_threshold = max(similarity_threshold, MIN_SIMILARITY_THRESHOLD)
+    st.session_state.selected_characters = set()
+    st.session_state.snapshot_data = None
+    st.session_state.open_error = None
+    st.session_state.search_index = None
+    st.session_state.name_index = None
+    st.session_state.analysis_version += 1
+    st.session_state.analyzed = True
+
+
+def load_store(store_path: str):
+    """Öffnet eine Entitäts-Datenbank aus 'main.py --store' (Erwähnungen werden erst bei Bedarf gelesen)"""
+    path = Path(store_path)
+    if not path.is_file():
+        st.session_state.open_error = f"{path} nicht gefunden"
+        return
+    store = EntityStore(path)
+    try:
+        similarity_threshold = store.get_meta("similarity_threshold")
+        if similarity_threshold is None:
+            st.session_state.open_error = f"{path} enthält keine abgeschlossene Analyse"
+            return
+        
+        merged = {entity_type: store.load_entities(entity_type)
+                  for entity_type in ("characters", "items", "locations")}
+        show_merged(merged, store.get_meta("dialog_data", {}), similarity_threshold, store)
+    finally:
+        # Nur die angezeigte Datenbank bleibt offen (sonst sofort schließen)
+        if st.session_state.entity_store is not store:
+            store.close()
+
+
+def load_output_dir(output_dir: str):
+    """Öffnet die Ergebnisse eines früheren Laufs (nur Übersichten, Einzeldateien erst bei Bedarf)"""
+    try:
+        merged = load_output(Path(output_dir))
+    except (OSError, ValueError) as e:
+        st.session_state.open_error = str(e)
+        return
+    show_merged(merged, {}, st.session_state.similarity_threshold)
+
+
+def create_snapshot() -> bytes:
+    """Kodiert die aktuelle Analyse (inkl. manueller Änderungen) als Snapshot"""
+    snapshot = AnalysisSnapshot(
+        {"characters": st.session_state.characters,
+         "items": st.session_state.story_items,
+         "locations": st.session_state.locations},
+        st.session_state.raw_entities,
+        st.session_state.similarity_graphs,
+        st.session_state.dialog_data,
+        st.session_state.merged_threshold,
+        AnalysisSnapshot.merger_settings(st.session_state.merger),
+        st.session_state.merge_report,
+        st.session_state.timeline
+    )
+    return snapshot.to_bytes()
+
+
+def apply_similarity_threshold(similarity_threshold: int):
+    """Gruppiert die rohen Entitäten beim Schwellwert neu (ohne SpaCy und ohne neue Ähnlichkeiten)"""
+    merger = st.session_state.merger
+    raw = st.session_state.raw_entities
+    graphs = st.session_state.similarity_graphs
+    
+    st.session_state.characters = merger.merge_characters(
+        raw["characters"], graphs["characters"], similarity_threshold)
+    st.session_state.story_items = merger.merge_items(
+        raw["items"], graphs["items"], similarity_threshold)
+    st.session_state.locations = merger.merge_locations(
+        raw["locations"], graphs["locations"], similarity_threshold)
+    st.session_state.merged_threshold = similarity_threshold
+    
+    # Auswahl auf vorhandene Charaktere beschränken
+    st.session_state.selected_characters &= set(st.session_state.characters)
+    st.session_state.snapshot_data = None
+    st.session_state.search_index = None
+    st.session_state.name_index = None
+    st.session_state.analysis_version += 1
+
+
+def get_filter_index() -> CharacterFilterIndex:
+    """Filterindex der aktuellen Charaktere (neu aufgebaut, wenn er zu einem älteren Stand gehört)"""
+    index = st.session_state.filter_index
+    if index is None or index.version != st.session_state.analysis_version:
+        index = st.session_state.filter_index = CharacterFilterIndex(
+            st.session_state.characters, st.session_state.analysis_version)
+    return index
+
+
+def analyze_stories(input_dir: Path, similarity_threshold: int = 80, use_gazetteer: bool = False,
+                    use_phonetic: bool = False):
     """Analysiert die Story-Dateien und speichert Ergebnisse im Session State"""
     with st.spinner("Analysiere Geschichten..."):
         try:
             # Initialisiere Komponenten
             extractor = EntityExtractor()
-            merger = EntityMerger(similarity_threshold)
+            merger = EntityMerger(similarity_threshold, phonetic="koelner" if use_phonetic else None)
             
             # Finde alle unterstützten Dateien (inkl. JSON)
             chat_files = list(input_dir.glob("*.txt")) + list(input_dir.glob("*.md")) + list(input_dir.glob("*.json"))
@@ -100,6 +340,10 @@ def analyze_stories(input_dir: Path, similarity_threshold: int = 80):
                 st.error(f"Keine Chat-Dateien in {input_dir} gefunden!")
                 return False
             
+            # Erster Durchlauf: bekannte Namen sammeln
+            if use_gazetteer:
+                extractor.build_gazetteer(chat_files)
+            
             progress_bar = st.progress(0)
             status_text = st.empty()
             
@@ -111,16 +355,7 @@ def analyze_stories(input_dir: Path, similarity_threshold: int = 80):
             
             # Führe ähnliche Entitäten zusammen
             status_text.text("Führe ähnliche Elemente zusammen...")
-            merged_characters = merger.merge_characters(extractor.characters)
-            merged_items = merger.merge_items(extractor.items)
-            merged_locations = merger.merge_locations(extractor.locations)
-            
-            # Speichere im Session State
-            st.session_state.characters = merged_characters
-            st.session_state.story_items = merged_items
-            st.session_state.locations = merged_locations
-            st.session_state.dialog_data = extractor.get_dialog_data()
-            st.session_state.analyzed = True
+            store_analysis(extractor, merger, similarity_threshold)
             
             progress_bar.empty()
             status_text.empty()
@@ -132,7 +367,8 @@ def analyze_stories(input_dir: Path, similarity_threshold: int = 80):
             return False
 
 
-def process_uploaded_files(uploaded_files, similarity_threshold: int = 80):
+def process_uploaded_files(uploaded_files, similarity_threshold: int = 80, use_gazetteer: bool = False,
+                           use_phonetic: bool = False):
     """Verarbeitet hochgeladene Story-Dateien"""
     if not uploaded_files:
         return False
@@ -141,50 +377,45 @@ def process_uploaded_files(uploaded_files, similarity_threshold: int = 80):
         try:
             # Initialisiere Komponenten
             extractor = EntityExtractor()
-            merger = EntityMerger(similarity_threshold)
+            merger = EntityMerger(similarity_threshold, phonetic="koelner" if use_phonetic else None)
             
             progress_bar = st.progress(0)
             status_text = st.empty()
             
-            # Verarbeite jede hochgeladene Datei
-            for i, uploaded_file in enumerate(uploaded_files):
-                status_text.text(f"Analysiere: {uploaded_file.name}")
-                
-                # Zeige Dateityp an
-                if uploaded_file.name.lower().endswith('.json'):
-                    status_text.text(f"Analysiere JSON: {uploaded_file.name}")
-                else:
-                    status_text.text(f"Analysiere Text: {uploaded_file.name}")
-                
-                # Erstelle temporäre Datei
+            # Erstelle temporäre Dateien (der Zwei-Pass-Modus liest alle Dateien zweimal)
+            tmp_paths = []
+            for uploaded_file in uploaded_files:
                 with tempfile.NamedTemporaryFile(mode='w', suffix=uploaded_file.name, delete=False, encoding='utf-8') as tmp_file:
                     # Lese Inhalt und schreibe in temporäre Datei
                     content = uploaded_file.read().decode('utf-8')
                     tmp_file.write(content)
-                    tmp_path = tmp_file.name
+                    tmp_paths.append(Path(tmp_file.name))
+            
+            try:
+                # Erster Durchlauf: bekannte Namen sammeln
+                if use_gazetteer:
+                    extractor.build_gazetteer(tmp_paths)
                 
-                # Verarbeite die temporäre Datei
-                try:
+                # Verarbeite jede hochgeladene Datei
+                for i, (uploaded_file, tmp_path) in enumerate(zip(uploaded_files, tmp_paths)):
+                    # Zeige Dateityp an
+                    if uploaded_file.name.lower().endswith('.json'):
+                        status_text.text(f"Analysiere JSON: {uploaded_file.name}")
+                    else:
+                        status_text.text(f"Analysiere Text: {uploaded_file.name}")
+                    
                     # Extrahiere Entitäten
-                    extractor.extract_from_file(Path(tmp_path))
-                finally:
-                    # Lösche temporäre Datei
-                    Path(tmp_path).unlink(missing_ok=True)
-                
-                progress_bar.progress((i + 1) / len(uploaded_files))
+                    extractor.extract_from_file(tmp_path)
+                    
+                    progress_bar.progress((i + 1) / len(uploaded_files))
+            finally:
+                # Lösche temporäre Dateien
+                for tmp_path in tmp_paths:
+                    tmp_path.unlink(missing_ok=True)
             
             # Führe ähnliche Entitäten zusammen
             status_text.text("Führe ähnliche Elemente zusammen...")
-            merged_characters = merger.merge_characters(extractor.characters)
-            merged_items = merger.merge_items(extractor.items)
-            merged_locations = merger.merge_locations(extractor.locations)
-            
-            # Speichere im Session State
-            st.session_state.characters = merged_characters
-            st.session_state.story_items = merged_items
-            st.session_state.locations = merged_locations
-            st.session_state.dialog_data = extractor.get_dialog_data()
-            st.session_state.analyzed = True
+            store_analysis(extractor, merger, similarity_threshold)
             
             progress_bar.empty()
             status_text.empty()
@@ -420,6 +651,7 @@ def apply_batch_changes(add_behaviors=None, remove_behaviors=None,
                        target_character=None, relationship_type=None, 
                        bidirectional=False):
     """Wendet Batch-Änderungen auf ausgewählte Charaktere an"""
+    filter_index = get_filter_index()
     
     for char_name in st.session_state.selected_characters:
         if char_name not in st.session_state.characters:
@@ -451,6 +683,10 @@ def apply_batch_changes(add_behaviors=None, remove_behaviors=None,
             character.name = new_name
             st.session_state.characters[new_name] = character
             del st.session_state.characters[char_name]
+            st.session_state.name_index = None
+            # Treffer der Volltextsuche nennen den Charakter beim Namen
+            st.session_state.search_index = None
+            filter_index.rename(char_name, new_name, character)
             # Update selected characters
             st.session_state.selected_characters.discard(char_name)
             st.session_state.selected_characters.add(new_name)
@@ -467,6 +703,9 @@ def apply_batch_changes(add_behaviors=None, remove_behaviors=None,
                 if not hasattr(target_char, 'relationships'):
                     target_char.relationships = {}
                 target_char.relationships[character.name] = relationship_type
+                filter_index.update(target_character, target_char)
+        
+        filter_index.update(character.name, character)
 
 
 def display_characters_tab():
@@ -477,45 +716,49 @@ def display_characters_tab():
         st.info("Keine Charaktere gefunden. Bitte analysiere zuerst Story-Dateien.")
         return
     
-    # Filter-Optionen
+    # Vorschau: Anzahl Charaktere je Ähnlichkeitsschwellwert
+    if st.session_state.threshold_preview:
+        with st.expander("📈 Vorschau: Charaktere je Ähnlichkeitsschwellwert", expanded=False):
+            preview = st.session_state.threshold_preview
+            st.line_chart(pd.DataFrame({"Charaktere": list(preview.values())}, index=list(preview.keys())))
+            st.caption(f"Aktuell {len(st.session_state.characters)} Charaktere bei Schwellwert "
+                       f"{st.session_state.merged_threshold}. Gruppen mit gleichem Hauptnamen werden "
+                       f"zusätzlich vereinigt, die Anzahl kann daher etwas kleiner ausfallen.")
+    
+    # Filter-Optionen (aus dem Filterindex statt aus allen Charakteren)
+    filter_index = get_filter_index()
     with st.expander("🔍 Erweiterte Filter", expanded=False):
         col1, col2, col3, col4 = st.columns([2, 2, 2, 1])
         
         with col1:
-            search_term = st.text_input("🔍 Suche nach Name", "")
+            search_term = st.text_input("🔍 Suche nach Name", "",
+                                        help="Durchsucht Namen und Aliase; Tippfehler werden toleriert")
             
             # Filter nach Häufigkeit
-            all_frequencies = [char.frequency for char in st.session_state.characters.values()]
-            if all_frequencies:
+            frequency_range = filter_index.frequency_range()
+            if frequency_range:
                 min_freq, max_freq = st.slider(
                     "📊 Erwähnungen (Min-Max)",
-                    min_value=min(all_frequencies),
-                    max_value=max(all_frequencies),
-                    value=(min(all_frequencies), max(all_frequencies))
+                    min_value=frequency_range[0],
+                    max_value=frequency_range[1],
+                    value=frequency_range
                 )
             else:
                 min_freq, max_freq = 0, 100
         
         with col2:
             # Filter nach Gegenständen
-            all_items = set()
-            for char in st.session_state.characters.values():
-                all_items.update(char.items)
-            
             filter_items = st.multiselect(
                 "🗡️ Nach Gegenständen filtern",
-                options=sorted(list(all_items))
+                options=filter_index.item_options()
             )
             
             # Filter nach Verhaltensweisen
-            all_behaviors = set()
-            for char in st.session_state.characters.values():
-                all_behaviors.update(char.behaviors)
-            
+            all_behaviors = filter_index.behavior_options()
             if all_behaviors:
                 filter_behaviors = st.multiselect(
                     "🎭 Nach Verhalten filtern",
-                    options=sorted(list(all_behaviors))
+                    options=all_behaviors
                 )
             else:
                 filter_behaviors = []
@@ -531,40 +774,24 @@ def display_characters_tab():
             # Sortierung
             sort_by = st.selectbox(
                 "📑 Sortieren nach",
-                ["Name", "Häufigkeit", "Anzahl Items", "Anzahl Beziehungen"]
+                ["Relevanz", "Name", "Häufigkeit", "Anzahl Items", "Anzahl Beziehungen"],
+                help="Relevanz: beste Treffer der Namenssuche zuerst (ohne Suche nach Name)"
             )
     
-    # Gefilterte Charaktere
-    filtered_chars = {}
-    for name, char in st.session_state.characters.items():
-        # Name-Filter
-        if search_term and search_term.lower() not in name.lower():
-            continue
-        
-        # Häufigkeits-Filter
-        if not (min_freq <= char.frequency <= max_freq):
-            continue
-        
-        # Item-Filter
-        if filter_items and not any(item in char.items for item in filter_items):
-            continue
-        
-        # Verhaltens-Filter
-        if filter_behaviors and not any(behavior in char.behaviors for behavior in filter_behaviors):
-            continue
-        
-        # Beziehungs-Filter
-        if has_relationships and (not hasattr(char, 'relationships') or not char.relationships):
-            continue
-        
-        # Beschreibungs-Filter
-        if has_description and not char.description:
-            continue
-        
-        filtered_chars[name] = char
+    # Namenssuche über den Trigramm-Index (Name -> Bewertung)
+    if st.session_state.name_index is None:
+        st.session_state.name_index = NameTrigramIndex.build(st.session_state.characters)
+    relevance = dict(st.session_state.name_index.search(search_term)) if search_term.strip() else None
+    
+    # Gefilterte Charaktere (Und-Verknüpfung der Filter im Index)
+    filtered_ids = filter_index.select(min_freq, max_freq, filter_items, filter_behaviors,
+                                       has_relationships, has_description, relevance)
+    filtered_chars = {name: st.session_state.characters[name] for name in filter_index.names(filtered_ids)}
     
     # Sortierung anwenden
-    if sort_by == "Name":
+    if sort_by == "Relevanz" and relevance is not None:
+        sorted_chars = sorted(filtered_chars.items(), key=lambda x: relevance[x[0]], reverse=True)
+    elif sort_by in ("Relevanz", "Name"):
         sorted_chars = sorted(filtered_chars.items())
     elif sort_by == "Häufigkeit":
         sorted_chars = sorted(filtered_chars.items(), key=lambda x: x[1].frequency, reverse=True)
@@ -607,27 +834,21 @@ def display_characters_tab():
             )
             
             if smart_option == "Top N nach Häufigkeit":
-                top_n = st.number_input("Anzahl:", min_value=1, max_value=len(filtered_chars), value=5)
+                max_top_n = max(len(filtered_chars), 1)
+                top_n = st.number_input("Anzahl:", min_value=1, max_value=max_top_n, value=min(5, max_top_n))
                 if st.button("Auswählen", key="smart_top_n"):
-                    sorted_by_freq = sorted(filtered_chars.items(), 
-                                          key=lambda x: x[1].frequency, reverse=True)
                     st.session_state.selected_characters = set(
-                        name for name, _ in sorted_by_freq[:top_n]
-                    )
+                        filter_index.top_by_frequency(filtered_ids, top_n))
                     st.rerun()
             
             elif smart_option == "Mit bestimmtem Item":
-                all_items = set()
-                for char in filtered_chars.values():
-                    all_items.update(char.items)
+                all_items = filter_index.items_of(filtered_ids)
                 
                 if all_items:
-                    selected_item = st.selectbox("Item:", sorted(list(all_items)))
+                    selected_item = st.selectbox("Item:", all_items)
                     if st.button("Auswählen", key="smart_item"):
                         st.session_state.selected_characters = set(
-                            name for name, char in filtered_chars.items() 
-                            if selected_item in char.items
-                        )
+                            filter_index.with_item(filtered_ids, selected_item))
                         st.rerun()
                 else:
                     st.info("Keine Items gefunden")
@@ -635,9 +856,7 @@ def display_characters_tab():
             else:  # Ohne Beziehungen
                 if st.button("Auswählen", key="smart_no_rel"):
                     st.session_state.selected_characters = set(
-                        name for name, char in filtered_chars.items() 
-                        if not hasattr(char, 'relationships') or not char.relationships
-                    )
+                        filter_index.without_relationships(filtered_ids))
                     st.rerun()
     
     # Status-Anzeige
@@ -667,14 +886,14 @@ def display_characters_tab():
         
         with col1:
             # Alle Charaktere als JSON
-            all_chars_data = {name: char.to_dict() for name, char in st.session_state.characters.items()}
-            create_json_download(all_chars_data, "alle_charaktere.json")
+            create_json_download(partial(encode_mapping, st.session_state.characters, indent=True),
+                                 "alle_charaktere.json")
         
         with col2:
             # Gefilterte Charaktere als JSON
             if filtered_chars:
-                filtered_data = {name: char.to_dict() for name, char in filtered_chars.items()}
-                create_json_download(filtered_data, "gefilterte_charaktere.json")
+                create_json_download(partial(encode_mapping, filtered_chars, indent=True),
+                                     "gefilterte_charaktere.json")
         
         with col3:
             # Kompletter Export als ZIP
@@ -700,16 +919,16 @@ def display_characters_tab():
             
             with col_batch1:
                 # Nur ausgewählte als JSON
-                selected_chars_data = {
-                    name: char.to_dict() 
+                selected_chars = {
+                    name: char
                     for name, char in st.session_state.characters.items() 
                     if name in st.session_state.selected_characters
                 }
                 
-                if selected_chars_data:
+                if selected_chars:
                     create_json_download(
-                        selected_chars_data, 
-                        f"ausgewaehlte_charaktere_{len(selected_chars_data)}.json"
+                        partial(encode_mapping, selected_chars, indent=True),
+                        f"ausgewaehlte_charaktere_{len(selected_chars)}.json"
                     )
             
             with col_batch2:
@@ -721,7 +940,7 @@ def display_characters_tab():
                         for char_name in st.session_state.selected_characters:
                             if char_name in st.session_state.characters:
                                 char = st.session_state.characters[char_name]
-                                json_data = json.dumps(char.to_dict(), indent=2, ensure_ascii=False)
+                                json_data = encode_entity(char, indent=True)
                                 safe_name = char_name.replace(' ', '_').lower()
                                 zf.writestr(f"selected_characters/{safe_name}.json", json_data)
                         
@@ -802,8 +1021,8 @@ def display_locations_tab():
         st.markdown("---")
         col1, col2 = st.columns(2)
         with col1:
-            locations_data = {name: loc.to_dict() for name, loc in st.session_state.locations.items()}
-            create_json_download(locations_data, "alle_orte.json")
+            create_json_download(partial(encode_mapping, st.session_state.locations, indent=True),
+                                 "alle_orte.json")
 
 
 def display_items_tab():
@@ -845,8 +1064,65 @@ def display_items_tab():
         st.markdown("---")
         col1, col2 = st.columns(2)
         with col1:
-            items_data = {name: item.to_dict() for name, item in st.session_state.story_items.items()}
-            create_json_download(items_data, "alle_gegenstaende.json")
+            create_json_download(partial(encode_mapping, st.session_state.story_items, indent=True),
+                                 "alle_gegenstaende.json")
+
+
+def display_search_tab():
+    """Zeigt die Volltextsuche über Erwähnungen und Dialogzeilen an"""
+    st.header("🔎 Volltextsuche")
+    
+    # Index einmal pro Analyse aufbauen (nach dem Neu-Gruppieren erneut)
+    if st.session_state.search_index is None:
+        with st.spinner("Erstelle Suchindex..."):
+            st.session_state.search_index = MentionSearchIndex.build(
+                {"characters": st.session_state.characters,
+                 "items": st.session_state.story_items,
+                 "locations": st.session_state.locations},
+                st.session_state.dialog_data,
+                st.session_state.timeline)
+    index = st.session_state.search_index
+    
+    col1, col2 = st.columns([2, 1])
+    with col1:
+        query = st.text_input(
+            "Suchbegriffe",
+            key="fulltext_query",
+            placeholder="z.B. Dämmerlicht",
+            help="Findet Zeilen, die alle Wörter enthalten; Wortanfänge ab drei Zeichen genügen"
+        )
+    type_labels = {"characters": "Charaktere", "items": "Gegenstände", "locations": "Orte",
+                   MentionSearchIndex.DIALOG: "Dialog"}
+    with col2:
+        selected_types = st.multiselect(
+            "Bereiche",
+            options=list(type_labels),
+            default=list(type_labels),
+            format_func=type_labels.get,
+            key="fulltext_types"
+        )
+    
+    if not query:
+        st.caption(f"{len(index)} Zeilen im Index")
+        return
+    
+    limit = 500
+    started = time.perf_counter()
+    hits = index.search(query, limit=limit, entity_types=selected_types)
+    elapsed = (time.perf_counter() - started) * 1000
+    st.caption(f"{len(hits)}{'+' if len(hits) == limit else ''} Treffer in {elapsed:.1f} ms")
+    
+    if hits:
+        st.dataframe([
+            {
+                "Bereich": type_labels.get(hit.entity_type, hit.entity_type),
+                "Element": hit.entity,
+                "Datei": Path(hit.source_file).name,
+                "Zeile": hit.line_number,
+                "Text": hit.text
+            }
+            for hit in hits
+        ], use_container_width=True)
 
 
 def display_export_tab():
@@ -958,12 +1234,17 @@ def display_export_tab():
         )
 
 
-def create_json_download(data: Dict, filename: str):
-    """Erstellt einen Download-Button für JSON-Daten"""
-    json_str = json.dumps(data, indent=2, ensure_ascii=False)
+def create_json_download(data, filename: str):
+    """Erstellt einen Download-Button für JSON-Daten (Dictionary, kodierte Bytes oder Funktion, die sie liefert)"""
+    if callable(data):
+        json_data = data if DEFERRED_DOWNLOADS else data()
+    elif isinstance(data, bytes):
+        json_data = data
+    else:
+        json_data = json.dumps(data, indent=2, ensure_ascii=False)
     st.download_button(
         label=f"📥 {filename} herunterladen",
-        data=json_str,
+        data=json_data,
         file_name=filename,
         mime="application/json",
         use_container_width=True
@@ -977,21 +1258,15 @@ def create_zip_download(characters: Dict, items: Dict, locations: Dict):
     with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zf:
         # Charaktere
         for name, char in characters.items():
-            json_data = json.dumps(char.to_dict() if hasattr(char, 'to_dict') else char, 
-                                   indent=2, ensure_ascii=False)
-            zf.writestr(f"characters/{name.replace(' ', '_').lower()}.json", json_data)
+            zf.writestr(f"characters/{name.replace(' ', '_').lower()}.json", encode_entity(char, indent=True))
         
         # Gegenstände
         for name, item in items.items():
-            json_data = json.dumps(item.to_dict() if hasattr(item, 'to_dict') else item, 
-                                   indent=2, ensure_ascii=False)
-            zf.writestr(f"items/{name.replace(' ', '_').lower()}.json", json_data)
+            zf.writestr(f"items/{name.replace(' ', '_').lower()}.json", encode_entity(item, indent=True))
         
         # Orte
         for name, location in locations.items():
-            json_data = json.dumps(location.to_dict() if hasattr(location, 'to_dict') else location, 
-                                   indent=2, ensure_ascii=False)
-            zf.writestr(f"locations/{name.replace(' ', '_').lower()}.json", json_data)
+            zf.writestr(f"locations/{name.replace(' ', '_').lower()}.json", encode_entity(location, indent=True))
         
         # Übersichtsdateien
         overview = {
@@ -1001,14 +1276,11 @@ def create_zip_download(characters: Dict, items: Dict, locations: Dict):
                 "items": len(items),
                 "locations": len(locations)
             },
-            "characters": {name: char.to_dict() if hasattr(char, 'to_dict') else char 
-                          for name, char in characters.items()},
-            "items": {name: item.to_dict() if hasattr(item, 'to_dict') else item 
-                     for name, item in items.items()},
-            "locations": {name: loc.to_dict() if hasattr(loc, 'to_dict') else loc 
-                         for name, loc in locations.items()}
+            "characters": {name: to_record(char) for name, char in characters.items()},
+            "items": {name: to_record(item) for name, item in items.items()},
+            "locations": {name: to_record(loc) for name, loc in locations.items()}
         }
-        zf.writestr("complete_overview.json", json.dumps(overview, indent=2, ensure_ascii=False))
+        zf.writestr("complete_overview.json", dumps(overview, indent=True))
     
     zip_buffer.seek(0)
     return zip_buffer.getvalue()
@@ -1120,7 +1392,7 @@ def main():
         st.header("⚙️ Einstellungen")
         
         # Tabs für verschiedene Input-Methoden
-        input_tab1, input_tab2 = st.tabs(["📁 Verzeichnis", "📤 Upload"])
+        input_tab1, input_tab2, input_tab3 = st.tabs(["📁 Verzeichnis", "📤 Upload", "💾 Snapshot"])
         
         with input_tab1:
             # Verbesserte Input-Sektion
@@ -1213,16 +1485,73 @@ def main():
             grammatikalischer Variationen und doppelter Entitäten erheblich.
             """)
         
+        with input_tab3:
+            # Gespeicherte Analyse öffnen (ohne erneute Analyse)
+            st.subheader("💾 Gespeicherte Analyse")
+            
+            snapshot_file = st.file_uploader(
+                "Snapshot auswählen",
+                type=['swsnap'],
+                help="Mit 'python main.py ... --snapshot' oder über 'Analyse speichern' erstellt"
+            )
+            
+            if snapshot_file:
+                st.button("📂 Analyse öffnen", type="primary", use_container_width=True,
+                          key="open_snapshot", on_click=load_analysis, args=(snapshot_file,))
+            if st.session_state.snapshot_error:
+                st.error(f"❌ Snapshot konnte nicht geöffnet werden: {st.session_state.snapshot_error}")
+            
+            # Datenbank aus 'main.py --store' (sehr große Korpora)
+            store_path = st.text_input(
+                "Datenbank (--store)",
+                value="output/entities.sqlite",
+                help="Mit 'python main.py ... --store' erstellt; Erwähnungen werden erst beim Anzeigen gelesen"
+            )
+            st.button("🗄️ Datenbank öffnen", use_container_width=True,
+                      key="open_store", on_click=load_store, args=(store_path,))
+            
+            # Ergebnisse eines früheren Laufs von main.py
+            output_dir = st.text_input(
+                "Ausgabeverzeichnis",
+                value="output",
+                help="Lädt nur die Übersichtsdateien; die JSON-Datei eines Elements wird erst gelesen, "
+                     "wenn seine Erwähnungen gebraucht werden"
+            )
+            st.button("📂 Ergebnisse öffnen", use_container_width=True,
+                      key="open_output", on_click=load_output_dir, args=(output_dir,))
+            if st.session_state.open_error:
+                st.error(f"❌ Konnte nicht geöffnet werden: {st.session_state.open_error}")
+        
         # Gemeinsame Einstellungen
         st.markdown("---")
         
         # Ähnlichkeitsschwellwert
         similarity_threshold = st.slider(
             "Ähnlichkeitsschwellwert",
-            min_value=50,
+            min_value=MIN_SIMILARITY_THRESHOLD,
             max_value=100,
-            value=80,
-            help="Niedrigere Werte führen zu mehr Zusammenführungen"
+            key="similarity_threshold",
+            help="Niedrigere Werte führen zu mehr Zusammenführungen. "
+                 "Nach einer Analyse wird sofort neu gruppiert (manuelle Änderungen gehen dabei verloren)"
+        )
+        
+        # Neu gruppieren, ohne die Geschichten erneut zu analysieren
+        if (st.session_state.analyzed and st.session_state.similarity_graphs
+                and similarity_threshold != st.session_state.merged_threshold):
+            apply_similarity_threshold(similarity_threshold)
+        
+        # Zwei-Pass-Modus
+        use_gazetteer = st.checkbox(
+            "Namensverzeichnis verwenden",
+            value=False,
+            help="Bekannte Sprecher werden ohne NER gezählt – schneller bei langen Geschichten"
+        )
+        
+        # Phonetischer Index für Charakternamen
+        use_phonetic = st.checkbox(
+            "Gleich klingende Namen zusammenführen",
+            value=False,
+            help="Charaktere mit gleicher Kölner Phonetik (z.B. Mayer/Meier) werden zusammengeführt"
         )
         
         # Analyse-Button (kontextabhängig)
@@ -1232,7 +1561,7 @@ def main():
         # Button für Verzeichnis-Analyse (nur wenn Verzeichnis ausgewählt)
         if input_dir:
             if st.button("🔍 Verzeichnis analysieren", type="primary", use_container_width=True, key="analyze_dir"):
-                if analyze_stories(Path(input_dir), similarity_threshold):
+                if analyze_stories(Path(input_dir), similarity_threshold, use_gazetteer, use_phonetic):
                     st.success("✅ Analyse erfolgreich!")
                     st.balloons()
                 else:
@@ -1241,7 +1570,7 @@ def main():
         # Button für Upload-Analyse (nur wenn Dateien hochgeladen)
         if uploaded_files:
             if st.button("🚀 Uploads analysieren", type="primary", use_container_width=True, key="analyze_upload"):
-                if process_uploaded_files(uploaded_files, similarity_threshold):
+                if process_uploaded_files(uploaded_files, similarity_threshold, use_gazetteer, use_phonetic):
                     st.success("✅ Analyse erfolgreich!")
                     st.balloons()
                 else:
@@ -1257,6 +1586,30 @@ def main():
             st.metric("Charaktere", len(st.session_state.characters))
             st.metric("Orte", len(st.session_state.locations))
             st.metric("Gegenstände", len(st.session_state.story_items))
+            
+            if st.session_state.merge_report:
+                with st.expander("⏱️ Ähnlichkeitsberechnung"):
+                    st.dataframe(pd.DataFrame([
+                        {"Typ": entity_type, "Namen": report["names"],
+                         "Vergleiche": report["comparisons"], "Blöcke": report["blocks"],
+                         "Zeit (s)": round(report["graph_seconds"], 2)}
+                        for entity_type, report in st.session_state.merge_report.items()
+                    ]), hide_index=True)
+            
+            # Analyse als Snapshot speichern (wird erst auf Anforderung kodiert)
+            if st.button("💾 Analyse speichern", use_container_width=True, key="save_snapshot"):
+                st.session_state.snapshot_data = create_snapshot()
+            if st.session_state.snapshot_data:
+                st.download_button(
+                    label="📥 Snapshot herunterladen",
+                    data=st.session_state.snapshot_data,
+                    file_name=f"storyweaver_{datetime.now().strftime('%Y%m%d_%H%M%S')}.swsnap",
+                    mime="application/octet-stream",
+                    use_container_width=True
+                )
+            if st.session_state.merged_threshold is not None and not st.session_state.similarity_graphs:
+                st.caption("Dieser Snapshot enthält keine Ähnlichkeitsgraphen aller Typen; "
+                           "der Schieberegler gruppiert nicht neu.")
         else:
             st.info("Bitte analysiere zuerst Story-Dateien")
         
@@ -1275,7 +1628,8 @@ def main():
     
     # Hauptbereich mit Tabs
     if st.session_state.analyzed:
-        tab1, tab2, tab3, tab4 = st.tabs(["📚 Charaktere", "🗺️ Orte", "⚔️ Gegenstände", "📤 Export"])
+        tab1, tab2, tab3, tab4, tab5 = st.tabs(["📚 Charaktere", "🗺️ Orte", "⚔️ Gegenstände",
+                                                "🔎 Suche", "📤 Export"])
         
         with tab1:
             display_characters_tab()
@@ -1287,6 +1641,9 @@ def main():
             display_items_tab()
         
         with tab4:
+            display_search_tab()
+        
+        with tab5:
             display_export_tab()
     else:
         # Willkommensbildschirm
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Codec der Story-Modelle vs. to_dict/from_dict mit json
+
+Erzeugt Charaktere, Gegenstände und Orte (Standard: je 20k mit 5
+Erwähnungen) und misst
+- Kodieren: to_dict + json.dumps(indent=2) pro Element (bisheriger Export)
+  gegen codec.encode_entities in einem Aufruf (mit und ohne Einrückung),
+- Dekodieren: json.loads + from_dict gegen codec.decode_entities, einmal
+  vollständig und einmal ohne Erwähnungen.
+Der Codec nutzt orjson, falls installiert, sonst die Standardbibliothek.
+
+Aufruf:
+    python benchmarks/bench_codec.py [--entities N] [--mentions N]
+"""
+import argparse
+import gc
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.models import Character, Item, Location, begin_run, codec
+
+
+def build_entities(count: int, mentions: int):
+    """Elemente aller drei Modelle mit Erwähnungen und typischen Attributen"""
+    entities = []
+    for number in range(count):
+        character = Character(name=f"Figur {number}", description="Eine Figur")
+        character.add_alias(f"F{number}")
+        character.add_behavior("neugierig")
+        character.add_item("Dolch")
+        item = Item(name=f"Dolch {number}", item_type="Waffe")
+        item.add_owner(character.name)
+        location = Location(name=f"Turm {number}", location_type="Turm")
+        location.add_inhabitant(character.name)
+        for element in (character, item, location):
+            for line in range(mentions):
+                element.add_mention("Eine Zeile mit einer Erwähnung.", "kapitel.txt", line)
+            entities.append(element)
+    return entities
+
+
+def timed(function, *args):
+    """Laufzeit eines Aufrufs ohne Garbage Collection (wie timeit) und sein Ergebnis"""
+    gc.collect()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        result = function(*args)
+        return time.perf_counter() - start, result
+    finally:
+        gc.enable()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--entities", type=int, default=20000, help="Elemente pro Modell")
+    parser.add_argument("--mentions", type=int, default=5, help="Erwähnungen pro Element")
+    args = parser.parse_args()
+
+    begin_run()
+    entities = build_entities(args.entities, args.mentions)
+    models = {"character": Character, "item": Item, "location": Location}
+    backend = "orjson" if codec.ORJSON_AVAILABLE else "json"
+    print(f"{len(entities):,} Elemente x {args.mentions} Erwähnungen, Codec mit {backend}")
+
+    seconds, _ = timed(lambda: [json.dumps(entity.to_dict(), ensure_ascii=False, indent=2)
+                                for entity in entities])
+    print(f"  Kodieren  to_dict + json.dumps    {seconds * 1000:8.1f} ms")
+    seconds, _ = timed(codec.encode_entities, entities, True)
+    print(f"  Kodieren  Codec (eingerückt)      {seconds * 1000:8.1f} ms")
+    seconds, data = timed(codec.encode_entities, entities)
+    print(f"  Kodieren  Codec (kompakt)         {seconds * 1000:8.1f} ms   {len(data) / 2 ** 20:.1f} MiB")
+
+    text = data.decode('utf-8')
+    seconds, _ = timed(lambda: [models[record["type"]].from_dict(record) for record in json.loads(text)])
+    print(f"  Dekodieren json.loads + from_dict {seconds * 1000:8.1f} ms")
+    seconds, _ = timed(codec.decode_entities, data)
+    print(f"  Dekodieren Codec                  {seconds * 1000:8.1f} ms")
+    seconds, _ = timed(codec.decode_entities, data, None, ["mentions"])
+    print(f"  Dekodieren Codec ohne Erwähnungen {seconds * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Speicherbedarf der Extraktion mit und ohne SQLite-Entitätsspeicher
+
+Legt viele Charaktere mit Erwähnungen an (Standard: 20k mit je 50), wie
+bei der Extraktion, und exportiert sie anschließend einzeln (to_record).
+Verglichen werden Laufzeit und Spitzenspeicher (tracemalloc)
+- mit Erwähnungen im Speicher (Standard) und
+- mit Erwähnungen im EntityStore (main.py --store).
+
+Aufruf:
+    python benchmarks/bench_entity_store.py [--entities N] [--mentions N] [--text-length N]
+"""
+import argparse
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.models import Character, begin_run
+from src.models.codec import to_record
+from src.utils.entity_store import EntityStore
+
+
+def run(store, entities: int, mentions: int, text: str):
+    """Extraktion und Export; gibt die Laufzeiten beider Phasen zurück"""
+    started = time.perf_counter()
+    characters = {}
+    for number in range(entities):
+        name = f"Figur {number}"
+        character = Character(name=name)
+        if store is not None:
+            character.mentions = store.mention_list("characters", name)
+        characters[name] = character
+    for line in range(mentions):
+        for character in characters.values():
+            character.add_mention(f"{text} {line}", f"kapitel{line % 20}.txt", line)
+    if store is not None:
+        store.save_entities(EntityStore.RAW, "characters", characters)
+    extracted = time.perf_counter()
+
+    for character in characters.values():
+        to_record(character)
+    return extracted - started, time.perf_counter() - extracted
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--entities", type=int, default=20000)
+    parser.add_argument("--mentions", type=int, default=50, help="Erwähnungen pro Charakter")
+    parser.add_argument("--text-length", type=int, default=120, help="Zeichen pro Erwähnung")
+    args = parser.parse_args()
+
+    begin_run()
+    text = "x" * args.text_length
+    print(f"{args.entities:,} Charaktere x {args.mentions} Erwähnungen à {args.text_length} Zeichen")
+
+    with tempfile.TemporaryDirectory() as directory:
+        for label in ("Speicher", "SQLite"):
+            store = EntityStore(Path(directory) / "entities.sqlite", reset=True) if label == "SQLite" else None
+            tracemalloc.start()
+            extract_time, export_time = run(store, args.entities, args.mentions, text)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            if store is not None:
+                store.close()
+            print(f"  {label:<9} Extraktion {extract_time:6.2f} s   Export {export_time:6.2f} s   "
+                  f"Spitze {peak / 2 ** 20:8.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
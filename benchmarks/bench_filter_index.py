@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Filter im Charaktere-Tab (CharacterFilterIndex)
+
+Erzeugt viele Charaktere mit Gegenständen, Verhalten und Beziehungen
+(Standard: 50k) und misst die Arbeit eines Neuaufbaus der Seite
+- bisher: Auswahllisten und Häufigkeiten aus allen Charakteren sammeln,
+  dann jeden Charakter durch die Filter prüfen, und
+- mit dem Filterindex (Auswahllisten zwischengespeichert, Filter als Bitmaps).
+
+Aufruf:
+    python benchmarks/bench_filter_index.py [--characters N] [--reruns N]
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.models import Character
+from src.utils.filter_index import CharacterFilterIndex
+
+
+def rerun_loop(characters, filters):
+    """Bisheriger Ablauf in display_characters_tab"""
+    frequencies = [character.frequency for character in characters.values()]
+    min_frequency, max_frequency = filters["frequency"] or (min(frequencies), max(frequencies))
+    all_items = set()
+    for character in characters.values():
+        all_items.update(character.items)
+    all_behaviors = set()
+    for character in characters.values():
+        all_behaviors.update(character.behaviors)
+    sorted(all_items), sorted(all_behaviors)
+    return [name for name, character in characters.items()
+            if min_frequency <= character.frequency <= max_frequency
+            and (not filters["items"] or any(item in character.items for item in filters["items"]))
+            and (not filters["behaviors"] or any(b in character.behaviors for b in filters["behaviors"]))
+            and (not filters["relationships"] or character.relationships)]
+
+
+def rerun_index(index, filters):
+    """Ablauf mit dem Filterindex"""
+    min_frequency, max_frequency = filters["frequency"] or index.frequency_range()
+    index.item_options(), index.behavior_options()
+    return index.names(index.select(min_frequency, max_frequency, filters["items"], filters["behaviors"],
+                                    filters["relationships"]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--characters", type=int, default=50000)
+    parser.add_argument("--reruns", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    items = [f"Gegenstand {number}" for number in range(500)]
+    behaviors = [f"Verhalten {number}" for number in range(200)]
+    characters = {}
+    for number in range(args.characters):
+        character = Character(name=f"Figur {number}")
+        character.frequency = int(rng.paretovariate(1.2))
+        for item in rng.sample(items, rng.randint(0, 3)):
+            character.add_item(item)
+        for behavior in rng.sample(behaviors, rng.randint(0, 3)):
+            character.add_behavior(behavior)
+        if rng.random() < 0.2:
+            character.add_relationship("Figur 0", "Freund")
+        characters[character.name] = character
+    reruns = [{"frequency": rng.choice([None, (2, 10)]), "items": rng.sample(items, rng.randint(0, 2)),
+               "behaviors": rng.sample(behaviors, rng.randint(0, 1)), "relationships": rng.random() < 0.3}
+              for _ in range(args.reruns)]
+    print(f"{args.characters:,} Charaktere, {args.reruns} Neuaufbauten")
+
+    started = time.perf_counter()
+    index = CharacterFilterIndex(characters)
+    print(f"  Aufbau des Index  {time.perf_counter() - started:8.3f} s")
+
+    for label, rerun in [("Schleife", lambda filters: rerun_loop(characters, filters)),
+                         ("Filterindex", lambda filters: rerun_index(index, filters))]:
+        started = time.perf_counter()
+        for filters in reruns:
+            rerun(filters)
+        elapsed = (time.perf_counter() - started) / len(reruns)
+        print(f"  {label:<16} {elapsed * 1000:8.2f} ms pro Neuaufbau")
+
+    started = time.perf_counter()
+    for name in rng.sample(sorted(characters), 1000):
+        characters[name].add_behavior("geändert")
+        index.update(name, characters[name])
+    print(f"  1000 Änderungen   {(time.perf_counter() - started) * 1000:8.2f} ms (update)")
+
+
+if __name__ == "__main__":
+    main()
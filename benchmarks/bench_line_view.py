@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Mikro-Benchmark: normalisierte Zeilensicht vs. Normalisierung pro Stufe
+
+Vergleicht die Schlüsselwort-Stufen des Extractors mit einer gemeinsamen
+LineView gegen die bisherige Variante, in der jede Stufe die Zeile selbst
+kleinschreibt und ihre Regex-Muster pro Treffer neu formatiert.
+
+Aufruf:
+    python benchmarks/bench_line_view.py [Wiederholungen]
+"""
+import re
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.extractors.entity_extractor import EntityExtractor
+from src.parsers.chat_parser import ChatParser
+
+
+def legacy_keyword_stages(extractor: EntityExtractor, line, source_file: str):
+    """Referenz: bisherige Implementierung der beiden Schlüsselwort-Stufen"""
+    for keywords in (extractor.item_keywords, extractor.location_keywords):
+        text_lower = line.content.lower()
+        for category, words in keywords.items():
+            for keyword in words:
+                if keyword in text_lower:
+                    patterns = [
+                        rf'\b(\w+\s+{keyword})\b',
+                        rf'\b({keyword}\s+\w+)\b',
+                        rf'\b({keyword})\b'
+                    ]
+                    for pattern in patterns:
+                        for match in re.finditer(pattern, text_lower):
+                            name = match.group(1).strip()
+                            if name and extractor._is_valid_item(name, line.content):
+                                break
+
+
+def shared_view_stages(extractor: EntityExtractor, line, source_file: str):
+    """Neue Implementierung: eine LineView für alle Stufen"""
+    view = extractor.normalizer.build(line.content)
+    for hits in (view.item_hits, view.location_hits):
+        for hit in hits:
+            for pattern in hit.patterns:
+                for match in pattern.finditer(view.text_lower):
+                    name = match.group(1).strip()
+                    if name and extractor._is_valid_item(name, line.content, name):
+                        break
+
+
+def legacy_name_forms(name: str):
+    """Referenz: bisherige Normalisierung in _add_character/_add_location"""
+    stripped = name.strip()
+    return stripped, stripped.lower(), stripped.title()
+
+
+def _time_per_call(func, items, repetitions: int) -> float:
+    """Misst die mittlere Zeit pro Element in Mikrosekunden"""
+    seconds = timeit.timeit(lambda: [func(item) for item in items], number=repetitions)
+    return seconds / (repetitions * len(items)) * 1e6
+
+
+def main():
+    repetitions = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+    extractor = EntityExtractor("blank:de")
+    lines = []
+    for path in sorted((Path(__file__).parent.parent / "examples").glob("*.txt")):
+        lines.extend(line for line in ChatParser().parse_file(path) if line.content)
+    keyword_lines = [line for line in lines if extractor.normalizer.build(line.content).item_hits]
+
+    # Namen wie sie NER und Schlüsselwortsuche wiederholt liefern
+    names = [word.strip(".,!?") for line in lines for word in line.content.split()
+             if word[:1].isupper()]
+
+    print(f"{len(lines)} Zeilen, davon {len(keyword_lines)} mit Schlüsselwort-Treffern, "
+          f"{len(names)} Namensaufrufe")
+    for title, items in [("Alle Zeilen", lines), ("Zeilen mit Treffern", keyword_lines)]:
+        print(f"\n{title}:")
+        for label, stage in [("bisher (pro Stufe)", legacy_keyword_stages),
+                             ("LineView (geteilt)", shared_view_stages)]:
+            per_line = _time_per_call(lambda line: stage(extractor, line, "bench.txt"),
+                                      items, repetitions)
+            print(f"  {label:<22} {per_line:8.2f} µs/Zeile")
+
+    print("\nNamens-Normalisierung:")
+    for label, func in [("bisher (pro Aufruf)", legacy_name_forms),
+                        ("zwischengespeichert", extractor.normalizer.name_forms)]:
+        print(f"  {label:<22} {_time_per_call(func, names, repetitions):8.3f} µs/Name")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Zusammenführen großer Cluster mit Erwähnungsblöcken vs. Listen
+
+Erzeugt Cluster aus vielen Aliasen (Standard: 20 Cluster mit je 50 Aliasen
+und 2000 Erwähnungen pro Alias) und führt sie mehrfach zusammen, wie beim
+Verschieben des Schwellwert-Reglers in der Web-UI. Verglichen werden
+Laufzeit und Spitzenspeicher (tracemalloc) mit
+- MentionList (Referenzen auf Blöcke) und
+- einfachen Listen (jede Zusammenführung kopiert alle Erwähnungen),
+dazu einmalig das Flachklopfen für den Export.
+
+Aufruf:
+    python benchmarks/bench_mentions.py [--clusters N] [--aliases N] [--mentions N] [--rounds N]
+"""
+import argparse
+import random
+import string
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.models import Character
+from src.utils.merger import EntityMerger
+
+
+@dataclass
+class ListCharacter(Character):
+    """Charakter mit Erwähnungen als einfacher Liste (bisheriges Verhalten)"""
+    mentions: List[Dict] = field(default_factory=list)
+
+
+def build_characters(model, clusters: int, aliases: int, mentions: int):
+    """Cluster über gleiche Vornamen, alle Erwähnungen teilen sich ein Dictionary"""
+    rng = random.Random(0)
+    word = lambda: "".join(rng.choice(string.ascii_lowercase) for _ in range(10)).title()
+    mention = {"text": "...", "source_file": "kapitel.txt", "line_number": 1}
+    characters = {}
+    for _ in range(clusters):
+        first_name = word()
+        for _ in range(aliases):
+            name = f"{first_name} {word()}"
+            character = model(name=name, frequency=mentions)
+            character.mentions.extend([mention] * mentions)
+            characters[name] = character
+    return characters
+
+
+def measure(merger, characters, graph, rounds: int):
+    """Mittlere Laufzeit und Spitzenspeicher pro Zusammenführung, Laufzeit des Exports"""
+    start = time.perf_counter()
+    for _ in range(rounds):
+        merged = merger.merge_characters(characters, graph)
+    merge_time = (time.perf_counter() - start) / rounds
+
+    # Speicher getrennt messen (tracemalloc verlangsamt jede Allokation)
+    tracemalloc.start()
+    merger.merge_characters(characters, graph)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for character in merged.values():
+        character.to_dict()
+    return merge_time, peak, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--clusters", type=int, default=20)
+    parser.add_argument("--aliases", type=int, default=50)
+    parser.add_argument("--mentions", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=10, help="Zusammenführungen pro Messung")
+    args = parser.parse_args()
+
+    merger = EntityMerger(80)
+    total = args.clusters * args.aliases * args.mentions
+    print(f"{args.clusters} Cluster x {args.aliases} Aliase x {args.mentions} Erwähnungen "
+          f"= {total:,} Erwähnungen, {args.rounds} Durchläufe")
+
+    for label, model in [("Listen", ListCharacter), ("MentionList", Character)]:
+        characters = build_characters(model, args.clusters, args.aliases, args.mentions)
+        graph = merger.character_graph(characters)
+        merge_time, peak, export_time = measure(merger, characters, graph, args.rounds)
+        print(f"  {label:<12} Zusammenführung {merge_time * 1000:8.1f} ms   "
+              f"Spitzenspeicher {peak / 2 ** 20:8.1f} MiB   Export {export_time * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Speicher und Durchsatz der Story-Modelle (add_mention, merge_with)
+
+Legt viele Charaktere an (Standard: 100k mit je 3 Erwähnungen), wie bei der
+Extraktion vor dem Zusammenführen, und führt sie anschließend in Gruppen
+zusammen. Verglichen werden
+- die Modelle mit Slots, erst bei Bedarf angelegten Sammlungen und einem
+  Zeitstempel pro Lauf und
+- eine Dataclass mit __dict__, allen Sammlungen ab Erzeugung und
+  datetime.now() bei jeder Erwähnung (bisheriges Verhalten).
+
+Aufruf:
+    python benchmarks/bench_models.py [--entities N] [--mentions N] [--group N]
+"""
+import argparse
+import gc
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.models import Character, MentionList, begin_run
+
+
+@dataclass
+class DictCharacter:
+    """Charakter als Dataclass mit __dict__ (bisheriges Verhalten)"""
+    name: str
+    description: str = ""
+    mentions: MentionList = field(default_factory=MentionList)
+    frequency: int = 0
+    source_files: Set[str] = field(default_factory=set)
+    created_at: datetime = field(default_factory=datetime.now)
+    updated_at: datetime = field(default_factory=datetime.now)
+    behaviors: List[str] = field(default_factory=list)
+    items: Set[str] = field(default_factory=set)
+    relationships: Dict[str, str] = field(default_factory=dict)
+    aliases: Set[str] = field(default_factory=set)
+
+    def add_mention(self, text: str, source_file: str, line_number: Optional[int] = None):
+        self.mentions.append({"text": text, "source_file": source_file, "line_number": line_number})
+        self.source_files.add(source_file)
+        self.frequency += 1
+        self.updated_at = datetime.now()
+
+    def merge_with(self, other: 'DictCharacter'):
+        if other.description and other.description not in self.description:
+            if self.description:
+                self.description += f" | {other.description}"
+            else:
+                self.description = other.description
+        self.mentions.extend(other.mentions)
+        self.source_files.update(other.source_files)
+        self.frequency += other.frequency
+        self.updated_at = datetime.now()
+        Character._extend_unique(self.behaviors, other.behaviors)
+        self.items.update(other.items)
+        self.aliases.update(other.aliases)
+        self.relationships.update(other.relationships)
+
+
+def extract(model, entities: int, mentions: int):
+    """Legt Charaktere an und fügt Erwähnungen hinzu (wie der Extractor)"""
+    characters = {}
+    for number in range(entities):
+        name = f"Figur {number}"
+        character = model(name=name)
+        for line in range(mentions):
+            character.add_mention("...", "kapitel.txt", line)
+        characters[name] = character
+    return characters
+
+
+def merge(model, characters, group: int):
+    """Führt jeweils ``group`` Charaktere in einem neuen zusammen"""
+    values = list(characters.values())
+    merged = []
+    for start in range(0, len(values), group):
+        target = model(name=values[start].name)
+        for character in values[start:start + group]:
+            target.merge_with(character)
+        merged.append(target)
+    return merged
+
+
+def timed(function, *args):
+    """Laufzeit eines Aufrufs ohne Garbage Collection (wie timeit) und sein Ergebnis"""
+    gc.collect()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        result = function(*args)
+        return time.perf_counter() - start, result
+    finally:
+        gc.enable()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--entities", type=int, default=100000)
+    parser.add_argument("--mentions", type=int, default=3, help="Erwähnungen pro Charakter")
+    parser.add_argument("--group", type=int, default=10, help="Charaktere pro Zusammenführung")
+    args = parser.parse_args()
+
+    begin_run()
+    print(f"{args.entities:,} Charaktere x {args.mentions} Erwähnungen, "
+          f"Zusammenführung in Gruppen zu {args.group}")
+
+    for label, model in [("Dataclass", DictCharacter), ("Slots", Character)]:
+        extract_time, characters = timed(extract, model, args.entities, args.mentions)
+        merge_time, _ = timed(merge, model, characters, args.group)
+
+        # Speicher getrennt messen (tracemalloc verlangsamt jede Allokation)
+        del characters
+        tracemalloc.start()
+        characters = extract(model, args.entities, args.mentions)
+        memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del characters
+
+        print(f"  {label:<10} add_mention {extract_time * 1000:8.1f} ms   "
+              f"merge_with {merge_time * 1000:8.1f} ms   Speicher {memory / 2 ** 20:8.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Namenssuche im Charaktere-Tab (NameTrigramIndex)
+
+Erzeugt viele Charaktere mit zufälligen Namen und je einem Alias
+(Standard: 50k) und misst für Eingaben wie beim Tippen
+- den bisherigen Teilstring-Filter über alle Namen und
+- die Trigramm-Suche (Top 20 und alle Treffer).
+
+Aufruf:
+    python benchmarks/bench_name_index.py [--characters N] [--queries N]
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.utils.name_index import NameTrigramIndex
+
+SYLLABLES = ["ka", "ta", "ne", "ru", "mol", "dra", "fen", "lor", "us", "wen", "schwa", "rin",
+             "el", "ly", "tho", "gar", "mi", "sor", "ben", "quil", "vas", "o", "an", "eth"]
+
+
+def random_name(rng: random.Random) -> str:
+    return " ".join("".join(rng.choices(SYLLABLES, k=rng.randint(2, 4))).title()
+                    for _ in range(rng.randint(1, 2)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--characters", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=500)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    names = {}
+    while len(names) < args.characters:
+        names[random_name(rng)] = [random_name(rng)]
+    # Eingaben: Anfänge vorhandener Namen (2 bis 8 Zeichen)
+    keys = list(names)
+    queries = [rng.choice(keys)[:rng.randint(2, 8)] for _ in range(args.queries)]
+    print(f"{args.characters:,} Charaktere, {args.queries} Eingaben")
+
+    started = time.perf_counter()
+    index = NameTrigramIndex(names)
+    print(f"  Aufbau            {time.perf_counter() - started:8.2f} s")
+
+    searches = [("Teilstring", lambda query: [name for name in names if query.lower() in name.lower()]),
+                ("Trigramm Top 20", lambda query: index.search(query, limit=20)),
+                ("Trigramm alle", lambda query: index.search(query))]
+    for label, search in searches:
+        started = time.perf_counter()
+        for query in queries:
+            search(query)
+        elapsed = (time.perf_counter() - started) / len(queries)
+        print(f"  {label:<16} {elapsed * 1000:8.3f} ms pro Eingabe")
+
+
+if __name__ == "__main__":
+    main()
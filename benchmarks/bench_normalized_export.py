@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Normalisierter Export mit gemeinsamer Erwähnungstabelle (--normalized)
+
+Erzeugt Zeilen, die jeweils mehrere Elemente erwähnen (Standard: 100k Zeilen
+mit je 3 von 5k Charakteren), und exportiert sie
+- wie bisher (jede Elementdatei mit allen Erwähnungen) und
+- normalisiert (mentions.ndjson, Elementdateien mit "mention_ids").
+Verglichen werden Schreibzeit und Größe der Ausgabe.
+
+Aufruf:
+    python benchmarks/bench_normalized_export.py [--lines N] [--characters N] [--per-line N]
+"""
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.models import Character, begin_run
+from src.utils.exporter import JSONExporter
+
+
+def directory_size(path: Path) -> int:
+    return sum(file.stat().st_size for file in path.rglob("*") if file.is_file())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--lines", type=int, default=100000)
+    parser.add_argument("--characters", type=int, default=5000)
+    parser.add_argument("--per-line", type=int, default=3, help="Erwähnte Charaktere pro Zeile")
+    args = parser.parse_args()
+
+    begin_run()
+    rng = random.Random(42)
+    characters = {f"Figur {number}": Character(name=f"Figur {number}") for number in range(args.characters)}
+    names = list(characters)
+    for line in range(args.lines):
+        mentioned = rng.sample(names, args.per_line)
+        text = f"{' und '.join(mentioned)} treffen sich am Tor und reden lange über die alte Karte ({line})."
+        for name in mentioned:
+            characters[name].add_mention(text, f"kapitel{line % 40}.txt", line)
+    print(f"{args.lines:,} Zeilen mit je {args.per_line} von {args.characters:,} Charakteren")
+
+    for label, normalized in (("Eingebettet", False), ("Normalisiert", True)):
+        with tempfile.TemporaryDirectory() as directory:
+            output_dir = Path(directory)
+            started = time.perf_counter()
+            JSONExporter(output_dir, normalized=normalized).export_all(characters, {}, {})
+            elapsed = time.perf_counter() - started
+            print(f"  {label:<13} {elapsed:6.2f} s   {directory_size(output_dir) / 2 ** 20:8.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
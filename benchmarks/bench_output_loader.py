@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Öffnen eines Ausgabeverzeichnisses (JSONExporter)
+
+Exportiert viele Charaktere mit Erwähnungen (Standard: 20k mit je 20) in
+ein temporäres Verzeichnis und lädt sie anschließend
+- vollständig aus den Einzeldateien (bisheriges Verhalten) und
+- mit load_output aus der Übersicht (Erwähnungen erst bei Bedarf).
+
+Aufruf:
+    python benchmarks/bench_output_loader.py [--entities N] [--mentions N]
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.models import Character, begin_run
+from src.models.codec import from_record, loads
+from src.utils.exporter import JSONExporter
+from src.utils.output_loader import load_output
+
+
+def load_files(output_dir: Path):
+    """Lädt alle Charaktere aus ihren Einzeldateien"""
+    return {entity.name: entity for entity in
+            (from_record(loads(path.read_bytes()), Character)
+             for path in (output_dir / "characters").glob("*.json"))}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--entities", type=int, default=20000)
+    parser.add_argument("--mentions", type=int, default=20, help="Erwähnungen pro Charakter")
+    args = parser.parse_args()
+
+    begin_run()
+    characters = {}
+    for number in range(args.entities):
+        character = Character(name=f"Figur {number}", description=f"Beschreibung {number}")
+        for line in range(args.mentions):
+            character.add_mention(f"Figur {number} sagt etwas in Zeile {line}.", "kapitel.txt", line)
+        characters[character.name] = character
+    print(f"{args.entities:,} Charaktere x {args.mentions} Erwähnungen")
+
+    with tempfile.TemporaryDirectory() as directory:
+        output_dir = Path(directory)
+        JSONExporter(output_dir).export_all(characters, {}, {})
+
+        for label, load in [("Einzeldateien", load_files),
+                            ("load_output", lambda path: load_output(path, ["characters"])["characters"])]:
+            started = time.perf_counter()
+            loaded = load(output_dir)
+            print(f"  {label:<14} {time.perf_counter() - started:6.2f} s   ({len(loaded):,} Einträge)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Volltextsuche über Erwähnungen (MentionSearchIndex)
+
+Legt viele Charaktere mit Erwähnungen an (Standard: 20k mit je 20), baut
+den Index auf und vergleicht die Suchzeit
+- mit einer linearen Suche über alle Erwähnungstexte und
+- mit dem invertierten Index.
+
+Aufruf:
+    python benchmarks/bench_search_index.py [--entities N] [--mentions N] [--words N] [--queries N]
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.models import Character, begin_run
+from src.utils.search_index import MentionSearchIndex, tokenize
+
+# Silben für einen künstlichen Wortschatz; Wörter werden nach Zipf gezogen wie in echten Texten
+SYLLABLES = ["ka", "ta", "ne", "ru", "mol", "dra", "fen", "lor", "us", "wen", "schwa", "rin"]
+
+
+def linear_search(entities, query: str, limit: int):
+    """Durchsucht alle Erwähnungstexte nacheinander (Wörter als Teilzeichenketten)"""
+    words = tokenize(query)
+    hits = []
+    for name, entity in entities["characters"].items():
+        for mention in entity.mentions:
+            text = mention["text"].casefold()
+            if all(word in text for word in words):
+                hits.append((name, mention["text"]))
+                if len(hits) >= limit:
+                    return hits
+    return hits
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--entities", type=int, default=20000)
+    parser.add_argument("--mentions", type=int, default=20, help="Erwähnungen pro Charakter")
+    parser.add_argument("--words", type=int, default=1000, help="Größe des Wortschatzes")
+    parser.add_argument("--line-words", type=int, default=12, help="Wörter pro Erwähnung")
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    begin_run()
+    rng = random.Random(42)
+    words = sorted({"".join(rng.choices(SYLLABLES, k=3)) for _ in range(args.words)})
+    rng.shuffle(words)
+    weights = [1 / rank for rank in range(1, len(words) + 1)]
+    characters = {}
+    for number in range(args.entities):
+        character = Character(name=f"Figur {number}")
+        for line in range(args.mentions):
+            text = " ".join(rng.choices(words, weights, k=args.line_words))
+            character.add_mention(f"Figur {number} {text}", "kapitel.txt", line)
+        characters[character.name] = character
+    entities = {"characters": characters}
+    # Anfragen aus zwei Wörtern einer vorhandenen Zeile
+    queries = []
+    for _ in range(args.queries):
+        mention = rng.choice(characters[f"Figur {rng.randrange(args.entities)}"].mentions)
+        queries.append(" ".join(rng.sample(mention["text"].split()[2:], 2)))
+    print(f"{args.entities:,} Charaktere x {args.mentions} Erwähnungen, {args.queries} Anfragen")
+
+    started = time.perf_counter()
+    index = MentionSearchIndex.build(entities)
+    print(f"  Aufbau          {time.perf_counter() - started:8.2f} s")
+
+    for label, search in [("Linear", lambda query: linear_search(entities, query, 500)),
+                          ("Index", lambda query: index.search(query, limit=500))]:
+        started = time.perf_counter()
+        for query in queries:
+            search(query)
+        elapsed = (time.perf_counter() - started) / len(queries)
+        print(f"  {label:<14} {elapsed * 1000:8.2f} ms pro Anfrage")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark: blockweise Ähnlichkeitsberechnung vs. fuzz.ratio Paar für Paar
+
+Misst für synthetische Namenslisten (Standard: 1k, 10k, 50k Namen) die
+Bewertung von Stichproben-Zeilen
+- gegen alle Namen (vollständiger Abgleich) und
+- gegen die Kandidaten des Blocking-Index,
+jeweils mit fuzz.ratio in einer Python-Schleife und mit SimilarityScorer.
+Die Gesamtzeit wird aus der Stichprobe hochgerechnet.
+
+Aufruf:
+    python benchmarks/bench_similarity.py [Namensanzahl ...] [--rows N]
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from fuzzywuzzy import fuzz
+
+from src.utils.merger import EntityMerger
+from src.utils.similarity import SimilarityScorer
+
+SYLLABLES = ["ly", "ra", "rae", "nor", "ael", "on", "ga", "reth", "mor", "kel", "al", "der",
+             "moor", "nigh", "shade", "the", "o", "dor", "vin", "ka", "la", "mi", "sa", "tor",
+             "wen", "fi", "ri", "an", "el", "bran", "us", "is", "hild", "gard", "sieg", "fried"]
+
+
+def generate_names(count: int, seed: int = 0):
+    """Erzeugt eindeutige, namensähnliche Zeichenketten"""
+    rng = random.Random(seed)
+    names = set()
+    while len(names) < count:
+        first = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).title()
+        if rng.random() < 0.4:
+            first += " " + "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).title()
+        names.add(first)
+    return sorted(names)
+
+
+def time_loop(rows):
+    """fuzz.ratio Paar für Paar"""
+    start = time.perf_counter()
+    for query, choices in rows:
+        for choice in choices:
+            fuzz.ratio(query, choice)
+    return time.perf_counter() - start
+
+
+def time_scorer(scorer, rows):
+    """Eine Matrix-Zeile pro Name"""
+    start = time.perf_counter()
+    for query, choices in rows:
+        scorer.score_row(query, choices)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("sizes", nargs="*", type=int, default=[1000, 10000, 50000])
+    parser.add_argument("--rows", type=int, default=200, help="Stichprobe an Zeilen pro Messung")
+    args = parser.parse_args()
+
+    merger = EntityMerger(80)
+    scorer = SimilarityScorer()
+    print(f"Backend: {scorer.backend}")
+
+    for size in args.sizes:
+        names = generate_names(size)
+        table = merger._build_name_table(names, merger._normalize_character_name)
+        normalized = [table[name].normalized for name in names]
+        index = merger._build_index(names, merger._normalize_character_name, normalized,
+                                    table, merger._character_rule_keys, substring=True)
+
+        sample = random.Random(1).sample(range(size), min(args.rows, size))
+        exhaustive = [(normalized[i], normalized) for i in sample]
+        blocked = [(normalized[i], [normalized[j] for j in index.candidates(i)]) for i in sample]
+        scale = size / len(sample)
+
+        print(f"\n{size} Namen ({len(sample)} Stichproben-Zeilen, hochgerechnet):")
+        for label, rows in [("alle Paare", exhaustive), ("Blocking-Kandidaten", blocked)]:
+            pairs = sum(len(choices) for _, choices in rows)
+            loop = time_loop(rows) * scale
+            batched = time_scorer(scorer, rows) * scale
+            print(f"  {label:<20} {int(pairs * scale):>13,} Paare   "
+                  f"fuzz.ratio {loop:8.2f} s   Matrix {batched:8.2f} s   "
+                  f"Faktor {loop / batched:6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
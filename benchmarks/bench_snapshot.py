@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Speichern und Öffnen eines Analyse-Snapshots
+
+Erzeugt eine Analyse mit rohen Entitäten (Standard: 100k, davon die Hälfte
+Charaktere, mit je 3 Erwähnungen), zufälligen Ähnlichkeitsgraphen und den
+daraus zusammengeführten Entitäten und misst
+- das Kodieren als Snapshot (AnalysisSnapshot.to_bytes),
+- das Öffnen (from_bytes: zusammengeführte Entitäten, Graphen, Dialoge),
+- das spätere Dekodieren der rohen Entitäten beim ersten Neu-Gruppieren.
+
+Aufruf:
+    python benchmarks/bench_snapshot.py [--entities N] [--mentions N]
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.models import Character, Item, Location, begin_run
+from src.utils.clustering import SimilarityGraph
+from src.utils.merger import EntityMerger
+from src.utils.snapshot import AnalysisSnapshot
+
+
+def build_analysis(entities: int, mentions: int) -> AnalysisSnapshot:
+    """Rohe Entitäten, ein Graph mit etwa einer Kante pro Name und die Zusammenführung bei 80"""
+    rng = random.Random(1)
+    merger = EntityMerger(80)
+    shares = {"characters": (Character, 0.5), "items": (Item, 0.25), "locations": (Location, 0.25)}
+    raw, graphs, merged = {}, {}, {}
+    for entity_type, (model, share) in shares.items():
+        count = int(entities * share)
+        elements = {}
+        for number in range(count):
+            element = model(name=f"{entity_type} {number}")
+            for line in range(mentions):
+                element.add_mention("Eine Zeile mit einer Erwähnung.", f"kapitel{number % 20}.txt", line)
+            elements[element.name] = element
+        graph = SimilarityGraph(list(elements), AnalysisSnapshot.MIN_SCORE)
+        for _ in range(count):
+            graph.add_edge(rng.randrange(count), rng.randrange(count), rng.randrange(50, 101))
+        raw[entity_type], graphs[entity_type] = elements, graph
+        merged[entity_type] = getattr(merger, f"merge_{entity_type}")(elements, graph, 80)
+    return AnalysisSnapshot(merged, raw, graphs, {}, 80, AnalysisSnapshot.merger_settings(merger))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--entities", type=int, default=100000, help="Rohe Entitäten insgesamt")
+    parser.add_argument("--mentions", type=int, default=3, help="Erwähnungen pro Entität")
+    args = parser.parse_args()
+
+    begin_run()
+    snapshot = build_analysis(args.entities, args.mentions)
+    merged = sum(len(entities) for entities in snapshot.merged.values())
+    print(f"{args.entities:,} rohe Entitäten x {args.mentions} Erwähnungen, {merged:,} zusammengeführt")
+
+    start = time.perf_counter()
+    data = snapshot.to_bytes()
+    print(f"  Speichern               {(time.perf_counter() - start) * 1000:8.1f} ms   "
+          f"{len(data) / 2 ** 20:.1f} MiB")
+
+    start = time.perf_counter()
+    loaded = AnalysisSnapshot.from_bytes(data)
+    print(f"  Öffnen                  {(time.perf_counter() - start) * 1000:8.1f} ms")
+
+    start = time.perf_counter()
+    for entity_type in loaded.raw_entities:
+        loaded.raw_entities[entity_type]
+    print(f"  Rohe Entitäten laden    {(time.perf_counter() - start) * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Laden der Ergebnisse in pandas (JSON-Dateien vs. Tabellen aus --tables)
+
+Erzeugt Zeilen, die jeweils mehrere Charaktere erwähnen (Standard: 100k
+Zeilen mit je 3 von 5k Charakteren), exportiert sie als JSON und als
+Tabellen und misst, bis Charaktere und Erwähnungen als DataFrames vorliegen
+- aus den Einzeldateien (jede Datei laden, Erwähnungen flach klopfen),
+- aus Parquet und aus Arrow IPC (je ein Aufruf pro Tabelle).
+
+Aufruf:
+    python benchmarks/bench_table_export.py [--lines N] [--characters N] [--per-line N]
+"""
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.models import Character, begin_run
+from src.models.codec import loads
+from src.utils.exporter import JSONExporter
+from src.utils.table_exporter import TableExporter
+
+
+def load_json(output_dir: Path):
+    """Bisher: jede Datei lesen und die Erwähnungen flach klopfen"""
+    records, mentions = [], []
+    for path in (output_dir / "characters").glob("*.json"):
+        record = loads(path.read_bytes())
+        for mention in record.pop("mentions"):
+            mentions.append({"entity": record["name"], **mention})
+        records.append(record)
+    return pd.DataFrame(records), pd.DataFrame(mentions)
+
+
+def load_tables(exporter: TableExporter):
+    read = pd.read_parquet if exporter.table_format == "parquet" else pd.read_feather
+    return read(exporter.table_path("characters")), read(exporter.table_path("mentions"))
+
+
+def directory_size(path: Path) -> int:
+    return sum(file.stat().st_size for file in path.rglob("*") if file.is_file())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--lines", type=int, default=100000)
+    parser.add_argument("--characters", type=int, default=5000)
+    parser.add_argument("--per-line", type=int, default=3, help="Erwähnte Charaktere pro Zeile")
+    args = parser.parse_args()
+
+    begin_run()
+    rng = random.Random(42)
+    characters = {f"Figur {number}": Character(name=f"Figur {number}") for number in range(args.characters)}
+    names = list(characters)
+    for line in range(args.lines):
+        mentioned = rng.sample(names, args.per_line)
+        text = f"{' und '.join(mentioned)} treffen sich am Tor und reden lange über die alte Karte ({line})."
+        for name in mentioned:
+            characters[name].add_mention(text, f"kapitel{line % 40}.txt", line)
+    print(f"{args.lines:,} Zeilen mit je {args.per_line} von {args.characters:,} Charakteren")
+    print(f"  {'':<10} {'Schreiben':>10} {'Laden':>9} {'Größe':>11}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        output_dir = Path(directory)
+        started = time.perf_counter()
+        JSONExporter(output_dir).export_characters(characters)
+        written = time.perf_counter() - started
+        started = time.perf_counter()
+        _, mentions = load_json(output_dir)
+        loaded = time.perf_counter() - started
+        size = directory_size(output_dir / "characters")
+        print(f"  {'JSON':<10} {written:8.2f} s {loaded:7.2f} s {size / 2 ** 20:7.1f} MiB   "
+              f"({len(mentions):,} Erwähnungen)")
+
+        for table_format in ("parquet", "arrow"):
+            exporter = TableExporter(output_dir, table_format)
+            started = time.perf_counter()
+            exporter.export_entities("characters", Character, characters.values())
+            exporter.export_mentions({"characters": characters})
+            written = time.perf_counter() - started
+            started = time.perf_counter()
+            _, mentions = load_tables(exporter)
+            loaded = time.perf_counter() - started
+            size = sum(exporter.table_path(table).stat().st_size for table in ("characters", "mentions"))
+            print(f"  {table_format.title():<10} {written:8.2f} s {loaded:7.2f} s {size / 2 ** 20:7.1f} MiB   "
+                  f"({len(mentions):,} Erwähnungen)")
+
+
+if __name__ == "__main__":
+    main()
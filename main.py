@@ -6,14 +6,23 @@ Lokale Analyse von dialogbasierten Geschichten
 import argparse
 import logging
 from pathlib import Path
+from typing import Dict, Iterable
 import sys
 import os
 from tqdm import tqdm
 
+from src.extractors.cooccurrence import load_cooccurrence, save_cooccurrence
 from src.extractors.entity_extractor import EntityExtractor
+from src.models import Character
+from src.utils.cluster_index import load_cluster_indexes, save_cluster_indexes
+from src.utils.entity_store import EntityStore
 from src.utils.merger import EntityMerger
-from src.utils.exporter import JSONExporter
+from src.utils.merge_pipeline import MergePipeline
+from src.utils.snapshot import AnalysisSnapshot, save_snapshot
+from src.utils.exporter import MENTIONS_FILE, JSONExporter
+from src.utils.output_loader import MentionTable, load_output
 from src.utils.sillytavern_exporter import SillyTavernExporter
+from src.utils.table_exporter import TABLES_DIR, TableExporter
 
 
 class StoryWeaver:
@@ -22,7 +31,19 @@ class StoryWeaver:
     def __init__(self, input_dir: Path, output_dir: Path, 
                  similarity_threshold: int = 80,
                  spacy_model: str = "de_core_news_sm",
-                 sillytavern_export: bool = False):
+                 sillytavern_export: bool = False,
+                 use_gazetteer: bool = False,
+                 cooccurrence_window: int = 5,
+                 cooccurrence_mode: str = "window",
+                 use_blocking: bool = True,
+                 base_words_path: Path = None,
+                 incremental: bool = False,
+                 workers: int = None,
+                 phonetic: str = None,
+                 snapshot_path: Path = None,
+                 store_path: Path = None,
+                 normalized_export: bool = False,
+                 table_format: str = None):
         """
         Args:
             input_dir: Verzeichnis mit Chat-Dateien
@@ -30,15 +51,48 @@ class StoryWeaver:
             similarity_threshold: Schwellwert für Ähnlichkeit (0-100)
             spacy_model: SpaCy-Modell für NLP
             sillytavern_export: Ob SillyTavern-Export aktiviert werden soll
+            use_gazetteer: Zwei-Pass-Modus mit Namensverzeichnis (NER nur für unbekannte Namen)
+            cooccurrence_window: Zeilenfenster für gemeinsame Auftritte von Charakteren
+            cooccurrence_mode: "window" (Zeilenfenster) oder "scene" (Szenen)
+            use_blocking: Nur plausible Paare zusammenführen (False = alle Paare vergleichen)
+            base_words_path: Eigene JSON-Datei mit Basis-Gegenständen und -Orten
+            incremental: Nur neue Dateien analysieren und in den gespeicherten Cluster-Index einordnen
+            workers: Prozesse für die Zusammenführung (Standard: Anzahl CPUs, 1 = ohne Pool)
+            phonetic: Charaktere mit gleichem phonetischen Schlüssel zusammenführen
+                      ("koelner", "metaphone" oder None)
+            snapshot_path: Analyse zusätzlich als Snapshot speichern (für die App)
+            store_path: Erwähnungen und Entitäten in dieser SQLite-Datenbank halten
+                        (für Korpora, die nicht in den Arbeitsspeicher passen)
+            normalized_export: Erwähnungen einmal in mentions.ndjson statt in jeder Elementdatei
+            table_format: Elemente, Erwähnungen und Dialogzeilen zusätzlich als Tabellen
+                          ("parquet" oder "arrow", None = keine Tabellen)
         """
+        if incremental and store_path:
+            # Die Datenbank enthält nur die Daten eines Laufs (rohe Entitäten, Erwähnungen, Gesprächszüge)
+            raise ValueError("--incremental und --store können nicht kombiniert werden")
         self.input_dir = Path(input_dir)
         self.output_dir = Path(output_dir)
         self.sillytavern_export = sillytavern_export
+        self.use_gazetteer = use_gazetteer
+        self.incremental = incremental
+        self.cluster_index_path = self.output_dir / "cluster_index.json"
+        self.cooccurrence_path = self.output_dir / "cooccurrence.json"
+        self.snapshot_path = Path(snapshot_path) if snapshot_path else None
+        self.store_path = Path(store_path) if store_path else None
+        self.normalized_export = normalized_export
         
         # Initialisiere Komponenten
-        self.extractor = EntityExtractor(spacy_model)
-        self.merger = EntityMerger(similarity_threshold)
-        self.exporter = JSONExporter(output_dir)
+        self.store = None
+        if self.store_path:
+            self.store_path.parent.mkdir(parents=True, exist_ok=True)
+            self.store = EntityStore(self.store_path, reset=True)
+        self.extractor = EntityExtractor(spacy_model, cooccurrence_window, cooccurrence_mode,
+                                         store=self.store)
+        self.merger = EntityMerger(similarity_threshold, use_blocking,
+                                   base_words_path=base_words_path, phonetic=phonetic)
+        self.merge_pipeline = MergePipeline(self.merger, workers)
+        self.exporter = JSONExporter(output_dir, normalized=normalized_export)
+        self.table_exporter = TableExporter(output_dir, table_format) if table_format else None
         
         # SillyTavern-Exporter bei Bedarf
         if self.sillytavern_export:
@@ -70,7 +124,27 @@ class StoryWeaver:
         
         self.logger.info(f"Gefunden: {len(chat_files)} Chat-Dateien")
         
-        # Verarbeite jede Datei
+        # Inkrementeller Lauf: bereits verarbeitete Dateien überspringen
+        indexes, processed_files = {}, set()
+        if self.incremental and self.cluster_index_path.exists():
+            indexes, processed_files = load_cluster_indexes(self.cluster_index_path)
+            chat_files = [path for path in chat_files if str(path) not in processed_files]
+            self.logger.info(f"Inkrementell: {len(chat_files)} neue Dateien")
+            if not chat_files:
+                self.logger.info("Keine neuen Dateien, Ergebnisse sind aktuell")
+                return
+            if self.sillytavern_export:
+                self.logger.warning("Inkrementell: SillyTavern-Karten enthalten nur die neuen Dateien")
+        elif self.incremental:
+            self.logger.info("Kein Cluster-Index gefunden, führe vollständige Analyse durch")
+        
+        # Erster Durchlauf: bekannte Namen sammeln
+        if self.use_gazetteer:
+            gazetteer = self.extractor.build_gazetteer(chat_files)
+            self.logger.info(f"Namensverzeichnis mit {len(gazetteer)} Einträgen erstellt")
+        
+        # Verarbeite jede Datei (nur erfolgreich gelesene gelten als verarbeitet)
+        extracted_files = set()
         for file_path in tqdm(chat_files, desc="Verarbeite Dateien"):
             self.logger.info(f"Analysiere: {file_path.name}")
             try:
@@ -78,25 +152,114 @@ class StoryWeaver:
             except Exception as e:
                 self.logger.error(f"Fehler bei {file_path.name}: {e}")
                 continue
+            extracted_files.add(str(file_path))
         
         # Hole alle extrahierten Entitäten
         self.logger.info("Extrahierung abgeschlossen. Beginne Zusammenführung...")
         
-        # Führe ähnliche Entitäten zusammen
-        merged_characters = self.merger.merge_characters(self.extractor.characters)
-        merged_items = self.merger.merge_items(self.extractor.items)
-        merged_locations = self.merger.merge_locations(self.extractor.locations)
+        # Führe ähnliche Entitäten zusammen (und halte die Cluster für spätere Läufe fest)
+        raw_entities = {
+            "characters": self.extractor.characters,
+            "items": self.extractor.items,
+            "locations": self.extractor.locations
+        }
+        merged, changed = {}, {}
+        # Erwähnungstabelle eines normalisierten Exports (nur gelesen, wenn eine Datei darauf verweist)
+        table = MentionTable(self.output_dir / MENTIONS_FILE)
+        for entity_type, entities in raw_entities.items():
+            if entity_type in indexes:
+                previous = self._load_merged(entity_type, table)
+                old_names = set(previous)
+                merged[entity_type] = self.merger.merge_incremental(
+                    entity_type, indexes[entity_type], previous, entities)
+                changed[entity_type] = self.merger.changed_names[entity_type]
+                # Erwähnungen der neu zusammengeführten Elemente lesen, solange ihre bisherigen Dateien existieren
+                for name in changed[entity_type]:
+                    merged[entity_type][name].mentions.materialize()
+                self._remove_stale(entity_type, old_names - set(merged[entity_type]))
+        if changed and self.normalized_export and table.path.exists():
+            # Nicht neu geschriebene Dateien verweisen weiter auf die bisherigen IDs
+            self.exporter.keep_mention_table(table.mentions())
+        
+        # Alle übrigen Typen vollständig (parallel) zusammenführen
+        full = {entity_type: entities for entity_type, entities in raw_entities.items()
+                if entity_type not in indexes}
+        if full:
+            # Für den Snapshot Graphen bis zum kleinsten Schwellwert der App berechnen
+            min_score = AnalysisSnapshot.MIN_SCORE if self.snapshot_path else None
+            full_merged, full_indexes = self.merge_pipeline.run(full, min_score)
+            merged.update(full_merged)
+            indexes.update(full_indexes)
+        merged_characters = merged["characters"]
+        merged_items = merged["items"]
+        merged_locations = merged["locations"]
         
         self.logger.info(f"Zusammenführung abgeschlossen:")
         self.logger.info(f"  - {len(merged_characters)} Charaktere")
         self.logger.info(f"  - {len(merged_items)} Gegenstände")
         self.logger.info(f"  - {len(merged_locations)} Orte")
+        for entity_type, stats in self.merger.blocking_stats.items():
+            self.logger.info(f"  Blocking {entity_type}: {stats['candidate_pairs']} von "
+                             f"{stats['exhaustive_pairs']} Vergleichen "
+                             f"({stats['reduction_ratio']:.1%} eingespart)")
+        if full:
+            self.logger.info(f"  Merge-Pipeline ({self.merge_pipeline.processes} Prozesse):")
+            for line in self.merge_pipeline.format_report():
+                self.logger.info(f"    {line}")
+        
+        # Rohe und zusammengeführte Entitäten in der Datenbank ablegen (ohne Kopie der Erwähnungen)
+        if self.store:
+            for entity_type, entities in raw_entities.items():
+                self.store.save_entities(EntityStore.RAW, entity_type, entities)
+                self.store.save_entities(EntityStore.MERGED, entity_type, merged[entity_type])
+            self.store.set_meta("similarity_threshold", self.merger.similarity_threshold)
+            self.store.set_meta("dialog_data", self.extractor.get_dialog_data())
+            self.logger.info(f"Entitäten gespeichert: {self.store_path}")
         
-        # Exportiere die Ergebnisse
-        self.exporter.export_all(merged_characters, merged_items, merged_locations)
+        # Exportiere die Ergebnisse (inkrementell nur die Dateien geänderter Elemente)
+        self.exporter.export_all(merged_characters, merged_items, merged_locations, changed)
+        if self.table_exporter:
+            # Inkrementell enthält die Zeitachse nur die neuen Dateien
+            self.table_exporter.export_all(merged_characters, merged_items, merged_locations,
+                                           self.extractor.timeline, keep_dialog_lines=bool(processed_files))
+        # Fehlgeschlagene Dateien werden im nächsten inkrementellen Lauf erneut versucht
+        save_cluster_indexes(self.cluster_index_path, indexes, processed_files | extracted_files)
+        
+        # Gemeinsame Auftritte früherer Läufe hinzuzählen (Fenster und Szenen enden an Dateigrenzen)
+        cooccurrence = self.extractor.cooccurrence
+        if processed_files:
+            try:
+                previous_cooccurrence = load_cooccurrence(self.cooccurrence_path)
+                previous_cooccurrence.update(cooccurrence)
+                cooccurrence = previous_cooccurrence
+            except (OSError, ValueError) as e:
+                self.logger.warning(f"Inkrementell: Gemeinsame Auftritte früherer Dateien nicht verfügbar ({e}), "
+                                    "relationship_graph.json wird nicht aktualisiert")
+                cooccurrence = None
         
         # Erstelle Beziehungsgraph
-        self.exporter.create_relationship_graph(merged_characters, merged_items, merged_locations)
+        if cooccurrence is not None:
+            save_cooccurrence(self.cooccurrence_path, cooccurrence)
+            self.exporter.create_relationship_graph(merged_characters, merged_items, merged_locations,
+                                                    cooccurrence=cooccurrence)
+        
+        # Snapshot für die App (rohe Entitäten und Graphen nur für vollständig zusammengeführte Typen)
+        if self.snapshot_path:
+            snapshot = AnalysisSnapshot(
+                merged,
+                {entity_type: raw_entities[entity_type] for entity_type in full},
+                self.merge_pipeline.graphs if full else {},
+                self.extractor.get_dialog_data(),
+                self.merger.similarity_threshold,
+                AnalysisSnapshot.merger_settings(self.merger),
+                self.merge_pipeline.report if full else {},
+                self.extractor.timeline
+            )
+            save_snapshot(self.snapshot_path, snapshot)
+            self.logger.info(f"Snapshot gespeichert: {self.snapshot_path}")
+            if not snapshot.regroupable:
+                self.logger.warning("Inkrementell: Der Snapshot enthält keine Graphen aller Typen, "
+                                    "in der App kann nicht neu gruppiert werden")
         
         # SillyTavern-Export wenn aktiviert
         if self.sillytavern_export:
@@ -115,8 +278,24 @@ class StoryWeaver:
             self.logger.info(f"  - {len(results['json'])} JSON-Dateien erstellt")
             self.logger.info(f"  - {len(results['png'])} PNG-Charakterkarten erstellt")
         
+        if self.store:
+            self.store.close()
         self.logger.info(f"Analyse abgeschlossen! Ergebnisse in: {self.output_dir}")
     
+    def _load_merged(self, entity_type: str, table: MentionTable) -> Dict:
+        """
+        Lädt die zusammengeführten Entitäten des letzten Laufs aus ihrer Übersicht
+        
+        Die Einzeldateien werden erst beim Zugriff auf die Erwähnungen gelesen,
+        also nur für die Cluster, die neue Entitäten erhalten.
+        """
+        return load_output(self.output_dir, [entity_type], table)[entity_type]
+    
+    def _remove_stale(self, entity_type: str, names: Iterable[str]):
+        """Entfernt die JSON-Dateien umbenannter oder vereinigter Cluster"""
+        for name in names:
+            (self.output_dir / entity_type / Character.json_filename(name)).unlink(missing_ok=True)
+    
     def print_summary(self):
         """Gibt eine Zusammenfassung der Ergebnisse aus"""
         print("\n" + "="*50)
@@ -134,6 +313,16 @@ class StoryWeaver:
         print("  ├── complete_overview.json")
         print("  ├── relationship_graph.json")
         print("  ├── export_statistics.json")
+        if self.normalized_export:
+            print(f"  ├── {MENTIONS_FILE}          # Alle Erwähnungen (--normalized)")
+        if self.table_exporter:
+            print(f"  ├── {TABLES_DIR}/                  # Tabellen für pandas (--tables)")
+        print("  ├── cluster_index.json       # Cluster für --incremental")
+        print("  ├── cooccurrence.json        # Gemeinsame Auftritte für --incremental")
+        if self.snapshot_path:
+            print(f"  ├── {self.snapshot_path.name}          # Snapshot für die App (--snapshot)")
+        if self.store_path:
+            print(f"  ├── {self.store_path.name}         # Entitäten und Erwähnungen (--store)")
         
         if self.sillytavern_export:
             print("  ├── characters_sillytavern/    # SillyTavern JSON-Dateien")
@@ -159,6 +348,13 @@ Beispiele:
   python main.py examples/ -m en_core_web_sm  # Englisches SpaCy-Modell
   python main.py examples/ -s          # Mit SillyTavern-Export
   python main.py examples/ -s -v       # SillyTavern-Export mit Details
+  python main.py examples/ -g          # Zwei-Pass-Modus mit Namensverzeichnis
+  python main.py examples/ --scenes    # Beziehungskanten pro Szene statt Zeilenfenster
+  python main.py examples/ --incremental  # Nur neue Dateien einordnen
+  python main.py examples/ --snapshot  # Analyse als Snapshot für die App speichern
+  python main.py korpus/ --store       # Erwähnungen in SQLite statt im Arbeitsspeicher
+  python main.py korpus/ --normalized  # Jede Erwähnung nur einmal exportieren
+  python main.py korpus/ --tables      # Zusätzlich Parquet-Tabellen für pandas
 
 Hinweis: Für große Geschichten (>100k Tokens) wird das mittlere oder große
 SpaCy-Modell empfohlen: -m de_core_news_md oder -m de_core_news_lg
@@ -204,6 +400,98 @@ SpaCy-Modell empfohlen: -m de_core_news_md oder -m de_core_news_lg
         help='Erstellt zusätzlich SillyTavern-kompatible Charakterkarten (JSON + PNG)'
     )
     
+    parser.add_argument(
+        '-g', '--gazetteer',
+        action='store_true',
+        help='Zwei-Pass-Modus: bekannte Namen ohne NER zählen (schneller bei langen Geschichten)'
+    )
+    
+    parser.add_argument(
+        '-w', '--window',
+        type=int,
+        default=5,
+        help='Zeilenfenster für gemeinsame Auftritte von Charakteren (Standard: 5)'
+    )
+    
+    parser.add_argument(
+        '--scenes',
+        action='store_true',
+        help='Gemeinsame Auftritte pro Szene zählen (Szenenwechsel nach Leerzeilen)'
+    )
+    
+    parser.add_argument(
+        '--exhaustive',
+        action='store_true',
+        help='Vergleicht beim Zusammenführen alle Namenspaare (ohne Blocking-Index)'
+    )
+    
+    parser.add_argument(
+        '--base-words',
+        type=str,
+        default=None,
+        help='JSON-Datei mit Basis-Wörtern für Gegenstände und Orte (Standard: src/utils/base_words.json)'
+    )
+    
+    parser.add_argument(
+        '--incremental',
+        action='store_true',
+        help='Nur neue Dateien analysieren und in die gespeicherten Cluster einordnen (cluster_index.json)'
+    )
+    
+    parser.add_argument(
+        '--phonetic',
+        nargs='?',
+        const='auto',
+        choices=['auto', 'koelner', 'metaphone'],
+        default=None,
+        help='Gleich ausgesprochene Charakternamen zusammenführen (Mayer/Meier); '
+             'auto = Kölner Phonetik, Double Metaphone bei englischen Modellen'
+    )
+    
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=None,
+        help='Prozesse für die Zusammenführung (Standard: Anzahl CPUs, 1 = ohne Prozess-Pool)'
+    )
+    
+    parser.add_argument(
+        '--snapshot',
+        nargs='?',
+        const='',
+        default=None,
+        metavar='DATEI',
+        help='Speichert die vollständige Analyse als Snapshot, der in der App geöffnet werden kann '
+             '(Standard: <Ausgabe>/analysis.swsnap)'
+    )
+    
+    parser.add_argument(
+        '--store',
+        nargs='?',
+        const='',
+        default=None,
+        metavar='DATEI',
+        help='Hält Erwähnungen, Gesprächszüge und Entitäten in einer SQLite-Datenbank statt im '
+             'Arbeitsspeicher, für sehr große Korpora (Standard: <Ausgabe>/entities.sqlite)'
+    )
+    
+    parser.add_argument(
+        '--normalized',
+        action='store_true',
+        help='Schreibt jede Erwähnung nur einmal in mentions.ndjson; die Dateien der Elemente '
+             'verweisen über "mention_ids" darauf (kleinere Ausgabe bei großen Korpora)'
+    )
+    
+    parser.add_argument(
+        '--tables',
+        nargs='?',
+        const='parquet',
+        default=None,
+        choices=['parquet', 'arrow'],
+        help='Schreibt Charaktere, Gegenstände, Orte, Erwähnungen und Dialogzeilen zusätzlich als '
+             'Tabellen nach <Ausgabe>/tables/ (Standard: parquet; arrow = Arrow IPC, benötigt pyarrow)'
+    )
+    
     args = parser.parse_args()
     
     # Setze Logging-Level
@@ -216,13 +504,44 @@ SpaCy-Modell empfohlen: -m de_core_news_md oder -m de_core_news_lg
         print(f"Fehler: Verzeichnis '{input_dir}' existiert nicht!")
         sys.exit(1)
     
+    if args.incremental and args.store is not None:
+        print("Fehler: --incremental und --store können nicht kombiniert werden!")
+        sys.exit(1)
+    
+    # Phonetisches Verfahren passend zur Sprache des Modells
+    phonetic = args.phonetic
+    if phonetic == 'auto':
+        phonetic = 'metaphone' if args.model.startswith('en') else 'koelner'
+    
+    # Snapshot-Datei (ohne Angabe im Ausgabeverzeichnis)
+    snapshot_path = None
+    if args.snapshot is not None:
+        snapshot_path = Path(args.snapshot) if args.snapshot else Path(args.output) / "analysis.swsnap"
+    
+    # Datenbank für Entitäten und Erwähnungen (ohne Angabe im Ausgabeverzeichnis)
+    store_path = None
+    if args.store is not None:
+        store_path = Path(args.store) if args.store else Path(args.output) / "entities.sqlite"
+    
     # Erstelle StoryWeaver-Instanz
     weaver = StoryWeaver(
         input_dir=input_dir,
         output_dir=Path(args.output),
         similarity_threshold=args.threshold,
         spacy_model=args.model,
-        sillytavern_export=args.sillytavern
+        sillytavern_export=args.sillytavern,
+        use_gazetteer=args.gazetteer,
+        cooccurrence_window=args.window,
+        cooccurrence_mode="scene" if args.scenes else "window",
+        use_blocking=not args.exhaustive,
+        base_words_path=Path(args.base_words) if args.base_words else None,
+        incremental=args.incremental,
+        workers=args.workers,
+        phonetic=phonetic,
+        snapshot_path=snapshot_path,
+        store_path=store_path,
+        normalized_export=args.normalized,
+        table_format=args.tables
     )
     
     try:
@@ -19,6 +19,9 @@ pip install --upgrade pip
 # Requirements installieren
 pip install -r requirements.txt
 
+# Optionale Beschleuniger und Exporte (orjson, rapidfuzz, pyarrow, ...)
+pip install -r requirements-optional.txt
+
 # SpaCy Sprachmodell herunterladen
 echo "Lade deutsches SpaCy-Modell herunter..."
 python -m spacy download de_core_news_sm
@@ -0,0 +1,279 @@
+"""
+Kookkurrenz-Matrix für StoryWeaver
+Zählt, wie oft Charakterpaare gemeinsam in einem Zeilenfenster oder einer Szene auftreten
+"""
+import json
+from array import array
+from collections import deque
+from itertools import combinations
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+
+class CooccurrenceMatrix:
+    """
+    Dünn besetzte, symmetrische Paar-Matrix über Charakternamen.
+
+    Während der Extraktion werden Paare nur als 64-Bit-Schlüssel
+    (``kleiner Index << 32 | größerer Index``) in einen Puffer geschrieben.
+    Ist der Puffer voll, wird er mit ``np.unique`` zu (Schlüssel, Gewicht)
+    verdichtet. Der Speicherbedarf hängt damit von der Anzahl verschiedener
+    Paare ab, nicht von der Anzahl der Zeilen oder Charaktere.
+
+    Modi:
+        window: Paare innerhalb von ``window`` aufeinanderfolgenden Zeilennummern
+        scene:  Paare innerhalb einer Szene (einmal pro Szene); eine neue Szene
+                beginnt nach mindestens ``scene_gap`` Leerzeilen
+    """
+
+    MODES = ("window", "scene")
+    VERSION = 1
+
+    def __init__(self, window: int = 5, mode: str = "window", scene_gap: int = 2,
+                 buffer_size: int = 1000000):
+        """
+        Args:
+            window: Fenstergröße in Zeilen (nur Modus "window")
+            mode: "window" oder "scene"
+            scene_gap: Leerzeilen, ab denen eine neue Szene beginnt (nur Modus "scene")
+            buffer_size: Anzahl gepufferter Paare bis zur Verdichtung
+        """
+        if mode not in self.MODES:
+            raise ValueError(f"Unbekannter Kookkurrenz-Modus: {mode}")
+
+        self.window = max(1, window)
+        self.mode = mode
+        self.scene_gap = max(1, scene_gap)
+        self.buffer_size = buffer_size
+
+        # Charaktername <-> Index
+        self.names: List[str] = []
+        self._index: Dict[str, int] = {}
+
+        # Verdichtete Paare und ungeordneter Puffer
+        self._keys = np.empty(0, dtype=np.int64)
+        self._weights = np.empty(0, dtype=np.int64)
+        self._buffer = array('q')
+
+        # Zustand der aktuellen Datei
+        self._current_file: Optional[str] = None
+        self._recent: deque = deque()
+        self._scene: set = set()
+        self._last_line: Optional[int] = None
+
+    def add_line(self, source_file: str, line_number: int, names: Iterable[str]):
+        """Verarbeitet die Charaktere einer Zeile (Zeilen müssen pro Datei aufsteigend kommen)"""
+        if source_file != self._current_file:
+            self._end_file()
+            self._current_file = source_file
+
+        indices = sorted({self._get_index(name) for name in names})
+
+        if self.mode == "scene":
+            if self._last_line is not None and line_number - self._last_line - 1 >= self.scene_gap:
+                self._close_scene()
+            self._scene.update(indices)
+            self._last_line = line_number
+            return
+
+        # Zeilen außerhalb des Fensters verwerfen
+        while self._recent and self._recent[0][0] <= line_number - self.window:
+            self._recent.popleft()
+
+        for first, second in combinations(indices, 2):
+            self._add_pair(first, second)
+        for _, previous in self._recent:
+            for first in previous:
+                for second in indices:
+                    if first != second:
+                        self._add_pair(first, second)
+
+        if indices:
+            self._recent.append((line_number, indices))
+
+    def finish(self):
+        """Schließt die laufende Datei/Szene ab und verdichtet den Puffer"""
+        self._end_file()
+        self._current_file = None
+        self._compact()
+
+    @property
+    def settings(self) -> Tuple:
+        """Einstellungen, unter denen gezählt wurde (nur gleiche Einstellungen lassen sich addieren)"""
+        return (self.mode, self.window if self.mode == "window" else self.scene_gap)
+
+    def update(self, other: 'CooccurrenceMatrix'):
+        """
+        Addiert die Paare einer anderen Matrix (z.B. aus einem Lauf über weitere Dateien)
+
+        Fenster und Szenen enden an Dateigrenzen; über verschiedene Dateien
+        gezählte Matrizen ergeben addiert dasselbe wie ein gemeinsamer Lauf.
+
+        Raises:
+            ValueError: Wenn die Matrizen mit anderen Einstellungen gezählt wurden
+        """
+        if other.settings != self.settings:
+            raise ValueError(f"Gemeinsame Auftritte wurden mit anderen Einstellungen gezählt: "
+                             f"{other.settings} statt {self.settings}")
+        other._compact()
+        if not len(other._keys):
+            return
+        mapping = np.array([self._get_index(name) for name in other.names], dtype=np.int64)
+        first = mapping[other._keys >> 32]
+        second = mapping[other._keys & 0xFFFFFFFF]
+        self._compact()
+        self._add_counts((np.minimum(first, second) << 32) | np.maximum(first, second), other._weights)
+
+    def weight(self, first: str, second: str) -> int:
+        """Gibt die Anzahl gemeinsamer Vorkommen zweier Charaktere zurück"""
+        if first not in self._index or second not in self._index or first == second:
+            return 0
+        self._compact()
+        key = self._pair_key(self._index[first], self._index[second])
+        position = np.searchsorted(self._keys, key)
+        if position < len(self._keys) and self._keys[position] == key:
+            return int(self._weights[position])
+        return 0
+
+    def pairs(self, min_weight: int = 1) -> Iterator[Tuple[str, str, int]]:
+        """Liefert alle Paare mit Gewicht, absteigend nach Gewicht"""
+        self._compact()
+        selected = np.nonzero(self._weights >= min_weight)[0]
+        order = selected[np.argsort(-self._weights[selected], kind="stable")]
+        for key, weight in zip(self._keys[order].tolist(), self._weights[order].tolist()):
+            yield self.names[key >> 32], self.names[key & 0xFFFFFFFF], weight
+
+    def aggregate(self, name_map: Dict[str, str], min_weight: int = 1) -> Dict[Tuple[str, str], int]:
+        """
+        Fasst die Paare auf zusammengeführte Namen zusammen
+
+        Args:
+            name_map: Rohname -> zusammengeführter Name (z.B. inkl. Aliasen)
+            min_weight: Mindestgewicht nach dem Zusammenfassen
+        """
+        aggregated: Dict[Tuple[str, str], int] = {}
+        for first, second, weight in self.pairs():
+            first = name_map.get(first)
+            second = name_map.get(second)
+            if first is None or second is None or first == second:
+                continue
+            pair = (first, second) if first < second else (second, first)
+            aggregated[pair] = aggregated.get(pair, 0) + weight
+
+        return {pair: weight for pair, weight in aggregated.items() if weight >= min_weight}
+
+    def to_scipy(self):
+        """Exportiert die symmetrische Matrix als ``scipy.sparse.csr_matrix`` (optional)"""
+        try:
+            from scipy import sparse
+        except ImportError:
+            raise ImportError("Für den Matrix-Export wird scipy benötigt: pip install scipy")
+
+        self._compact()
+        rows = self._keys >> 32
+        cols = self._keys & 0xFFFFFFFF
+        size = len(self.names)
+        matrix = sparse.coo_matrix(
+            (np.concatenate([self._weights, self._weights]),
+             (np.concatenate([rows, cols]), np.concatenate([cols, rows]))),
+            shape=(size, size)
+        )
+        return matrix.tocsr()
+
+    def __len__(self) -> int:
+        """Anzahl verschiedener Paare"""
+        self._compact()
+        return len(self._keys)
+
+    def to_dict(self) -> Dict:
+        """Konvertiert die verdichteten Paare in ein Dictionary für JSON-Export"""
+        self._compact()
+        return {
+            "mode": self.mode,
+            "window": self.window,
+            "scene_gap": self.scene_gap,
+            "names": self.names,
+            "first": (self._keys >> 32).tolist(),
+            "second": (self._keys & 0xFFFFFFFF).tolist(),
+            "weights": self._weights.tolist()
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'CooccurrenceMatrix':
+        """Erstellt eine Matrix aus einem Dictionary"""
+        matrix = cls(window=data['window'], mode=data['mode'], scene_gap=data['scene_gap'])
+        for name in data['names']:
+            matrix._get_index(name)
+        keys = (np.array(data['first'], dtype=np.int64) << 32) | np.array(data['second'], dtype=np.int64)
+        matrix._add_counts(keys, np.array(data['weights'], dtype=np.int64))
+        return matrix
+
+    def _get_index(self, name: str) -> int:
+        """Gibt den Index eines Namens zurück und legt ihn bei Bedarf an"""
+        index = self._index.get(name)
+        if index is None:
+            index = len(self.names)
+            self._index[name] = index
+            self.names.append(name)
+        return index
+
+    @staticmethod
+    def _pair_key(first: int, second: int) -> int:
+        """Symmetrischer 64-Bit-Schlüssel eines Paares"""
+        if first > second:
+            first, second = second, first
+        return (first << 32) | second
+
+    def _add_pair(self, first: int, second: int):
+        """Schreibt ein Paar in den Puffer"""
+        self._buffer.append(self._pair_key(first, second))
+        if len(self._buffer) >= self.buffer_size:
+            self._compact()
+
+    def _close_scene(self):
+        """Zählt jedes Paar der abgeschlossenen Szene einmal"""
+        for first, second in combinations(sorted(self._scene), 2):
+            self._add_pair(first, second)
+        self._scene = set()
+
+    def _end_file(self):
+        """Setzt den Zustand am Dateiende zurück (Fenster/Szenen enden an Dateigrenzen)"""
+        if self._scene:
+            self._close_scene()
+        self._recent.clear()
+        self._last_line = None
+
+    def _compact(self):
+        """Verdichtet den Puffer in die sortierten (Schlüssel, Gewicht)-Arrays"""
+        if not self._buffer:
+            return
+
+        buffer = np.frombuffer(self._buffer, dtype=np.int64)
+        self._add_counts(buffer, np.ones(len(buffer), dtype=np.int64))
+        self._buffer = array('q')
+
+    def _add_counts(self, keys: np.ndarray, weights: np.ndarray):
+        """Addiert (Schlüssel, Gewicht)-Paare zu den verdichteten Arrays"""
+        keys = np.concatenate([self._keys, keys])
+        weights = np.concatenate([self._weights, weights])
+        self._keys, inverse = np.unique(keys, return_inverse=True)
+        self._weights = np.bincount(inverse.ravel(), weights=weights,
+                                    minlength=len(self._keys)).astype(np.int64)
+
+
+def save_cooccurrence(filepath: Path, matrix: CooccurrenceMatrix):
+    """Speichert die gemeinsamen Auftritte (z.B. output/cooccurrence.json für --incremental)"""
+    data = {"version": CooccurrenceMatrix.VERSION, **matrix.to_dict()}
+    with open(filepath, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+
+
+def load_cooccurrence(filepath: Path) -> CooccurrenceMatrix:
+    """Lädt die mit save_cooccurrence gespeicherten gemeinsamen Auftritte"""
+    with open(filepath, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if data.get('version') != CooccurrenceMatrix.VERSION:
+        raise ValueError(f"Nicht unterstützte Version der gemeinsamen Auftritte: {data.get('version')}")
+    return CooccurrenceMatrix.from_dict(data)
@@ -0,0 +1,124 @@
+"""
+Dialog-Stichproben für StoryWeaver
+Hält pro Sprecher nur die besten Kandidaten für Charakterkarten vor
+"""
+import heapq
+from itertools import count
+from typing import Dict, List, Tuple
+
+from .timeline import ConversationTimeline, TurnRef
+
+
+class DialogSampleHeap:
+    """
+    Begrenzte Heaps mit Beispielzeilen eines einzelnen Sprechers.
+
+    Statt den kompletten Dialogverlauf zu speichern, werden während der
+    Extraktion nur die k besten Kandidaten für die erste Nachricht und für
+    Beispiel-Dialoge (Vorgänger-Zug + Antwort) behalten. Die Heaps enthalten
+    nur Verweise auf die ``ConversationTimeline``; Inhalte und Gesprächspartner
+    werden erst beim Auslesen aufgelöst.
+    """
+
+    # Gewichtung der Zeilentypen (Dialog ist für Karten wertvoller als Aktionen)
+    TYPE_WEIGHTS = {"dialog": 1.0, "action": 0.5}
+
+    # Ab dieser Länge bringt zusätzlicher Text keinen Vorteil mehr
+    IDEAL_LENGTH = 200
+
+    # Mindestlänge für eine sinnvolle erste Nachricht
+    MIN_FIRST_MESSAGE_LENGTH = 20
+
+    def __init__(self, max_first_messages: int = 3, max_examples: int = 4):
+        """
+        Args:
+            max_first_messages: Anzahl der behaltenen Kandidaten für die erste Nachricht
+            max_examples: Anzahl der behaltenen Beispiel-Dialoge
+        """
+        self.max_first_messages = max_first_messages
+        self.max_examples = max_examples
+
+        # Min-Heaps: das schlechteste Element liegt vorne und wird zuerst verdrängt
+        self._first_messages: List[Tuple[float, int, TurnRef]] = []
+        self._examples: List[Tuple[float, int, TurnRef]] = []
+        self._counter = count()
+
+    @classmethod
+    def score_line(cls, content: str, line_type: str) -> float:
+        """Bewertet eine Zeile anhand von Länge und Zeilentyp"""
+        weight = cls.TYPE_WEIGHTS.get(line_type, 0.0)
+        length = len(content)
+
+        # Sehr lange Monologe sind als Beispiel weniger geeignet
+        if length > cls.IDEAL_LENGTH:
+            length = max(cls.IDEAL_LENGTH - (length - cls.IDEAL_LENGTH) // 2, 0)
+
+        return weight * length
+
+    def offer(self, timeline: ConversationTimeline, ref: TurnRef):
+        """
+        Bietet einen Zug des Sprechers als Kandidat an
+
+        Args:
+            timeline: Zeitachse, in der der Zug bereits eingetragen ist
+            ref: Verweis auf den Zug
+        """
+        content = (timeline.content(ref) or "").strip()
+        line_type = timeline.line_type(ref)
+        if not content or line_type != "dialog":
+            return
+
+        score = self.score_line(content, line_type)
+        # Negativer Zähler: bei Gleichstand gewinnt die frühere Zeile
+        order = -next(self._counter)
+
+        if len(content) > self.MIN_FIRST_MESSAGE_LENGTH:
+            self._push(self._first_messages, (score, order, ref), self.max_first_messages)
+
+        previous_ref = timeline.previous_turn(ref)
+        if previous_ref and timeline.speaker(previous_ref) != timeline.speaker(ref):
+            previous_content = (timeline.content(previous_ref) or "").strip()
+            if previous_content:
+                previous_score = self.score_line(previous_content, timeline.line_type(previous_ref))
+                self._push(self._examples, (score + previous_score / 2, order, ref),
+                           self.max_examples)
+
+    @staticmethod
+    def _push(heap: List, entry: Tuple, limit: int):
+        """Fügt einen Eintrag ein und verdrängt ggf. den schlechtesten"""
+        if limit <= 0:
+            return
+        if len(heap) < limit:
+            heapq.heappush(heap, entry)
+        elif entry > heap[0]:
+            heapq.heapreplace(heap, entry)
+
+    def first_messages(self) -> List[TurnRef]:
+        """Gibt die Kandidaten für die erste Nachricht zurück (beste zuerst)"""
+        return [entry[2] for entry in sorted(self._first_messages, reverse=True)]
+
+    def examples(self) -> List[TurnRef]:
+        """Gibt die Antworten der Beispiel-Dialoge zurück (beste zuerst)"""
+        return [entry[2] for entry in sorted(self._examples, reverse=True)]
+
+    def to_dialog_lines(self, timeline: ConversationTimeline) -> List[Dict]:
+        """
+        Wandelt die Stichproben in das Listenformat der Dialog-Daten um.
+
+        Zuerst folgen die Kandidaten für die erste Nachricht, danach die
+        Beispiel-Antworten. Jede Zeile trägt ``sample_role``; Beispiel-Antworten
+        enthalten unter ``reply_to`` den tatsächlichen Vorgänger-Zug der Datei.
+        """
+        lines = []
+        for ref in self.first_messages():
+            lines.append(dict(timeline.turn(ref), sample_role="first_message"))
+
+        for ref in self.examples():
+            line = dict(timeline.turn(ref), sample_role="example")
+            line["reply_to"] = timeline.turn(timeline.previous_turn(ref))
+            lines.append(line)
+
+        return lines
+
+    def __len__(self) -> int:
+        return len(self._first_messages) + len(self._examples)
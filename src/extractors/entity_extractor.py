@@ -3,19 +3,36 @@ Entity-Extractor für StoryWeaver
 Nutzt spaCy und Heuristiken zur Erkennung von Story-Elementen
 """
 import spacy
-from typing import List, Dict, Set, Tuple
+from typing import List, Dict, Optional, Set, Tuple
 import re
 from pathlib import Path
+from datetime import datetime
 
-from ..models import Character, Item, Location
+from ..models import Character, Item, Location, run_timestamp
 from ..parsers.chat_parser import ChatLine, ChatParser
+from .cooccurrence import CooccurrenceMatrix
+from .dialog_samples import DialogSampleHeap
+from .line_view import LineNormalizer, LineView
+from .gazetteer import NameGazetteer
+from .timeline import ConversationTimeline
 
 
 class EntityExtractor:
     """Extrahiert Charaktere, Gegenstände und Orte aus Chat-Verläufen"""
     
-    def __init__(self, spacy_model: str = "de_core_news_sm"):
-        """Initialisiert den Extractor mit einem spaCy-Modell"""
+    def __init__(self, spacy_model: str = "de_core_news_sm",
+                 cooccurrence_window: int = 5, cooccurrence_mode: str = "window",
+                 store=None):
+        """
+        Initialisiert den Extractor mit einem spaCy-Modell
+        
+        Args:
+            spacy_model: SpaCy-Modell für NLP
+            cooccurrence_window: Fenstergröße in Zeilen für gemeinsame Auftritte
+            cooccurrence_mode: "window" (Zeilenfenster) oder "scene" (Szenen)
+            store: Optionaler EntityStore; Erwähnungen und Inhalte der Gesprächszüge
+                   werden dann in die Datenbank geschrieben statt im Speicher gehalten
+        """
         try:
             self.nlp = spacy.load(spacy_model)
             # Erhöhe das Limit für große Texte
@@ -73,6 +90,24 @@ class EntityExtractor:
             'erste', 'zweite', 'dritte', 'letzte', 'nächste'
         }
         
+        # Großgeschriebene Wörter, die im Zwei-Pass-Modus als Nomen gelten und kein NER
+        # auslösen: bekannte Nomen, typische Nomen-Endungen und Wörter nach Begleitern
+        self.noun_lexicon = self.body_and_action_terms.union(
+            *self.item_keywords.values(), *self.location_keywords.values()
+        )
+        self.noun_suffixes = ('ung', 'heit', 'keit', 'schaft', 'tion', 'nis', 'tum', 'chen', 'lein', 'ität')
+        self.determiners = {
+            'der', 'die', 'das', 'den', 'dem', 'des', 'ein', 'eine', 'einen', 'einem', 'einer', 'eines',
+            'kein', 'keine', 'keinen', 'keinem', 'keiner', 'mein', 'meine', 'meinen', 'meinem', 'meiner',
+            'dein', 'deine', 'deinen', 'deinem', 'deiner', 'sein', 'seine', 'seinen', 'seinem', 'seiner',
+            'ihre', 'ihren', 'ihrem', 'ihrer', 'unsere', 'unseren', 'unserem', 'eure', 'euren', 'eurem',
+            'dieser', 'diese', 'dieses', 'diesen', 'diesem', 'jede', 'jeden', 'jedem', 'jeder',
+            'im', 'am', 'ans', 'ins', 'zum', 'zur', 'vom', 'beim'
+        }
+        
+        # Einmal pro Zeile berechnete Normalisierung für alle Analyse-Stufen
+        self.normalizer = LineNormalizer(self.item_keywords, self.location_keywords)
+        
         # Minimale Länge für Entitätsnamen
         self.min_name_length = 3
         
@@ -82,36 +117,70 @@ class EntityExtractor:
         # Maximale Textlänge für SpaCy-Verarbeitung
         self.MAX_TEXT_LENGTH = 1000000
         
-        # Container für extrahierte Entitäten
+        # Ein Zeitstempel für alle in diesem Lauf angelegten und geänderten Elemente
+        # (gilt nur während extract_from_file, spätere Änderungen erhalten die aktuelle Uhrzeit)
+        self.run_timestamp = datetime.now()
+        
+        # Container für extrahierte Entitäten (Erwähnungen ggf. im EntityStore)
+        self.store = store
         self.characters: Dict[str, Character] = {}
         self.items: Dict[str, Item] = {}
         self.locations: Dict[str, Location] = {}
         
-        # Dialog-Daten für SillyTavern-Export
-        self.dialog_data: Dict[str, List[Dict]] = {}
+        # Zeitachse aller Gesprächszüge und begrenzte Stichproben pro Sprecher
+        self.timeline = ConversationTimeline(store)
+        self.dialog_samples: Dict[str, DialogSampleHeap] = {}
+        
+        # Gemeinsame Auftritte von Charakteren (Grundlage für Beziehungskanten)
+        self.cooccurrence = CooccurrenceMatrix(window=cooccurrence_window, mode=cooccurrence_mode)
+        
+        # Namensverzeichnis für den Zwei-Pass-Modus (siehe build_gazetteer)
+        self.gazetteer: NameGazetteer = None
+    
+    def build_gazetteer(self, filepaths: List[Path]) -> NameGazetteer:
+        """
+        Erster Durchlauf des Zwei-Pass-Modus: sammelt alle ausdrücklich genannten
+        Sprecher und baut daraus ein Namensverzeichnis.
+        
+        Im zweiten Durchlauf (extract_from_file) werden bekannte Namen direkt
+        gezählt; NER läuft nur noch für Zeilen mit unbekannten großgeschriebenen
+        Wörtern.
+        """
+        names = set()
+        for filepath in filepaths:
+            parser = ChatParser()
+            parser.parse_file(Path(filepath))
+            names.update(parser.get_speakers(explicit_only=True))
+        
+        self.gazetteer = NameGazetteer.from_names(
+            names, stopwords=self.common_words, min_alias_length=self.min_name_length
+        )
+        print(f"Namensverzeichnis erstellt: {len(self.gazetteer)} Namen und Aliase")
+        return self.gazetteer
     
     def extract_from_file(self, filepath: Path):
         """Extrahiert Entitäten aus einer einzelnen Chat-Datei"""
-        parser = ChatParser()
+        with run_timestamp(self.run_timestamp):
+            self._extract_file(filepath)
+    
+    def _extract_file(self, filepath: Path):
+        """Extraktion einer Datei (mit dem Zeitstempel des Laufs)"""
+        parser = ChatParser(gazetteer=self.gazetteer)
         chat_lines = parser.parse_file(filepath)
         
         # Erst alle Sprecher als potenzielle Charaktere erfassen
         for speaker in parser.get_speakers():
             self._add_character(speaker, f"Spricht in {filepath.name}")
         
-        # Sammle Dialog-Daten für jeden Charakter
+        # Trage Gesprächszüge in die Zeitachse ein und sammle Stichproben
         for line in chat_lines:
             if line.speaker and line.line_type in ["dialog", "action"]:
-                if line.speaker not in self.dialog_data:
-                    self.dialog_data[line.speaker] = []
+                ref = self.timeline.add_turn(str(filepath), line.line_number, line.speaker,
+                                             line.content, line.line_type)
                 
-                self.dialog_data[line.speaker].append({
-                    "speaker": line.speaker,
-                    "content": line.content,
-                    "line_type": line.line_type,
-                    "line_number": line.line_number,
-                    "source_file": str(filepath)
-                })
+                if line.speaker not in self.dialog_samples:
+                    self.dialog_samples[line.speaker] = DialogSampleHeap()
+                self.dialog_samples[line.speaker].offer(self.timeline, ref)
         
         # Verwende Batch-Verarbeitung für große Dateien
         if len(chat_lines) > 1000:
@@ -121,6 +190,9 @@ class EntityExtractor:
             # Bei kleineren Dateien normale Verarbeitung
             for line in chat_lines:
                 self._analyze_line(line, str(filepath))
+        
+        # Fenster und Szenen enden an der Dateigrenze
+        self.cooccurrence.finish()
     
     def _analyze_lines_batch(self, lines: List[ChatLine], source_file: str, batch_size: int = 500):
         """Verarbeitet Zeilen in Batches für bessere Performance bei großen Texten"""
@@ -130,16 +202,18 @@ class EntityExtractor:
         # Verarbeite in Batches
         for i in range(0, len(lines_with_content), batch_size):
             batch = lines_with_content[i:i + batch_size]
+            views = [self._build_view(line) for _, line in batch]
             
-            # Extrahiere Texte für SpaCy
-            texts = [line.content for _, line in batch]
+            # Extrahiere Texte für SpaCy (nur Zeilen, die NER benötigen)
+            texts = [line.content for (_, line), view in zip(batch, views) if self._needs_ner(view)]
             
             # Nutze pipe() für Batch-Verarbeitung
-            docs = list(self.nlp.pipe(texts, batch_size=50, n_process=1))
+            docs = iter(list(self.nlp.pipe(texts, batch_size=50, n_process=1)))
             
-            # Verarbeite Ergebnisse
-            for doc, (idx, line) in zip(docs, batch):
-                self._analyze_doc_and_line(doc, line, source_file)
+            # Verarbeite Ergebnisse in Zeilenreihenfolge
+            for (idx, line), view in zip(batch, views):
+                doc = next(docs) if self._needs_ner(view) else None
+                self._analyze_doc_and_line(doc, line, source_file, view)
                 
             # Gib Speicher frei nach jedem Batch
             if i % (batch_size * 10) == 0 and i > 0:
@@ -147,20 +221,112 @@ class EntityExtractor:
                 gc.collect()
                 print(f"Verarbeitet: {i}/{len(lines_with_content)} Zeilen...")
     
-    def _analyze_doc_and_line(self, doc, line: ChatLine, source_file: str):
-        """Analysiert ein SpaCy-Doc-Objekt zusammen mit der ChatLine"""
+    def _build_view(self, line: ChatLine) -> LineView:
+        """Erstellt die normalisierte Sicht einer Zeile inkl. Treffern bekannter Namen"""
+        view = self.normalizer.build(line.content)
+        if self.gazetteer is not None:
+            view.name_hits = self.gazetteer.find(view.text, view.token_spans)
+        return view
+    
+    def _needs_ner(self, view: LineView) -> bool:
+        """
+        Prüft, ob eine Zeile noch unbekannte Namen für NER enthalten kann
+        
+        Im Deutschen sind alle Nomen großgeschrieben. Ein großgeschriebenes Wort
+        zählt daher nur, wenn es nicht am Satzanfang steht und nicht als Nomen
+        erkannt wird (siehe ``_is_noun``).
+        """
+        if self.gazetteer is None:
+            return True
+        
+        hits = iter(view.name_hits)
+        hit = next(hits, None)
+        spans = view.token_spans
+        for index, (start, end) in enumerate(spans):
+            # Token innerhalb eines bekannten Namens überspringen
+            while hit is not None and hit.end <= start:
+                hit = next(hits, None)
+            if hit is not None and hit.start <= start:
+                continue
+            
+            token = view.text[start:end]
+            if not token[0].isupper() or token.lower() in self.common_words:
+                continue
+            if self._is_sentence_start(view, index) or self._is_noun(view, index):
+                continue
+            return True
+        
+        return False
+    
+    @staticmethod
+    def _is_sentence_start(view: LineView, index: int) -> bool:
+        """Prüft, ob das Token am Anfang der Zeile oder nach einem Satzzeichen steht"""
+        if index == 0:
+            return True
+        gap = view.text[view.token_spans[index - 1][1]:view.token_spans[index][0]]
+        return any(mark in gap for mark in '.!?:;')
+    
+    def _is_noun(self, view: LineView, index: int) -> bool:
+        """
+        Prüft, ob ein großgeschriebenes Token ein Nomen ist: bekanntes Nomen,
+        typische Endung oder ein Begleiter davor (ggf. mit Adjektiven dazwischen,
+        z.B. "die schwere Tür")
+        """
+        spans = view.token_spans
+        token = view.text_lower[spans[index][0]:spans[index][1]]
+        if token in self.noun_lexicon or token.endswith(self.noun_suffixes):
+            return True
+        # Pluralformen bekannter Nomen (z.B. "Seile")
+        if any(token.endswith(ending) and token[:-len(ending)] in self.noun_lexicon
+               for ending in ('e', 'n', 'en', 'er', 's')):
+            return True
+        
+        # Höchstens zwei kleingeschriebene Adjektive zwischen Begleiter und Nomen
+        for previous in range(index - 1, max(index - 4, -1), -1):
+            word = view.text[spans[previous][0]:spans[previous][1]]
+            if word.lower() in self.determiners:
+                return True
+            if not (word.islower() and word.endswith(('e', 'en', 'er', 'es', 'em'))):
+                return False
+        return False
+    
+    def _analyze_doc_and_line(self, doc, line: ChatLine, source_file: str, view: LineView = None):
+        """Analysiert ein SpaCy-Doc-Objekt zusammen mit der ChatLine (doc ist None ohne NER)"""
+        # Normalisierte Sicht einmal berechnen und an alle Stufen weitergeben
+        if view is None:
+            view = self._build_view(line)
+        
+        # Charaktere dieser Zeile (Sprecher und Erwähnungen) für die Kookkurrenz
+        line_characters = set()
+        if line.speaker and line.line_type in ["dialog", "action"]:
+            line_characters.add(self._character_key(line.speaker))
+        
+        # Bekannte Namen direkt zählen
+        for hit in view.name_hits:
+            line_characters.add(self._add_character(hit.name, line.raw_text, source_file, line.line_number))
+        
         # Named Entities verarbeiten
-        for ent in doc.ents:
+        for ent in (doc.ents if doc is not None else ()):
             if ent.label_ == "PER":  # Person
-                self._add_character(ent.text, line.raw_text, source_file, line.line_number)
+                # Bereits über das Namensverzeichnis gezählt
+                if self.gazetteer is not None and ent.text in self.gazetteer:
+                    continue
+                line_characters.add(self._add_character(ent.text, line.raw_text, source_file, line.line_number))
             elif ent.label_ in ["LOC", "GPE"]:  # Location, Geopolitical entity
                 self._add_location(ent.text, line.raw_text, source_file, line.line_number)
         
+        line_characters.discard(None)
+        self.cooccurrence.add_line(source_file, line.line_number, line_characters)
+        
         # Schlüsselwort-basierte Suche für Gegenstände
-        self._extract_items_by_keywords(line, source_file)
+        self._extract_items_by_keywords(line, source_file, view)
         
         # Schlüsselwort-basierte Suche für Orte
-        self._extract_locations_by_keywords(line, source_file)
+        self._extract_locations_by_keywords(line, source_file, view)
+        
+        # Ohne NER-Lauf fehlen die Token-Analysen der folgenden Stufen
+        if doc is None:
+            return
         
         # Besitzbeziehungen erkennen
         self._extract_ownership(doc, line, source_file)
@@ -174,43 +340,59 @@ class EntityExtractor:
         if not line.content:
             return
         
-        # SpaCy-Analyse
-        doc = self.nlp(line.content)
+        # SpaCy-Analyse (im Zwei-Pass-Modus nur bei unbekannten Namen)
+        view = self._build_view(line)
+        doc = self.nlp(line.content) if self._needs_ner(view) else None
         
         # Verwende die gleiche Analyse-Logik
-        self._analyze_doc_and_line(doc, line, source_file)
+        self._analyze_doc_and_line(doc, line, source_file, view)
     
-    def _add_character(self, name: str, context: str, source_file: str = None, line_number: int = None):
-        """Fügt einen Charakter hinzu oder aktualisiert ihn"""
-        name = name.strip()
-        if not name or len(name) < self.min_name_length:
-            return
+    def _character_key(self, name: str) -> Optional[str]:
+        """Gibt den normalisierten Charakternamen zurück oder None, wenn er ungültig ist"""
+        forms = self.normalizer.name_forms(name)
+        if not forms.stripped or len(forms.stripped) < self.min_name_length:
+            return None
         
         # Prüfe auf Common Words
-        if name.lower() in self.common_words:
-            return
+        if forms.lower in self.common_words:
+            return None
         
         # Ignoriere Namen die nur aus Zahlen bestehen
-        if name.isdigit():
-            return
+        if forms.stripped.isdigit():
+            return None
         
         # Normalisiere den Namen (erste Buchstaben groß)
-        name = name.title()
+        return forms.title
+    
+    def _new_entity(self, entity_type: str, entity):
+        """Verbindet ein neues Element mit dem EntityStore (falls vorhanden)"""
+        if self.store is not None:
+            entity.mentions = self.store.mention_list(entity_type, entity.name)
+        return entity
+    
+    def _add_character(self, name: str, context: str, source_file: str = None,
+                       line_number: int = None) -> Optional[str]:
+        """Fügt einen Charakter hinzu oder aktualisiert ihn (gibt den normalisierten Namen zurück)"""
+        name = self._character_key(name)
+        if name is None:
+            return None
         
         if name not in self.characters:
-            self.characters[name] = Character(name=name)
+            self.characters[name] = self._new_entity("characters", Character(name=name))
         
         if source_file:
             self.characters[name].add_mention(context, source_file, line_number)
+        
+        return name
     
     def _add_item(self, name: str, item_type: str, context: str, source_file: str, line_number: int):
         """Fügt einen Gegenstand hinzu oder aktualisiert ihn"""
-        name = name.strip().lower()
+        name = self.normalizer.name_forms(name).lower
         if not name:
             return
         
         if name not in self.items:
-            self.items[name] = Item(name=name)
+            self.items[name] = self._new_entity("items", Item(name=name))
             if item_type:
                 self.items[name].set_type(item_type)
         
@@ -218,68 +400,55 @@ class EntityExtractor:
     
     def _add_location(self, name: str, context: str, source_file: str, line_number: int):
         """Fügt einen Ort hinzu oder aktualisiert ihn"""
-        name = name.strip()
+        forms = self.normalizer.name_forms(name)
         
         # Verwende die neue Validierungsmethode
-        if not self._is_valid_location(name, context):
+        if not self._is_valid_location(forms.stripped, context, forms.lower):
             return
         
-        # Normalisiere den Namen
-        name = name.title()
-        
+        self._store_location(forms.title, context, source_file, line_number)
+    
+    def _store_location(self, name: str, context: str, source_file: str, line_number: int):
+        """Speichert eine Erwähnung für einen bereits validierten, normalisierten Ortsnamen"""
         if name not in self.locations:
-            self.locations[name] = Location(name=name)
+            self.locations[name] = self._new_entity("locations", Location(name=name))
         
         self.locations[name].add_mention(context, source_file, line_number)
     
-    def _extract_items_by_keywords(self, line: ChatLine, source_file: str):
+    def _extract_items_by_keywords(self, line: ChatLine, source_file: str, view: LineView = None):
         """Sucht nach Gegenständen basierend auf Schlüsselwörtern"""
-        text_lower = line.content.lower()
-        
-        for category, keywords in self.item_keywords.items():
-            for keyword in keywords:
-                if keyword in text_lower:
-                    # Präzisere Muster - nur direkte Modifikatoren
-                    patterns = [
-                        rf'\b(\w+\s+{keyword})\b',  # Ein Wort vor dem Keyword
-                        rf'\b({keyword}\s+\w+)\b',  # Ein Wort nach dem Keyword
-                        rf'\b({keyword})\b'          # Nur das Keyword selbst
-                    ]
-                    
-                    for pattern in patterns:
-                        matches = re.finditer(pattern, text_lower)
-                        for match in matches:
-                            item_name = match.group(1).strip()
-                            # Verwende die neue Validierungsmethode
-                            if item_name and self._is_valid_item(item_name, line.content):
-                                self._add_item(item_name, category, line.raw_text, source_file, line.line_number)
-                                break
+        if view is None:
+            view = self.normalizer.build(line.content)
+        
+        # Nur Schlüsselwörter prüfen, die in der Zeile vorkommen
+        for hit in view.item_hits:
+            # Präzisere Muster - nur direkte Modifikatoren
+            for pattern in hit.patterns:
+                for match in pattern.finditer(view.text_lower):
+                    item_name = match.group(1).strip()
+                    # Verwende die neue Validierungsmethode
+                    if item_name and self._is_valid_item(item_name, line.content, item_name):
+                        self._add_item(item_name, hit.category, line.raw_text, source_file, line.line_number)
+                        break
     
-    def _extract_locations_by_keywords(self, line: ChatLine, source_file: str):
+    def _extract_locations_by_keywords(self, line: ChatLine, source_file: str, view: LineView = None):
         """Sucht nach Orten basierend auf Schlüsselwörtern"""
-        text_lower = line.content.lower()
-        
-        for category, keywords in self.location_keywords.items():
-            for keyword in keywords:
-                if keyword in text_lower:
-                    # Präzisere Muster für Orte
-                    patterns = [
-                        rf'\b(\w+\s+{keyword})\b',  # Ein Wort vor dem Keyword
-                        rf'\b({keyword}\s+\w+)\b',  # Ein Wort nach dem Keyword
-                        rf'\b({keyword})\b'          # Nur das Keyword selbst
-                    ]
-                    
-                    for pattern in patterns:
-                        matches = re.finditer(pattern, text_lower)
-                        for match in matches:
-                            location_name = match.group(1).strip()
-                            # Verwende die neue Validierungsmethode
-                            if location_name and self._is_valid_location(location_name, line.content):
-                                self._add_location(location_name.title(), line.raw_text, source_file, line.line_number)
-                                # Setze den Typ
-                                if location_name.title() in self.locations:
-                                    self.locations[location_name.title()].set_type(category)
-                                break
+        if view is None:
+            view = self.normalizer.build(line.content)
+        
+        # Nur Schlüsselwörter prüfen, die in der Zeile vorkommen
+        for hit in view.location_hits:
+            # Präzisere Muster für Orte
+            for pattern in hit.patterns:
+                for match in pattern.finditer(view.text_lower):
+                    location_name = match.group(1).strip()
+                    # Verwende die neue Validierungsmethode
+                    if location_name and self._is_valid_location(location_name, line.content, location_name):
+                        title_name = self.normalizer.name_forms(location_name).title
+                        self._store_location(title_name, line.raw_text, source_file, line.line_number)
+                        # Setze den Typ
+                        self.locations[title_name].set_type(hit.category)
+                        break
     
     def _extract_ownership(self, doc, line: ChatLine, source_file: str):
         """Erkennt Besitzbeziehungen zwischen Charakteren und Gegenständen"""
@@ -325,12 +494,14 @@ class EntityExtractor:
         }
     
     def get_dialog_data(self) -> Dict[str, List[Dict]]:
-        """Gibt die gesammelten Dialog-Daten zurück"""
-        return self.dialog_data 
+        """Gibt die gesammelten Dialog-Stichproben pro Sprecher zurück"""
+        return {speaker: samples.to_dialog_lines(self.timeline)
+                for speaker, samples in self.dialog_samples.items()}
 
-    def _is_valid_item(self, name, text):
+    def _is_valid_item(self, name, text, name_lower=None):
         """Überprüft, ob ein erkannter Gegenstand valide ist"""
-        name_lower = name.lower()
+        if name_lower is None:
+            name_lower = name.lower()
         
         # Zu kurze Namen
         if len(name) < 3:
@@ -359,9 +530,10 @@ class EntityExtractor:
             
         return True
     
-    def _is_valid_location(self, name, text):
+    def _is_valid_location(self, name, text, name_lower=None):
         """Überprüft, ob ein erkannter Ort valide ist"""
-        name_lower = name.lower()
+        if name_lower is None:
+            name_lower = name.lower()
         
         # Zu kurze Namen  
         if len(name) < 3:
@@ -0,0 +1,129 @@
+"""
+Namensverzeichnis (Gazetteer) für StoryWeaver
+Findet bekannte Charakternamen und Aliase ohne NER in einem Durchlauf pro Zeile
+"""
+import re
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+
+class NameHit(NamedTuple):
+    """Ein Treffer eines bekannten Namens im Text"""
+    start: int
+    end: int
+    name: str
+
+
+class NameGazetteer:
+    """
+    Token-Automat über bekannten Namen und Aliasen.
+
+    Die Namen werden als Token-Trie abgelegt. Eine Zeile wird einmal von links
+    nach rechts durchlaufen, an jeder Position wird der längste bekannte Name
+    gewählt. Die Kosten hängen damit nur von der Zeilenlänge ab, nicht von der
+    Anzahl der bekannten Namen.
+    """
+
+    TOKEN_PATTERN = re.compile(r'\w+')
+
+    # Schlüssel für Endzustände im Trie (kann kein Token sein)
+    _END = ''
+
+    def __init__(self):
+        self._root: Dict = {}
+        # Kleingeschriebene Namensform -> kanonischer Name
+        self.names: Dict[str, str] = {}
+
+    def add_name(self, surface: str, canonical: Optional[str] = None):
+        """Fügt einen Namen (oder Alias für ``canonical``) hinzu"""
+        tokens = [token.lower() for token in self.TOKEN_PATTERN.findall(surface)]
+        if not tokens:
+            return
+
+        canonical = canonical or surface.strip()
+        node = self._root
+        for token in tokens:
+            node = node.setdefault(token, {})
+        node[self._END] = canonical
+        self.names[' '.join(tokens)] = canonical
+
+    @classmethod
+    def from_names(cls, names: Iterable[str], stopwords: Set[str] = frozenset(),
+                   min_alias_length: int = 3) -> 'NameGazetteer':
+        """
+        Erstellt ein Verzeichnis aus Namen und leitet eindeutige Vornamen-Aliase ab
+
+        Args:
+            names: Bekannte Namen (z.B. Sprecher aus ``ChatParser.get_speakers``)
+            stopwords: Wörter, die nie als Alias verwendet werden
+            min_alias_length: Minimale Länge eines abgeleiteten Alias
+        """
+        gazetteer = cls()
+        names = sorted(set(name.strip() for name in names if name and name.strip()))
+        for name in names:
+            gazetteer.add_name(name)
+
+        # Vornamen mehrteiliger Namen als Alias, sofern eindeutig
+        first_tokens: Dict[str, Set[str]] = {}
+        for name in names:
+            tokens = cls.TOKEN_PATTERN.findall(name)
+            if len(tokens) > 1:
+                first_tokens.setdefault(tokens[0].lower(), set()).add(name)
+
+        for alias, owners in first_tokens.items():
+            if (len(owners) == 1 and len(alias) >= min_alias_length
+                    and alias not in stopwords and alias not in gazetteer.names):
+                gazetteer.add_name(alias, next(iter(owners)))
+
+        return gazetteer
+
+    def find(self, text: str, token_spans: Optional[List[Tuple[int, int]]] = None) -> List[NameHit]:
+        """
+        Findet alle bekannten Namen im Text (längster Treffer gewinnt)
+
+        Args:
+            text: Originaltext der Zeile
+            token_spans: Bereits berechnete Token-Grenzen (z.B. aus ``LineView``)
+        """
+        if token_spans is None:
+            token_spans = [match.span() for match in self.TOKEN_PATTERN.finditer(text)]
+        tokens = [text[start:end].lower() for start, end in token_spans]
+
+        hits = []
+        i = 0
+        count = len(tokens)
+        while i < count:
+            node = self._root
+            best = None
+            j = i
+            while j < count:
+                node = node.get(tokens[j])
+                if node is None:
+                    break
+                j += 1
+                if self._END in node:
+                    best = (j, node[self._END])
+
+            # Nur großgeschriebene Vorkommen zählen ("Fremder" vs. "ein fremder Mann")
+            if best and text[token_spans[i][0]].isupper():
+                end_index, name = best
+                hits.append(NameHit(token_spans[i][0], token_spans[end_index - 1][1], name))
+                i = end_index
+            else:
+                i += 1
+
+        return hits
+
+    def find_in_text(self, text: str) -> List[NameHit]:
+        """Findet alle bekannten Namen in einem beliebigen Text"""
+        return self.find(text)
+
+    def lookup(self, name: str) -> Optional[str]:
+        """Gibt den kanonischen Namen zurück, wenn der Name bekannt ist"""
+        tokens = [token.lower() for token in self.TOKEN_PATTERN.findall(name)]
+        return self.names.get(' '.join(tokens))
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __contains__(self, name: str) -> bool:
+        return self.lookup(name) is not None
@@ -0,0 +1,105 @@
+"""
+Normalisierte Zeilensicht für StoryWeaver
+Berechnet Kleinschreibung, Token-Grenzen und Schlüsselwort-Treffer einmal pro Zeile
+"""
+import re
+from typing import Dict, List, NamedTuple, Pattern, Tuple
+
+
+class KeywordHit(NamedTuple):
+    """Ein Schlüsselwort, das in der Zeile vorkommt, samt vorkompilierten Mustern"""
+    category: str
+    keyword: str
+    patterns: Tuple[Pattern, ...]
+
+
+class NameForms(NamedTuple):
+    """Normalisierte Formen eines Namens"""
+    stripped: str
+    lower: str
+    title: str
+
+
+class LineView:
+    """Einmal berechnete, normalisierte Sicht auf den Inhalt einer Zeile"""
+
+    __slots__ = ('text', 'text_lower', 'item_hits', 'location_hits', 'name_hits', '_token_spans')
+
+    TOKEN_PATTERN = re.compile(r'\w+')
+
+    def __init__(self, text: str, text_lower: str,
+                 item_hits: List[KeywordHit], location_hits: List[KeywordHit]):
+        self.text = text
+        self.text_lower = text_lower
+        self.item_hits = item_hits
+        self.location_hits = location_hits
+        # Treffer bekannter Namen, wird vom Extractor im Zwei-Pass-Modus gesetzt
+        self.name_hits = []
+        self._token_spans = None
+
+    @property
+    def token_spans(self) -> List[Tuple[int, int]]:
+        """Gibt die Token-Grenzen im Originaltext zurück (erst bei Bedarf berechnet)"""
+        if self._token_spans is None:
+            self._token_spans = [match.span() for match in self.TOKEN_PATTERN.finditer(self.text)]
+        return self._token_spans
+
+    @property
+    def tokens(self) -> List[str]:
+        """Gibt die kleingeschriebenen Tokens der Zeile zurück"""
+        return [self.text[start:end].lower() for start, end in self.token_spans]
+
+
+class LineNormalizer:
+    """
+    Erstellt ``LineView``-Objekte für alle Analyse-Stufen des Extractors.
+
+    Die Schlüsselwort-Muster werden einmalig kompiliert; normalisierte
+    Namensformen werden zwischengespeichert, da dieselben Namen in sehr
+    vielen Zeilen vorkommen.
+    """
+
+    def __init__(self, item_keywords: Dict[str, List[str]],
+                 location_keywords: Dict[str, List[str]]):
+        """
+        Args:
+            item_keywords: Schlüsselwörter für Gegenstände pro Kategorie
+            location_keywords: Schlüsselwörter für Orte pro Kategorie
+        """
+        self.item_keywords = self._compile_keywords(item_keywords)
+        self.location_keywords = self._compile_keywords(location_keywords)
+        # (Schlüsselwort, Treffer)-Paare für die schnelle Vorprüfung in build()
+        self._item_lookup = [(hit.keyword, hit) for hit in self.item_keywords]
+        self._location_lookup = [(hit.keyword, hit) for hit in self.location_keywords]
+        self._name_forms: Dict[str, NameForms] = {}
+
+    @staticmethod
+    def _compile_keywords(keywords: Dict[str, List[str]]) -> List[KeywordHit]:
+        """Kompiliert die Suchmuster für jedes Schlüsselwort"""
+        compiled = []
+        for category, words in keywords.items():
+            for keyword in words:
+                patterns = (
+                    re.compile(rf'\b(\w+\s+{keyword})\b'),  # Ein Wort vor dem Keyword
+                    re.compile(rf'\b({keyword}\s+\w+)\b'),  # Ein Wort nach dem Keyword
+                    re.compile(rf'\b({keyword})\b')          # Nur das Keyword selbst
+                )
+                compiled.append(KeywordHit(category, keyword, patterns))
+        return compiled
+
+    def build(self, text: str) -> LineView:
+        """Erstellt die normalisierte Sicht auf eine Zeile"""
+        # lower() statt casefold(), damit "ß" wie bisher erhalten bleibt
+        text_lower = text.lower()
+        item_hits = [hit for keyword, hit in self._item_lookup if keyword in text_lower]
+        location_hits = [hit for keyword, hit in self._location_lookup if keyword in text_lower]
+        return LineView(text, text_lower, item_hits, location_hits)
+
+    def name_forms(self, name: str) -> NameForms:
+        """Gibt die normalisierten Formen eines Namens zurück (zwischengespeichert)"""
+        forms = self._name_forms.get(name)
+        if forms is None:
+            stripped = name.strip()
+            forms = NameForms(stripped, stripped.lower(), stripped.title())
+            self._name_forms[name] = forms
+        return forms
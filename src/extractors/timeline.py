@@ -0,0 +1,225 @@
+"""
+Gesprächs-Zeitachse für StoryWeaver
+Korpusweiter Index aller Gesprächszüge mit O(1)-Zugriff auf Nachbarzüge
+"""
+import tempfile
+from array import array
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+
+class TurnRef(NamedTuple):
+    """Verweis auf einen Gesprächszug: Datei-ID und Position innerhalb der Datei"""
+    file_id: int
+    position: int
+
+
+class TurnSpillFile:
+    """
+    Auslagerung der Inhalte von Gesprächszügen in eine anonyme temporäre Datei
+
+    Bietet dieselben Methoden wie der ``EntityStore`` für Gesprächszüge. Im
+    Speicher bleiben pro Zug nur Position und Länge des Inhalts (12 Byte);
+    die Datei verschwindet, sobald die Zeitachse freigegeben wird.
+    """
+
+    BATCH_SIZE = 10000
+
+    def __init__(self, batch_size: int = BATCH_SIZE):
+        self.batch_size = max(batch_size, 1)
+        self._file = tempfile.TemporaryFile()
+        self._size = 0
+        # Pro Datei-ID: Position und Länge (in Byte) jedes ausgelagerten Inhalts
+        self._offsets: List[array] = []
+        self._lengths: List[array] = []
+
+    def add_turns(self, rows: Iterable[Tuple[int, int, str]]):
+        """Hängt Inhalte an (Zeilen aus Datei-ID, Position, Inhalt, je Datei in Reihenfolge)"""
+        chunks = []
+        for file_id, position, content in rows:
+            while len(self._offsets) <= file_id:
+                self._offsets.append(array('q'))
+                self._lengths.append(array('i'))
+            if position != len(self._offsets[file_id]):
+                raise ValueError(f"Gesprächszug {position} von Datei {file_id} ist nicht der nächste")
+            data = content.encode("utf-8") if content is not None else b""
+            self._offsets[file_id].append(self._size)
+            # Länge -1 steht für einen fehlenden Inhalt (None)
+            self._lengths[file_id].append(len(data) if content is not None else -1)
+            self._size += len(data)
+            chunks.append(data)
+        self._file.seek(0, 2)
+        self._file.write(b"".join(chunks))
+
+    def turn_content(self, file_id: int, position: int) -> Optional[str]:
+        """Liest den Inhalt eines ausgelagerten Zugs"""
+        length = self._lengths[file_id][position]
+        if length < 0:
+            return None
+        self._file.seek(self._offsets[file_id][position])
+        return self._file.read(length).decode("utf-8")
+
+    def turn_contents(self, file_id: int) -> List[Optional[str]]:
+        """Liest alle ausgelagerten Inhalte einer Datei in Reihenfolge"""
+        if file_id >= len(self._offsets):
+            return []
+        return [self.turn_content(file_id, position) for position in range(len(self._offsets[file_id]))]
+
+
+class ConversationTimeline:
+    """
+    Geordneter Index aller Gesprächszüge (Dialog und Aktionen) pro Datei.
+
+    Pro Datei werden kompakte Arrays mit Zeilennummer, Sprecher-ID und
+    Zeilentyp sowie eine Liste mit Verweisen auf die Inhalte gehalten.
+    Vorheriger und nächster Zug einer Zeile sind damit in konstanter Zeit
+    erreichbar, unabhängig davon, wer gesprochen hat.
+
+    Die Inhalte werden nach jeweils ``batch_size`` Zügen ausgelagert, in den
+    ``EntityStore`` oder ohne ihn in eine temporäre Datei (``TurnSpillFile``).
+    Im Speicher bleiben die Arrays (etwa 9 Byte pro Zug, ohne Datenbank
+    weitere 12 Byte für den Verweis in die Datei) und höchstens ``batch_size``
+    noch nicht ausgelagerte Inhalte.
+    """
+
+    LINE_TYPES = ["dialog", "action"]
+
+    def __init__(self, store=None):
+        """
+        Args:
+            store: Optionaler EntityStore für die Inhalte der Züge (sonst
+                eine temporäre Datei)
+        """
+        self.store = store if store is not None else TurnSpillFile()
+        self.files: List[str] = []
+        self.speakers: List[str] = []
+        self._file_ids: Dict[str, int] = {}
+        self._speaker_ids: Dict[str, int] = {}
+        self._type_ids = {line_type: idx for idx, line_type in enumerate(self.LINE_TYPES)}
+
+        # Spalten pro Datei
+        self._line_numbers: List[array] = []
+        self._speaker_refs: List[array] = []
+        self._line_types: List[array] = []
+        self._contents: List[List[str]] = []
+        # Pro Datei: Anzahl der ausgelagerten Inhalte (sie stehen vor denen in _contents)
+        self._stored: List[int] = []
+        self._pending = 0
+
+    def _file_id(self, source_file: str) -> int:
+        """Gibt die ID einer Datei zurück und legt sie bei Bedarf an"""
+        file_id = self._file_ids.get(source_file)
+        if file_id is None:
+            file_id = len(self.files)
+            self._file_ids[source_file] = file_id
+            self.files.append(source_file)
+            self._line_numbers.append(array('i'))
+            self._speaker_refs.append(array('i'))
+            self._line_types.append(array('b'))
+            self._contents.append([])
+            self._stored.append(0)
+        return file_id
+
+    def _speaker_id(self, speaker: str) -> int:
+        """Gibt die ID eines Sprechers zurück und legt sie bei Bedarf an"""
+        speaker_id = self._speaker_ids.get(speaker)
+        if speaker_id is None:
+            speaker_id = len(self.speakers)
+            self._speaker_ids[speaker] = speaker_id
+            self.speakers.append(speaker)
+        return speaker_id
+
+    def add_turn(self, source_file: str, line_number: int, speaker: str,
+                 content: str, line_type: str) -> TurnRef:
+        """Hängt einen Gesprächszug an die Zeitachse der Datei an"""
+        file_id = self._file_id(source_file)
+        position = len(self._line_numbers[file_id])
+
+        self._line_numbers[file_id].append(line_number)
+        self._speaker_refs[file_id].append(self._speaker_id(speaker))
+        self._line_types[file_id].append(self._type_ids[line_type])
+        self._contents[file_id].append(content)
+
+        self._pending += 1
+        if self._pending >= self.store.batch_size:
+            self._spill()
+
+        return TurnRef(file_id, position)
+
+    def _spill(self):
+        """Lagert die Inhalte aller Dateien aus (EntityStore oder temporäre Datei)"""
+        for file_id, contents in enumerate(self._contents):
+            if contents:
+                start = self._stored[file_id]
+                self.store.add_turns((file_id, start + offset, content)
+                                     for offset, content in enumerate(contents))
+                self._stored[file_id] = start + len(contents)
+                self._contents[file_id] = []
+        self._pending = 0
+
+    def previous_turn(self, ref: TurnRef) -> Optional[TurnRef]:
+        """Gibt den vorherigen Zug derselben Datei zurück"""
+        if ref.position <= 0:
+            return None
+        return TurnRef(ref.file_id, ref.position - 1)
+
+    def next_turn(self, ref: TurnRef) -> Optional[TurnRef]:
+        """Gibt den nächsten Zug derselben Datei zurück"""
+        if ref.position + 1 >= len(self._line_numbers[ref.file_id]):
+            return None
+        return TurnRef(ref.file_id, ref.position + 1)
+
+    def speaker(self, ref: TurnRef) -> str:
+        """Gibt den Sprecher eines Zugs zurück"""
+        return self.speakers[self._speaker_refs[ref.file_id][ref.position]]
+
+    def content(self, ref: TurnRef) -> str:
+        """Gibt den Inhalt eines Zugs zurück"""
+        offset = ref.position - self._stored[ref.file_id]
+        if offset < 0:
+            return self.store.turn_content(ref.file_id, ref.position)
+        return self._contents[ref.file_id][offset]
+
+    def line_type(self, ref: TurnRef) -> str:
+        """Gibt den Zeilentyp eines Zugs zurück"""
+        return self.LINE_TYPES[self._line_types[ref.file_id][ref.position]]
+
+    def turn(self, ref: TurnRef) -> Dict:
+        """Gibt einen Zug im Dialog-Daten-Format zurück"""
+        return {
+            "speaker": self.speaker(ref),
+            "content": self.content(ref),
+            "line_type": self.line_type(ref),
+            "line_number": self._line_numbers[ref.file_id][ref.position],
+            "source_file": self.files[ref.file_id]
+        }
+
+    def turns(self, source_file: str) -> Iterator[TurnRef]:
+        """Iteriert in Reihenfolge über alle Züge einer Datei"""
+        file_id = self._file_ids.get(source_file)
+        if file_id is None:
+            return
+        for position in range(len(self._line_numbers[file_id])):
+            yield TurnRef(file_id, position)
+
+    def file_columns(self) -> Iterator[Dict]:
+        """
+        Iteriert pro Datei über alle Züge als Spalten (z.B. für den Tabellen-Export)
+
+        Jeder Eintrag enthält ``source_file`` sowie gleich lange Spalten
+        ``line_number`` (array), ``speaker``, ``line_type`` und ``content``;
+        ausgelagerte Inhalte werden dateiweise zurückgelesen.
+        """
+        for file_id, source_file in enumerate(self.files):
+            contents = self._contents[file_id]
+            if self._stored[file_id]:
+                contents = self.store.turn_contents(file_id) + contents
+            yield {
+                "source_file": source_file,
+                "line_number": self._line_numbers[file_id],
+                "speaker": list(map(self.speakers.__getitem__, self._speaker_refs[file_id])),
+                "line_type": list(map(self.LINE_TYPES.__getitem__, self._line_types[file_id])),
+                "content": contents
+            }
+
+    def __len__(self) -> int:
+        return sum(len(line_numbers) for line_numbers in self._line_numbers)
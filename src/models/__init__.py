@@ -1,9 +1,11 @@
 """
 StoryWeaver Datenmodelle
 """
-from .base import StoryElement
+from .base import StoryElement, begin_run, end_run, run_timestamp
 from .character import Character
 from .item import Item
 from .location import Location
+from .mentions import MentionList
 
-__all__ = ['StoryElement', 'Character', 'Item', 'Location']
+__all__ = ['StoryElement', 'Character', 'Item', 'Location', 'MentionList', 'begin_run', 'end_run',
+           'run_timestamp']
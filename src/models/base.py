@@ -1,23 +1,137 @@
 """
 Basisklassen für StoryWeaver Datenmodelle
 """
-from typing import Dict, List, Optional, Set
-from dataclasses import dataclass, field
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, Optional, Set
+from dataclasses import dataclass, field, fields
 from datetime import datetime
 import json
 from pathlib import Path
 
+from .mentions import MentionList
 
+
+# Zeitstempel des laufenden Extraktionslaufs (None = aktuelle Uhrzeit bei jedem Aufruf).
+# Als ContextVar gilt er nur im eigenen Thread (z.B. je Streamlit-Sitzung).
+_run_timestamp: ContextVar[Optional[datetime]] = ContextVar("run_timestamp", default=None)
+
+
+def begin_run(timestamp: Optional[datetime] = None) -> datetime:
+    """
+    Legt den Zeitstempel eines Extraktionslaufs fest (bis end_run)
+    
+    Alle danach angelegten oder geänderten Elemente erhalten diesen
+    Zeitstempel, statt bei jeder Erwähnung datetime.now() aufzurufen.
+    """
+    timestamp = timestamp or datetime.now()
+    _run_timestamp.set(timestamp)
+    return timestamp
+
+
+def end_run():
+    """Beendet den Lauf; Elemente erhalten wieder die aktuelle Uhrzeit"""
+    _run_timestamp.set(None)
+
+
+@contextmanager
+def run_timestamp(timestamp: Optional[datetime] = None) -> Iterator[datetime]:
+    """
+    Zeitstempel eines Laufs nur innerhalb des with-Blocks
+    
+    Danach gilt wieder der vorherige Zustand (auch bei verschachtelten Aufrufen).
+    """
+    timestamp = timestamp or datetime.now()
+    token = _run_timestamp.set(timestamp)
+    try:
+        yield timestamp
+    finally:
+        _run_timestamp.reset(token)
+
+
+def _timestamp() -> datetime:
+    """Zeitstempel des laufenden Laufs (ohne Lauf: aktuelle Uhrzeit)"""
+    return _run_timestamp.get() or datetime.now()
+
+
+class LazyCollection:
+    """
+    Sammlung, die erst beim ersten Zugriff angelegt wird.
+    
+    Der Wert liegt im Slot ``_<name>``; ``None`` bedeutet "noch leer". Die
+    Modelle lesen den Slot intern direkt (z.B. ``other._aliases``), damit
+    Zusammenführen und Export für leere Sammlungen nichts anlegen.
+    """
+    
+    def __init__(self, factory: Callable):
+        self.factory = factory
+    
+    def __set_name__(self, owner, name: str):
+        self.slot = f"_{name}"
+    
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+        value = getattr(obj, self.slot)
+        if value is None:
+            value = self.factory()
+            setattr(obj, self.slot, value)
+        return value
+    
+    def __set__(self, obj, value):
+        setattr(obj, self.slot, value)
+
+
+def lazy_field(factory: Callable):
+    """Dataclass-Feld für eine LazyCollection (siehe slotted)"""
+    return field(default=None, metadata={"lazy": factory})
+
+
+def slotted(cls):
+    """
+    Erzeugt eine Dataclass mit ``__slots__`` für ihre eigenen Felder neu
+    
+    Entspricht ``dataclass(slots=True)`` (erst ab Python 3.10). Felder aus
+    lazy_field werden als LazyCollection mit Slot ``_<name>`` angelegt.
+    """
+    own = cls.__dict__.get('__annotations__', {})
+    slots = []
+    namespace = dict(cls.__dict__)
+    for dataclass_field in fields(cls):
+        if dataclass_field.name not in own:
+            continue
+        namespace.pop(dataclass_field.name, None)
+        factory = dataclass_field.metadata.get("lazy")
+        if factory is None:
+            slots.append(dataclass_field.name)
+        else:
+            slots.append(f"_{dataclass_field.name}")
+            namespace[dataclass_field.name] = LazyCollection(factory)
+    namespace['__slots__'] = tuple(slots)
+    namespace.pop('__dict__', None)
+    namespace.pop('__weakref__', None)
+    new_cls = type(cls)(cls.__name__, cls.__bases__, namespace)
+    
+    # super() ohne Argumente verweist über die Zelle __class__ noch auf die alte Klasse
+    for member in namespace.values():
+        function = getattr(member, '__func__', member)
+        for cell in getattr(function, '__closure__', None) or ():
+            if cell.cell_contents is cls:
+                cell.cell_contents = new_cls
+    return new_cls
+
+
+@slotted
 @dataclass
 class StoryElement:
     """Basisklasse für alle Story-Elemente"""
     name: str
     description: str = ""
-    mentions: List[Dict[str, str]] = field(default_factory=list)  # Quellstellen
+    mentions: MentionList = field(default_factory=MentionList)  # Quellstellen
     frequency: int = 0
     source_files: Set[str] = field(default_factory=set)
-    created_at: datetime = field(default_factory=datetime.now)
-    updated_at: datetime = field(default_factory=datetime.now)
+    created_at: datetime = field(default_factory=_timestamp)
+    updated_at: datetime = field(default_factory=_timestamp)
     
     def add_mention(self, text: str, source_file: str, line_number: Optional[int] = None):
         """Fügt eine Erwähnung aus dem Quelltext hinzu"""
@@ -29,7 +143,7 @@ class StoryElement:
         self.mentions.append(mention)
         self.source_files.add(source_file)
         self.frequency += 1
-        self.updated_at = datetime.now()
+        self.updated_at = _timestamp()
     
     def merge_with(self, other: 'StoryElement'):
         """Führt dieses Element mit einem anderen zusammen"""
@@ -40,11 +154,28 @@ class StoryElement:
             else:
                 self.description = other.description
         
-        # Erwähnungen und Quellen zusammenführen
+        # Erwähnungen (nur Referenzen auf die Blöcke) und Quellen zusammenführen
         self.mentions.extend(other.mentions)
         self.source_files.update(other.source_files)
         self.frequency += other.frequency
-        self.updated_at = datetime.now()
+        self.updated_at = _timestamp()
+    
+    def _flat_mentions(self) -> List[Dict[str, str]]:
+        """Erwähnungen als Liste (MentionList wird erst hier zusammengefügt)"""
+        if isinstance(self.mentions, MentionList):
+            return self.mentions.flatten()
+        return list(self.mentions)
+    
+    @staticmethod
+    def _extend_unique(target: List[str], values: List[str]):
+        """Hängt nicht leere Werte ohne Duplikate an (Set statt Listensuche pro Wert)"""
+        if not values:
+            return
+        seen = set(target)
+        for value in values:
+            if value and value not in seen:
+                target.append(value)
+                seen.add(value)
     
     def to_dict(self) -> Dict:
         """Konvertiert das Objekt in ein Dictionary für JSON-Export"""
@@ -53,16 +184,20 @@ class StoryElement:
             "description": self.description,
             "frequency": self.frequency,
             "source_files": list(self.source_files),
-            "mentions": self.mentions,
+            "mentions": self._flat_mentions(),
             "created_at": self.created_at.isoformat(),
             "updated_at": self.updated_at.isoformat()
         }
     
+    @staticmethod
+    def json_filename(name: str) -> str:
+        """Dateiname der JSON-Datei eines Elements"""
+        # Dateiname aus Name generieren (lowercase, Leerzeichen durch Unterstriche ersetzen)
+        return name.lower().replace(" ", "_").replace("/", "_") + ".json"
+    
     def save_to_json(self, output_dir: Path):
         """Speichert das Element als JSON-Datei"""
-        # Dateiname aus Name generieren (lowercase, Leerzeichen durch Unterstriche ersetzen)
-        filename = self.name.lower().replace(" ", "_").replace("/", "_") + ".json"
-        filepath = output_dir / filename
+        filepath = output_dir / self.json_filename(self.name)
         
         # Verzeichnis erstellen, falls nicht vorhanden
         output_dir.mkdir(parents=True, exist_ok=True)
@@ -79,7 +214,7 @@ class StoryElement:
             description=data.get('description', ''),
             frequency=data.get('frequency', 0)
         )
-        obj.mentions = data.get('mentions', [])
+        obj.mentions = MentionList(data.get('mentions', []))
         obj.source_files = set(data.get('source_files', []))
         
         # Datumsfelder konvertieren
@@ -2,19 +2,21 @@
 Charakter-Modell für StoryWeaver
 """
 from typing import List, Set, Dict
-from dataclasses import dataclass, field
-from .base import StoryElement
+from dataclasses import dataclass
+from .base import StoryElement, lazy_field, slotted
+from .mentions import MentionList
 
 
+@slotted
 @dataclass
 class Character(StoryElement):
     """Repräsentiert einen Charakter in der Geschichte"""
     
-    # Zusätzliche charakter-spezifische Attribute
-    behaviors: List[str] = field(default_factory=list)  # Verhaltensweisen
-    items: Set[str] = field(default_factory=set)  # Besessene/genutzte Gegenstände
-    relationships: Dict[str, str] = field(default_factory=dict)  # Beziehungen zu anderen Charakteren
-    aliases: Set[str] = field(default_factory=set)  # Alternative Namen/Bezeichnungen
+    # Zusätzliche charakter-spezifische Attribute (Sammlungen erst beim ersten Zugriff angelegt)
+    behaviors: List[str] = lazy_field(list)  # Verhaltensweisen
+    items: Set[str] = lazy_field(set)  # Besessene/genutzte Gegenstände
+    relationships: Dict[str, str] = lazy_field(dict)  # Beziehungen zu anderen Charakteren
+    aliases: Set[str] = lazy_field(set)  # Alternative Namen/Bezeichnungen
     
     def add_behavior(self, behavior: str):
         """Fügt eine Verhaltensweise hinzu"""
@@ -36,30 +38,36 @@ class Character(StoryElement):
         if alias and alias != self.name:
             self.aliases.add(alias)
     
+    def all_names(self) -> Set[str]:
+        """Name und alle Aliase (ohne die Alias-Menge anzulegen)"""
+        return {self.name, *(self._aliases or ())}
+    
     def merge_with(self, other: 'Character'):
         """Führt diesen Charakter mit einem anderen zusammen"""
         # Basis-Merge aufrufen
         super().merge_with(other)
         
-        # Charakter-spezifische Attribute zusammenführen
-        for behavior in other.behaviors:
-            self.add_behavior(behavior)
-        
-        self.items.update(other.items)
-        self.aliases.update(other.aliases)
+        # Charakter-spezifische Attribute zusammenführen (leere Sammlungen nicht anlegen)
+        if other._behaviors:
+            self._extend_unique(self.behaviors, other._behaviors)
+        if other._items:
+            self.items.update(other._items)
+        if other._aliases:
+            self.aliases.update(other._aliases)
         
         # Beziehungen zusammenführen (neuere überschreiben ältere)
-        self.relationships.update(other.relationships)
+        if other._relationships:
+            self.relationships.update(other._relationships)
     
     def to_dict(self) -> Dict:
         """Konvertiert den Charakter in ein Dictionary"""
         data = super().to_dict()
         data.update({
             "type": "character",
-            "behaviors": self.behaviors,
-            "items": list(self.items),
-            "relationships": self.relationships,
-            "aliases": list(self.aliases)
+            "behaviors": self._behaviors or [],
+            "items": list(self._items or ()),
+            "relationships": self._relationships or {},
+            "aliases": list(self._aliases or ())
         })
         return data
     
@@ -72,7 +80,7 @@ class Character(StoryElement):
         )
         
         # Basis-Attribute laden
-        char.mentions = data.get('mentions', [])
+        char.mentions = MentionList(data.get('mentions', []))
         char.source_files = set(data.get('source_files', []))
         char.frequency = data.get('frequency', 0)
         
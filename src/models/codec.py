@@ -0,0 +1,311 @@
+"""
+Codec für StoryWeaver-Modelle
+Kodiert Story-Elemente schemabasiert und in großen Mengen in JSON-Bytes (orjson, sonst json)
+"""
+import json
+from collections import deque
+from dataclasses import MISSING, fields
+from datetime import datetime
+from operator import attrgetter
+from typing import (Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple, Type, Union,
+                    get_type_hints)
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+from .base import LazyCollection, StoryElement
+from .character import Character
+from .item import Item
+from .location import Location
+from .mentions import MentionList
+
+# Typkennung im JSON ("type") -> Modellklasse
+MODEL_TYPES: Dict[str, Type[StoryElement]] = {"character": Character, "item": Item, "location": Location}
+
+# Reihenfolge der Basisfelder wie in StoryElement.to_dict
+BASE_FIELDS = ("name", "description", "frequency", "source_files", "mentions", "created_at", "updated_at")
+
+
+def dumps(data: Any, indent: bool = False) -> bytes:
+    """Kodiert JSON-kompatible Daten als UTF-8-Bytes (orjson, falls installiert)"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 if indent else 0)
+    return json.dumps(data, ensure_ascii=False, indent=2 if indent else None).encode('utf-8')
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """Dekodiert JSON-Bytes oder -Text (orjson, falls installiert)"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class Schema:
+    """
+    Kodier- und Dekodierfunktionen einer Modellklasse.
+
+    Die Felder werden aus den Dataclass-Feldern und ihren Typen abgeleitet
+    (Set, List, Dict, MentionList, datetime). Daraus wird - wie bei
+    ``dataclasses`` selbst - pro Klasse je eine Python-Funktion erzeugt, die
+    alle Felder ohne Schleife und Typprüfung liest bzw. setzt. Die Ausgabe
+    entspricht ``to_dict`` (gleiche Schlüssel in gleicher Reihenfolge).
+    """
+
+    def __init__(self, model: Type[StoryElement], type_name: str):
+        self.model = model
+        self.type_name = type_name
+        hints = get_type_hints(model)
+        by_name = {field.name: field for field in fields(model)}
+        own = [name for name in by_name if name not in BASE_FIELDS]
+        self.fields = [(by_name[name], self._kind(hints[name])) for name in BASE_FIELDS + tuple(own)]
+        self.encode = self._build_encoder()
+        self._encoders: Dict[FrozenSet[str], Callable] = {frozenset(): self.encode}
+        self._decoders: Dict[FrozenSet[str], Callable] = {}
+
+    @staticmethod
+    def _kind(hint) -> str:
+        """Art eines Feldes aus seinem Typ"""
+        if hint is MentionList:
+            return "mentions"
+        if hint is datetime:
+            return "datetime"
+        origin = getattr(hint, '__origin__', None)
+        return {set: "set", list: "list", dict: "dict"}.get(origin, "value")
+
+    def _is_lazy(self, name: str) -> bool:
+        return isinstance(getattr(self.model, name, None), LazyCollection)
+
+    def slot(self, name: str) -> str:
+        """Slot, in dem ein Feld gespeichert ist (bei Lazy-Feldern "_<name>", leer = None)"""
+        return f"_{name}" if self._is_lazy(name) else name
+
+    def encoder(self, skip: FrozenSet[str] = frozenset()) -> Callable[[StoryElement], Dict]:
+        """Funktion Element -> Dictionary; Felder in ``skip`` fehlen im Ergebnis"""
+        encode = self._encoders.get(skip)
+        if encode is None:
+            encode = self._encoders[skip] = self._build_encoder(skip)
+        return encode
+
+    def _build_encoder(self, skip: FrozenSet[str] = frozenset()) -> Callable[[StoryElement], Dict]:
+        """Erzeugt die Funktion Element -> Dictionary"""
+        lines = []
+        for field, kind in self.fields:
+            name = field.name
+            if name in skip:
+                if name == BASE_FIELDS[-1]:
+                    lines.append(f"        'type': {self.type_name!r},")
+                continue
+            lazy = self._is_lazy(name)
+            attribute = f"e._{name}" if lazy else f"e.{name}"
+            expression = {
+                "mentions": "e._flat_mentions()",
+                "datetime": f"{attribute}.isoformat()",
+                "set": f"list({attribute} or ())" if lazy else f"list({attribute})",
+                "list": f"{attribute} or []" if lazy else attribute,
+                "dict": f"{attribute} or {{}}" if lazy else attribute,
+            }.get(kind, attribute)
+            lines.append(f"        {name!r}: {expression},")
+            if name == BASE_FIELDS[-1]:
+                lines.append(f"        'type': {self.type_name!r},")
+        source = "def encode(e):\n    return {\n" + "\n".join(lines) + "\n    }\n"
+        namespace: Dict[str, Any] = {}
+        exec(source, {}, namespace)
+        return namespace['encode']
+
+    def decoder(self, skip: FrozenSet[str] = frozenset()) -> Callable[[Dict], StoryElement]:
+        """Funktion Dictionary -> Element; Felder in ``skip`` erhalten ihren Standardwert"""
+        decode = self._decoders.get(skip)
+        if decode is None:
+            decode = self._decoders[skip] = self._build_decoder(skip)
+        return decode
+
+    def _build_decoder(self, skip: FrozenSet[str]) -> Callable[[Dict], StoryElement]:
+        """Erzeugt die Funktion Dictionary -> Element (ohne __init__ und Standard-Fabriken)"""
+        scope: Dict[str, Any] = {"model": self.model, "MentionList": MentionList,
+                                 "fromisoformat": datetime.fromisoformat}
+        lines = ["    e = model.__new__(model)"]
+        for field, kind in self.fields:
+            name = field.name
+            if self._is_lazy(name):
+                convert = "set(v)" if kind == "set" else "v"
+                value = "None" if name in skip else f"{convert} if v else None"
+                lines.append(f"    v = r.get({name!r})")
+                lines.append(f"    e._{name} = {value}")
+                continue
+
+            # Standardwert des Feldes (Konstante oder Fabrik)
+            if field.default is not MISSING:
+                scope[f"default_{name}"] = field.default
+                default = f"default_{name}"
+            else:
+                scope[f"factory_{name}"] = field.default_factory
+                default = f"factory_{name}()"
+            if name == "name" or name not in skip:
+                convert = {
+                    "mentions": "MentionList(r[{0!r}])",
+                    "datetime": "fromisoformat(r[{0!r}])",
+                    "set": "set(r[{0!r}])",
+                    "list": "list(r[{0!r}])",
+                    "dict": "dict(r[{0!r}])",
+                }.get(kind, "r[{0!r}]").format(name)
+                value = convert if name == "name" else f"{convert} if {name!r} in r else {default}"
+            else:
+                value = default
+            lines.append(f"    e.{name} = {value}")
+        source = "def decode(r):\n" + "\n".join(lines) + "\n    return e\n"
+        namespace: Dict[str, Any] = {}
+        exec(source, scope, namespace)
+        return namespace['decode']
+
+
+SCHEMAS: Dict[Type[StoryElement], Schema] = {model: Schema(model, type_name)
+                                             for type_name, model in MODEL_TYPES.items()}
+
+
+def _schema(model: Type[StoryElement]) -> Schema:
+    """Schema einer Modellklasse (auch für Unterklassen der drei Modelle)"""
+    schema = SCHEMAS.get(model)
+    if schema is None:
+        base = next((known for known in MODEL_TYPES.values() if issubclass(model, known)), None)
+        if base is None:
+            raise TypeError(f"Kein Schema für {model.__name__}")
+        schema = SCHEMAS[model] = Schema(model, SCHEMAS[base].type_name)
+    return schema
+
+
+def to_record(entity: StoryElement, skip: Iterable[str] = ()) -> Dict:
+    """
+    Element -> Dictionary (wie to_dict)
+
+    Args:
+        entity: Element
+        skip: Nicht benötigte Felder (z.B. "mentions"), die im Ergebnis fehlen
+    """
+    if not skip:
+        return _schema(type(entity)).encode(entity)
+    return _schema(type(entity)).encoder(frozenset(skip))(entity)
+
+
+def from_record(record: Dict, model: Optional[Type[StoryElement]] = None,
+                skip: Iterable[str] = ()) -> StoryElement:
+    """
+    Dictionary -> Element
+
+    Args:
+        record: Dictionary aus to_dict bzw. to_record
+        model: Modellklasse (Standard: nach dem Schlüssel "type")
+        skip: Nicht benötigte Felder (z.B. "mentions"), die ihren Standardwert erhalten
+    """
+    model = model or MODEL_TYPES[record["type"]]
+    return _schema(model).decoder(frozenset(skip))(record)
+
+
+def record_fields(model: Type[StoryElement], skip: Iterable[str] = ()) -> List[Tuple[str, str]]:
+    """
+    Felder eines Records als (Name, Art) in der Reihenfolge von to_record (ohne "type")
+
+    Art ist "datetime", "set", "list", "dict", "mentions" oder "value".
+    """
+    skip = frozenset(skip)
+    return [(field.name, kind) for field, kind in _schema(model).fields if field.name not in skip]
+
+
+def encode_entity(entity: StoryElement, indent: bool = False) -> bytes:
+    """Kodiert ein Element als JSON-Bytes"""
+    return dumps(to_record(entity), indent)
+
+
+def encode_entities(entities: Iterable[StoryElement], indent: bool = False) -> bytes:
+    """Kodiert viele Elemente als JSON-Array in einem Aufruf des Encoders"""
+    return dumps([to_record(entity) for entity in entities], indent)
+
+
+def encode_mapping(entities: Dict[str, StoryElement], indent: bool = False) -> bytes:
+    """Kodiert ein Dictionary Name -> Element als JSON-Objekt"""
+    return dumps({name: to_record(entity) for name, entity in entities.items()}, indent)
+
+
+def decode_entities(data: Union[bytes, str], model: Optional[Type[StoryElement]] = None,
+                    skip: Iterable[str] = ()) -> List[StoryElement]:
+    """Dekodiert ein JSON-Array aus encode_entities (Argumente wie from_record)"""
+    skip = frozenset(skip)
+    records = loads(data)
+    if model is not None:
+        decode = _schema(model).decoder(skip)
+        return [decode(record) for record in records]
+    return [from_record(record, skip=skip) for record in records]
+
+
+def encode_columns(entities: Sequence[StoryElement], model: Type[StoryElement]) -> Dict[str, List]:
+    """
+    Elemente -> Spalten (Feldname -> Liste der Werte) für große Mengen
+
+    Spalten lassen sich schneller kodieren und dekodieren als ein
+    Dictionary pro Element. Erwähnungen sind nicht enthalten (der Aufrufer
+    speichert sie, siehe AnalysisSnapshot). Leere Sammlungen werden als None
+    kodiert, Zeitstempel als Indizes in die Tabelle "<Feld>_table" ihrer
+    verschiedenen Werte (meist einer pro Extraktionslauf).
+    """
+    schema = _schema(model)
+    columns: Dict[str, List] = {}
+    for field, kind in schema.fields:
+        if kind == "mentions":
+            continue
+        name = field.name
+        values = list(map(attrgetter(schema.slot(name)), entities))
+        if kind == "datetime":
+            table: Dict[datetime, int] = {}
+            columns[name] = [table.setdefault(value, len(table)) for value in values]
+            columns[f"{name}_table"] = [value.isoformat() for value in table]
+        elif kind == "set":
+            columns[name] = [list(value) if value else None for value in values]
+        elif kind in ("list", "dict"):
+            columns[name] = [value or None for value in values]
+        else:
+            columns[name] = values
+    return columns
+
+
+def decode_columns(columns: Dict[str, List], model: Type[StoryElement],
+                   mentions: Sequence[MentionList]) -> List[StoryElement]:
+    """
+    Spalten aus encode_columns -> Elemente (ohne __init__ und Standard-Fabriken)
+
+    Args:
+        columns: Spalten (fehlende Felder erhalten ihren Standardwert)
+        model: Modellklasse
+        mentions: Erwähnungen pro Element (bestimmt auch die Anzahl der Elemente)
+    """
+    schema = _schema(model)
+    entities = [model.__new__(model) for _ in range(len(mentions))]
+    for field, kind in schema.fields:
+        name = field.name
+        lazy = schema._is_lazy(name)
+        column = columns.get(name)
+        if kind == "mentions":
+            values = mentions
+        elif column is None:
+            if lazy:
+                values = [None] * len(entities)
+            elif field.default is not MISSING:
+                values = [field.default] * len(entities)
+            else:
+                values = [field.default_factory() for _ in entities]
+        elif kind == "datetime":
+            table = [datetime.fromisoformat(value) for value in columns[f"{name}_table"]]
+            values = list(map(table.__getitem__, column))
+        elif kind == "set":
+            values = [set(value) if value else (None if lazy else set()) for value in column]
+        elif kind == "list":
+            values = column if lazy else [value or [] for value in column]
+        elif kind == "dict":
+            values = column if lazy else [value or {} for value in column]
+        else:
+            values = column
+
+        # Direkt über den Slot-Deskriptor setzen (Schleife in C, ohne Typprüfung)
+        deque(map(getattr(model, schema.slot(name)).__set__, entities, values), maxlen=0)
+    return entities
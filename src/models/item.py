@@ -2,18 +2,20 @@
 Gegenstand-Modell für StoryWeaver
 """
 from typing import Set, Dict, Optional
-from dataclasses import dataclass, field
-from .base import StoryElement
+from dataclasses import dataclass
+from .base import StoryElement, lazy_field, slotted
+from .mentions import MentionList
 
 
+@slotted
 @dataclass
 class Item(StoryElement):
     """Repräsentiert einen Gegenstand in der Geschichte"""
     
     # Zusätzliche item-spezifische Attribute
     item_type: Optional[str] = None  # Typ oder Funktion (z.B. Waffe, Werkzeug, Schmuck)
-    owners: Set[str] = field(default_factory=set)  # Charaktere, die den Gegenstand besitzen/nutzen
-    properties: Dict[str, str] = field(default_factory=dict)  # Eigenschaften (z.B. magisch, verzaubert)
+    owners: Set[str] = lazy_field(set)  # Charaktere, die den Gegenstand besitzen/nutzen
+    properties: Dict[str, str] = lazy_field(dict)  # Eigenschaften (z.B. magisch, verzaubert)
     location: Optional[str] = None  # Wo der Gegenstand sich befindet
     
     def add_owner(self, character_name: str):
@@ -48,8 +50,10 @@ class Item(StoryElement):
             # Bei unterschiedlichen Typen beide behalten
             self.item_type = f"{self.item_type} / {other.item_type}"
         
-        self.owners.update(other.owners)
-        self.properties.update(other.properties)
+        if other._owners:
+            self.owners.update(other._owners)
+        if other._properties:
+            self.properties.update(other._properties)
         
         if other.location:
             self.location = other.location
@@ -60,8 +64,8 @@ class Item(StoryElement):
         data.update({
             "type": "item",
             "item_type": self.item_type,
-            "owners": list(self.owners),
-            "properties": self.properties,
+            "owners": list(self._owners or ()),
+            "properties": self._properties or {},
             "location": self.location
         })
         return data
@@ -75,7 +79,7 @@ class Item(StoryElement):
         )
         
         # Basis-Attribute laden
-        item.mentions = data.get('mentions', [])
+        item.mentions = MentionList(data.get('mentions', []))
         item.source_files = set(data.get('source_files', []))
         item.frequency = data.get('frequency', 0)
         
@@ -2,21 +2,23 @@
 Ort-Modell für StoryWeaver
 """
 from typing import List, Set, Dict, Optional
-from dataclasses import dataclass, field
-from .base import StoryElement
+from dataclasses import dataclass
+from .base import StoryElement, lazy_field, slotted
+from .mentions import MentionList
 
 
+@slotted
 @dataclass
 class Location(StoryElement):
     """Repräsentiert einen Ort in der Geschichte"""
     
     # Zusätzliche ort-spezifische Attribute
     location_type: Optional[str] = None  # Art des Orts (Stadt, Ruine, Raum, Planet)
-    atmosphere: List[str] = field(default_factory=list)  # Stimmung/Atmosphäre
+    atmosphere: List[str] = lazy_field(list)  # Stimmung/Atmosphäre
     significance: Optional[str] = None  # Bedeutung innerhalb der Geschichte
-    connected_locations: Set[str] = field(default_factory=set)  # Verbundene Orte
-    inhabitants: Set[str] = field(default_factory=set)  # Bewohner/häufige Besucher
-    features: List[str] = field(default_factory=list)  # Besondere Merkmale
+    connected_locations: Set[str] = lazy_field(set)  # Verbundene Orte
+    inhabitants: Set[str] = lazy_field(set)  # Bewohner/häufige Besucher
+    features: List[str] = lazy_field(list)  # Besondere Merkmale
     
     def set_type(self, location_type: str):
         """Setzt den Typ des Ortes"""
@@ -60,16 +62,17 @@ class Location(StoryElement):
             # Bei unterschiedlichen Typen beide behalten
             self.location_type = f"{self.location_type} / {other.location_type}"
         
-        # Listen zusammenführen ohne Duplikate
-        for mood in other.atmosphere:
-            self.add_atmosphere(mood)
-        
-        for feature in other.features:
-            self.add_feature(feature)
+        # Listen zusammenführen ohne Duplikate (leere Sammlungen nicht anlegen)
+        if other._atmosphere:
+            self._extend_unique(self.atmosphere, other._atmosphere)
+        if other._features:
+            self._extend_unique(self.features, other._features)
         
         # Sets zusammenführen
-        self.connected_locations.update(other.connected_locations)
-        self.inhabitants.update(other.inhabitants)
+        if other._connected_locations:
+            self.connected_locations.update(other._connected_locations)
+        if other._inhabitants:
+            self.inhabitants.update(other._inhabitants)
         
         # Bedeutung zusammenführen
         if other.significance:
@@ -84,11 +87,11 @@ class Location(StoryElement):
         data.update({
             "type": "location",
             "location_type": self.location_type,
-            "atmosphere": self.atmosphere,
+            "atmosphere": self._atmosphere or [],
             "significance": self.significance,
-            "connected_locations": list(self.connected_locations),
-            "inhabitants": list(self.inhabitants),
-            "features": self.features
+            "connected_locations": list(self._connected_locations or ()),
+            "inhabitants": list(self._inhabitants or ()),
+            "features": self._features or []
         })
         return data
     
@@ -101,7 +104,7 @@ class Location(StoryElement):
         )
         
         # Basis-Attribute laden
-        location.mentions = data.get('mentions', [])
+        location.mentions = MentionList(data.get('mentions', []))
         location.source_files = set(data.get('source_files', []))
         location.frequency = data.get('frequency', 0)
         
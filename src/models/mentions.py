@@ -0,0 +1,135 @@
+"""
+Erwähnungslisten für StoryWeaver
+Verkettet die Erwähnungen zusammengeführter Elemente, ohne sie zu kopieren
+"""
+from itertools import chain, islice
+from typing import Dict, Iterable, Iterator, List, Optional
+
+
+class MentionList:
+    """
+    Erwähnungen eines Story-Elements als Kette von Blöcken.
+
+    Neue Erwähnungen landen in einem offenen Block. ``extend`` mit einer
+    anderen MentionList versiegelt die offenen Blöcke beider Listen und
+    übernimmt nur die Referenzen auf deren Blöcke - die Erwähnungen selbst
+    werden nicht kopiert. Versiegelte Blöcke werden nie mehr verändert und
+    können daher von beliebig vielen Listen geteilt werden; spätere
+    ``append``-Aufrufe schreiben in einen neuen offenen Block (Copy-on-Write).
+    Erst ``flatten`` (Export, Anzeige) kopiert die Erwähnungen in eine Liste.
+    """
+
+    __slots__ = ('_chunks', '_tail', '_length')
+
+    # Ab so vielen Blöcken werden kleine Blöcke beim Verketten zusammengefasst
+    MAX_CHUNKS = 256
+
+    def __init__(self, mentions: Optional[Iterable[Dict]] = None):
+        self._chunks: List[List[Dict]] = []
+        self._tail: List[Dict] = list(mentions) if mentions is not None else []
+        self._length = len(self._tail)
+
+    @classmethod
+    def wrap(cls, mentions: List[Dict]) -> 'MentionList':
+        """Übernimmt eine Liste als offenen Block, ohne sie zu kopieren (z.B. beim Laden)"""
+        result = cls.__new__(cls)
+        result._chunks = []
+        result._tail = mentions
+        result._length = len(mentions)
+        return result
+
+    @classmethod
+    def from_chunks(cls, chunks: List) -> 'MentionList':
+        """Übernimmt versiegelte Blöcke (z.B. Blöcke, die ihre Erwähnungen erst beim Lesen laden)"""
+        result = cls.__new__(cls)
+        result._chunks = [chunk for chunk in chunks if len(chunk)]
+        result._tail = []
+        result._length = sum(map(len, result._chunks))
+        return result
+
+    def append(self, mention: Dict):
+        """Fügt eine Erwähnung an"""
+        self._tail.append(mention)
+        self._length += 1
+
+    def extend(self, mentions: Iterable[Dict]):
+        """Hängt Erwähnungen an; andere MentionLists werden nur referenziert"""
+        if not isinstance(mentions, MentionList):
+            for mention in mentions:
+                self.append(mention)
+            return
+        if not mentions._length:
+            return
+
+        self._seal()
+        mentions._seal()
+        self._chunks.extend(mentions._chunks)
+        self._length += mentions._length
+        if len(self._chunks) > self.MAX_CHUNKS:
+            self._compact()
+
+    def flatten(self) -> List[Dict]:
+        """Gibt alle Erwähnungen als neue Liste zurück (für Export und Anzeige)"""
+        result: List[Dict] = []
+        for chunk in self._chunks:
+            result.extend(chunk)
+        result.extend(self._tail)
+        return result
+
+    def materialize(self):
+        """
+        Liest Blöcke, die ihre Erwähnungen erst bei Bedarf laden (z.B. aus
+        JSON-Dateien), jetzt ein und ersetzt sie durch Listen
+
+        Danach hängt die Liste nicht mehr von den Quellen der Blöcke ab; sie
+        dürfen z.B. gelöscht oder überschrieben werden.
+        """
+        self._chunks = [chunk if isinstance(chunk, list) else list(chunk) for chunk in self._chunks]
+
+    def _seal(self):
+        """Schließt den offenen Block ab (er wird danach nicht mehr verändert)"""
+        if self._tail:
+            self._chunks.append(self._tail)
+            self._tail = []
+
+    def _compact(self):
+        """Fasst aufeinanderfolgende kleine Blöcke zu neuen Blöcken zusammen"""
+        # Zielgröße für etwa MAX_CHUNKS / 2 Blöcke, damit nicht jedes extend verdichtet
+        target = max(2 * self._length // self.MAX_CHUNKS, 1)
+        chunks: List[List[Dict]] = []
+        pending: List[Dict] = []
+        for chunk in self._chunks:
+            # Blöcke, die keine Listen sind (z.B. aus dem EntityStore), werden nie kopiert
+            if len(chunk) >= target or not isinstance(chunk, list):
+                if pending:
+                    chunks.append(pending)
+                    pending = []
+                chunks.append(chunk)
+            else:
+                pending.extend(chunk)
+                if len(pending) >= target:
+                    chunks.append(pending)
+                    pending = []
+        if pending:
+            chunks.append(pending)
+        self._chunks = chunks
+
+    def __iter__(self) -> Iterator[Dict]:
+        return chain(chain.from_iterable(self._chunks), self._tail)
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice) and (index.start or 0) >= 0 and \
+                (index.stop is None or index.stop >= 0) and (index.step or 1) > 0:
+            return list(islice(self, index.start, index.stop, index.step))
+        return self.flatten()[index]
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (MentionList, list)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"MentionList({len(self)} Erwähnungen, {len(self._chunks) + bool(self._tail)} Blöcke)"
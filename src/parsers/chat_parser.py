@@ -50,8 +50,14 @@ class ChatParser:
         'narrator': re.compile(r'^(Erzähler|Narrator|Erzählerin):\s*(.+)$', re.IGNORECASE),
     }
     
-    def __init__(self):
+    def __init__(self, gazetteer=None):
+        """
+        Args:
+            gazetteer: Optionales Namensverzeichnis (``NameGazetteer``) für die
+                Erkennung der Handelnden in Aktionszeilen
+        """
         self.lines: List[ChatLine] = []
+        self.gazetteer = gazetteer
     
     def parse_file(self, filepath: Path) -> List[ChatLine]:
         """Parst eine einzelne Chat-Datei basierend auf dem Dateityp"""
@@ -223,6 +229,11 @@ class ChatParser:
     
     def _extract_actor_from_action(self, action_text: str) -> Optional[str]:
         """Versucht, den Handelnden aus einer Aktion zu extrahieren"""
+        # Mit Namensverzeichnis: erster bekannter Name in der Aktion
+        if self.gazetteer is not None:
+            hits = self.gazetteer.find_in_text(action_text)
+            return hits[0].name if hits else None
+        
         # Einfache Heuristik: Erstes Wort könnte der Name sein
         words = action_text.split()
         if words:
@@ -234,10 +245,17 @@ class ChatParser:
         # Weitere Muster könnten hier ergänzt werden
         return None
     
-    def get_speakers(self) -> List[str]:
-        """Gibt eine Liste aller erkannten Sprecher zurück"""
+    def get_speakers(self, explicit_only: bool = False) -> List[str]:
+        """
+        Gibt eine Liste aller erkannten Sprecher zurück
+        
+        Args:
+            explicit_only: Nur ausdrücklich genannte Sprecher (ohne aus Aktionen geratene)
+        """
         speakers = set()
         for line in self.lines:
+            if explicit_only and line.is_action():
+                continue
             if line.speaker and line.speaker != "Erzähler":
                 speakers.add(line.speaker)
         return sorted(list(speakers))
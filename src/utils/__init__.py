@@ -2,7 +2,15 @@
 StoryWeaver Utilities
 """
 from .merger import EntityMerger
+from .merge_pipeline import MergePipeline
 from .exporter import JSONExporter
+from .snapshot import AnalysisSnapshot
+from .entity_store import EntityStore
+from .search_index import MentionSearchIndex
+from .name_index import NameTrigramIndex
+from .filter_index import CharacterFilterIndex
 from .sillytavern_exporter import SillyTavernExporter
+from .table_exporter import TableExporter
 
-__all__ = ['EntityMerger', 'JSONExporter', 'SillyTavernExporter']
+__all__ = ['EntityMerger', 'MergePipeline', 'JSONExporter', 'SillyTavernExporter', 'AnalysisSnapshot', 'EntityStore',
+           'MentionSearchIndex', 'NameTrigramIndex', 'CharacterFilterIndex', 'TableExporter']
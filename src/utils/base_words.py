@@ -0,0 +1,72 @@
+"""
+Basis-Wortschatz für StoryWeaver
+Erkennt Basis-Gegenstände und Basis-Orte über eine Token-Tabelle statt über Regex pro Wort
+"""
+import json
+import re
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+# Mitgelieferte Wortlisten
+DEFAULT_CONFIG = Path(__file__).with_name("base_words.json")
+
+
+class BaseWordVocabulary:
+    """
+    Wortschatz aus Basis-Wörtern (z.B. "schwert") und Pluralformen (z.B. "schwerter").
+
+    Alle Einträge liegen in einer Tabelle Token -> (Rang, Basis-Wort). Ein Name
+    wird einmal in Tokens zerlegt; die Treffer ergeben sich aus der
+    Schnittmenge mit der Tabelle. Bei mehreren Treffern gewinnt der kleinste
+    Rang: zuerst die Basis-Wörter in Listenreihenfolge, danach die Pluralformen.
+    Die Kosten hängen damit nur von der Länge des Namens ab, nicht von der
+    Größe des Wortschatzes.
+    """
+
+    TOKEN_PATTERN = re.compile(r'\w+')
+
+    def __init__(self, words: Iterable[str] = (), plurals: Optional[Dict[str, str]] = None):
+        """
+        Args:
+            words: Basis-Wörter in Prioritätsreihenfolge
+            plurals: Pluralform -> Basis-Wort (nachrangig zu allen Basis-Wörtern)
+        """
+        self._table: Dict[str, Tuple[int, str]] = {}
+        for word in words:
+            self.add(word)
+        for plural, base in (plurals or {}).items():
+            self.add(plural, base)
+
+    @classmethod
+    def from_config(cls, section: str, path: Optional[Path] = None) -> 'BaseWordVocabulary':
+        """
+        Lädt einen Wortschatz aus einer JSON-Datei
+
+        Args:
+            section: Abschnitt der Datei (z.B. "items" oder "locations")
+            path: JSON-Datei (Standard: mitgelieferte base_words.json)
+        """
+        with open(path or DEFAULT_CONFIG, 'r', encoding='utf-8') as f:
+            data = json.load(f).get(section, {})
+        return cls(data.get('words', []), data.get('plurals', {}))
+
+    def add(self, word: str, base: Optional[str] = None):
+        """Fügt ein Wort hinzu (bestehende Einträge behalten ihren Rang)"""
+        word = word.strip().lower()
+        if not self.TOKEN_PATTERN.fullmatch(word):
+            raise ValueError(f"Basis-Wörter müssen aus genau einem Wort bestehen: {word!r}")
+        if word not in self._table:
+            self._table[word] = (len(self._table), (base or word).strip().lower())
+
+    def extract(self, name: str) -> Optional[str]:
+        """Gibt das Basis-Wort eines (normalisierten) Namens zurück oder None"""
+        # Schnittmenge Tokens x Tabelle (iteriert nur über die Tokens des Namens)
+        table = self._table
+        hits = [table[token] for token in self.TOKEN_PATTERN.findall(name) if token in table]
+        return min(hits)[1] if hits else None
+
+    def __len__(self) -> int:
+        return len(self._table)
+
+    def __contains__(self, word: str) -> bool:
+        return word.lower() in self._table
@@ -0,0 +1,248 @@
+"""
+Blocking-Index für StoryWeaver
+Erzeugt Vergleichskandidaten für den EntityMerger, statt jeden Namen mit jedem zu vergleichen
+"""
+from math import ceil
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+
+class BlockingIndex:
+    """
+    Kandidatenindex über normalisierte Namen.
+
+    Ein Paar wird nur dann bewertet, wenn es mindestens eine der Regeln des
+    Mergers erfüllen *kann*:
+
+    - Fuzzy-Ähnlichkeit: Erreichen zwei Namen ``fuzz.ratio >= Schwellwert``,
+      ist ihre längste gemeinsame Teilfolge so lang, dass sie ab einem
+      Schwellwert von etwa 67 zwingend eine Mindestanzahl an Bigrammen (mit
+      Auffüllung) teilen (siehe ``_min_shared_grams``). Wo das nicht
+      garantiert ist, werden alle Namen passender Länge geprüft.
+    - Regel-Schlüssel (z.B. Vorname, Basis-Gegenstand, Ortswörter): Namen mit
+      gemeinsamem Schlüssel. Der Schlüssel ``WILDCARD`` passt zu allen Namen.
+    - Teilstrings (optional): Namen, die einander enthalten.
+
+    Leere normalisierte Namen (z.B. "...") erfüllen keine Regel; sie sind nur
+    untereinander Kandidaten (``ratio("", "") == 100``).
+
+    Die Kandidatenmenge ist damit eine Obermenge der Treffer des vollständigen
+    Abgleichs; die Ergebnisse bleiben identisch.
+    """
+
+    WILDCARD = '*'
+
+    # Bigramme mit einem Leerzeichen Auffüllung an beiden Enden
+    Q = 2
+
+    def __init__(self, names: List[str], normalize: Callable[[str], str],
+                 similarity_threshold: int = 80,
+                 rule_keys: Optional[Callable[[str, str], Iterable[str]]] = None,
+                 substring: bool = False, normalized: Optional[List[str]] = None):
+        """
+        Args:
+            names: Namen in der Reihenfolge des Mergers
+            normalize: Normalisierung, auf der ``fuzz.ratio`` berechnet wird
+            similarity_threshold: Schwellwert für die Fuzzy-Ähnlichkeit (0-100)
+            rule_keys: Liefert die Regel-Schlüssel für (Name, normalisierter Name)
+            substring: Ob Namen, die einander enthalten, Kandidaten sind
+            normalized: Bereits normalisierte Namen (sonst wird ``normalize`` angewendet)
+        """
+        self.names = list(names)
+        self.normalized = list(normalized) if normalized is not None else [normalize(name) for name in names]
+        self.substring = substring
+        self._normalize = normalize
+        self._rule_keys = rule_keys
+
+        # Mindest-Ratio, die nach Rundung noch den Schwellwert erreicht
+        self._min_ratio = (similarity_threshold - 0.5) / 100 - 1e-9
+
+        self._grams: Dict[str, List[int]] = {}
+        self._lengths: Dict[int, List[int]] = {}
+        self._keys: Dict[str, List[int]] = {}
+        self._name_keys: List[Set[str]] = []
+        self._wildcards: List[int] = []
+        self._empty: List[int] = []
+        self._by_normalized: Dict[str, List[int]] = {}
+
+        self._wildcard_set: Set[int] = set()
+
+        for position, (name, normalized) in enumerate(zip(self.names, self.normalized)):
+            keys = rule_keys(name, normalized) if rule_keys else ()
+            self._insert(position, normalized, keys)
+
+        # Statistik über erzeugte Kandidaten
+        self.queries = 0
+        self.candidate_pairs = 0
+
+    def add(self, name: str, normalized: Optional[str] = None,
+            keys: Optional[Iterable[str]] = None) -> int:
+        """
+        Fügt einen Namen nachträglich hinzu und gibt seine Position zurück
+
+        Args:
+            name: Neuer Name
+            normalized: Bereits normalisierter Name (sonst wird ``normalize`` angewendet)
+            keys: Regel-Schlüssel (sonst über ``rule_keys`` berechnet)
+        """
+        if normalized is None:
+            normalized = self._normalize(name)
+        if keys is None:
+            keys = self._rule_keys(name, normalized) if self._rule_keys else ()
+        position = len(self.names)
+        self.names.append(name)
+        self.normalized.append(normalized)
+        self._insert(position, normalized, keys)
+        return position
+
+    def _insert(self, position: int, normalized: str, keys: Iterable[str]):
+        """Trägt einen Namen in alle Postinglisten ein"""
+        if not normalized:
+            self._empty.append(position)
+        else:
+            for gram in self._padded_grams(normalized):
+                self._grams.setdefault(gram, []).append(position)
+            self._lengths.setdefault(len(normalized), []).append(position)
+            self._by_normalized.setdefault(normalized, []).append(position)
+
+        keys = set(keys)
+        if self.WILDCARD in keys:
+            self._wildcards.append(position)
+            self._wildcard_set.add(position)
+            keys.discard(self.WILDCARD)
+        for key in keys:
+            self._keys.setdefault(key, []).append(position)
+        self._name_keys.append(keys)
+
+    def candidates(self, position: int) -> List[int]:
+        """Gibt die Kandidaten-Positionen für einen Namen in Originalreihenfolge zurück"""
+        normalized = self.normalized[position]
+        if not normalized:
+            # Leere Namen sind nur einander ähnlich (keine Regeln, keine Wildcards)
+            found: Set[int] = set(self._empty)
+        else:
+            found = set()
+            # Wildcard-Namen passen zu allen, ein eigener Wildcard-Schlüssel zu allen
+            if position in self._wildcard_set:
+                found.update(range(len(self.names)))
+            found.update(self._wildcards)
+            for key in self._name_keys[position]:
+                found.update(self._keys[key])
+            self._add_fuzzy_candidates(normalized, found)
+            if self.substring:
+                self._add_substring_candidates(normalized, found)
+
+        found.discard(position)
+        self.queries += 1
+        self.candidate_pairs += len(found)
+        return sorted(found)
+
+    def candidate_names(self, position: int) -> List[str]:
+        """Gibt die Kandidaten-Namen für einen Namen in Originalreihenfolge zurück"""
+        return [self.names[candidate] for candidate in self.candidates(position)]
+
+    def reset_stats(self):
+        """Setzt die Statistik zurück (z.B. vor jedem Block, der denselben Index nutzt)"""
+        self.queries = 0
+        self.candidate_pairs = 0
+
+    def stats(self) -> Dict[str, float]:
+        """Statistik: Anteil eingesparter Vergleiche gegenüber dem vollständigen Abgleich"""
+        exhaustive = self.queries * max(len(self.names) - 1, 0)
+        return {
+            "names": len(self.names),
+            "queries": self.queries,
+            "exhaustive_pairs": exhaustive,
+            "candidate_pairs": self.candidate_pairs,
+            "reduction_ratio": 1 - self.candidate_pairs / exhaustive if exhaustive else 0.0
+        }
+
+    @staticmethod
+    def combine_stats(stats: List[Dict[str, float]]) -> Dict[str, float]:
+        """Fasst die Statistiken mehrerer Indizes über dieselben Namen zusammen"""
+        exhaustive = sum(entry["exhaustive_pairs"] for entry in stats)
+        candidates = sum(entry["candidate_pairs"] for entry in stats)
+        return {
+            "names": max((entry["names"] for entry in stats), default=0),
+            "queries": sum(entry["queries"] for entry in stats),
+            "exhaustive_pairs": exhaustive,
+            "candidate_pairs": candidates,
+            "reduction_ratio": 1 - candidates / exhaustive if exhaustive else 0.0
+        }
+
+    @classmethod
+    def _padded_grams(cls, text: str) -> Set[str]:
+        """Bigramme eines Textes mit Auffüllung an beiden Enden"""
+        return set(cls._padded_gram_list(text))
+
+    @classmethod
+    def _padded_gram_list(cls, text: str) -> List[str]:
+        """Alle Bigramm-Vorkommen eines Textes mit Auffüllung (mit Wiederholungen)"""
+        padded = ' ' * (cls.Q - 1) + text + ' ' * (cls.Q - 1)
+        return [padded[i:i + cls.Q] for i in range(len(padded) - cls.Q + 1)]
+
+    def _length_compatible(self, first: int, second: int) -> bool:
+        """Prüft, ob zwei Längen die Mindest-Ratio überhaupt erreichen können"""
+        return 2 * min(first, second) >= self._min_ratio * (first + second)
+
+    def _min_shared_grams(self, first: int, second: int) -> int:
+        """
+        Mindestanzahl gemeinsamer Bigramm-Vorkommen, wenn der Schwellwert erreicht wird
+
+        ``fuzz.ratio`` ist 2 * LCS / S (S = Summe der Längen). Die Zeichen
+        außerhalb der gemeinsamen Teilfolge (S - 2 * LCS) zerlegen sie in
+        höchstens S - 2 * LCS + 1 zusammenhängende Blöcke; mit der Auffüllung
+        ist die Teilfolge LCS + 2 Zeichen lang. Jeder Block der Länge m liefert
+        m - 1 gemeinsame Bigramme, zusammen also mindestens 3 * LCS + 1 - S.
+        Ein Wert <= 0 bedeutet, dass kein gemeinsames Bigramm garantiert ist.
+        """
+        total = first + second
+        min_lcs = ceil(self._min_ratio * total / 2)
+        return 3 * min_lcs + 1 - total
+
+    def _add_fuzzy_candidates(self, normalized: str, found: Set[int]):
+        """Ergänzt Kandidaten, die die Fuzzy-Ähnlichkeit erreichen können"""
+        length = len(normalized)
+        gram_list = self._padded_gram_list(normalized)
+        gram_counts: Dict[str, int] = {}
+        for gram in gram_list:
+            gram_counts[gram] = gram_counts.get(gram, 0) + 1
+        # Jedes verschiedene Bigramm deckt höchstens so viele Vorkommen ab
+        multiplicity = max(gram_counts.values())
+
+        shared: Dict[int, int] = {}
+        for gram in gram_counts:
+            for other in self._grams.get(gram, ()):
+                shared[other] = shared.get(other, 0) + 1
+
+        required: Dict[int, int] = {}
+        for other, count in shared.items():
+            other_length = len(self.normalized[other])
+            if other_length not in required:
+                required[other_length] = (
+                    ceil(self._min_shared_grams(length, other_length) / multiplicity)
+                    if self._length_compatible(length, other_length) else None
+                )
+            needed = required[other_length]
+            if needed is not None and count >= needed:
+                found.add(other)
+
+        for other_length, positions in self._lengths.items():
+            if self._length_compatible(length, other_length) and \
+                    self._min_shared_grams(length, other_length) <= 0:
+                found.update(positions)
+
+    def _add_substring_candidates(self, normalized: str, found: Set[int]):
+        """Ergänzt Namen, die diesen Namen enthalten oder in ihm enthalten sind"""
+        # Namen, die in diesem Namen enthalten sind (alle Teilstrings nachschlagen)
+        length = len(normalized)
+        for start in range(length):
+            for end in range(start + 1, length + 1):
+                found.update(self._by_normalized.get(normalized[start:end], ()))
+
+        # Namen, die diesen Namen enthalten: seltenstes Bigramm als Vorfilter
+        if length >= self.Q:
+            postings = min((self._grams.get(normalized[i:i + self.Q], ())
+                            for i in range(length - self.Q + 1)), key=len)
+        else:
+            postings = range(len(self.names))
+        found.update(other for other in postings if normalized in self.normalized[other])
@@ -0,0 +1,167 @@
+"""
+Cluster-Index für StoryWeaver
+Speichert das Ergebnis einer Zusammenführung, damit neue Kapitel inkrementell eingeordnet werden können
+"""
+import json
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# Vergleichsschlüssel eines Namens: (normalisiert, Vorname, Basis-Wort, Inhaltswörter, Phonetik)
+Keys = Tuple[str, Optional[str], Optional[str], frozenset, Optional[str]]
+
+
+class ClusterIndex:
+    """
+    Persistierter Cluster-Index eines Entitätstyps.
+
+    Für jeden unzusammengeführten Namen werden seine Vergleichsschlüssel,
+    Blocking-Schlüssel, Häufigkeit und sein Cluster gespeichert; für jeden
+    Cluster der Hauptname. Neue Namen werden nur gegen diesen Index
+    verglichen (siehe ``EntityMerger.merge_incremental``), ohne die
+    Ähnlichkeiten des bestehenden Bestands neu zu berechnen.
+    """
+
+    VERSION = 1
+
+    def __init__(self, entity_type: str, threshold: int, phonetic: Optional[str] = None):
+        """
+        Args:
+            entity_type: "characters", "items" oder "locations"
+            threshold: Ähnlichkeitsschwellwert, mit dem die Cluster gebildet wurden
+            phonetic: Phonetisches Verfahren der Schlüssel (None = ohne)
+        """
+        self.entity_type = entity_type
+        self.threshold = threshold
+        self.phonetic = phonetic
+        self.names: List[str] = []
+        self.keys: List[Keys] = []
+        self.blocking_keys: List[List[str]] = []
+        self.frequencies: List[int] = []
+        self.cluster_of: List[int] = []
+        self.members: Dict[int, List[int]] = {}
+        self.canonical: Dict[int, str] = {}
+        self._positions: Dict[str, int] = {}
+        self._next_cluster = 0
+
+        # Blocking-Index über die Namen (wird vom Merger bei Bedarf aufgebaut)
+        self.blocking = None
+
+    def position(self, name: str) -> Optional[int]:
+        """Position eines unzusammengeführten Namens oder None"""
+        return self._positions.get(name)
+
+    def add(self, name: str, keys: Keys, blocking_keys: Iterable[str], frequency: int = 0,
+            cluster: Optional[int] = None) -> int:
+        """
+        Fügt einen Namen hinzu und gibt seine Position zurück
+
+        Args:
+            cluster: Bestehender Cluster (None = neuer Cluster nur mit diesem Namen)
+        """
+        if name in self._positions:
+            raise ValueError(f"Name bereits im Cluster-Index: {name!r}")
+        if cluster is None:
+            cluster = self._next_cluster
+            self._next_cluster += 1
+            self.members[cluster] = []
+            self.canonical[cluster] = name
+
+        position = len(self.names)
+        self.names.append(name)
+        self.keys.append(keys)
+        self.blocking_keys.append(list(blocking_keys))
+        self.frequencies.append(frequency)
+        self.cluster_of.append(cluster)
+        self.members[cluster].append(position)
+        self._positions[name] = position
+        return position
+
+    def join(self, first: int, second: int) -> int:
+        """Vereinigt zwei Cluster und gibt den verbleibenden zurück (der größere bleibt)"""
+        if first == second:
+            return first
+        if len(self.members[first]) < len(self.members[second]):
+            first, second = second, first
+        for position in self.members[second]:
+            self.cluster_of[position] = first
+        self.members[first].extend(self.members.pop(second))
+        self.canonical.pop(second)
+        return first
+
+    def cluster_by_name(self) -> Dict[str, int]:
+        """Hauptname -> Cluster"""
+        return {name: cluster for cluster, name in self.canonical.items()}
+
+    def member_names(self, cluster: int) -> List[str]:
+        """Unzusammengeführte Namen eines Clusters"""
+        return [self.names[position] for position in self.members[cluster]]
+
+    def __len__(self) -> int:
+        return len(self.members)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._positions
+
+    def to_dict(self) -> Dict:
+        """Konvertiert den Index in ein Dictionary für JSON-Export"""
+        return {
+            "entity_type": self.entity_type,
+            "threshold": self.threshold,
+            "phonetic": self.phonetic,
+            "names": self.names,
+            "keys": [[normalized, first_token, base, sorted(words), phonetic]
+                     for normalized, first_token, base, words, phonetic in self.keys],
+            "blocking_keys": self.blocking_keys,
+            "frequencies": self.frequencies,
+            "clusters": [{"name": self.canonical[cluster], "members": members}
+                         for cluster, members in self.members.items()]
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'ClusterIndex':
+        """Erstellt einen Index aus einem Dictionary"""
+        index = cls(data['entity_type'], data['threshold'], data.get('phonetic'))
+        index.names = data['names']
+        # Indizes ohne phonetische Schlüssel (vor --phonetic) haben nur vier Einträge
+        index.keys = [(normalized, first_token, base, frozenset(words), phonetic[0] if phonetic else None)
+                      for normalized, first_token, base, words, *phonetic in data['keys']]
+        index.blocking_keys = data['blocking_keys']
+        index.frequencies = data['frequencies']
+        index.cluster_of = [0] * len(index.names)
+        for cluster, entry in enumerate(data['clusters']):
+            index.members[cluster] = entry['members']
+            index.canonical[cluster] = entry['name']
+            for position in entry['members']:
+                index.cluster_of[position] = cluster
+        index._positions = {name: position for position, name in enumerate(index.names)}
+        index._next_cluster = len(data['clusters'])
+        return index
+
+
+def save_cluster_indexes(filepath: Path, indexes: Dict[str, ClusterIndex], source_files: Set[str]):
+    """
+    Speichert die Cluster-Indizes aller Entitätstypen in einer JSON-Datei
+
+    Args:
+        filepath: Zieldatei (z.B. output/cluster_index.json)
+        indexes: Entitätstyp -> Cluster-Index
+        source_files: Bereits verarbeitete Quelldateien
+    """
+    data = {
+        "version": ClusterIndex.VERSION,
+        "source_files": sorted(source_files),
+        "indexes": {entity_type: index.to_dict() for entity_type, index in indexes.items()}
+    }
+    with open(filepath, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+
+
+def load_cluster_indexes(filepath: Path) -> Tuple[Dict[str, ClusterIndex], Set[str]]:
+    """Lädt die mit save_cluster_indexes gespeicherten Indizes und Quelldateien"""
+    with open(filepath, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if data.get('version') != ClusterIndex.VERSION:
+        raise ValueError(f"Nicht unterstützte Version des Cluster-Index: {data.get('version')}")
+    indexes = {entity_type: ClusterIndex.from_dict(entry)
+               for entity_type, entry in data['indexes'].items()}
+    return indexes, set(data['source_files'])
@@ -0,0 +1,149 @@
+"""
+Clustering für StoryWeaver
+Disjunkte Mengen (Union-Find) für die reihenfolgeunabhängige Zusammenführung
+"""
+from array import array
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+import numpy as np
+
+
+class EdgeBlock(NamedTuple):
+    """Kanten eines Positionsbereichs (Ergebnis von EntityMerger.graph_edges)"""
+    first: array
+    second: array
+    scores: array
+    comparisons: int  # Anzahl der geprüften Paare
+    blocking: Optional[Dict]  # BlockingIndex.stats() oder None im vollständigen Modus
+
+
+class DisjointSet:
+    """
+    Union-Find über die Positionen 0..n-1 mit Pfadkompression und Union nach Rang.
+
+    Die Komponenten hängen nur von den vereinigten Paaren ab, nicht von der
+    Reihenfolge der Vereinigungen.
+    """
+
+    def __init__(self, size: int):
+        self.parent = list(range(size))
+        self.rank = [0] * size
+
+    def find(self, element: int) -> int:
+        """Gibt den Repräsentanten der Menge eines Elements zurück"""
+        root = element
+        while self.parent[root] != root:
+            root = self.parent[root]
+        # Pfadkompression
+        while self.parent[element] != root:
+            self.parent[element], element = root, self.parent[element]
+        return root
+
+    def union(self, first: int, second: int) -> bool:
+        """Vereinigt zwei Mengen; gibt False zurück, wenn sie schon verbunden waren"""
+        first, second = self.find(first), self.find(second)
+        if first == second:
+            return False
+        if self.rank[first] < self.rank[second]:
+            first, second = second, first
+        self.parent[second] = first
+        if self.rank[first] == self.rank[second]:
+            self.rank[first] += 1
+        return True
+
+    def components(self) -> List[List[int]]:
+        """Alle Mengen, Elemente aufsteigend, Mengen nach ihrem kleinsten Element sortiert"""
+        groups: Dict[int, List[int]] = {}
+        for element in range(len(self.parent)):
+            groups.setdefault(self.find(element), []).append(element)
+        return list(groups.values())
+
+    def __len__(self) -> int:
+        return len(self.parent)
+
+
+class SimilarityGraph:
+    """
+    Dünn besetzter Graph der Ähnlichkeiten zwischen Namen.
+
+    Gespeichert werden alle Paare mit ``fuzz.ratio >= min_score`` (mit ihrem
+    Wert) sowie alle Paare, die eine Regel des Mergers erfüllen (Teilstring,
+    Vorname, Basis-Wort ...); Regel-Kanten gelten bei jedem Schwellwert. Für
+    jeden Schwellwert ab ``min_score`` lassen sich die Komponenten daraus neu
+    bilden, ohne Ähnlichkeiten neu zu berechnen.
+    """
+
+    # Wert für Regel-Kanten (über jedem Schwellwert)
+    RULE = 255
+
+    def __init__(self, names: List[str], min_score: int):
+        """
+        Args:
+            names: Namen in der Reihenfolge des Mergers (Knoten 0..n-1)
+            min_score: Kleinster Schwellwert, für den der Graph vollständig ist
+        """
+        self.names = names
+        self.min_score = min_score
+        self._first = array('i')
+        self._second = array('i')
+        self._scores = array('B')
+
+    def add_edge(self, first: int, second: int, score: int):
+        """Fügt eine Kante hinzu (``score`` = RULE für Regel-Kanten)"""
+        self._first.append(first)
+        self._second.append(second)
+        self._scores.append(score)
+
+    def add_block(self, block: EdgeBlock):
+        """Übernimmt die Kanten eines Blocks (z.B. aus einem Worker-Prozess)"""
+        self._first.extend(block.first)
+        self._second.extend(block.second)
+        self._scores.extend(block.scores)
+
+    def edges(self) -> EdgeBlock:
+        """Alle Kanten als Block (z.B. zum Speichern; Gegenstück zu add_block)"""
+        return EdgeBlock(self._first, self._second, self._scores, 0, None)
+
+    def components(self, threshold: int) -> List[List[int]]:
+        """Komponenten beim Schwellwert (Positionen in Originalreihenfolge)"""
+        self._check_threshold(threshold)
+        clusters = DisjointSet(len(self.names))
+        for first, second, score in zip(self._first, self._second, self._scores):
+            if score >= threshold:
+                clusters.union(first, second)
+        return clusters.components()
+
+    def component_counts(self, thresholds: Iterable[int]) -> Dict[int, int]:
+        """
+        Anzahl der Komponenten für mehrere Schwellwerte in einem Durchlauf
+
+        Die Kanten werden absteigend nach Wert vereinigt; die Anzahl bei
+        einem Schwellwert ist die Knotenzahl minus der bis dahin erfolgreichen
+        Vereinigungen.
+        """
+        thresholds = list(thresholds)
+        for threshold in thresholds:
+            self._check_threshold(threshold)
+
+        scores = np.frombuffer(self._scores, dtype=np.uint8) if len(self._scores) else np.zeros(0, np.uint8)
+        order = np.argsort(-scores.astype(np.int16), kind='stable')
+        clusters = DisjointSet(len(self.names))
+        count = len(self.names)
+        counts: Dict[int, int] = {}
+        edge = 0
+        for threshold in sorted(set(thresholds), reverse=True):
+            while edge < len(order) and scores[order[edge]] >= threshold:
+                position = order[edge]
+                if clusters.union(self._first[position], self._second[position]):
+                    count -= 1
+                edge += 1
+            counts[threshold] = count
+        return {threshold: counts[threshold] for threshold in thresholds}
+
+    def _check_threshold(self, threshold: int):
+        if threshold < self.min_score:
+            raise ValueError(f"Schwellwert {threshold} liegt unter dem Mindestwert "
+                             f"des Graphen ({self.min_score})")
+
+    def __len__(self) -> int:
+        return len(self._scores)
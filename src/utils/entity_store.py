@@ -0,0 +1,356 @@
+"""
+Entitätsspeicher für StoryWeaver
+Lagert Erwähnungen, Gesprächszüge und Entitäten großer Korpora in eine lokale SQLite-Datenbank aus
+"""
+import sqlite3
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from ..models import Character, Item, Location, MentionList, StoryElement
+from ..models.codec import dumps, from_record, loads, to_record
+
+# Entitätstyp -> Modellklasse
+ENTITY_MODELS = {"characters": Character, "items": Item, "locations": Location}
+
+# Felder einer Erwähnung aus StoryElement.add_mention (eigene Spalten, alles andere in "extra")
+MENTION_KEYS = ("text", "source_file", "line_number")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS entities (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    entity_type TEXT NOT NULL,
+    name TEXT NOT NULL,
+    data TEXT
+);
+CREATE TABLE IF NOT EXISTS mentions (
+    entity_id INTEGER NOT NULL,
+    text TEXT,
+    source_file TEXT,
+    line_number INTEGER,
+    extra TEXT
+);
+CREATE TABLE IF NOT EXISTS parts (
+    entity_id INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    part_id INTEGER NOT NULL,
+    PRIMARY KEY (entity_id, position)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS turns (
+    file_id INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    content TEXT,
+    PRIMARY KEY (file_id, position)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS entities_name ON entities (name);
+CREATE INDEX IF NOT EXISTS entities_type ON entities (entity_type, kind);
+CREATE INDEX IF NOT EXISTS mentions_entity ON mentions (entity_id);
+CREATE INDEX IF NOT EXISTS mentions_source ON mentions (source_file);
+CREATE INDEX IF NOT EXISTS parts_part ON parts (part_id);
+"""
+
+
+class StoredMentions:
+    """
+    Block einer MentionList, dessen Erwähnungen in der Datenbank liegen.
+
+    Der Block hält nur die Entitäts-ID und die Anzahl; beim Iterieren werden
+    die Erwähnungen abgefragt. ``MentionList.extend`` übernimmt ihn wie jeden
+    anderen Block als Referenz, zusammengeführte Elemente verweisen also nur
+    auf die Erwähnungen ihrer Mitglieder.
+    """
+
+    __slots__ = ('store', 'entity_id', 'length')
+
+    def __init__(self, store: 'EntityStore', entity_id: int, length: int = 0):
+        self.store = store
+        self.entity_id = entity_id
+        self.length = length
+
+    def __iter__(self) -> Iterator[Dict]:
+        return self.store.iter_mentions(self.entity_id)
+
+    def __len__(self) -> int:
+        return self.length
+
+
+class StoredMentionList(MentionList):
+    """
+    MentionList eines Elements im Entitätsspeicher.
+
+    ``append`` schreibt die Erwähnung gepuffert in die Datenbank statt in
+    einen offenen Block. Anders als bei gewöhnlichen Blöcken wächst der
+    eigene Block dadurch weiter; zusammengeführt wird daher erst nach der
+    Extraktion.
+    """
+
+    __slots__ = ('_stored',)
+
+    def __init__(self, stored: StoredMentions):
+        super().__init__()
+        self._stored = stored
+        self._chunks.append(stored)
+        self._length = stored.length
+
+    def append(self, mention: Dict):
+        """Schreibt eine Erwähnung (gepuffert) in die Datenbank"""
+        self._stored.store.add_mention(self._stored.entity_id, mention)
+        self._stored.length += 1
+        self._length += 1
+
+
+class EntityStore:
+    """
+    SQLite-Datenbank für Entitäten, Erwähnungen und Gesprächszüge.
+
+    Während der Extraktion bleiben nur die Elemente selbst (Name, Zähler,
+    Sammlungen) im Speicher; ihre Erwähnungen und die Inhalte der
+    Gesprächszüge werden in Stapeln von ``batch_size`` Zeilen mit
+    ``executemany`` geschrieben (WAL-Modus, ein Commit pro Stapel). Der
+    Speicherbedarf hängt damit nicht mehr von der Länge des Korpus ab.
+
+    Nach dem Zusammenführen speichert ``save_entities`` die rohen und die
+    zusammengeführten Elemente (ohne Erwähnungen). Zusammengeführte Elemente
+    verweisen über die Tabelle ``parts`` auf die Erwähnungen ihrer
+    Mitglieder; ``load_entities`` liefert sie mit Erwähnungen, die erst beim
+    Lesen (Export, Anzeige) abgefragt werden. Name, Typ und Quelldatei sind
+    indiziert.
+    """
+
+    # Art der gespeicherten Elemente
+    RAW = "raw"
+    MERGED = "merged"
+
+    # Zeilen pro Schreibstapel
+    BATCH_SIZE = 10000
+
+    def __init__(self, path: Path, batch_size: int = BATCH_SIZE, reset: bool = False):
+        """
+        Args:
+            path: Datenbankdatei (wird bei Bedarf angelegt)
+            batch_size: Gepufferte Zeilen pro Schreibstapel
+            reset: Vorhandene Daten löschen (neuer Extraktionslauf)
+        """
+        self.path = Path(path)
+        self.batch_size = max(batch_size, 1)
+        if reset:
+            for suffix in ("", "-wal", "-shm"):
+                Path(f"{self.path}{suffix}").unlink(missing_ok=True)
+
+        # Streamlit führt Callbacks in wechselnden Threads aus
+        self.connection = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+
+        self._next_id = self.connection.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM entities").fetchone()[0]
+        self._entity_rows: List[Tuple] = []
+        self._mention_rows: List[Tuple] = []
+        self._turn_rows: List[Tuple] = []
+
+    # --- Schreiben während der Extraktion ---
+
+    def mention_list(self, entity_type: str, name: str) -> StoredMentionList:
+        """Legt ein rohes Element an und gibt seine Erwähnungsliste zurück"""
+        entity_id = self._new_id()
+        self._entity_rows.append((entity_id, self.RAW, entity_type, name, None))
+        return StoredMentionList(StoredMentions(self, entity_id))
+
+    def add_mention(self, entity_id: int, mention: Dict):
+        """Puffert eine Erwähnung"""
+        if tuple(mention) == MENTION_KEYS:
+            self._mention_rows.append((entity_id, mention["text"], mention["source_file"],
+                                       mention["line_number"], None))
+        else:
+            # Andere Erwähnungen (z.B. aus JSON-Importen) unverändert als JSON
+            self._mention_rows.append((entity_id, None, mention.get("source_file"), None,
+                                       dumps(mention).decode('utf-8')))
+        if len(self._mention_rows) >= self.batch_size:
+            self.flush()
+
+    def add_turns(self, rows: Iterable[Tuple[int, int, str]]):
+        """Puffert Inhalte von Gesprächszügen (Datei-ID, Position, Inhalt)"""
+        self._turn_rows.extend(rows)
+        if len(self._turn_rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Schreibt alle gepufferten Zeilen in einer Transaktion"""
+        if not (self._entity_rows or self._mention_rows or self._turn_rows):
+            return
+        with self.connection:
+            self.connection.executemany("INSERT INTO entities VALUES (?, ?, ?, ?, ?)", self._entity_rows)
+            self.connection.executemany("INSERT INTO mentions VALUES (?, ?, ?, ?, ?)", self._mention_rows)
+            self.connection.executemany("INSERT OR REPLACE INTO turns VALUES (?, ?, ?)", self._turn_rows)
+        self._entity_rows = []
+        self._mention_rows = []
+        self._turn_rows = []
+
+    def _new_id(self) -> int:
+        entity_id = self._next_id
+        self._next_id += 1
+        return entity_id
+
+    # --- Elemente nach dem Zusammenführen ---
+
+    def save_entities(self, kind: str, entity_type: str, entities: Dict[str, StoryElement]):
+        """
+        Speichert Elemente ohne ihre Erwähnungen
+
+        Rohe Elemente aus ``mention_list`` behalten ihre ID. Blöcke aus dem
+        Speicher werden als Verweise in ``parts`` eingetragen; Erwähnungen
+        aus gewöhnlichen Blöcken (z.B. geladene Elemente eines inkrementellen
+        Laufs) werden unter der ID des Elements selbst gespeichert.
+        Zusammengeführte Elemente eines Typs ersetzen die des letzten Aufrufs.
+
+        Args:
+            kind: RAW oder MERGED
+            entity_type: "characters", "items" oder "locations"
+            entities: Name -> Element
+        """
+        self.flush()
+        if kind == self.MERGED:
+            with self.connection:
+                stale = "SELECT id FROM entities WHERE kind = ? AND entity_type = ?"
+                for table, column in (("parts", "entity_id"), ("mentions", "entity_id"), ("entities", "id")):
+                    self.connection.execute(f"DELETE FROM {table} WHERE {column} IN ({stale})",
+                                            (kind, entity_type))
+
+        entity_rows: List[Tuple] = []
+        part_rows: List[Tuple] = []
+        for entity in entities.values():
+            mentions = entity.mentions
+            own = mentions._stored.entity_id if isinstance(mentions, StoredMentionList) else None
+            entity_id = own if own is not None and kind == self.RAW else self._new_id()
+
+            parts: List[int] = []
+            for chunk in mentions._chunks + [mentions._tail]:
+                if isinstance(chunk, StoredMentions):
+                    parts.append(chunk.entity_id)
+                elif chunk:
+                    if entity_id not in parts:
+                        parts.append(entity_id)
+                    for mention in chunk:
+                        self.add_mention(entity_id, mention)
+            if parts != [entity_id]:
+                part_rows.extend((entity_id, position, part_id) for position, part_id in enumerate(parts))
+
+            record = to_record(entity, skip=("mentions",))
+            entity_rows.append((entity_id, kind, entity_type, entity.name, dumps(record).decode('utf-8')))
+            if len(entity_rows) >= self.batch_size:
+                self._write_entities(entity_rows, part_rows)
+                entity_rows, part_rows = [], []
+        self._write_entities(entity_rows, part_rows)
+
+    def _write_entities(self, entity_rows: List[Tuple], part_rows: List[Tuple]):
+        """Schreibt einen Stapel Elemente samt Verweisen auf ihre Erwähnungen"""
+        self.flush()
+        with self.connection:
+            self.connection.executemany("INSERT OR REPLACE INTO entities VALUES (?, ?, ?, ?, ?)", entity_rows)
+            self.connection.executemany("INSERT OR REPLACE INTO parts VALUES (?, ?, ?)", part_rows)
+
+    # --- Lesen (Zusammenführen, Export, App) ---
+
+    def iter_mentions(self, entity_id: int) -> Iterator[Dict]:
+        """Iteriert in Einfügereihenfolge über die eigenen Erwähnungen eines Elements"""
+        self.flush()
+        cursor = self.connection.execute(
+            "SELECT text, source_file, line_number, extra FROM mentions WHERE entity_id = ? ORDER BY rowid",
+            (entity_id,))
+        for text, source_file, line_number, extra in cursor:
+            if extra is None:
+                yield {"text": text, "source_file": source_file, "line_number": line_number}
+            else:
+                yield loads(extra)
+
+    def load_entities(self, entity_type: str, kind: str = MERGED,
+                      names: Optional[Iterable[str]] = None) -> Dict[str, StoryElement]:
+        """
+        Lädt gespeicherte Elemente; ihre Erwähnungen werden erst beim Lesen abgefragt
+
+        Args:
+            entity_type: "characters", "items" oder "locations"
+            kind: RAW oder MERGED
+            names: Nur diese Namen laden (über den Namensindex)
+        """
+        self.flush()
+        query = "SELECT id, name, data FROM entities WHERE entity_type = ? AND kind = ? AND data IS NOT NULL"
+        if names is None:
+            rows = self.connection.execute(query + " ORDER BY id", (entity_type, kind)).fetchall()
+        else:
+            rows = []
+            for name in dict.fromkeys(names):
+                rows.extend(self.connection.execute(query + " AND name = ?", (entity_type, kind, name)))
+        if not rows:
+            return {}
+
+        ids = [row[0] for row in rows]
+        parts: Dict[int, List[int]] = {}
+        for entity_id, part_id in self._select_in(
+                "SELECT entity_id, part_id FROM parts WHERE entity_id IN ({}) ORDER BY entity_id, position", ids):
+            parts.setdefault(entity_id, []).append(part_id)
+        part_ids = {part_id for entity_id in ids for part_id in parts.get(entity_id, (entity_id,))}
+        counts = dict(self._select_in(
+            "SELECT entity_id, COUNT(*) FROM mentions WHERE entity_id IN ({}) GROUP BY entity_id", list(part_ids)))
+
+        model = ENTITY_MODELS[entity_type]
+        entities: Dict[str, StoryElement] = {}
+        for entity_id, name, data in rows:
+            entity = from_record(loads(data), model, skip=("mentions",))
+            blocks = [StoredMentions(self, part_id, counts.get(part_id, 0))
+                      for part_id in parts.get(entity_id, (entity_id,))]
+            if entity_id not in parts:
+                entity.mentions = StoredMentionList(blocks[0])
+            else:
+                for block in blocks:
+                    entity.mentions.extend(StoredMentionList(block))
+            entities[name] = entity
+        return entities
+
+    def _select_in(self, query: str, values: List[int], size: int = 500) -> Iterator[Tuple]:
+        """Führt eine Abfrage mit ``IN (...)`` in Abschnitten aus (Grenze für SQL-Parameter)"""
+        for start in range(0, len(values), size):
+            chunk = values[start:start + size]
+            yield from self.connection.execute(query.format(", ".join("?" * len(chunk))), chunk)
+
+    def names_in_file(self, entity_type: str, source_file: str, kind: str = MERGED) -> List[str]:
+        """Namen der Elemente, die in einer Quelldatei erwähnt werden (über den Quelldatei-Index)"""
+        self.flush()
+        rows = self.connection.execute(
+            "SELECT name FROM entities WHERE entity_type = ? AND kind = ? AND data IS NOT NULL AND id IN ("
+            "SELECT entity_id FROM mentions WHERE source_file = ? UNION "
+            "SELECT p.entity_id FROM mentions m JOIN parts p ON p.part_id = m.entity_id "
+            "WHERE m.source_file = ?) ORDER BY name",
+            (entity_type, kind, source_file, source_file))
+        return [name for name, in rows]
+
+    def turn_content(self, file_id: int, position: int) -> Optional[str]:
+        """Inhalt eines ausgelagerten Gesprächszugs"""
+        self.flush()
+        row = self.connection.execute("SELECT content FROM turns WHERE file_id = ? AND position = ?",
+                                      (file_id, position)).fetchone()
+        return row[0] if row else None
+
+    def turn_contents(self, file_id: int) -> List[Optional[str]]:
+        """Inhalte aller ausgelagerten Gesprächszüge einer Datei (nach Position)"""
+        self.flush()
+        rows = self.connection.execute("SELECT content FROM turns WHERE file_id = ? ORDER BY position",
+                                       (file_id,))
+        return [content for content, in rows]
+
+    def set_meta(self, key: str, value):
+        """Speichert einen JSON-kompatiblen Wert (z.B. Schwellwert, Dialog-Daten)"""
+        with self.connection:
+            self.connection.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)",
+                                    (key, dumps(value).decode('utf-8')))
+
+    def get_meta(self, key: str, default=None):
+        """Liest einen mit set_meta gespeicherten Wert"""
+        row = self.connection.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return loads(row[0]) if row else default
+
+    def close(self):
+        """Schreibt alle Puffer und schließt die Datenbank"""
+        self.flush()
+        self.connection.close()
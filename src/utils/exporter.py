@@ -2,26 +2,43 @@
 JSON-Exporter für StoryWeaver
 Exportiert die extrahierten Daten in strukturierte JSON-Dateien
 """
-import json
+from collections import defaultdict
+from itertools import count
+from operator import itemgetter
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Dict, Iterable, List, Any, Hashable, Optional, Set
 from datetime import datetime
 import logging
 
-from ..models import Character, Item, Location
+from ..models import Character, Item, Location, StoryElement
+from ..models.codec import dumps, encode_entity, to_record
+from ..extractors.cooccurrence import CooccurrenceMatrix
+
+# Gemeinsame Erwähnungstabelle des normalisierten Exports (eine JSON-Zeile pro Erwähnung)
+MENTIONS_FILE = "mentions.ndjson"
+
+# Schlüssel einer Erwähnung aus add_mention (genau diese drei Felder)
+_mention_key = itemgetter("text", "source_file", "line_number")
 
 
 class JSONExporter:
     """Exportiert Story-Elemente als JSON-Dateien"""
     
-    def __init__(self, output_dir: Path = Path("output")):
+    def __init__(self, output_dir: Path = Path("output"), normalized: bool = False):
         """
         Args:
             output_dir: Hauptverzeichnis für die Ausgabe
+            normalized: Jede Erwähnung nur einmal in mentions.ndjson schreiben; die
+                        Dateien der Elemente enthalten dann "mention_ids" statt "mentions"
         """
         self.output_dir = Path(output_dir)
+        self.normalized = normalized
         self.logger = logging.getLogger(__name__)
         
+        # Erwähnung -> ID (neue Schlüssel erhalten die nächste ID) und Zeilen der Tabelle (nur normalisiert)
+        self._mention_ids: Dict[Hashable, int] = defaultdict(count().__next__)
+        self._mention_rows: List[Dict] = []
+        
         # Erstelle Ausgabeverzeichnisse
         self._create_output_dirs()
     
@@ -38,14 +55,33 @@ class JSONExporter:
     
     def export_all(self, characters: Dict[str, Character], 
                    items: Dict[str, Item], 
-                   locations: Dict[str, Location]):
-        """Exportiert alle Entitäten"""
+                   locations: Dict[str, Location],
+                   changed: Optional[Dict[str, Set[str]]] = None):
+        """
+        Exportiert alle Entitäten
+        
+        Args:
+            changed: Entitätstyp -> Namen, deren Einzeldateien neu geschrieben werden
+                     (inkrementeller Lauf; fehlende Typen vollständig). Die übrigen
+                     Dateien bleiben unverändert, die Übersichten enthalten alle Elemente.
+        """
         self.logger.info("Exportiere alle Entitäten...")
         
-        # Exportiere einzelne Entitäten
-        char_count = self.export_characters(characters)
-        item_count = self.export_items(items)
-        loc_count = self.export_locations(locations)
+        def select(entity_type: str, entities: Dict[str, StoryElement]) -> Dict[str, StoryElement]:
+            if changed is None or entity_type not in changed:
+                return entities
+            return {name: entities[name] for name in changed[entity_type] if name in entities}
+        
+        # Exportiere einzelne Entitäten (Anzahl: alle Elemente ohne fehlgeschlagene)
+        counts = []
+        for entity_type, entities, export in (("characters", characters, self.export_characters),
+                                              ("items", items, self.export_items),
+                                              ("locations", locations, self.export_locations)):
+            selected = select(entity_type, entities)
+            counts.append(len(entities) - len(selected) + export(selected))
+        char_count, item_count, loc_count = counts
+        if self.normalized:
+            self.write_mention_table()
         
         # Erstelle Übersichtsdateien
         self.create_overview_files(characters, items, locations)
@@ -62,7 +98,7 @@ class JSONExporter:
         
         for name, character in characters.items():
             try:
-                character.save_to_json(output_dir)
+                self._write_entity(output_dir, character)
                 count += 1
                 self.logger.debug(f"Charakter exportiert: {name}")
             except Exception as e:
@@ -77,7 +113,7 @@ class JSONExporter:
         
         for name, item in items.items():
             try:
-                item.save_to_json(output_dir)
+                self._write_entity(output_dir, item)
                 count += 1
                 self.logger.debug(f"Gegenstand exportiert: {name}")
             except Exception as e:
@@ -92,7 +128,7 @@ class JSONExporter:
         
         for name, location in locations.items():
             try:
-                location.save_to_json(output_dir)
+                self._write_entity(output_dir, location)
                 count += 1
                 self.logger.debug(f"Ort exportiert: {name}")
             except Exception as e:
@@ -109,13 +145,13 @@ class JSONExporter:
         char_overview = {
             "total": len(characters),
             "characters": [
-                {
+                self._overview_entry(char, {
                     "name": char.name,
                     "aliases": list(char.aliases),
                     "frequency": char.frequency,
                     "items": list(char.items),
                     "relationships": char.relationships
-                }
+                })
                 for char in characters.values()
             ]
         }
@@ -125,13 +161,13 @@ class JSONExporter:
         item_overview = {
             "total": len(items),
             "items": [
-                {
+                self._overview_entry(item, {
                     "name": item.name,
                     "type": item.item_type,
                     "frequency": item.frequency,
                     "owners": list(item.owners),
                     "location": item.location
-                }
+                })
                 for item in items.values()
             ]
         }
@@ -141,31 +177,52 @@ class JSONExporter:
         location_overview = {
             "total": len(locations),
             "locations": [
-                {
+                self._overview_entry(loc, {
                     "name": loc.name,
                     "type": loc.location_type,
                     "frequency": loc.frequency,
                     "inhabitants": list(loc.inhabitants),
                     "connected_locations": list(loc.connected_locations)
-                }
+                })
                 for loc in locations.values()
             ]
         }
         self._save_json(self.output_dir / "locations_overview.json", location_overview)
         
-        # Gesamt-Übersicht
+        # Gesamt-Übersicht (normalisiert nur Verweise auf die Übersichtsdateien statt Kopien)
         complete_overview = {
             "metadata": {
                 "export_date": datetime.now().isoformat(),
                 "version": "1.0",
                 "total_entities": len(characters) + len(items) + len(locations)
-            },
-            "characters": char_overview,
-            "items": item_overview,
-            "locations": location_overview
+            }
         }
+        for entity_type, overview in (("characters", char_overview), ("items", item_overview),
+                                      ("locations", location_overview)):
+            complete_overview[entity_type] = overview if not self.normalized else {
+                "total": overview["total"], "file": f"{entity_type}_overview.json"}
+        if self.normalized:
+            complete_overview["metadata"]["mentions_file"] = MENTIONS_FILE
         self._save_json(self.output_dir / "complete_overview.json", complete_overview)
     
+    @staticmethod
+    def _overview_entry(entity: StoryElement, entry: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Ergänzt einen Übersichtseintrag um alle übrigen Felder außer den Erwähnungen
+        
+        Damit kann load_output die Elemente allein aus den Übersichten aufbauen;
+        die Einzeldatei ("file") wird erst für die Erwähnungen gelesen.
+        """
+        record = to_record(entity, skip=("mentions",))
+        # "type" enthält in der Übersicht den Gegenstands- bzw. Ortstyp
+        for field in ("type", "item_type", "location_type"):
+            record.pop(field, None)
+        for key, value in record.items():
+            entry.setdefault(key, value)
+        entry["mention_count"] = len(entity.mentions)
+        entry["file"] = entity.json_filename(entity.name)
+        return entry
+    
     def create_statistics_file(self, char_count: int, item_count: int, loc_count: int):
         """Erstellt eine Statistikdatei"""
         stats = {
@@ -183,8 +240,16 @@ class JSONExporter:
     
     def create_relationship_graph(self, characters: Dict[str, Character],
                                  items: Dict[str, Item],
-                                 locations: Dict[str, Location]):
-        """Erstellt eine Datei mit allen Beziehungen zwischen Entitäten"""
+                                 locations: Dict[str, Location],
+                                 cooccurrence: CooccurrenceMatrix = None,
+                                 min_cooccurrence: int = 2):
+        """
+        Erstellt eine Datei mit allen Beziehungen zwischen Entitäten
+        
+        Args:
+            cooccurrence: Gemeinsame Auftritte aus der Extraktion (gewichtete Kanten)
+            min_cooccurrence: Mindestanzahl gemeinsamer Auftritte für eine Kante
+        """
         relationships = {
             "nodes": [],
             "edges": []
@@ -232,6 +297,23 @@ class JSONExporter:
                     "type": relation
                 })
         
+        # Charakter <-> Charakter gemeinsame Auftritte (auf zusammengeführte Namen abgebildet)
+        if cooccurrence is not None:
+            name_map = {}
+            for char in characters.values():
+                name_map[char.name] = char.name
+                for alias in char.aliases:
+                    name_map.setdefault(alias, char.name)
+            
+            weighted = cooccurrence.aggregate(name_map, min_weight=min_cooccurrence)
+            for (first, second), weight in sorted(weighted.items(), key=lambda pair: -pair[1]):
+                relationships["edges"].append({
+                    "source": f"char_{first}",
+                    "target": f"char_{second}",
+                    "type": "co_occurrence",
+                    "weight": weight
+                })
+        
         # Charakter -> Location Beziehungen
         for loc in locations.values():
             for inhabitant in loc.inhabitants:
@@ -252,11 +334,71 @@ class JSONExporter:
         
         self._save_json(self.output_dir / "relationship_graph.json", relationships)
     
+    def _write_entity(self, output_dir: Path, entity: StoryElement):
+        """Speichert ein Element als JSON-Datei (über den Codec, ohne Zwischen-String)"""
+        if self.normalized:
+            record = to_record(entity, skip=("mentions",))
+            record["mention_ids"] = self._mention_ids_of(entity.mentions)
+            data = dumps(record, indent=True)
+        else:
+            data = encode_entity(entity, indent=True)
+        with open(output_dir / entity.json_filename(entity.name), 'wb') as f:
+            f.write(data)
+    
+    def _mention_ids_of(self, mentions: Iterable[Dict]) -> List[int]:
+        """
+        IDs der Erwähnungen in der Tabelle (gleiche Erwähnungen mehrerer Elemente nur einmal)
+        
+        Schlüssel und IDs entstehen über map statt einer Python-Schleife pro
+        Erwähnung; nur Erwähnungen mit eigenen Feldern werden einzeln kodiert.
+        """
+        mentions = list(mentions)
+        rows = self._mention_rows
+        start = len(rows)
+        try:
+            if set(map(len, mentions)) - {3}:
+                raise KeyError
+            ids = list(map(self._mention_ids.__getitem__, map(_mention_key, mentions)))
+        except KeyError:
+            ids = [self._mention_ids[_mention_key(mention) if len(mention) == 3 and
+                                     all(key in mention for key in ("text", "source_file", "line_number"))
+                                     else dumps(mention)]
+                   for mention in mentions]
+        # Neue IDs sind fortlaufend; je ID eine (gleiche) Erwähnung als Zeile
+        end = len(self._mention_ids)
+        if end > start:
+            first = dict(zip(ids, mentions))
+            rows.extend(map(first.__getitem__, range(start, end)))
+        return ids
+    
+    def keep_mention_table(self, mentions: Iterable[Dict]):
+        """
+        Übernimmt die Erwähnungen einer vorhandenen mentions.ndjson mit ihren IDs
+        
+        Für inkrementelle Läufe: Nicht neu geschriebene Dateien verweisen
+        weiter auf diese IDs, neue Erwähnungen erhalten die folgenden.
+        """
+        self._mention_ids_of(mentions)
+    
+    def write_mention_table(self):
+        """
+        Schreibt die gesammelten Erwähnungen nach mentions.ndjson (normalisierter Export)
+        
+        Wird von export_all aufgerufen; nach einzelnen export_*-Aufrufen selbst aufrufen.
+        """
+        with open(self.output_dir / MENTIONS_FILE, 'wb') as f:
+            for mention_id, mention in enumerate(self._mention_rows):
+                f.write(dumps({"id": mention_id, **mention}))
+                f.write(b"\n")
+        self.logger.debug(f"{len(self._mention_rows)} Erwähnungen gespeichert: {MENTIONS_FILE}")
+        self._mention_ids = defaultdict(count().__next__)
+        self._mention_rows = []
+    
     def _save_json(self, filepath: Path, data: Any):
-        """Speichert Daten als JSON-Datei"""
+        """Speichert Daten als JSON-Datei (über den Codec, orjson falls installiert)"""
         try:
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            with open(filepath, 'wb') as f:
+                f.write(dumps(data, indent=True))
             self.logger.debug(f"JSON gespeichert: {filepath}")
         except Exception as e:
             self.logger.error(f"Fehler beim Speichern von {filepath}: {e}")
@@ -0,0 +1,202 @@
+"""
+Filterindex für StoryWeaver
+Vorberechnete Postings und Bitmaps für die Filter im Charaktere-Tab
+"""
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from ..models import Character
+
+
+class CharacterFilterIndex:
+    """
+    Invertierte Filterindizes über die Charaktere einer Analyse.
+
+    Jeder Charakter erhält eine fortlaufende ID (Reihenfolge des Dictionaries).
+    Gehalten werden
+    - Gegenstand -> IDs und Verhalten -> IDs (Postings),
+    - die Häufigkeiten, nach Wert sortiert (Bereichsfilter per Binärsuche),
+    - Bitmaps für "hat Beziehungen" und "hat Beschreibung".
+    Ein Filter wird so zu Und-Verknüpfungen von Bitmaps statt fünf Prüfungen
+    pro Charakter und Neuaufbau.
+
+    ``version`` gibt an, für welchen Stand der Analyse der Index gebaut wurde
+    (siehe ``analysis_version`` in der App); bei einer neuen Analyse wird er
+    neu gebaut. Änderungen an einzelnen Charakteren (Batch-Bearbeitung)
+    werden mit ``update`` und ``rename`` nachgetragen.
+    """
+
+    def __init__(self, characters: Dict[str, Character], version: int = 0):
+        self.version = version
+        self._names: List[Optional[str]] = []
+        self._ids: Dict[str, int] = {}
+        self._items: Dict[str, Set[int]] = {}
+        self._behaviors: Dict[str, Set[int]] = {}
+        # Zuletzt eingetragene Gegenstände/Verhalten je ID (zum Austragen bei Änderungen)
+        self._indexed: List[Tuple[frozenset, frozenset]] = []
+        # Sortierte Auswahllisten (bei Änderungen der Postings verworfen)
+        self._options: Dict[str, List[str]] = {}
+        frequencies, relationships, descriptions = [], [], []
+        for name, character in characters.items():
+            self._add(name, character)
+            frequencies.append(character.frequency)
+            relationships.append(bool(character.relationships))
+            descriptions.append(bool(character.description))
+
+        self._frequency = np.array(frequencies, dtype=np.int64)
+        self._has_relationships = np.array(relationships, dtype=bool)
+        self._has_description = np.array(descriptions, dtype=bool)
+        self._alive = np.ones(len(self._names), dtype=bool)
+        # IDs und Häufigkeiten aufsteigend nach Häufigkeit (bei Änderungen neu sortiert)
+        self._frequency_order: Optional[Tuple[np.ndarray, np.ndarray]] = None
+
+    def _add(self, name: str, character: Character):
+        character_id = len(self._names)
+        self._names.append(name)
+        self._ids[name] = character_id
+        self._indexed.append((frozenset(), frozenset()))
+        self._set_postings(character_id, frozenset(character.items), frozenset(character.behaviors))
+
+    def _set_postings(self, character_id: int, items: frozenset, behaviors: frozenset):
+        """Trägt Gegenstände und Verhalten eines Charakters neu ein"""
+        old_items, old_behaviors = self._indexed[character_id]
+        for postings, old, new in ((self._items, old_items, items), (self._behaviors, old_behaviors, behaviors)):
+            for key in old - new:
+                ids = postings[key]
+                ids.discard(character_id)
+                if not ids:
+                    del postings[key]
+            for key in new - old:
+                postings.setdefault(key, set()).add(character_id)
+        if items != old_items or behaviors != old_behaviors:
+            self._options.clear()
+        self._indexed[character_id] = (items, behaviors)
+
+    def update(self, name: str, character: Character):
+        """Trägt einen geänderten Charakter (gleicher Name) nach"""
+        character_id = self._ids[name]
+        self._set_postings(character_id, frozenset(character.items), frozenset(character.behaviors))
+        if self._frequency[character_id] != character.frequency:
+            self._frequency[character_id] = character.frequency
+            self._frequency_order = None
+        self._has_relationships[character_id] = bool(character.relationships)
+        self._has_description[character_id] = bool(character.description)
+
+    def rename(self, old_name: str, new_name: str, character: Character):
+        """
+        Trägt eine Umbenennung nach
+
+        Der Charakter erhält eine neue ID am Ende, wie sein neuer Schlüssel im
+        Dictionary; die Reihenfolge der Ergebnisse bleibt so die des Dictionaries.
+        """
+        old_id = self._ids.pop(old_name)
+        self._names[old_id] = None
+        self._alive[old_id] = False
+        self._set_postings(old_id, frozenset(), frozenset())
+
+        self._add(new_name, character)
+        self._frequency = np.append(self._frequency, character.frequency)
+        self._has_relationships = np.append(self._has_relationships, bool(character.relationships))
+        self._has_description = np.append(self._has_description, bool(character.description))
+        self._alive = np.append(self._alive, True)
+        self._frequency_order = None
+
+    def item_options(self) -> List[str]:
+        """Alle Gegenstände, die mindestens ein Charakter besitzt (sortiert)"""
+        if "items" not in self._options:
+            self._options["items"] = sorted(self._items)
+        return self._options["items"]
+
+    def behavior_options(self) -> List[str]:
+        """Alle Verhaltensweisen, die mindestens ein Charakter zeigt (sortiert)"""
+        if "behaviors" not in self._options:
+            self._options["behaviors"] = sorted(self._behaviors)
+        return self._options["behaviors"]
+
+    def frequency_range(self) -> Optional[Tuple[int, int]]:
+        """Kleinste und größte Häufigkeit (None ohne Charaktere)"""
+        frequencies = self._sorted_by_frequency()[1]
+        if not len(frequencies):
+            return None
+        return int(frequencies[0]), int(frequencies[-1])
+
+    def _sorted_by_frequency(self) -> Tuple[np.ndarray, np.ndarray]:
+        """IDs aller vorhandenen Charaktere und ihre Häufigkeiten, aufsteigend nach Häufigkeit"""
+        if self._frequency_order is None:
+            alive = np.flatnonzero(self._alive)
+            order = alive[np.argsort(self._frequency[alive], kind="stable")]
+            self._frequency_order = order, self._frequency[order]
+        return self._frequency_order
+
+    def _mask(self, postings: Dict[str, Set[int]], keys: Iterable[str]) -> np.ndarray:
+        """Bitmap der IDs, die mindestens einen der Schlüssel haben"""
+        mask = np.zeros(len(self._names), dtype=bool)
+        for key in keys:
+            ids = postings.get(key)
+            if ids:
+                mask[np.fromiter(ids, dtype=np.int64, count=len(ids))] = True
+        return mask
+
+    def select(self, min_frequency: Optional[int] = None, max_frequency: Optional[int] = None,
+               items: Iterable[str] = (), behaviors: Iterable[str] = (),
+               has_relationships: bool = False, has_description: bool = False,
+               names: Optional[Iterable[str]] = None) -> np.ndarray:
+        """
+        IDs der Charaktere, die alle Filter erfüllen (aufsteigend)
+
+        Args:
+            min_frequency, max_frequency: Häufigkeitsbereich (einschließlich)
+            items: Mindestens einer dieser Gegenstände
+            behaviors: Mindestens eine dieser Verhaltensweisen
+            has_relationships: Nur Charaktere mit Beziehungen
+            has_description: Nur Charaktere mit Beschreibung
+            names: Nur diese Charaktere (z.B. Treffer der Namenssuche)
+        """
+        mask = self._alive.copy()
+        if min_frequency is not None or max_frequency is not None:
+            order, frequencies = self._sorted_by_frequency()
+            start = 0 if min_frequency is None else np.searchsorted(frequencies, min_frequency, "left")
+            stop = len(order) if max_frequency is None else np.searchsorted(frequencies, max_frequency, "right")
+            in_range = np.zeros(len(mask), dtype=bool)
+            in_range[order[start:stop]] = True
+            mask &= in_range
+        items, behaviors = list(items), list(behaviors)
+        if items:
+            mask &= self._mask(self._items, items)
+        if behaviors:
+            mask &= self._mask(self._behaviors, behaviors)
+        if has_relationships:
+            mask &= self._has_relationships
+        if has_description:
+            mask &= self._has_description
+        if names is not None:
+            selected = np.zeros(len(mask), dtype=bool)
+            selected[[self._ids[name] for name in names if name in self._ids]] = True
+            mask &= selected
+        return np.flatnonzero(mask)
+
+    def names(self, ids: Iterable[int]) -> List[str]:
+        """Charakternamen zu IDs"""
+        return [self._names[character_id] for character_id in ids]
+
+    def top_by_frequency(self, ids: np.ndarray, count: int) -> List[str]:
+        """Die ``count`` häufigsten der gegebenen Charaktere"""
+        order = np.argsort(-self._frequency[ids], kind="stable")[:count]
+        return self.names(ids[order])
+
+    def items_of(self, ids: np.ndarray) -> List[str]:
+        """Gegenstände, die mindestens einer der gegebenen Charaktere besitzt (sortiert)"""
+        selected = set(ids.tolist())
+        return [item for item in self.item_options() if not selected.isdisjoint(self._items[item])]
+
+    def with_item(self, ids: np.ndarray, item: str) -> List[str]:
+        """Die gegebenen Charaktere, die den Gegenstand besitzen"""
+        return self.names(ids[self._mask(self._items, [item])[ids]])
+
+    def without_relationships(self, ids: np.ndarray) -> List[str]:
+        """Die gegebenen Charaktere ohne Beziehungen"""
+        return self.names(ids[~self._has_relationships[ids]])
+
+    def __len__(self) -> int:
+        return len(self._ids)
@@ -0,0 +1,195 @@
+"""
+Merge-Pipeline für StoryWeaver
+Berechnet die Ähnlichkeitsgraphen der Entitätstypen parallel in einem Prozess-Pool
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional, Tuple
+
+from ..models import StoryElement
+from .blocking import BlockingIndex
+from .cluster_index import ClusterIndex
+from .clustering import EdgeBlock, SimilarityGraph
+from .merger import EntityMerger, GraphContext
+
+# Zustand des Worker-Prozesses (einmal pro Prozess übertragen, siehe _init_worker):
+# Merger, Namenslisten pro Typ und die daraus einmal berechneten Graph-Kontexte
+_worker_merger: Optional[EntityMerger] = None
+_worker_names: Dict[str, List[str]] = {}
+_worker_min_score: Optional[int] = None
+_worker_contexts: Dict[str, GraphContext] = {}
+
+
+def _init_worker(merger: EntityMerger, names: Dict[str, List[str]], min_score: int):
+    """
+    Initialisiert einen Worker-Prozess mit dem Merger und den Namen des Hauptprozesses
+
+    Der Pool startet so viele Prozesse wie Kerne; RapidFuzz rechnet darin
+    daher mit einem Thread statt mit allen Kernen pro Prozess.
+    """
+    global _worker_merger, _worker_names, _worker_min_score, _worker_contexts
+    merger.scorer.workers = 1
+    _worker_merger = merger
+    _worker_names = names
+    _worker_min_score = min_score
+    _worker_contexts = {}
+
+
+def _graph_block(entity_type: str, start: int, stop: int) -> Tuple[EdgeBlock, float]:
+    """Berechnet einen Kantenblock im Worker und misst die Laufzeit"""
+    started = time.perf_counter()
+    context = _worker_contexts.get(entity_type)
+    if context is None:
+        context = _worker_contexts[entity_type] = _worker_merger.graph_context(
+            entity_type, _worker_names[entity_type], _worker_min_score)
+    block = _worker_merger.graph_edges(entity_type, context.names, start, stop, context=context)
+    return block, time.perf_counter() - started
+
+
+class MergePipeline:
+    """
+    Merge-Stufe für Charaktere, Gegenstände und Orte.
+
+    Die drei Typen sind unabhängig voneinander; ihre Ähnlichkeitsgraphen
+    werden daher gleichzeitig in einem Prozess-Pool berechnet. Große Typen
+    werden zusätzlich in Positionsbereiche von ``block_size`` Namen zerlegt
+    (siehe ``EntityMerger.graph_edges``). An die Worker gehen einmal pro
+    Prozess die Namenslisten; Vergleichsschlüssel und Blocking-Index eines
+    Typs berechnet jeder Worker einmal und nutzt sie für alle seine Blöcke.
+    Graphen, Cluster und zusammengeführte Entitäten entstehen im
+    Hauptprozess. Mit ``workers=1`` oder weniger als ``pool_min_names`` Namen
+    (z.B. eine Analyse in der App) läuft alles ohne Pool im Hauptprozess.
+
+    Nach jedem Lauf enthält ``report`` pro Typ die Zahl der Namen, Blöcke und
+    geprüften Paare (``comparisons``), die Zeit vom Start bis zum fertigen
+    Graphen (``graph_seconds``), die Summe der Block-Laufzeiten in den Workern
+    (``worker_seconds``) und die Zeit der Zusammenführung (``merge_seconds``).
+    """
+
+    # Namen pro Kantenblock
+    BLOCK_SIZE = 2000
+
+    # Ab dieser Zahl von Namen (alle Typen) lohnt sich der Start eines Prozess-Pools
+    POOL_MIN_NAMES = 5000
+
+    def __init__(self, merger: EntityMerger, workers: Optional[int] = None,
+                 block_size: int = BLOCK_SIZE, pool_min_names: int = POOL_MIN_NAMES):
+        """
+        Args:
+            merger: Konfigurierter Merger (wird an die Worker übertragen)
+            workers: Anzahl Prozesse (Standard: Anzahl CPUs, 1 = ohne Pool)
+            block_size: Namen pro Kantenblock innerhalb eines Typs
+            pool_min_names: Weniger Namen werden ohne Pool im Hauptprozess verglichen
+        """
+        self.merger = merger
+        self.workers = max(workers or os.cpu_count() or 1, 1)
+        self.block_size = max(block_size, 1)
+        self.pool_min_names = pool_min_names
+        # Tatsächlich genutzte Prozesse im letzten Lauf (1 = im Hauptprozess)
+        self.processes = 1
+        self.report: Dict[str, Dict] = {}
+        self.graphs: Dict[str, SimilarityGraph] = {}
+
+    def build_graphs(self, entities: Dict[str, Dict[str, StoryElement]],
+                     min_score: Optional[int] = None) -> Dict[str, SimilarityGraph]:
+        """
+        Berechnet die Ähnlichkeitsgraphen aller übergebenen Typen
+
+        Args:
+            entities: Entitätstyp -> unzusammengeführte Entitäten
+            min_score: Kleinster späterer Schwellwert (Standard: similarity_threshold)
+        """
+        min_score = self.merger._threshold(min_score)
+        names = {entity_type: list(entities[entity_type]) for entity_type in entities}
+        tasks = [(entity_type, start, min(start + self.block_size, len(names[entity_type])))
+                 for entity_type in names
+                 for start in range(0, len(names[entity_type]), self.block_size)]
+        blocks: Dict[Tuple[str, int], EdgeBlock] = {}
+        started = time.perf_counter()
+        self.report = {entity_type: {"names": len(names[entity_type]), "blocks": 0,
+                                     "comparisons": 0, "worker_seconds": 0.0,
+                                     "graph_seconds": 0.0, "merge_seconds": 0.0}
+                       for entity_type in names}
+
+        def collect(entity_type: str, start: int, block: EdgeBlock, seconds: float):
+            blocks[entity_type, start] = block
+            report = self.report[entity_type]
+            report["blocks"] += 1
+            report["comparisons"] += block.comparisons
+            report["worker_seconds"] += seconds
+            report["graph_seconds"] = time.perf_counter() - started
+
+        total = sum(len(entity_names) for entity_names in names.values())
+        if self.workers == 1 or len(tasks) <= 1 or total < self.pool_min_names:
+            self.processes = 1
+            contexts: Dict[str, GraphContext] = {}
+            for entity_type, start, stop in tasks:
+                block_started = time.perf_counter()
+                if entity_type not in contexts:
+                    contexts[entity_type] = self.merger.graph_context(entity_type, names[entity_type],
+                                                                      min_score)
+                block = self.merger.graph_edges(entity_type, names[entity_type], start, stop,
+                                                context=contexts[entity_type])
+                collect(entity_type, start, block, time.perf_counter() - block_started)
+        else:
+            self.processes = min(self.workers, len(tasks))
+            with ProcessPoolExecutor(self.processes, initializer=_init_worker,
+                                     initargs=(self.merger, names, min_score)) as pool:
+                futures = {pool.submit(_graph_block, entity_type, start, stop): (entity_type, start)
+                           for entity_type, start, stop in tasks}
+                for future in as_completed(futures):
+                    collect(*futures[future], *future.result())
+
+        # Blöcke in fester Reihenfolge übernehmen (unabhängig von der Fertigstellung)
+        graphs: Dict[str, SimilarityGraph] = {}
+        for entity_type in names:
+            graph = SimilarityGraph(names[entity_type], min_score)
+            stats = []
+            for start in range(0, len(names[entity_type]), self.block_size):
+                block = blocks[entity_type, start]
+                graph.add_block(block)
+                if block.blocking is not None:
+                    stats.append(block.blocking)
+            if stats:
+                self.merger.blocking_stats[entity_type] = BlockingIndex.combine_stats(stats)
+            self.report[entity_type]["edges"] = len(graph)
+            graphs[entity_type] = graph
+        return graphs
+
+    def run(self, entities: Dict[str, Dict[str, StoryElement]], min_score: Optional[int] = None
+            ) -> Tuple[Dict[str, Dict[str, StoryElement]], Dict[str, ClusterIndex]]:
+        """
+        Führt alle übergebenen Typen zusammen (die Graphen bleiben in ``graphs``)
+
+        Args:
+            entities: Entitätstyp -> unzusammengeführte Entitäten
+            min_score: Kleinster späterer Schwellwert der Graphen (Standard: similarity_threshold)
+
+        Returns:
+            (Entitätstyp -> zusammengeführte Entitäten, Entitätstyp -> Cluster-Index)
+        """
+        graphs = self.graphs = self.build_graphs(entities, min_score)
+        merged: Dict[str, Dict[str, StoryElement]] = {}
+        indexes: Dict[str, ClusterIndex] = {}
+        for entity_type, graph in graphs.items():
+            started = time.perf_counter()
+            merged[entity_type], indexes[entity_type] = self.merger.build_cluster_index(
+                entity_type, entities[entity_type], graph)
+            report = self.report[entity_type]
+            report["merge_seconds"] = time.perf_counter() - started
+            report["clusters"] = len(merged[entity_type])
+        return merged, indexes
+
+    def format_report(self) -> List[str]:
+        """Eine Zeile pro Entitätstyp für Log und Konsole"""
+        lines = []
+        for entity_type, report in self.report.items():
+            line = (f"{entity_type}: {report['names']} Namen, {report['comparisons']} Vergleiche "
+                    f"in {report['blocks']} Blöcken, Graph fertig nach {report['graph_seconds']:.2f}s "
+                    f"(Worker {report['worker_seconds']:.2f}s), "
+                    f"Zusammenführung {report['merge_seconds']:.2f}s")
+            if "clusters" in report:
+                line += f" -> {report['clusters']}"
+            lines.append(line)
+        return lines
@@ -2,233 +2,544 @@
 Merger für StoryWeaver
 Führt Duplikate zusammen und erkennt ähnliche Entitäten
 """
-from typing import Dict, List, Tuple, Set
-from fuzzywuzzy import fuzz, process
+from array import array
+from typing import Callable, Dict, FrozenSet, List, NamedTuple, Optional, Sequence, Tuple, Set
+from pathlib import Path
 import re
 
 from ..models import Character, Item, Location, StoryElement
+from .base_words import BaseWordVocabulary
+from .blocking import BlockingIndex
+from .cluster_index import ClusterIndex
+from .clustering import EdgeBlock, SimilarityGraph
+from .phonetics import PhoneticEncoder
+from .similarity import ScoreTable, SimilarityScorer
+
+
+class NameKeys(NamedTuple):
+    """Einmal pro Merge berechnete Vergleichsschlüssel eines Namens"""
+    normalized: str
+    first_token: Optional[str]
+    base: Optional[str]  # Basis-Gegenstand bzw. Basis-Ort
+    content_words: FrozenSet[str]  # Wörter ohne Füllwörter
+    phonetic: Optional[str] = None  # Phonetischer Schlüssel (nur Charaktere, optional)
+
+
+class GraphContext(NamedTuple):
+    """Einmal pro Entitätstyp und Namensliste vorbereitete Daten für graph_edges"""
+    entity_type: str
+    names: List[str]
+    min_score: int
+    table: Dict[str, NameKeys]
+    normalized: List[str]
+    index: Optional[BlockingIndex]  # None im vollständigen Modus
+    related: Callable[[NameKeys, NameKeys], bool]
 
 
 class EntityMerger:
     """Führt ähnliche Entitäten zusammen"""
     
-    def __init__(self, similarity_threshold: int = 80):
+    # Füllwörter, die beim Teilmengen-Vergleich von Ortsnamen ignoriert werden
+    LOCATION_STOP_WORDS = {'von', 'der', 'die', 'das', 'am', 'im', 'zur', 'zum', 'in', 'an', 'auf', 'bei'}
+    
+    def __init__(self, similarity_threshold: int = 80, use_blocking: bool = True,
+                 scorer: SimilarityScorer = None, base_words_path: Optional[Path] = None,
+                 phonetic: Optional[str] = None):
         """
         Args:
             similarity_threshold: Minimale Ähnlichkeit (0-100) für Zusammenführung
+            use_blocking: Nur plausible Paare über einen Blocking-Index vergleichen
+                          (False = vollständiger Abgleich aller Paare)
+            scorer: Backend für die blockweise Ähnlichkeitsberechnung
+            base_words_path: JSON-Datei mit Basis-Gegenständen und -Orten
+                             (Standard: src/utils/base_words.json)
+            phonetic: Charaktere mit gleichem phonetischen Schlüssel zusammenführen:
+                      "koelner" (Kölner Phonetik), "metaphone" (Double Metaphone)
+                      oder None (aus)
         """
         self.similarity_threshold = similarity_threshold
-    
-    def merge_characters(self, characters: Dict[str, Character]) -> Dict[str, Character]:
-        """Führt ähnliche Charaktere zusammen"""
-        merged = {}
-        processed = set()
+        self.use_blocking = use_blocking
+        self.scorer = scorer or SimilarityScorer()
         
-        char_names = list(characters.keys())
+        # Basis-Wörter für "magisches schwert" -> "schwert", "dunkler wald" -> "wald"
+        self.item_base_words = BaseWordVocabulary.from_config("items", base_words_path)
+        self.location_base_words = BaseWordVocabulary.from_config("locations", base_words_path)
         
-        for name in char_names:
-            if name in processed:
-                continue
-            
-            char = characters[name]
-            similar_names = self._find_similar_names(name, char_names, processed)
-            
-            # Führe alle ähnlichen Charaktere zusammen
-            for similar_name in similar_names:
-                if similar_name != name and similar_name not in processed:
-                    similar_char = characters[similar_name]
-                    char.merge_with(similar_char)
-                    char.add_alias(similar_name)
-                    processed.add(similar_name)
-            
-            # Verwende den längsten/vollständigsten Namen als Hauptnamen
-            all_names = [name] + list(char.aliases)
-            main_name = self._select_best_name(all_names)
-            if main_name != name:
-                char.name = main_name
-                char.add_alias(name)
-            
-            merged[char.name] = char
-            processed.add(name)
+        # Phonetische Schlüssel für "Mayer"/"Meier" (Codes pro Wort zwischengespeichert)
+        self.phonetic = PhoneticEncoder(phonetic) if phonetic else None
         
-        return merged
-    
-    def merge_items(self, items: Dict[str, Item]) -> Dict[str, Item]:
-        """Führt ähnliche Gegenstände zusammen"""
-        merged = {}
-        processed = set()
+        # Statistik des Blocking-Index pro Entitätstyp (siehe BlockingIndex.stats)
+        self.blocking_stats: Dict[str, Dict] = {}
         
-        item_names = list(items.keys())
+        # Namen der Elemente, die merge_incremental neu zusammengeführt hat (pro Entitätstyp)
+        self.changed_names: Dict[str, Set[str]] = {}
+    
+    def merge_characters(self, characters: Dict[str, Character], graph: SimilarityGraph = None,
+                         threshold: Optional[int] = None) -> Dict[str, Character]:
+        """
+        Führt ähnliche Charaktere zusammen
         
-        for name in item_names:
-            if name in processed:
-                continue
-            
-            item = items[name]
-            similar_names = self._find_similar_items(name, item_names, processed)
-            
-            # Führe ähnliche Gegenstände zusammen
-            for similar_name in similar_names:
-                if similar_name != name and similar_name not in processed:
-                    similar_item = items[similar_name]
-                    item.merge_with(similar_item)
-                    processed.add(similar_name)
-            
-            # Bereinige den Namen
-            clean_name = self._clean_item_name(name)
-            if clean_name != name:
-                item.name = clean_name
-            
-            merged[item.name] = item
-            processed.add(name)
+        Args:
+            characters: Unzusammengeführte Charaktere
+            graph: Vorberechneter Graph (siehe character_graph), sonst neu berechnet
+            threshold: Schwellwert für die Zusammenführung (Standard: similarity_threshold)
+        """
+        return self._merge_graph("characters", characters, graph, threshold)
+    
+    def merge_items(self, items: Dict[str, Item], graph: SimilarityGraph = None,
+                    threshold: Optional[int] = None) -> Dict[str, Item]:
+        """Führt ähnliche Gegenstände zusammen (Argumente wie merge_characters)"""
+        return self._merge_graph("items", items, graph, threshold)
+    
+    def merge_locations(self, locations: Dict[str, Location], graph: SimilarityGraph = None,
+                        threshold: Optional[int] = None) -> Dict[str, Location]:
+        """Führt ähnliche Orte zusammen (Argumente wie merge_characters)"""
+        return self._merge_graph("locations", locations, graph, threshold)
+    
+    def character_graph(self, characters: Dict[str, Character],
+                        min_score: Optional[int] = None) -> SimilarityGraph:
+        """
+        Berechnet den Ähnlichkeitsgraphen der Charaktere
         
-        return merged
+        Args:
+            characters: Unzusammengeführte Charaktere
+            min_score: Kleinster Schwellwert, mit dem später zusammengeführt
+                       werden kann (Standard: similarity_threshold)
+        """
+        return self.similarity_graph("characters", characters, min_score)
     
-    def merge_locations(self, locations: Dict[str, Location]) -> Dict[str, Location]:
-        """Führt ähnliche Orte zusammen"""
-        merged = {}
-        processed = set()
+    def item_graph(self, items: Dict[str, Item], min_score: Optional[int] = None) -> SimilarityGraph:
+        """Berechnet den Ähnlichkeitsgraphen der Gegenstände (siehe character_graph)"""
+        return self.similarity_graph("items", items, min_score)
+    
+    def location_graph(self, locations: Dict[str, Location],
+                       min_score: Optional[int] = None) -> SimilarityGraph:
+        """Berechnet den Ähnlichkeitsgraphen der Orte (siehe character_graph)"""
+        return self.similarity_graph("locations", locations, min_score)
+    
+    def similarity_graph(self, entity_type: str, entities: Dict[str, StoryElement],
+                         min_score: Optional[int] = None) -> SimilarityGraph:
+        """
+        Sammelt alle Paare, die eine Ähnlichkeitsregel erfüllen
         
-        location_names = list(locations.keys())
+        Alle Regeln sind symmetrisch; jedes Paar wird daher nur einmal (von der
+        kleineren Position aus) geprüft. Die Komponenten des Graphen sind die
+        transitive Hülle der Paare und hängen nicht von der Reihenfolge der
+        Namen ab.
+        """
+        min_score = self._threshold(min_score)
+        names = list(entities.keys())
+        graph = SimilarityGraph(names, min_score)
+        block = self.graph_edges(entity_type, names, min_score=min_score)
+        graph.add_block(block)
+        if block.blocking is not None:
+            self.blocking_stats[entity_type] = block.blocking
+        return graph
+    
+    def graph_context(self, entity_type: str, names: List[str],
+                      min_score: Optional[int] = None) -> GraphContext:
+        """
+        Vergleichsschlüssel und Blocking-Index aller Namen eines Typs für graph_edges
         
-        for name in location_names:
-            if name in processed:
+        Wird einmal pro Typ berechnet und für alle Blöcke wiederverwendet
+        (in der MergePipeline einmal pro Worker-Prozess).
+        """
+        min_score = self._threshold(min_score)
+        table = self._name_table(entity_type, names)
+        normalize, rule_keys, related, substring = self._rules(entity_type)
+        normalized = [table[name].normalized for name in names]
+        index = self._build_index(names, normalize, normalized, table, rule_keys,
+                                  substring, min_score)
+        return GraphContext(entity_type, names, min_score, table, normalized, index, related)
+    
+    def graph_edges(self, entity_type: str, names: List[str], start: int = 0,
+                    stop: Optional[int] = None, min_score: Optional[int] = None,
+                    context: Optional[GraphContext] = None) -> EdgeBlock:
+        """
+        Berechnet die Kanten der Namen an den Positionen start..stop-1
+        
+        Jede Position wird gegen alle späteren Positionen (auch außerhalb des
+        Bereichs) geprüft; die Blöcke einer Zerlegung von 0..n-1 ergeben
+        zusammen genau die Kanten von similarity_graph. Braucht nur die
+        Namensliste und kann daher in einem Worker-Prozess laufen (siehe
+        MergePipeline). Mit ``context`` (aus graph_context für dieselben Namen)
+        werden Schlüssel und Blocking-Index nicht pro Block neu berechnet.
+        """
+        if context is None:
+            context = self.graph_context(entity_type, names, min_score)
+        names, min_score, table, index, related = (context.names, context.min_score, context.table,
+                                                   context.index, context.related)
+        stop = len(names) if stop is None else stop
+        if index is not None:
+            index.reset_stats()
+        scores = ScoreTable(self.scorer, context.normalized, dense=index is None)
+        first, second, values = array('i'), array('i'), array('B')
+        comparisons = 0
+        
+        for position in range(start, stop):
+            candidates = index.candidates(position) if index else range(len(names))
+            candidates = [other for other in candidates if other > position]
+            if not candidates:
                 continue
-            
-            location = locations[name]
-            similar_names = self._find_similar_locations(name, location_names, processed)
-            
-            # Führe ähnliche Orte zusammen
-            for similar_name in similar_names:
-                if similar_name != name and similar_name not in processed:
-                    similar_location = locations[similar_name]
-                    location.merge_with(similar_location)
-                    processed.add(similar_name)
-            
-            # Verwende den vollständigsten Namen
-            if similar_names:
-                all_names = [name] + list(similar_names)
-                best_name = self._select_best_location_name(all_names)
-                if best_name != name:
-                    location.name = best_name
-            
-            merged[location.name] = location
-            processed.add(name)
+            comparisons += len(candidates)
+            keys = table[names[position]]
+            for other, score in zip(candidates, scores.row(position, candidates).tolist()):
+                if related(keys, table[names[other]]):
+                    score = SimilarityGraph.RULE
+                elif score < min_score:
+                    continue
+                first.append(position)
+                second.append(other)
+                values.append(score)
+        
+        return EdgeBlock(first, second, values, comparisons,
+                         index.stats() if index is not None else None)
+    
+    def build_cluster_index(self, entity_type: str, entities: Dict[str, StoryElement],
+                            graph: SimilarityGraph = None) -> Tuple[Dict[str, StoryElement], ClusterIndex]:
+        """
+        Führt zusammen und erstellt den Cluster-Index für spätere inkrementelle Läufe
         
-        return merged
+        Returns:
+            (zusammengeführte Entitäten, Cluster-Index)
+        """
+        if graph is None:
+            graph = self.similarity_graph(entity_type, entities)
+        index = ClusterIndex(entity_type, self.similarity_threshold,
+                             self._phonetic_algorithm(entity_type))
+        merged = self._merge_graph(entity_type, entities, graph, None, index)
+        return merged, index
     
-    def _find_similar_names(self, name: str, all_names: List[str], processed: Set[str]) -> List[str]:
-        """Findet ähnliche Charakternamen"""
-        similar = []
+    def merge_incremental(self, entity_type: str, index: ClusterIndex,
+                          merged: Dict[str, StoryElement],
+                          new_entities: Dict[str, StoryElement]) -> Dict[str, StoryElement]:
+        """
+        Ordnet neue, unzusammengeführte Entitäten in bestehende Cluster ein
         
-        # Normalisiere den Namen für Vergleich
-        normalized = self._normalize_character_name(name)
+        Jeder neue Name wird nur mit seinen Kandidaten aus dem Cluster-Index
+        verglichen und dem passenden Cluster zugeordnet (verbindet er mehrere
+        Cluster, werden diese vereinigt) oder bildet einen neuen. Nur die
+        betroffenen Cluster werden neu zusammengeführt; der Aufwand hängt von
+        der Zahl der neuen Entitäten ab, nicht von der Größe des Bestands.
+        Ihre Namen stehen danach in ``changed_names[entity_type]``; die
+        Erwähnungen aller übrigen Elemente werden nicht gelesen.
         
-        for other_name in all_names:
-            if other_name in processed or other_name == name:
-                continue
-            
-            other_normalized = self._normalize_character_name(other_name)
-            
-            # Prüfe verschiedene Ähnlichkeitskriterien
-            
-            # 1. Fuzzy String Matching auf normalisierten Namen
-            similarity = fuzz.ratio(normalized, other_normalized)
-            if similarity >= self.similarity_threshold:
-                similar.append(other_name)
-                continue
+        Args:
+            entity_type: "characters", "items" oder "locations"
+            index: Cluster-Index des letzten Laufs (wird aktualisiert)
+            merged: Zusammengeführte Entitäten des letzten Laufs (wird aktualisiert)
+            new_entities: Neue unzusammengeführte Entitäten
             
-            # 2. Teilstring-Matching (z.B. "Lyra" in "Lyra Nightshade")
-            if normalized in other_normalized or other_normalized in normalized:
-                similar.append(other_name)
-                continue
+        Returns:
+            Die aktualisierten zusammengeführten Entitäten
+        """
+        if index.threshold != self.similarity_threshold:
+            raise ValueError(f"Cluster-Index wurde mit Schwellwert {index.threshold} erstellt, "
+                             f"nicht mit {self.similarity_threshold}")
+        if index.phonetic != self._phonetic_algorithm(entity_type):
+            raise ValueError(f"Cluster-Index wurde mit phonetischem Verfahren {index.phonetic} "
+                             f"erstellt, nicht mit {self._phonetic_algorithm(entity_type)}")
+        
+        normalize, rule_keys, related, substring = self._rules(entity_type)
+        table = self._name_table(entity_type, list(new_entities))
+        blocking = self._cluster_blocking(index, normalize, rule_keys, substring)
+        
+        # Bestehende Cluster, die neue Mitglieder erhalten: Cluster -> bisheriger Hauptname
+        previous: Dict[int, str] = {}
+        created: Set[int] = set()
+        forward: Dict[int, int] = {}
+        pending: List[Tuple[int, StoryElement]] = []
+        
+        def join(first: int, second: int) -> int:
+            for cluster in (first, second):
+                if cluster not in created and cluster not in previous:
+                    previous[cluster] = index.canonical[cluster]
+            kept = index.join(first, second)
+            forward[second if kept == first else first] = kept
+            return kept
+        
+        for name, entity in new_entities.items():
+            position = index.position(name)
+            if position is None:
+                keys = table[name]
+                entity_keys = rule_keys(keys)
+                position = index.add(name, tuple(keys), entity_keys)
+                cluster = index.cluster_of[position]
+                created.add(cluster)
+                
+                if blocking is not None:
+                    blocking.add(name, keys.normalized, entity_keys)
+                    candidates = [other for other in blocking.candidates(position) if other != position]
+                else:
+                    candidates = list(range(position))
+                scores = self.scorer.score_row(keys.normalized,
+                                               [index.keys[other][0] for other in candidates])
+                for other, score in zip(candidates, scores.tolist()):
+                    if index.cluster_of[other] == cluster:
+                        continue
+                    if score >= self.similarity_threshold or \
+                            related(keys, NameKeys._make(index.keys[other])):
+                        cluster = join(cluster, index.cluster_of[other])
+            elif index.cluster_of[position] not in created:
+                previous.setdefault(index.cluster_of[position], index.canonical[index.cluster_of[position]])
             
-            # 3. Gleicher Vorname
-            name_parts = normalized.split()
-            other_parts = other_normalized.split()
-            if name_parts and other_parts and name_parts[0] == other_parts[0]:
-                similar.append(other_name)
+            index.frequencies[position] += entity.frequency
+            pending.append((position, entity))
+        
+        # Bisherige Entitäten und neue Mitglieder pro (verbleibendem) Cluster sammeln
+        parts: Dict[int, List[StoryElement]] = {}
+        for cluster, name in previous.items():
+            while cluster in forward:
+                cluster = forward[cluster]
+            if name in merged:
+                parts.setdefault(cluster, []).append(merged.pop(name))
+        for position, entity in pending:
+            parts.setdefault(index.cluster_of[position], []).append(entity)
+        
+        changed = self.changed_names[entity_type] = set()
+        for cluster, cluster_parts in parts.items():
+            positions = index.members[cluster]
+            element = self._merge_component(entity_type, cluster_parts,
+                                            [index.names[position] for position in positions],
+                                            [index.frequencies[position] for position in positions])
+            if element.name in merged:
+                # Gleicher Hauptname wie ein anderer Cluster: vereinigen
+                other = next(other for other, name in index.canonical.items()
+                             if name == element.name and other != cluster)
+                cluster = index.join(cluster, other)
+            self._add_merged(merged, element)
+            index.canonical[cluster] = element.name
+            changed.add(element.name)
         
-        return similar
+        return merged
     
-    def _find_similar_items(self, name: str, all_names: List[str], processed: Set[str]) -> List[str]:
-        """Findet ähnliche Gegenstandsnamen"""
-        similar = []
-        
-        # Normalisiere den Namen für Vergleich
-        normalized = self._normalize_item_name(name)
+    def _merge_graph(self, entity_type: str, entities: Dict[str, StoryElement],
+                     graph: Optional[SimilarityGraph], threshold: Optional[int],
+                     index: Optional[ClusterIndex] = None) -> Dict[str, StoryElement]:
+        """Führt jede Komponente des Graphen genau einmal zusammen (optional mit Cluster-Index)"""
+        if graph is None:
+            graph = self.similarity_graph(entity_type, entities)
+        if index is not None:
+            table = self._name_table(entity_type, graph.names)
+            rule_keys = self._rules(entity_type)[1]
+            clusters: Dict[str, int] = {}
         
-        for other_name in all_names:
-            if other_name in processed or other_name == name:
-                continue
-            
-            other_normalized = self._normalize_item_name(other_name)
-            
-            # Fuzzy Matching auf normalisierten Namen
-            similarity = fuzz.ratio(normalized, other_normalized)
-            if similarity >= self.similarity_threshold:
-                similar.append(other_name)
-                continue
-            
-            # Prüfe ob es derselbe Gegenstand mit Attributen ist
-            # z.B. "schwert" und "magisches schwert"
-            base_item = self._extract_base_item(normalized)
-            other_base = self._extract_base_item(other_normalized)
+        merged = {}
+        for component in graph.components(self._threshold(threshold)):
+            members = [entities[graph.names[position]] for position in component]
+            element = self._merge_component(entity_type, members,
+                                            [member.name for member in members],
+                                            [member.frequency for member in members])
+            self._add_merged(merged, element)
             
-            if base_item and other_base and base_item == other_base:
-                similar.append(other_name)
+            if index is not None:
+                # Komponenten mit gleichem Hauptnamen bilden einen Cluster
+                cluster = clusters.get(element.name)
+                for member in members:
+                    keys = table[member.name]
+                    position = index.add(member.name, tuple(keys), rule_keys(keys),
+                                         member.frequency, cluster)
+                    cluster = index.cluster_of[position]
+                clusters[element.name] = cluster
+                index.canonical[cluster] = element.name
         
-        return similar
+        return merged
     
-    def _find_similar_locations(self, name: str, all_names: List[str], processed: Set[str]) -> List[str]:
-        """Findet ähnliche Ortsnamen"""
-        similar = []
+    def _merge_component(self, entity_type: str, parts: List[StoryElement],
+                         names: List[str], frequencies: List[int]) -> StoryElement:
+        """
+        Führt die Teile eines Clusters in ein neues Element mit Hauptnamen zusammen
         
-        # Normalisiere den Namen für Vergleich
-        normalized = self._normalize_location_name(name)
+        Args:
+            parts: Zusammenzuführende Entitäten
+            names: Unzusammengeführte Namen des Clusters
+            frequencies: Häufigkeiten dieser Namen
+        """
+        if entity_type == "characters":
+            # Verwende den längsten/vollständigsten Namen als Hauptnamen
+            all_names = set(names)
+            for part in parts:
+                all_names.update(part.all_names())
+            char = self._merge_members(parts, self._select_best_name(sorted(all_names)))
+            for alias in all_names:
+                char.add_alias(alias)
+            char.aliases.discard(char.name)
+            return char
+        
+        if entity_type == "items":
+            # Häufigster Name (bei Gleichstand der kürzere), bereinigt
+            main = min(range(len(names)), key=lambda i: (-frequencies[i], len(names[i]), names[i]))
+            return self._merge_members(parts, self._clean_item_name(names[main]))
+        
+        # Verwende den vollständigsten Namen
+        return self._merge_members(parts, self._select_best_location_name(sorted(names)))
+    
+    def _name_table(self, entity_type: str, names: Sequence[str]) -> Dict[str, NameKeys]:
+        """Vergleichsschlüssel der Namen eines Entitätstyps"""
+        if entity_type == "characters":
+            return self._build_name_table(names, self._normalize_character_name,
+                                          phonetic=self.phonetic.key if self.phonetic else None)
+        if entity_type == "items":
+            return self._build_name_table(names, self._normalize_item_name,
+                                          base=self._extract_base_item)
+        if entity_type == "locations":
+            return self._build_name_table(names, self._normalize_location_name,
+                                          base=self._extract_base_location,
+                                          stop_words=self.LOCATION_STOP_WORDS)
+        raise ValueError(f"Unbekannter Entitätstyp: {entity_type}")
+    
+    def _rules(self, entity_type: str):
+        """Normalisierung, Blocking-Schlüssel, Regeln und Teilstring-Blocking eines Entitätstyps"""
+        return {
+            "characters": (self._normalize_character_name, self._character_rule_keys,
+                           self._characters_related, True),
+            "items": (self._normalize_item_name, self._item_rule_keys, self._items_related, False),
+            "locations": (self._normalize_location_name, self._location_rule_keys,
+                          self._locations_related, False)
+        }[entity_type]
+    
+    def _cluster_blocking(self, index: ClusterIndex, normalize, rule_keys,
+                          substring: bool) -> Optional[BlockingIndex]:
+        """Blocking-Index über die Namen eines Cluster-Index (aus den gespeicherten Schlüsseln)"""
+        if not self.use_blocking:
+            return None
+        if index.blocking is None:
+            index.blocking = BlockingIndex(
+                index.names, normalize, index.threshold,
+                rule_keys=lambda name, _: index.blocking_keys[index.position(name)],
+                substring=substring, normalized=[keys[0] for keys in index.keys]
+            )
+        return index.blocking
+    
+    def _phonetic_algorithm(self, entity_type: str) -> Optional[str]:
+        """Phonetisches Verfahren eines Entitätstyps (nur Charaktere) oder None"""
+        if entity_type == "characters" and self.phonetic:
+            return self.phonetic.algorithm
+        return None
+    
+    def _threshold(self, threshold: Optional[int]) -> int:
+        """Schwellwert eines Aufrufs (Standard: similarity_threshold)"""
+        return self.similarity_threshold if threshold is None else threshold
+    
+    @staticmethod
+    def _merge_members(members: List[StoryElement], name: str) -> StoryElement:
+        """Führt die Mitglieder einer Komponente in ein neues Element zusammen"""
+        # Die Original-Entitäten bleiben unverändert
+        merged = type(members[0])(name=name)
+        merged.created_at = min(member.created_at for member in members)
+        for member in members:
+            merged.merge_with(member)
+        return merged
+    
+    @staticmethod
+    def _add_merged(merged: Dict[str, StoryElement], element: StoryElement):
+        """Übernimmt ein Element; Komponenten mit gleichem Hauptnamen werden vereinigt"""
+        if element.name in merged:
+            merged[element.name].merge_with(element)
+        else:
+            merged[element.name] = element
+    
+    def _build_name_table(self, names: Sequence[str], normalize, base=None,
+                          stop_words: Set[str] = frozenset(), phonetic=None) -> Dict[str, NameKeys]:
+        """
+        Berechnet die Vergleichsschlüssel aller Namen einmal pro Merge
         
-        for other_name in all_names:
-            if other_name in processed or other_name == name:
-                continue
-            
-            other_normalized = self._normalize_location_name(other_name)
-            
-            # Fuzzy Matching auf normalisierten Namen
-            similarity = fuzz.ratio(normalized, other_normalized)
-            if similarity >= self.similarity_threshold:
-                similar.append(other_name)
+        Args:
+            names: Zu vergleichende Namen
+            normalize: Normalisierung des Entitätstyps
+            base: Extraktion des Basis-Worts aus dem normalisierten Namen (optional)
+            stop_words: Wörter, die nicht zu den Inhaltswörtern zählen
+            phonetic: Phonetischer Schlüssel aus dem normalisierten Namen (optional)
+        """
+        table = {}
+        for name in names:
+            if name in table:
                 continue
-            
-            # Teilstring-Matching für Orte
-            # z.B. "Tempel" und "Tempel von Morrakel"
-            if self._is_location_subset(name, other_name):
-                similar.append(other_name)
-            
-            # Basis-Orte erkennen (z.B. "Wald" in "Dunkler Wald")
-            base_location1 = self._extract_base_location(normalized)
-            base_location2 = self._extract_base_location(other_normalized)
-            
-            if base_location1 and base_location2 and base_location1 == base_location2:
-                similar.append(other_name)
-        
-        return similar
+            normalized = normalize(name)
+            tokens = normalized.split()
+            table[name] = NameKeys(
+                normalized=normalized,
+                first_token=tokens[0] if tokens else None,
+                base=base(normalized) if base else None,
+                content_words=frozenset(tokens) - stop_words,
+                phonetic=phonetic(normalized) if phonetic else None
+            )
+        return table
+    
+    def _build_index(self, names: List[str], normalize, normalized: List[str],
+                     table: Dict[str, NameKeys], rule_keys,
+                     substring: bool = False, threshold: Optional[int] = None) -> BlockingIndex:
+        """Erstellt den Blocking-Index (None im vollständigen Modus)"""
+        if not self.use_blocking:
+            return None
+        return BlockingIndex(names, normalize, self._threshold(threshold),
+                             rule_keys=lambda name, _: rule_keys(table[name]),
+                             substring=substring, normalized=normalized)
+    
+    def _character_rule_keys(self, keys: NameKeys) -> List[str]:
+        """Blocking-Schlüssel für Charaktere: gleicher Vorname und gleicher phonetischer Schlüssel"""
+        rule_keys = [f"first:{keys.first_token}"] if keys.first_token else []
+        if keys.phonetic:
+            rule_keys.append(f"phon:{keys.phonetic}")
+        return rule_keys
+    
+    def _item_rule_keys(self, keys: NameKeys) -> List[str]:
+        """Blocking-Schlüssel für Gegenstände: gleicher Basis-Gegenstand"""
+        return [f"base:{keys.base}"] if keys.base else []
+    
+    def _location_rule_keys(self, keys: NameKeys) -> List[str]:
+        """Blocking-Schlüssel für Orte: gemeinsame Ortswörter und gleicher Basis-Ort"""
+        # Leere Wortmenge ist Teilmenge jedes Ortsnamens (leere Namen erfüllen keine Regel)
+        if keys.content_words:
+            rule_keys = [f"word:{word}" for word in keys.content_words]
+        else:
+            rule_keys = [BlockingIndex.WILDCARD] if keys.normalized else []
+        if keys.base:
+            rule_keys.append(f"base:{keys.base}")
+        return rule_keys
+    
+    @staticmethod
+    def _characters_related(keys: NameKeys, other: NameKeys) -> bool:
+        """Regeln für Charakternamen unabhängig von der Fuzzy-Ähnlichkeit"""
+        # Leere Namen (z.B. "...") wären Teilstring jedes Namens und verbänden alle Charaktere
+        if not keys.normalized or not other.normalized:
+            return False
+        
+        # Teilstring-Matching (z.B. "Lyra" in "Lyra Nightshade")
+        if keys.normalized in other.normalized or other.normalized in keys.normalized:
+            return True
+        
+        # Gleicher Vorname
+        if keys.first_token and keys.first_token == other.first_token:
+            return True
+        
+        # Gleich ausgesprochen (z.B. "Mayer" und "Meier", nur mit phonetischem Index)
+        return bool(keys.phonetic) and keys.phonetic == other.phonetic
+    
+    @staticmethod
+    def _items_related(keys: NameKeys, other: NameKeys) -> bool:
+        """Regeln für Gegenstandsnamen unabhängig von der Fuzzy-Ähnlichkeit"""
+        # Prüfe ob es derselbe Gegenstand mit Attributen ist
+        # z.B. "schwert" und "magisches schwert"
+        return bool(keys.base) and keys.base == other.base
+    
+    def _locations_related(self, keys: NameKeys, other: NameKeys) -> bool:
+        """Regeln für Ortsnamen unabhängig von der Fuzzy-Ähnlichkeit"""
+        # Leere Namen hätten eine leere Wortmenge und wären Teilmenge jedes Ortsnamens
+        if not keys.normalized or not other.normalized:
+            return False
+        
+        # Teilstring-Matching für Orte
+        # z.B. "Tempel" und "Tempel von Morrakel"
+        if self._is_word_subset(keys.content_words, other.content_words):
+            return True
+        
+        # Basis-Orte erkennen (z.B. "Wald" in "Dunkler Wald")
+        return bool(keys.base) and keys.base == other.base
     
     def _extract_base_location(self, name: str) -> str:
         """Extrahiert den Basis-Ort aus einem Namen"""
-        # Liste von Orts-Schlüsselwörtern
-        location_words = [
-            'wald', 'schloss', 'burg', 'turm', 'dorf', 'stadt', 'tempel', 'höhle',
-            'taverne', 'palast', 'ruine', 'kirche', 'platz', 'tal', 'berg', 'see',
-            'fluss', 'meer', 'insel', 'brücke', 'straße', 'haus', 'hof', 'halle',
-            'festung', 'hafen', 'bucht', 'schenke', 'markt', 'garten'
-        ]
-        
-        # Wortgrenzen beachten um false positives zu vermeiden
-        for word in location_words:
-            if re.search(r'\b' + word + r'\b', name):
-                return word
-        
-        return None
+        return self.location_base_words.extract(name)
     
     def _normalize_item_name(self, name: str) -> str:
         """Normalisiert einen Gegenstandsnamen für bessere Vergleichbarkeit"""
@@ -247,33 +558,8 @@ class EntityMerger:
         return name.strip()
     
     def _extract_base_item(self, name: str) -> str:
-        """Extrahiert den Basis-Gegenstand aus einem Namen"""
-        # Erweiterte Liste von Item-Schlüsselwörtern
-        item_words = [
-            'schwert', 'dolch', 'stab', 'bogen', 'amulett', 'ring', 'kette', 'mantel',
-            'kristall', 'stein', 'schlüssel', 'seil', 'schild', 'robe', 'buch', 'karte',
-            'tasche', 'flasche', 'handschellen', 'krone', 'helm', 'rüstung', 'umhang',
-            'trank', 'werkzeug', 'waffe', 'schriftrolle'
-        ]
-        
-        # Wortgrenzen beachten um false positives zu vermeiden
-        for word in item_words:
-            if re.search(r'\b' + word + r'\b', name):
-                return word
-        
-        # Prüfe auf Pluralformen
-        plural_mapping = {
-            'schwerter': 'schwert', 'dolche': 'dolch', 'stäbe': 'stab', 'bögen': 'bogen',
-            'amulette': 'amulett', 'ringe': 'ring', 'ketten': 'kette', 'mäntel': 'mantel',
-            'kristalle': 'kristall', 'steine': 'stein', 'schlüssel': 'schlüssel',
-            'seile': 'seil', 'schilde': 'schild', 'roben': 'robe'
-        }
-        
-        for plural, singular in plural_mapping.items():
-            if re.search(r'\b' + plural + r'\b', name):
-                return singular
-        
-        return None
+        """Extrahiert den Basis-Gegenstand aus einem Namen (Singular vor Plural)"""
+        return self.item_base_words.extract(name)
     
     def _clean_item_name(self, name: str) -> str:
         """Bereinigt einen Gegenstandsnamen"""
@@ -336,11 +622,14 @@ class EntityMerger:
         words2 = set(norm2.split())
         
         # Ignoriere kleine Wörter
-        stop_words = {'von', 'der', 'die', 'das', 'am', 'im', 'zur', 'zum', 'in', 'an', 'auf', 'bei'}
-        words1 = words1 - stop_words
-        words2 = words2 - stop_words
+        words1 = words1 - self.LOCATION_STOP_WORDS
+        words2 = words2 - self.LOCATION_STOP_WORDS
         
-        # Prüfe ob eine Wortmenge Teilmenge der anderen ist
+        return self._is_word_subset(words1, words2)
+    
+    @staticmethod
+    def _is_word_subset(words1: FrozenSet[str], words2: FrozenSet[str]) -> bool:
+        """Prüft ob eine Wortmenge Teilmenge der anderen ist"""
         return words1.issubset(words2) or words2.issubset(words1)
     
     def _normalize_location_name(self, name: str) -> str:
@@ -0,0 +1,177 @@
+"""
+Namenssuche für StoryWeaver
+Trigramm-Index über Namen und Aliase für die Suche während der Eingabe
+"""
+from array import array
+from math import ceil
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from ..models import Character
+
+
+def _normalize(text: str) -> str:
+    """Kleinschreibung, Wörter durch zwei Leerzeichen getrennt (jeder Wortanfang wird zu "  x")"""
+    return "  " + "  ".join(text.casefold().split())
+
+
+def _trigrams(text: str) -> Iterable[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _initial_bigrams(text: str, complete: bool = True) -> Iterable[str]:
+    """
+    Bigramme jedes Worts (mit Leerzeichen davor und danach), jeweils mit dem
+    Anfangsbuchstaben des Worts vorangestellt ("lyra" -> "l l", "lly", ..., "la ")
+
+    Ohne ``complete`` bleibt das letzte Wort hinten offen (es wird noch getippt).
+    """
+    words = text.casefold().split()
+    grams = set()
+    for number, word in enumerate(words):
+        padded = " " + word + (" " if complete or number < len(words) - 1 else "")
+        grams.update(word[0] + padded[i:i + 2] for i in range(len(padded) - 1))
+    return grams
+
+
+class _GramPostings:
+    """Postings einer Gramm-Art (CSR-artig) und Anzahl der Gramme je Name"""
+
+    def __init__(self, string_grams: List[Iterable[str]]):
+        gram_ids: Dict[str, int] = {}
+        grams = array('I')
+        strings = array('I')
+        sizes = array('I')
+        for string_id, text_grams in enumerate(string_grams):
+            sizes.append(len(text_grams))
+            for gram in text_grams:
+                grams.append(gram_ids.setdefault(gram, len(gram_ids)))
+                strings.append(string_id)
+
+        self.gram_ids = gram_ids
+        grams = np.frombuffer(grams, dtype=np.uint32)
+        order = np.argsort(grams, kind="stable")
+        self.postings = np.frombuffer(strings, dtype=np.uint32)[order]
+        self.offsets = np.zeros(len(gram_ids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(grams, minlength=len(gram_ids)), out=self.offsets[1:])
+        self.sizes = np.frombuffer(sizes, dtype=np.uint32)
+
+    def scores(self, query_grams: Iterable[str], min_share: float) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Namen mit genügend gemeinsamen Grammen und ihre Bewertung: Jaccard der
+        Gramme, +1 wenn der Name alle Gramme der Anfrage enthält
+
+        Returns:
+            (Namens-IDs aufsteigend, Bewertungen)
+        """
+        gram_ids = [self.gram_ids[gram] for gram in query_grams if gram in self.gram_ids]
+        if not gram_ids:
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+
+        offsets = self.offsets
+        counts = np.bincount(
+            np.concatenate([self.postings[offsets[gram]:offsets[gram + 1]] for gram in gram_ids]),
+            minlength=len(self.sizes))
+        # Kurze Anfragen (ein, zwei Zeichen) müssen ein Wortanfang sein
+        needed = max(ceil(len(query_grams) * min_share), min(len(query_grams), 2))
+        candidates = np.nonzero(counts >= needed)[0]
+        shared = counts[candidates]
+        scores = shared / (len(query_grams) + self.sizes[candidates] - shared)
+        scores += shared == len(query_grams)
+        return candidates, scores
+
+
+class NameTrigramIndex:
+    """
+    Trigramm-Index über die Namen und Aliase der Charaktere.
+
+    Jeder Name wird normalisiert (jedes Wort mit zwei führenden Leerzeichen)
+    und in Trigramme zerlegt. Die Postings liegen CSR-artig in einem
+    numpy-Array: ``offsets[g]:offsets[g + 1]`` sind die Namen mit Trigramm
+    ``g``. Eine Anfrage zählt mit ``np.bincount``, wie viele ihrer Trigramme
+    jeder Name enthält; ohne Schleife über alle Namen bleibt sie (mit ``limit``)
+    auch bei 50k Charakteren bei etwa einer Millisekunde.
+
+    Die Anfrage wird hinten nicht aufgefüllt, der zuletzt getippte Teil wirkt
+    also wie ein Wortanfang ("lyr" findet "Lyra"). Tippfehler werden toleriert,
+    solange mindestens ``MIN_SHARE`` der Trigramme der Anfrage passen. In
+    kurzen Wörtern trifft ein Tippfehler fast alle Trigramme; Anfragen mit drei
+    bis ``SHORT_QUERY`` Zeichen werden daher zusätzlich über die Bigramme
+    der Wörter mit demselben Anfangsbuchstaben bewertet ("Lira" findet "Lyra").
+    """
+
+    # Anteil der Gramme der Anfrage, die ein Name enthalten muss
+    MIN_SHARE = 0.5
+    # Höchstlänge der Anfragen, die zusätzlich über Bigramme gesucht werden (ab drei Zeichen;
+    # kürzere Anfragen gelten als Wortanfang)
+    SHORT_QUERY = 5
+
+    def __init__(self, names: Dict[str, Iterable[str]]):
+        """
+        Args:
+            names: Charaktername -> Aliase
+        """
+        self.keys: List[str] = list(names)
+        owners = array('I')
+        texts = []
+        for key_id, (name, aliases) in enumerate(names.items()):
+            for text in dict.fromkeys([name, *aliases]):
+                owners.append(key_id)
+                texts.append(text)
+
+        self._owners = np.frombuffer(owners, dtype=np.uint32)
+        self._trigrams = _GramPostings([_trigrams(_normalize(text) + " ") for text in texts])
+        self._bigrams = _GramPostings([_initial_bigrams(text) for text in texts])
+
+    @classmethod
+    def build(cls, characters: Dict[str, Character]) -> 'NameTrigramIndex':
+        """Baut den Index über Namen und Aliase aller Charaktere auf"""
+        return cls({name: character.aliases for name, character in characters.items()})
+
+    def search(self, query: str, limit: Optional[int] = None) -> List[Tuple[str, float]]:
+        """
+        Findet Charaktere, deren Name oder Alias zur Anfrage passt
+
+        Bewertet wird der Anteil gemeinsamer Trigramme (Jaccard) des am besten
+        passenden Namens; Namen, die die Anfrage vollständig enthalten
+        (Wortanfang), erhalten einen Bonus von 1 und stehen damit vorne.
+        Kurze Anfragen werden zusätzlich über Bigramme bewertet, es zählt
+        der bessere Wert.
+
+        Args:
+            query: Eingabe (auch unvollständig oder mit Tippfehlern)
+            limit: Höchstzahl der Treffer (None = alle)
+
+        Returns:
+            (Charaktername, Bewertung), beste Treffer zuerst
+        """
+        if not query.strip() or not len(self._owners):
+            return []
+        candidates, scores = self._trigrams.scores(_trigrams(_normalize(query)), self.MIN_SHARE)
+        if 3 <= len(query.strip()) <= self.SHORT_QUERY:
+            bigram_candidates, bigram_scores = self._bigrams.scores(
+                _initial_bigrams(query, complete=False), self.MIN_SHARE)
+            # Nach Namens-ID ordnen; doppelte Namen fallen unten beim Maximum je Charakter zusammen
+            candidates = np.concatenate([candidates, bigram_candidates])
+            order = np.argsort(candidates, kind="stable")
+            candidates = candidates[order]
+            scores = np.concatenate([scores, bigram_scores])[order]
+        if not len(candidates):
+            return []
+
+        # Bester Name/Alias je Charakter (die Namen eines Charakters liegen hintereinander)
+        owners = self._owners[candidates]
+        starts = np.flatnonzero(np.concatenate(([True], owners[1:] != owners[:-1])))
+        owners = owners[starts]
+        best = np.maximum.reduceat(scores, starts)
+        if limit is not None and limit < len(best):
+            ranking = np.sort(np.argpartition(-best, limit - 1)[:limit])
+            ranking = ranking[np.argsort(-best[ranking], kind="stable")]
+        else:
+            ranking = np.argsort(-best, kind="stable")
+        keys = self.keys
+        return [(keys[owner], score) for owner, score in zip(owners[ranking].tolist(), best[ranking].tolist())]
+
+    def __len__(self) -> int:
+        return len(self.keys)
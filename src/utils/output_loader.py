@@ -0,0 +1,183 @@
+"""
+Laden exportierter Ergebnisse für StoryWeaver
+Baut Elemente aus den Übersichtsdateien auf und liest Einzeldateien erst für die Erwähnungen
+"""
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Type
+
+from ..models import Character, Item, Location, MentionList, StoryElement
+from ..models.codec import from_record, loads
+from .exporter import MENTIONS_FILE
+from .snapshot import _gc_paused
+
+# Entitätstyp -> (Modellklasse, Feld hinter "type" in der Übersicht)
+OVERVIEW_TYPES = {
+    "characters": (Character, None),
+    "items": (Item, "item_type"),
+    "locations": (Location, "location_type"),
+}
+
+
+class MentionTable:
+    """
+    Erwähnungstabelle eines normalisierten Exports (mentions.ndjson).
+
+    Die Datei wird beim ersten Zugriff einmal vollständig gelesen; die
+    Erwähnungen liegen danach nach ID in einer Liste.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._mentions: Optional[List[Dict]] = None
+
+    def resolve(self, mention_ids: Iterable[int]) -> List[Dict]:
+        """
+        Erwähnungen zu IDs aus "mention_ids"
+
+        Raises:
+            ValueError: Wenn die Tabelle fehlt oder nicht zum Export passt
+        """
+        mentions = self.mentions()
+        try:
+            return [mentions[mention_id] for mention_id in mention_ids]
+        except IndexError:
+            raise ValueError(f"{self.path} enthält nicht alle Erwähnungen der Elemente") from None
+
+    def mentions(self) -> List[Dict]:
+        """Alle Erwähnungen der Tabelle (Position = ID)"""
+        if self._mentions is None:
+            self._mentions = self._load()
+        return self._mentions
+
+    def _load(self) -> List[Dict]:
+        if not self.path.is_file():
+            raise ValueError(f"{self.path} nicht gefunden (normalisierter Export ohne Erwähnungstabelle)")
+        mentions = []
+        with _gc_paused(), open(self.path, 'rb') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                mention = loads(line)
+                if mention.pop("id") != len(mentions):
+                    raise ValueError(f"{self.path}: IDs nicht fortlaufend")
+                mentions.append(mention)
+        return mentions
+
+
+def read_mentions(record: Dict, table: Optional[MentionTable]) -> List[Dict]:
+    """Erwähnungen einer Elementdatei (eingebettet oder als IDs der Erwähnungstabelle)"""
+    if "mention_ids" in record:
+        if table is None:
+            raise ValueError("Normalisierter Export: Erwähnungstabelle erforderlich")
+        return table.resolve(record["mention_ids"])
+    return record.get("mentions", [])
+
+
+def load_entity_file(path: Path, model: Type[StoryElement],
+                     table: Optional[MentionTable] = None) -> StoryElement:
+    """
+    Lädt ein Element aus seiner JSON-Datei (auch aus einem normalisierten Export)
+
+    Args:
+        path: JSON-Datei des Elements
+        model: Modellklasse
+        table: Erwähnungstabelle des Ausgabeverzeichnisses (für "mention_ids")
+    """
+    record = loads(Path(path).read_bytes())
+    if "mention_ids" not in record:
+        return from_record(record, model)
+    entity = from_record(record, model, skip=("mentions",))
+    entity.mentions = MentionList(read_mentions(record, table))
+    return entity
+
+
+class JSONMentions:
+    """
+    Block einer MentionList, dessen Erwähnungen in der JSON-Datei des Elements liegen.
+
+    Die Datei wird erst beim ersten Iterieren gelesen (Anzeige, Export) und
+    die Erwähnungen danach im Block behalten. ``len`` kommt ohne Lesen aus
+    (Anzahl aus der Übersicht). Enthält die Datei "mention_ids"
+    (normalisierter Export), kommen die Erwähnungen aus ``table``.
+    """
+
+    __slots__ = ('directory', 'filename', 'length', 'table', '_mentions')
+
+    def __init__(self, directory: Path, filename: str, length: int,
+                 table: Optional[MentionTable] = None):
+        self.directory = directory
+        self.filename = filename
+        self.length = length
+        self.table = table
+        self._mentions: Optional[List[Dict]] = None
+
+    @property
+    def path(self) -> Path:
+        """JSON-Datei des Elements (Pfad erst bei Bedarf zusammengesetzt)"""
+        return self.directory / self.filename
+
+    @property
+    def loaded(self) -> bool:
+        """Ob die Datei bereits gelesen wurde"""
+        return self._mentions is not None
+
+    def __iter__(self) -> Iterator[Dict]:
+        if self._mentions is None:
+            self._mentions = read_mentions(loads(self.path.read_bytes()), self.table)
+        return iter(self._mentions)
+
+    def __len__(self) -> int:
+        return self.length
+
+
+def load_output(output_dir: Path, entity_types: Iterable[str] = tuple(OVERVIEW_TYPES),
+                table: Optional[MentionTable] = None) -> Dict[str, Dict[str, StoryElement]]:
+    """
+    Lädt die Elemente eines Ausgabeverzeichnisses (JSONExporter)
+
+    Gelesen werden nur ``<Typ>_overview.json``; jedes Element erhält alle
+    Felder aus seinem Übersichtseintrag und eine MentionList, die die
+    Einzeldatei erst beim ersten Zugriff auf die Erwähnungen liest.
+    Übersichten älterer Versionen (ohne "mention_count") enthalten nicht alle
+    Felder; für sie werden die Einzeldateien wie bisher vollständig geladen.
+    Bei einem normalisierten Export wird mentions.ndjson beim ersten Zugriff
+    auf Erwähnungen einmal gelesen.
+
+    Args:
+        output_dir: Ausgabeverzeichnis
+        entity_types: Zu ladende Typen ("characters", "items", "locations")
+        table: Erwähnungstabelle des Verzeichnisses (ohne: eigene, bei Bedarf gelesen)
+
+    Returns:
+        Entitätstyp -> (Name -> Element)
+
+    Raises:
+        ValueError: Wenn eine Übersichtsdatei fehlt
+    """
+    output_dir = Path(output_dir)
+    if table is None:
+        table = MentionTable(output_dir / MENTIONS_FILE)
+    result: Dict[str, Dict[str, StoryElement]] = {}
+    for entity_type in entity_types:
+        model, type_field = OVERVIEW_TYPES[entity_type]
+        overview_path = output_dir / f"{entity_type}_overview.json"
+        if not overview_path.is_file():
+            raise ValueError(f"{overview_path} nicht gefunden (kein StoryWeaver-Ausgabeverzeichnis?)")
+
+        directory = output_dir / entity_type
+        entities: Dict[str, StoryElement] = {}
+        with _gc_paused():
+            for entry in loads(overview_path.read_bytes())[entity_type]:
+                filename = entry.get("file") or model.json_filename(entry["name"])
+                if "mention_count" not in entry:
+                    entity = load_entity_file(directory / filename, model, table)
+                else:
+                    if type_field:
+                        entry[type_field] = entry.pop("type")
+                    entity = from_record(entry, model, skip=("mentions",))
+                    if entry["mention_count"]:
+                        entity.mentions = MentionList.from_chunks(
+                            [JSONMentions(directory, filename, entry["mention_count"], table)])
+                entities[entity.name] = entity
+        result[entity_type] = entities
+    return result
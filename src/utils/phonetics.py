@@ -0,0 +1,127 @@
+"""
+Phonetische Schlüssel für StoryWeaver
+Kölner Phonetik (Deutsch) und optional Double Metaphone (Englisch) für Namensvarianten wie Mayer/Meier
+"""
+import unicodedata
+from typing import Dict, Optional
+
+try:
+    from metaphone import doublemetaphone
+    METAPHONE_AVAILABLE = True
+except ImportError:
+    METAPHONE_AVAILABLE = False
+
+
+# Buchstaben, vor denen ein C am Wortanfang als K gesprochen wird
+_C_INITIAL_HARD = set("AHKLOQRUX")
+# Buchstaben, vor denen ein C im Wort als K gesprochen wird (außer nach S, Z)
+_C_HARD = set("AHKOQUX")
+
+_SIMPLE_CODES = {
+    **dict.fromkeys("AEIJOUY", "0"),
+    "B": "1",
+    **dict.fromkeys("FVW", "3"),
+    **dict.fromkeys("GKQ", "4"),
+    "L": "5",
+    **dict.fromkeys("MN", "6"),
+    "R": "7",
+    **dict.fromkeys("SZ", "8"),
+    "H": "",
+}
+
+
+def _ascii_letters(word: str) -> str:
+    """Großbuchstaben A-Z eines Wortes (Umlaute und Akzente ohne Zeichen, ß -> SS)"""
+    word = unicodedata.normalize("NFKD", word.upper().replace("ß", "SS"))
+    return "".join(char for char in word if "A" <= char <= "Z")
+
+
+def cologne_phonetic(word: str) -> str:
+    """
+    Kölner Phonetik eines Wortes (z.B. "Mayer", "Meier" und "Maier" -> "67")
+
+    Jeder Buchstabe wird abhängig von seinen Nachbarn auf eine Ziffer
+    abgebildet; anschließend werden aufeinanderfolgende gleiche Ziffern
+    zusammengefasst und alle Nullen außer am Anfang entfernt.
+    """
+    letters = _ascii_letters(word)
+    codes = []
+    for position, char in enumerate(letters):
+        previous = letters[position - 1] if position else ""
+        following = letters[position + 1] if position + 1 < len(letters) else ""
+        if char in _SIMPLE_CODES:
+            code = _SIMPLE_CODES[char]
+        elif char == "P":
+            code = "3" if following == "H" else "1"
+        elif char in "DT":
+            code = "8" if following in ("C", "S", "Z") else "2"
+        elif char == "C":
+            if position == 0:
+                code = "4" if following in _C_INITIAL_HARD else "8"
+            else:
+                code = "4" if following in _C_HARD and previous not in ("S", "Z") else "8"
+        elif char == "X":
+            code = "8" if previous in ("C", "K", "Q") else "48"
+        else:
+            code = ""
+        codes.append(code)
+
+    digits = "".join(codes)
+    collapsed = []
+    for digit in digits:
+        if not collapsed or collapsed[-1] != digit:
+            collapsed.append(digit)
+    if not collapsed:
+        return ""
+    return collapsed[0] + "".join(digit for digit in collapsed[1:] if digit != "0")
+
+
+class PhoneticEncoder:
+    """
+    Phonetischer Schlüssel eines normalisierten Namens.
+
+    Jedes Wort wird einzeln kodiert, die Codes werden mit Leerzeichen
+    verbunden. Codes einzelner Wörter werden zwischengespeichert, da sich
+    Vor- und Nachnamen über viele Namensvarianten wiederholen. Namen mit zu
+    kurzem Code (z.B. "Anna" -> "06") erhalten keinen Schlüssel, damit kurze
+    Namen nicht massenhaft zusammenfallen.
+    """
+
+    ALGORITHMS = ("koelner", "metaphone")
+
+    # Mindestanzahl bedeutungstragender Zeichen eines Schlüssels (ohne Nullen)
+    MIN_SIGNIFICANT = 2
+
+    def __init__(self, algorithm: str = "koelner"):
+        """
+        Args:
+            algorithm: "koelner" (Kölner Phonetik, Deutsch) oder
+                       "metaphone" (Double Metaphone, Englisch; benötigt das Paket metaphone)
+        """
+        if algorithm not in self.ALGORITHMS:
+            raise ValueError(f"Unbekanntes phonetisches Verfahren: {algorithm}")
+        if algorithm == "metaphone" and not METAPHONE_AVAILABLE:
+            raise ImportError("Double Metaphone benötigt das Paket 'metaphone' (pip install metaphone)")
+        self.algorithm = algorithm
+        self._cache: Dict[str, str] = {}
+
+    def encode_word(self, word: str) -> str:
+        """Code eines einzelnen Wortes"""
+        code = self._cache.get(word)
+        if code is None:
+            if self.algorithm == "koelner":
+                code = cologne_phonetic(word)
+            else:
+                code = doublemetaphone(word)[0]
+            self._cache[word] = code
+        return code
+
+    def key(self, normalized: str) -> Optional[str]:
+        """Schlüssel eines normalisierten Namens oder None (Code zu kurz)"""
+        codes = [code for code in map(self.encode_word, normalized.split()) if code]
+        key = " ".join(codes)
+        # Bei der Kölner Phonetik steht 0 für Vokale, bei Double Metaphone für "th"
+        ignored = "0 " if self.algorithm == "koelner" else " "
+        if sum(char not in ignored for char in key) < self.MIN_SIGNIFICANT:
+            return None
+        return key
@@ -0,0 +1,192 @@
+"""
+Volltextsuche für StoryWeaver
+Invertierter Index über die Kontexte aller Erwähnungen und die Dialogzeilen
+"""
+import re
+from array import array
+from bisect import bisect_left
+from heapq import merge
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional
+
+from ..models import StoryElement
+from ..extractors.timeline import ConversationTimeline
+
+# Wörter (Buchstaben, Ziffern, Unterstrich; Umlaute eingeschlossen)
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Zerlegt einen Text in Suchbegriffe (ohne Groß-/Kleinschreibung)"""
+    return TOKEN_PATTERN.findall(text.casefold())
+
+
+class SearchHit(NamedTuple):
+    """Treffer der Volltextsuche: eine Zeile mit dem Element, zu dem sie gehört"""
+    entity_type: str
+    entity: str
+    text: str
+    source_file: str
+    line_number: Optional[int]
+
+
+class MentionSearchIndex:
+    """
+    Invertierter Index über Erwähnungen und Dialogzeilen.
+
+    Jede Zeile erhält eine fortlaufende ID; pro Wort wird die sortierte
+    Liste der IDs, in denen es vorkommt, als kompaktes Array gehalten. Eine
+    Suche schneidet die Listen aller Suchbegriffe, beginnend mit der
+    kürzesten (Binärsuche in den übrigen). Begriffe ab ``MIN_PREFIX``
+    Zeichen passen auch auf längere Wörter ("schwarz" findet "Schwarzen"),
+    so erscheinen schon während der Eingabe Treffer.
+
+    Der Index wird einmal nach der Analyse aufgebaut; nach dem Neu-Gruppieren
+    stimmen die Namen der Elemente nicht mehr und er muss neu erstellt werden.
+    """
+
+    # Typ der Dialogzeilen (Element = Sprecher)
+    DIALOG = "dialog"
+
+    # Mindestlänge eines Begriffs für die Präfixsuche (kürzere müssen genau passen)
+    MIN_PREFIX = 3
+
+    def __init__(self):
+        self._texts: List[str] = []
+        self._owners = array('I')
+        self._files = array('I')
+        self._lines = array('i')
+        self._owner_table: List[tuple] = []
+        self._owner_ids: Dict[tuple, int] = {}
+        self._file_table: List[str] = []
+        self._file_ids: Dict[str, int] = {}
+        self._postings: Dict[str, array] = {}
+        self._vocabulary: Optional[List[str]] = None
+
+    @classmethod
+    def build(cls, entities: Dict[str, Dict[str, StoryElement]],
+              dialog_data: Optional[Dict[str, List[Dict]]] = None,
+              timeline: Optional[ConversationTimeline] = None) -> 'MentionSearchIndex':
+        """
+        Baut den Index über alle Erwähnungen und Dialogzeilen auf
+
+        Args:
+            entities: Entitätstyp -> (Name -> zusammengeführtes Element)
+            dialog_data: Sprecher -> Dialogzeilen (wie EntityExtractor.get_dialog_data);
+                         nur ohne Zeitachse, denn es sind lediglich Stichproben
+            timeline: Zeitachse mit allen Gesprächszügen (Dialog und Aktionen)
+        """
+        index = cls()
+        for entity_type, elements in entities.items():
+            for name, element in elements.items():
+                for mention in element.mentions:
+                    index.add(entity_type, name, mention.get("text") or "",
+                              mention.get("source_file") or "", mention.get("line_number"))
+        if timeline is not None:
+            for turns in timeline.file_columns():
+                source_file = turns["source_file"]
+                for speaker, content, line_number in zip(turns["speaker"], turns["content"],
+                                                         turns["line_number"]):
+                    index.add(cls.DIALOG, speaker, content or "", source_file, line_number)
+            return index
+        for speaker, lines in (dialog_data or {}).items():
+            for line in lines:
+                index.add(cls.DIALOG, speaker, line.get("content") or "",
+                          line.get("source_file") or "", line.get("line_number"))
+        return index
+
+    def add(self, entity_type: str, entity: str, text: str, source_file: str,
+            line_number: Optional[int] = None):
+        """Nimmt eine Zeile in den Index auf"""
+        line_id = len(self._texts)
+        owner = (entity_type, entity)
+        owner_id = self._owner_ids.get(owner)
+        if owner_id is None:
+            owner_id = self._owner_ids[owner] = len(self._owner_table)
+            self._owner_table.append(owner)
+        file_id = self._file_ids.get(source_file)
+        if file_id is None:
+            file_id = self._file_ids[source_file] = len(self._file_table)
+            self._file_table.append(source_file)
+
+        self._texts.append(text)
+        self._owners.append(owner_id)
+        self._files.append(file_id)
+        self._lines.append(-1 if line_number is None else line_number)
+
+        postings = self._postings
+        for token in set(tokenize(text)):
+            posting = postings.get(token)
+            if posting is None:
+                posting = postings[token] = array('I')
+                self._vocabulary = None
+            posting.append(line_id)
+
+    def _prefix_postings(self, prefix: str) -> Iterable[int]:
+        """IDs aller Zeilen mit einem Wort, das mit ``prefix`` beginnt (sortiert, ohne Duplikate)"""
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self._postings)
+        vocabulary = self._vocabulary
+        start = bisect_left(vocabulary, prefix)
+        stop = bisect_left(vocabulary, prefix + "\U0010ffff", start)
+        if stop - start == 1:
+            return self._postings[vocabulary[start]]
+        result = array('I')
+        previous = -1
+        for line_id in merge(*(self._postings[token] for token in vocabulary[start:stop])):
+            if line_id != previous:
+                result.append(line_id)
+                previous = line_id
+        return result
+
+    def search(self, query: str, limit: Optional[int] = 100,
+               entity_types: Optional[Iterable[str]] = None) -> List[SearchHit]:
+        """
+        Findet Zeilen, die alle Wörter der Anfrage enthalten
+
+        Args:
+            query: Suchbegriffe (Wortanfänge ab MIN_PREFIX Zeichen genügen)
+            limit: Höchstzahl der Treffer (None = alle)
+            entity_types: Nur Treffer dieser Typen (z.B. ["characters", "dialog"])
+
+        Returns:
+            Treffer in der Reihenfolge des Aufbaus
+        """
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return []
+        postings = [self._prefix_postings(token) if len(token) >= self.MIN_PREFIX
+                    else self._postings.get(token, ()) for token in tokens]
+        postings.sort(key=len)
+        if not postings[0]:
+            return []
+
+        types = set(entity_types) if entity_types is not None else None
+        hits: List[SearchHit] = []
+        for line_id in self._intersect(postings):
+            entity_type, entity = self._owner_table[self._owners[line_id]]
+            if types is not None and entity_type not in types:
+                continue
+            line_number = self._lines[line_id]
+            hits.append(SearchHit(entity_type, entity, self._texts[line_id],
+                                  self._file_table[self._files[line_id]],
+                                  None if line_number < 0 else line_number))
+            if limit is not None and len(hits) >= limit:
+                break
+        return hits
+
+    @staticmethod
+    def _intersect(postings: List[Iterable[int]]) -> Iterator[int]:
+        """IDs, die in allen Listen vorkommen (die erste ist die kürzeste)"""
+        others = postings[1:]
+        # Suchbeginn je Liste: die IDs steigen, davor liegt kein Treffer mehr
+        starts = [0] * len(others)
+        for line_id in postings[0]:
+            for number, posting in enumerate(others):
+                position = starts[number] = bisect_left(posting, line_id, starts[number])
+                if position == len(posting) or posting[position] != line_id:
+                    break
+            else:
+                yield line_id
+
+    def __len__(self) -> int:
+        return len(self._texts)
@@ -209,27 +209,24 @@ class SillyTavernExporter:
         examples = []
         
         if dialog_lines:
-            # Sammle Dialog-Paare
-            char_lines = [l for l in dialog_lines if l.get("speaker") == character.name 
-                         and l.get("line_type") == "dialog"]
-            
-            # Versuche Kontext zu finden
             for i, line in enumerate(dialog_lines):
-                if (line.get("speaker") == character.name and 
-                    line.get("line_type") == "dialog" and 
-                    i > 0):
-                    
-                    # Vorherige Zeile könnte User sein
+                if line.get("speaker") != character.name or line.get("line_type") != "dialog":
+                    continue
+                
+                # Vorgänger-Zug aus der Zeitachse; sonst vorherige Zeile der Liste
+                prev_line = line.get("reply_to")
+                if prev_line is None and i > 0:
                     prev_line = dialog_lines[i-1]
-                    if prev_line.get("speaker") != character.name:
-                        user_text = prev_line.get("content", "").strip()
-                        char_text = line.get("content", "").strip()
-                        
-                        if user_text and char_text:
-                            examples.append(f"{{{{user}}}}: {user_text}\n{{{{char}}}}: {char_text}")
-                        
-                        if len(examples) >= 2:  # Maximal 2 Beispiele
-                            break
+                
+                if prev_line and prev_line.get("speaker") != character.name:
+                    user_text = prev_line.get("content", "").strip()
+                    char_text = line.get("content", "").strip()
+                    
+                    if user_text and char_text:
+                        examples.append(f"{{{{user}}}}: {user_text}\n{{{{char}}}}: {char_text}")
+                    
+                    if len(examples) >= 2:  # Maximal 2 Beispiele
+                        break
         
         # Fallback-Beispiele wenn keine gefunden
         if not examples:
@@ -0,0 +1,113 @@
+"""
+Ähnlichkeitsberechnung für StoryWeaver
+Berechnet fuzz.ratio-Werte blockweise als Matrix statt Paar für Paar
+"""
+from typing import List, Optional, Sequence
+
+import numpy as np
+from fuzzywuzzy import fuzz
+
+try:
+    from rapidfuzz import process as rapidfuzz_process
+    from rapidfuzz.distance import Indel
+    RAPIDFUZZ_AVAILABLE = True
+except ImportError:
+    RAPIDFUZZ_AVAILABLE = False
+
+
+class SimilarityScorer:
+    """
+    Berechnet ``fuzz.ratio`` für ganze Blöcke von Namen.
+
+    Mit RapidFuzz wird ``process.cdist`` mit mehreren Threads genutzt.
+    ``fuzz.ratio`` ist ``round(100 * Levenshtein.ratio)`` und
+    ``Levenshtein.ratio`` ist die normalisierte Indel-Ähnlichkeit von
+    RapidFuzz - die Matrix liefert daher exakt dieselben Werte (Rundung wie
+    ``round``: halbe Werte zur geraden Zahl). Ohne RapidFuzz wird Paar für
+    Paar mit ``fuzz.ratio`` gerechnet.
+    """
+
+    # Ab dieser Matrixgröße lohnt sich der Start mehrerer Threads
+    PARALLEL_MIN_CELLS = 20000
+
+    def __init__(self, workers: int = -1, chunk_size: int = 1024, use_rapidfuzz: bool = True):
+        """
+        Args:
+            workers: Anzahl Threads für RapidFuzz (-1 = alle Kerne)
+            chunk_size: Zeilen pro Block bei großen Matrizen (begrenzt den Speicher)
+            use_rapidfuzz: RapidFuzz verwenden, falls installiert
+        """
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.backend = "rapidfuzz" if use_rapidfuzz and RAPIDFUZZ_AVAILABLE else "fuzzywuzzy"
+
+    def score(self, first: str, second: str) -> int:
+        """Ähnlichkeit eines einzelnen Paares (0-100)"""
+        return fuzz.ratio(first, second)
+
+    def score_matrix(self, queries: Sequence[str], choices: Sequence[str]) -> np.ndarray:
+        """Ähnlichkeitsmatrix (len(queries) x len(choices)) als uint8"""
+        result = np.zeros((len(queries), len(choices)), dtype=np.uint8)
+        if not len(queries) or not len(choices):
+            return result
+
+        for start in range(0, len(queries), self.chunk_size):
+            block = queries[start:start + self.chunk_size]
+            result[start:start + len(block)] = self._score_block(block, choices)
+        return result
+
+    def score_row(self, query: str, choices: Sequence[str]) -> np.ndarray:
+        """Ähnlichkeit eines Namens zu allen Kandidaten als uint8-Vektor"""
+        return self.score_matrix([query], choices)[0]
+
+    def _score_block(self, queries: Sequence[str], choices: Sequence[str]) -> np.ndarray:
+        """Berechnet einen Block der Matrix"""
+        if self.backend == "rapidfuzz":
+            workers = self.workers if len(queries) * len(choices) >= self.PARALLEL_MIN_CELLS else 1
+            similarity = rapidfuzz_process.cdist(
+                queries, choices, scorer=Indel.normalized_similarity,
+                dtype=np.float64, workers=workers
+            )
+            return np.rint(100 * similarity).astype(np.uint8)
+
+        return np.array([[fuzz.ratio(query, choice) for choice in choices] for query in queries],
+                        dtype=np.uint8)
+
+
+class ScoreTable:
+    """
+    Liefert die Ähnlichkeitswerte für die Merge-Schleife.
+
+    Im vollständigen Modus (``dense``) werden jeweils ``chunk_size`` Zeilen
+    gegen alle Namen auf einmal berechnet und zeilenweise verbraucht. Mit
+    Blocking-Index wird pro Name nur die Zeile seiner Kandidaten berechnet.
+    """
+
+    def __init__(self, scorer: SimilarityScorer, normalized: List[str],
+                 dense: bool = False, chunk_size: int = 256):
+        """
+        Args:
+            scorer: Backend für die Ähnlichkeitsberechnung
+            normalized: Normalisierte Namen in der Reihenfolge des Mergers
+            dense: Ganze Zeilenblöcke gegen alle Namen vorausberechnen
+            chunk_size: Zeilen pro vorausberechnetem Block
+        """
+        self.scorer = scorer
+        self.normalized = normalized
+        self.dense = dense
+        self.chunk_size = chunk_size
+        self._block_start: Optional[int] = None
+        self._block: Optional[np.ndarray] = None
+
+    def row(self, position: int, candidates: List[int]) -> np.ndarray:
+        """Ähnlichkeit des Namens an ``position`` zu den Kandidaten-Positionen"""
+        if not self.dense:
+            return self.scorer.score_row(self.normalized[position],
+                                         [self.normalized[other] for other in candidates])
+
+        if self._block is None or not (self._block_start <= position < self._block_start + len(self._block)):
+            self._block_start = position
+            self._block = self.scorer.score_matrix(
+                self.normalized[position:position + self.chunk_size], self.normalized
+            )
+        return self._block[position - self._block_start][candidates]
@@ -0,0 +1,427 @@
+"""
+Analyse-Snapshots für StoryWeaver
+Speichert ein vollständiges Analyseergebnis in einer versionierten Binärdatei und lädt es ohne erneute Analyse
+"""
+import gc
+import struct
+import sys
+import zlib
+from array import array
+from collections.abc import Mapping
+from contextlib import contextmanager
+from datetime import datetime
+from functools import partial
+from itertools import accumulate, chain
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from ..models import Character, Item, Location, MentionList, StoryElement
+from ..models.codec import decode_columns, dumps, encode_columns, loads
+from ..extractors.timeline import ConversationTimeline
+from .clustering import EdgeBlock, SimilarityGraph
+from .merger import EntityMerger
+
+# Entitätstyp -> Modellklasse
+ENTITY_MODELS = {"characters": Character, "items": Item, "locations": Location}
+
+# Schlüssel einer Erwähnung (StoryElement.add_mention)
+_MENTION_KEYS = frozenset(("text", "source_file", "line_number"))
+
+
+class AnalysisSnapshot:
+    """
+    Vollständiges Analyseergebnis als versionierte Binärdatei (.swsnap).
+
+    Aufbau der Datei (alle Zahlen Little Endian):
+        Kopf        MAGIC, Version (uint16), Anzahl der Abschnitte (uint16)
+        Tabelle     pro Abschnitt Name (16 Bytes), Kompression (uint8), Offset,
+                    gespeicherte und entpackte Länge (je uint64)
+        Abschnitte  "meta" (Einstellungen), "mentions" (alle Erwähnungen),
+                    "characters", "items", "locations" (zusammengeführt),
+                    "raw/<Typ>" (unzusammengeführt), "graph/<Typ>"
+                    (Ähnlichkeitsgraph), "dialog" (Dialog-Stichproben) und
+                    "turns" (alle Gesprächszüge der Zeitachse)
+
+    Ein Abschnitt besteht aus einem JSON-Kopf und rohen Arrays, die beim
+    Laden ohne Umwandlung übernommen werden. Entitäten werden spaltenweise
+    kodiert (siehe ``codec.encode_columns``). Jede Erwähnung steht nur
+    einmal in "mentions" - auch wenn sie zu einer rohen und einer
+    zusammengeführten Entität gehört - und die Entitäten verweisen über
+    Indizes darauf; nach dem Laden teilen sie sich wieder dieselben
+    Objekte. Rohe Entitäten und Graphen sind optional; ohne sie lässt sich
+    nicht neu gruppieren. Unbekannte Abschnitte werden übersprungen.
+    """
+
+    MAGIC = b"SWSNAP\r\n"
+    VERSION = 1
+
+    # Kleinster Schwellwert der gespeicherten Graphen (wie der Schieberegler der App)
+    MIN_SCORE = 50
+
+    # Kompression der Abschnitte
+    STORED, ZLIB = 0, 1
+
+    _HEADER = struct.Struct("<8sHH")
+    _ENTRY = struct.Struct("<16sBQQQ")
+    _LENGTH = struct.Struct("<I")
+
+    def __init__(self, merged: Dict[str, Dict[str, StoryElement]],
+                 raw_entities: Optional[Dict[str, Dict[str, StoryElement]]] = None,
+                 similarity_graphs: Optional[Dict[str, SimilarityGraph]] = None,
+                 dialog_data: Optional[Dict[str, List[Dict]]] = None,
+                 threshold: int = 80, settings: Optional[Dict] = None,
+                 merge_report: Optional[Dict[str, Dict]] = None,
+                 timeline: Optional[ConversationTimeline] = None):
+        """
+        Args:
+            merged: Entitätstyp -> zusammengeführte Entitäten
+            raw_entities: Entitätstyp -> unzusammengeführte Entitäten
+            similarity_graphs: Entitätstyp -> Ähnlichkeitsgraph der rohen Entitäten
+            dialog_data: Sprecher -> Dialogzeilen (EntityExtractor.get_dialog_data)
+            threshold: Schwellwert, mit dem ``merged`` gebildet wurde
+            settings: Einstellungen des Mergers (siehe merger_settings)
+            merge_report: Bericht der Merge-Pipeline
+            timeline: Zeitachse mit allen Gesprächszügen (z.B. für die Volltextsuche)
+        """
+        self.merged = merged
+        self.raw_entities = raw_entities or {}
+        self.similarity_graphs = similarity_graphs or {}
+        self.dialog_data = dialog_data or {}
+        self.threshold = threshold
+        self.settings = settings or {}
+        self.merge_report = merge_report or {}
+        self.timeline = timeline
+        self.created_at = datetime.now()
+
+    @staticmethod
+    def merger_settings(merger: EntityMerger) -> Dict:
+        """Einstellungen eines Mergers, aus denen create_merger ihn wieder erzeugt"""
+        return {
+            "similarity_threshold": merger.similarity_threshold,
+            "use_blocking": merger.use_blocking,
+            "phonetic": merger.phonetic.algorithm if merger.phonetic else None
+        }
+
+    def create_merger(self) -> EntityMerger:
+        """Merger mit den gespeicherten Einstellungen (zum Neu-Gruppieren)"""
+        return EntityMerger(self.settings.get("similarity_threshold", self.threshold),
+                            self.settings.get("use_blocking", True),
+                            phonetic=self.settings.get("phonetic"))
+
+    @property
+    def regroupable(self) -> bool:
+        """Ob rohe Entitäten und Graphen aller Typen vorhanden sind"""
+        return all(entity_type in self.raw_entities and entity_type in self.similarity_graphs
+                   for entity_type in ENTITY_MODELS)
+
+    def _entity_sections(self) -> List[Tuple[str, Dict[str, StoryElement]]]:
+        """Abschnittsname -> Entitäten; rohe zuerst, damit ihre Erwähnungen zusammenhängend liegen"""
+        sections = [(f"raw/{entity_type}", self.raw_entities[entity_type])
+                    for entity_type in ENTITY_MODELS if entity_type in self.raw_entities]
+        sections += [(entity_type, self.merged[entity_type])
+                     for entity_type in ENTITY_MODELS if entity_type in self.merged]
+        return sections
+
+    def to_bytes(self) -> bytes:
+        """Kodiert den Snapshot als Binärdatei"""
+        meta = {
+            "created_at": self.created_at.isoformat(),
+            "threshold": self.threshold,
+            "settings": self.settings,
+            "merge_report": self.merge_report
+        }
+        mentions = _MentionTable()
+        sections = []
+        for name, entities in self._entity_sections():
+            model = ENTITY_MODELS[name.rsplit("/", 1)[-1]]
+            values = list(entities.values())
+            counts, indices = mentions.add(values)
+            header = {"keys": list(entities), "columns": encode_columns(values, model)}
+            sections.append((name, self._pack(header, counts, indices)))
+        for entity_type in ENTITY_MODELS:
+            if entity_type in self.similarity_graphs:
+                graph = self.similarity_graphs[entity_type]
+                block = graph.edges()
+                header = {"min_score": graph.min_score, "names": graph.names}
+                sections.append((f"graph/{entity_type}",
+                                 self._pack(header, block.first, block.second, block.scores)))
+        sections[:0] = [("meta", self._pack(meta)), ("mentions", mentions.pack())]
+        sections.append(("dialog", self._pack(self.dialog_data)))
+        if self.timeline is not None:
+            sections.append(("turns", self._pack_timeline(self.timeline)))
+
+        # Abschnitte komprimieren und hinter der Tabelle anordnen
+        offset = self._HEADER.size + len(sections) * self._ENTRY.size
+        table, payloads = [], []
+        for name, data in sections:
+            payload = zlib.compress(data, 1)
+            table.append(self._ENTRY.pack(name.encode('ascii'), self.ZLIB, offset,
+                                          len(payload), len(data)))
+            payloads.append(payload)
+            offset += len(payload)
+        return b"".join([self._HEADER.pack(self.MAGIC, self.VERSION, len(sections)), *table, *payloads])
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'AnalysisSnapshot':
+        """
+        Dekodiert einen mit to_bytes erzeugten Snapshot
+
+        Rohe Entitäten werden nur zum Neu-Gruppieren gebraucht und daher erst
+        beim ersten Zugriff auf ihren Typ entpackt und dekodiert.
+        """
+        sections = cls._read_sections(memoryview(data))
+        with _gc_paused():
+            meta = cls._unpack(cls._decompress(sections["meta"]))[0]
+            snapshot = cls({}, threshold=meta["threshold"], settings=meta["settings"],
+                           merge_report=meta["merge_report"])
+            snapshot.created_at = datetime.fromisoformat(meta["created_at"])
+            mentions = _MentionTable.unpack(*cls._unpack(cls._decompress(sections["mentions"])))
+
+            def decode(name: str, model) -> Dict[str, StoryElement]:
+                with _gc_paused():
+                    header, (counts, indices) = cls._unpack(cls._decompress(sections[name]))
+                    entities = decode_columns(header["columns"], model, mentions.lists(counts, indices))
+                    return dict(zip(header["keys"], entities))
+
+            for entity_type, model in ENTITY_MODELS.items():
+                if entity_type in sections:
+                    snapshot.merged[entity_type] = decode(entity_type, model)
+                if f"graph/{entity_type}" in sections:
+                    header, arrays = cls._unpack(cls._decompress(sections[f"graph/{entity_type}"]))
+                    graph = SimilarityGraph(header["names"], header["min_score"])
+                    graph.add_block(EdgeBlock(*arrays, 0, None))
+                    snapshot.similarity_graphs[entity_type] = graph
+            snapshot.raw_entities = _LazyEntities({
+                entity_type: partial(decode, f"raw/{entity_type}", model)
+                for entity_type, model in ENTITY_MODELS.items() if f"raw/{entity_type}" in sections
+            })
+            if "dialog" in sections:
+                snapshot.dialog_data = cls._unpack(cls._decompress(sections["dialog"]))[0]
+            if "turns" in sections:
+                snapshot.timeline = cls._unpack_timeline(*cls._unpack(cls._decompress(sections["turns"])))
+        return snapshot
+
+    @classmethod
+    def _pack_timeline(cls, timeline: ConversationTimeline) -> bytes:
+        """Abschnitt "turns": Dateien, Sprecher und Inhalte im Kopf, die übrigen Spalten als Arrays"""
+        speakers: Dict[str, int] = {}
+        type_ids = {line_type: number for number, line_type in enumerate(ConversationTimeline.LINE_TYPES)}
+        files, contents = [], []
+        counts, line_numbers, speaker_refs, line_types = array('I'), array('i'), array('i'), array('b')
+        for turns in timeline.file_columns():
+            files.append(turns["source_file"])
+            counts.append(len(turns["line_number"]))
+            line_numbers.extend(turns["line_number"])
+            speaker_refs.extend([speakers.setdefault(speaker, len(speakers)) for speaker in turns["speaker"]])
+            line_types.extend(map(type_ids.__getitem__, turns["line_type"]))
+            contents.extend(turns["content"])
+        header = {"files": files, "speakers": list(speakers), "contents": contents}
+        return cls._pack(header, counts, line_numbers, speaker_refs, line_types)
+
+    @staticmethod
+    def _unpack_timeline(header: Dict, arrays: List[array]) -> ConversationTimeline:
+        """Gegenstück zu _pack_timeline"""
+        counts, line_numbers, speaker_refs, line_types = arrays
+        speakers, contents = header["speakers"], header["contents"]
+        timeline = ConversationTimeline()
+        bounds = list(accumulate(counts, initial=0))
+        for source_file, start, stop in zip(header["files"], bounds, bounds[1:]):
+            for position in range(start, stop):
+                timeline.add_turn(source_file, line_numbers[position], speakers[speaker_refs[position]],
+                                  contents[position], ConversationTimeline.LINE_TYPES[line_types[position]])
+        return timeline
+
+    @classmethod
+    def _read_sections(cls, data: memoryview) -> Dict[str, Tuple[int, memoryview, int]]:
+        """Prüft Kopf und Version; Abschnittsname -> (Kompression, Daten, entpackte Länge)"""
+        if len(data) < cls._HEADER.size:
+            raise ValueError("Datei ist zu kurz für einen StoryWeaver-Snapshot")
+        magic, version, count = cls._HEADER.unpack_from(data)
+        if magic != cls.MAGIC:
+            raise ValueError("Datei ist kein StoryWeaver-Snapshot")
+        if version != cls.VERSION:
+            raise ValueError(f"Nicht unterstützte Version des Snapshots: {version}")
+        if len(data) < cls._HEADER.size + count * cls._ENTRY.size:
+            raise ValueError("Snapshot ist unvollständig")
+
+        sections = {}
+        for number in range(count):
+            raw_name, compression, offset, size, length = cls._ENTRY.unpack_from(
+                data, cls._HEADER.size + number * cls._ENTRY.size)
+            payload = data[offset:offset + size]
+            if len(payload) != size:
+                raise ValueError("Snapshot ist unvollständig")
+            if compression not in (cls.STORED, cls.ZLIB):
+                raise ValueError(f"Unbekannte Kompression im Snapshot: {compression}")
+            sections[raw_name.rstrip(b"\0").decode('ascii')] = (compression, payload, length)
+        if "meta" not in sections:
+            raise ValueError("Snapshot ist unvollständig")
+        return sections
+
+    @classmethod
+    def _decompress(cls, section: Tuple[int, memoryview, int]) -> bytes:
+        """Entpackt einen Abschnitt aus _read_sections"""
+        compression, payload, length = section
+        if compression == cls.ZLIB:
+            try:
+                data = zlib.decompress(payload, bufsize=max(length, 1))
+            except zlib.error as e:
+                raise ValueError("Snapshot ist beschädigt") from e
+        else:
+            data = bytes(payload)
+        if len(data) != length:
+            raise ValueError("Snapshot ist beschädigt")
+        return data
+
+    @classmethod
+    def _pack(cls, header, *arrays: array) -> bytes:
+        """Abschnitt aus JSON-Kopf und Arrays (Typcode und Länge stehen am Ende des Kopfes)"""
+        encoded = dumps({"header": header, "arrays": [[values.typecode, len(values)] for values in arrays]})
+        parts = [cls._LENGTH.pack(len(encoded)), encoded]
+        for values in arrays:
+            if sys.byteorder == "big":
+                values = array(values.typecode, values)
+                values.byteswap()
+            parts.append(values.tobytes())
+        return b"".join(parts)
+
+    @classmethod
+    def _unpack(cls, data: bytes) -> Tuple[Dict, List[array]]:
+        """Gegenstück zu _pack: (Kopf, Arrays)"""
+        if len(data) < cls._LENGTH.size:
+            raise ValueError("Snapshot ist beschädigt")
+        (size,) = cls._LENGTH.unpack_from(data)
+        start = cls._LENGTH.size
+        encoded = loads(data[start:start + size])
+        start += size
+        arrays = []
+        for typecode, length in encoded["arrays"]:
+            values = array(typecode)
+            end = start + length * values.itemsize
+            values.frombytes(data[start:end])
+            if sys.byteorder == "big":
+                values.byteswap()
+            arrays.append(values)
+            start = end
+        return encoded["header"], arrays
+
+
+@contextmanager
+def _gc_paused():
+    """
+    Pausiert die Garbage Collection beim Dekodieren
+
+    Dabei entstehen nur neue, langlebige Objekte; jeder Lauf der Garbage
+    Collection würde sie erneut vergeblich durchsuchen.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+class _LazyEntities(Mapping):
+    """Entitätstyp -> Entitäten; jeder Typ wird erst beim ersten Zugriff dekodiert"""
+
+    def __init__(self, loaders: Dict[str, Callable[[], Dict[str, StoryElement]]]):
+        self._loaders = loaders
+        self._loaded: Dict[str, Dict[str, StoryElement]] = {}
+
+    def __getitem__(self, entity_type: str) -> Dict[str, StoryElement]:
+        entities = self._loaded.get(entity_type)
+        if entities is None:
+            entities = self._loaded[entity_type] = self._loaders[entity_type]()
+        return entities
+
+    def __contains__(self, entity_type) -> bool:
+        return entity_type in self._loaders
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._loaders)
+
+    def __len__(self) -> int:
+        return len(self._loaders)
+
+
+class _MentionTable:
+    """
+    Alle Erwähnungen eines Snapshots, jede nur einmal.
+
+    Zusammengeführte Entitäten teilen sich die Erwähnungs-Dictionaries mit
+    ihren rohen Entitäten (siehe MentionList.extend); sie werden über ihre
+    Identität erkannt. Texte und Quelldateien werden als Tabellen mit
+    Indizes gespeichert, Zeilennummern als Array (-1 = keine).
+    """
+
+    def __init__(self):
+        self.positions: Dict[int, int] = {}
+        self.mentions: List[Dict] = []
+
+    def add(self, entities: Sequence[StoryElement]) -> Tuple[array, array]:
+        """Nimmt die Erwähnungen der Entitäten auf; gibt Anzahl pro Entität und Indizes zurück"""
+        positions, mentions = self.positions, self.mentions
+        flat = list(chain.from_iterable(entity.mentions for entity in entities))
+        counts = array('I', [len(entity.mentions) for entity in entities])
+        indices = array('I', [positions.setdefault(id(mention), len(positions)) for mention in flat])
+        # Neue Erwähnungen in der Reihenfolge ihres ersten Auftretens übernehmen
+        for mention, position in zip(flat, indices):
+            if position == len(mentions):
+                mentions.append(mention)
+        return counts, indices
+
+    def pack(self) -> bytes:
+        """Abschnitt "mentions" """
+        # Erwähnungen in anderer Form (z.B. aus JSON-Importen) unverändert im Kopf
+        other = {str(position): mention for position, mention in enumerate(self.mentions)
+                 if not self._regular(mention)}
+        regular = list(self.mentions)
+        for position in other:
+            regular[int(position)] = {"text": "", "source_file": "", "line_number": None}
+
+        texts: Dict[str, int] = {}
+        files: Dict[str, int] = {}
+        text_indices = array('I', [texts.setdefault(mention["text"], len(texts)) for mention in regular])
+        file_indices = array('I', [files.setdefault(mention["source_file"], len(files))
+                                   for mention in regular])
+        lines = array('i', [-1 if mention["line_number"] is None else mention["line_number"]
+                            for mention in regular])
+        header = {"texts": list(texts), "files": list(files), "other": other}
+        return AnalysisSnapshot._pack(header, text_indices, file_indices, lines)
+
+    @staticmethod
+    def _regular(mention: Dict) -> bool:
+        """Ob eine Erwähnung die Form aus StoryElement.add_mention hat"""
+        return (mention.keys() == _MENTION_KEYS and isinstance(mention["text"], str)
+                and isinstance(mention["source_file"], str)
+                and (mention["line_number"] is None or type(mention["line_number"]) is int))
+
+    @classmethod
+    def unpack(cls, header: Dict, arrays: List[array]) -> '_MentionTable':
+        """Gegenstück zu pack"""
+        texts, files = header["texts"], header["files"]
+        table = cls()
+        table.mentions = [{"text": texts[text], "source_file": files[file],
+                           "line_number": None if line < 0 else line}
+                          for text, file, line in zip(*arrays)]
+        for position, mention in header["other"].items():
+            table.mentions[int(position)] = mention
+        return table
+
+    def lists(self, counts: array, indices: array) -> List[MentionList]:
+        """Erwähnungslisten der Entitäten eines Abschnitts"""
+        references = list(map(self.mentions.__getitem__, indices))
+        bounds = list(accumulate(counts, initial=0))
+        return [MentionList.wrap(references[start:stop]) for start, stop in zip(bounds, bounds[1:])]
+
+
+def save_snapshot(filepath: Path, snapshot: AnalysisSnapshot):
+    """Speichert einen Snapshot (z.B. output/analysis.swsnap)"""
+    Path(filepath).write_bytes(snapshot.to_bytes())
+
+
+def load_snapshot(filepath: Path) -> AnalysisSnapshot:
+    """Lädt einen mit save_snapshot gespeicherten Snapshot"""
+    return AnalysisSnapshot.from_bytes(Path(filepath).read_bytes())
@@ -0,0 +1,227 @@
+"""
+Tabellen-Export für StoryWeaver
+Schreibt Elemente, Erwähnungen und Dialogzeilen als spaltenorientierte Tabellen (Parquet oder Arrow IPC)
+"""
+import logging
+import os
+from operator import itemgetter
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Type, get_type_hints
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+from ..models import Character, Item, Location, StoryElement
+from ..models.codec import record_fields, to_record
+from ..extractors.timeline import ConversationTimeline
+
+# Unterverzeichnis der Tabellen im Ausgabeverzeichnis
+TABLES_DIR = "tables"
+
+# Tabellenformat -> Dateiendung
+TABLE_FORMATS = {"parquet": ".parquet", "arrow": ".arrow"}
+
+# Zeilen pro Record-Batch (Parquet: pro Row Group) bei Erwähnungen und Dialogzeilen
+BATCH_ROWS = 100_000
+
+_mention_columns = itemgetter("text", "source_file", "line_number")
+
+
+class _TableWriter:
+    """Schreibt Record-Batches nacheinander in eine Tabelle (erst zum Schluss an ihren Platz)"""
+
+    def __init__(self, path: Path, schema: 'pa.Schema', table_format: str):
+        self.path = path
+        self.schema = schema
+        self.rows = 0
+        self._temporary = path.with_name(path.name + ".tmp")
+        if table_format == "parquet":
+            self._writer = pq.ParquetWriter(self._temporary, schema)
+        else:
+            self._writer = pa.ipc.new_file(str(self._temporary), schema)
+
+    def write(self, columns: List[list]):
+        """Hängt einen Batch aus Spalten (in der Reihenfolge des Schemas) an"""
+        arrays = [pa.array(column, type=field.type) for column, field in zip(columns, self.schema)]
+        self.write_batch(pa.RecordBatch.from_arrays(arrays, schema=self.schema))
+
+    def write_batch(self, batch: 'pa.RecordBatch'):
+        self._writer.write_batch(batch)
+        self.rows += batch.num_rows
+
+    def __enter__(self) -> '_TableWriter':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._writer.close()
+        if exc_type is None:
+            os.replace(self._temporary, self.path)
+        else:
+            self._temporary.unlink(missing_ok=True)
+
+
+class TableExporter:
+    """
+    Exportiert die Ergebnisse als spaltenorientierte Tabellen für pandas & Co.
+
+    Pro Lauf entstehen im Unterverzeichnis ``tables/``
+    - ``characters``, ``items``, ``locations``: eine Zeile pro Element mit
+      allen Feldern außer den Erwähnungen (Mengen und Listen als Listen-,
+      Dictionaries als Map-Spalten) und ``mention_count``,
+    - ``mentions``: eine Zeile pro Erwähnung mit ``entity_type`` und ``entity``,
+    - ``dialog_lines``: alle Gesprächszüge der Zeitachse (Dialog und Aktionen).
+
+    Eine Tabelle wird so mit einem Aufruf gelesen (``pandas.read_parquet``
+    bzw. ``pyarrow.ipc``) statt über tausende Einzeldateien. Erwähnungen und
+    Dialogzeilen werden in Batches geschrieben und nie als Ganzes gehalten.
+    """
+
+    MENTION_SCHEMA = [("entity_type", "string"), ("entity", "string"), ("text", "string"),
+                      ("source_file", "string"), ("line_number", "int64")]
+    DIALOG_SCHEMA = [("source_file", "string"), ("line_number", "int64"), ("speaker", "string"),
+                     ("line_type", "string"), ("content", "string")]
+
+    def __init__(self, output_dir: Path = Path("output"), table_format: str = "parquet"):
+        """
+        Args:
+            output_dir: Hauptverzeichnis für die Ausgabe (Tabellen in ``tables/``)
+            table_format: "parquet" oder "arrow" (Arrow IPC, unkomprimiert und per Memory-Map lesbar)
+        """
+        if table_format not in TABLE_FORMATS:
+            raise ValueError(f"Unbekanntes Tabellenformat: {table_format}")
+        if not PYARROW_AVAILABLE:
+            raise ImportError("Der Tabellen-Export benötigt das Paket 'pyarrow' (pip install pyarrow)")
+        self.table_format = table_format
+        self.output_dir = Path(output_dir) / TABLES_DIR
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.logger = logging.getLogger(__name__)
+
+    def table_path(self, table: str) -> Path:
+        """Pfad einer Tabelle (z.B. "mentions") im gewählten Format"""
+        return self.output_dir / f"{table}{TABLE_FORMATS[self.table_format]}"
+
+    def _writer(self, table: str, schema) -> _TableWriter:
+        if isinstance(schema, list):
+            schema = pa.schema([(name, pa.type_for_alias(type_name)) for name, type_name in schema])
+        return _TableWriter(self.table_path(table), schema, self.table_format)
+
+    def export_all(self, characters: Dict[str, Character],
+                   items: Dict[str, Item],
+                   locations: Dict[str, Location],
+                   timeline: Optional[ConversationTimeline] = None,
+                   keep_dialog_lines: bool = False) -> Dict[str, int]:
+        """
+        Schreibt alle Tabellen
+
+        Args:
+            characters, items, locations: Zusammengeführte Elemente
+            timeline: Gesprächszüge für ``dialog_lines`` (ohne: Tabelle entfällt)
+            keep_dialog_lines: Zeilen anderer Dateien aus der vorhandenen Tabelle
+                               übernehmen (inkrementeller Lauf mit nur neuen Dateien)
+
+        Returns:
+            Tabelle -> Anzahl der Zeilen
+        """
+        entities = {"characters": (Character, characters), "items": (Item, items),
+                    "locations": (Location, locations)}
+        rows = {}
+        for table, (model, elements) in entities.items():
+            rows[table] = self.export_entities(table, model, elements.values())
+        rows["mentions"] = self.export_mentions({table: elements for table, (_, elements) in entities.items()})
+        if timeline is not None:
+            rows["dialog_lines"] = self.export_dialog_lines(timeline, keep_dialog_lines)
+
+        self.logger.info("Tabellen exportiert (" + ", ".join(f"{table}: {count}" for table, count in rows.items())
+                         + f") in {self.output_dir}")
+        return rows
+
+    def export_entities(self, table: str, model: Type[StoryElement], entities: Iterable[StoryElement]) -> int:
+        """Eine Zeile pro Element (alle Felder außer den Erwähnungen, dazu ``mention_count``)"""
+        entities = list(entities)
+        records = [to_record(entity, skip=("mentions",)) for entity in entities]
+        hints = get_type_hints(model)
+        arrays, names = [], []
+        for name, kind in record_fields(model, skip=("mentions",)):
+            values = list(map(itemgetter(name), records))
+            if kind == "datetime":
+                array = pa.array(values, pa.string()).cast(pa.timestamp("us"))
+            elif kind in ("set", "list"):
+                array = pa.array(values, pa.list_(pa.string()))
+            elif kind == "dict":
+                array = pa.array(values, pa.map_(pa.string(), pa.string()))
+            else:
+                # Einfache Felder sind Zahlen (frequency) oder (optionale) Texte
+                array = pa.array(values, pa.int64() if hints[name] is int else pa.string())
+            arrays.append(array)
+            names.append(name)
+        arrays.append(pa.array([len(entity.mentions) for entity in entities], pa.int64()))
+        names.append("mention_count")
+
+        batch = pa.RecordBatch.from_arrays(arrays, names=names)
+        with self._writer(table, batch.schema) as writer:
+            writer.write_batch(batch)
+        return writer.rows
+
+    def export_mentions(self, entities: Dict[str, Dict[str, StoryElement]]) -> int:
+        """Eine Zeile pro Erwähnung eines Elements (Elementtyp -> Name -> Element)"""
+        with self._writer("mentions", self.MENTION_SCHEMA) as writer:
+            columns = [[], [], [], [], []]
+            entity_types, names, texts, files, lines = columns
+            for entity_type, elements in entities.items():
+                for entity in elements.values():
+                    mentions = list(entity.mentions)
+                    if not mentions:
+                        continue
+                    entity_types.extend([entity_type] * len(mentions))
+                    names.extend([entity.name] * len(mentions))
+                    for column, values in zip((texts, files, lines), zip(*map(_mention_columns, mentions))):
+                        column.extend(values)
+                    if len(texts) >= BATCH_ROWS:
+                        writer.write(columns)
+                        for column in columns:
+                            column.clear()
+            if texts:
+                writer.write(columns)
+        return writer.rows
+
+    def export_dialog_lines(self, timeline: ConversationTimeline, keep_existing: bool = False) -> int:
+        """
+        Alle Gesprächszüge der Zeitachse, dateiweise in Reihenfolge
+
+        Mit ``keep_existing`` bleiben die Zeilen der vorhandenen Tabelle erhalten,
+        deren Datei nicht in der Zeitachse vorkommt.
+        """
+        path = self.table_path("dialog_lines")
+        previous = self._read(path) if keep_existing and path.exists() else None
+        with self._writer("dialog_lines", self.DIALOG_SCHEMA) as writer:
+            if previous is not None:
+                other_files = pc.invert(pc.is_in(previous["source_file"], pa.array(timeline.files, pa.string())))
+                kept = previous.select(writer.schema.names).cast(writer.schema).filter(other_files)
+                for batch in kept.to_batches(BATCH_ROWS):
+                    writer.write_batch(batch)
+            columns = [[], [], [], [], []]
+            for turns in timeline.file_columns():
+                size = len(turns["line_number"])
+                columns[0].extend([turns["source_file"]] * size)
+                columns[1].extend(turns["line_number"])
+                for column, name in zip(columns[2:], ("speaker", "line_type", "content")):
+                    column.extend(turns[name])
+                if len(columns[0]) >= BATCH_ROWS:
+                    writer.write(columns)
+                    for column in columns:
+                        column.clear()
+            if columns[0]:
+                writer.write(columns)
+        return writer.rows
+
+    def _read(self, path: Path) -> 'pa.Table':
+        """Liest eine vorhandene Tabelle vollständig ein"""
+        if self.table_format == "parquet":
+            return pq.read_table(path)
+        with pa.OSFile(str(path)) as source:
+            return pa.ipc.open_file(source).read_all()
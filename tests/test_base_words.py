@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Tests für den Basis-Wortschatz des Mergers
+"""
+import json
+from pathlib import Path
+import sys
+
+import pytest
+
+# Füge src zum Python-Pfad hinzu
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.utils.base_words import BaseWordVocabulary
+from src.utils.merger import EntityMerger
+
+
+def test_priority_and_plurals():
+    """Test: Basis-Wörter vor Pluralformen, Listenreihenfolge entscheidet"""
+    vocabulary = BaseWordVocabulary(["schwert", "ring", "kette"], {"ketten": "kette", "ringe": "ring"})
+
+    assert vocabulary.extract("magisches schwert") == "schwert"
+    assert vocabulary.extract("kette mit ring") == "ring"
+    assert vocabulary.extract("schwere ketten") == "kette"
+    assert vocabulary.extract("ringelblume") is None
+    with pytest.raises(ValueError):
+        vocabulary.add("zwei wörter")
+
+
+def test_merger_loads_custom_config(tmp_path):
+    """Test: Der Merger lädt eigene Wortlisten aus einer JSON-Datei"""
+    config = tmp_path / "base_words.json"
+    config.write_text(json.dumps({"items": {"words": ["laterne"]},
+                                  "locations": {"words": ["lichtung"]}}), encoding="utf-8")
+    merger = EntityMerger(base_words_path=config)
+
+    assert merger._extract_base_item("alte laterne") == "laterne"
+    assert merger._extract_base_item("magisches schwert") is None
+    assert merger._extract_base_location("stille lichtung") == "lichtung"
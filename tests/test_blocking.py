@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Tests für den Blocking-Index des EntityMergers
+"""
+import copy
+from pathlib import Path
+import sys
+
+# Füge src zum Python-Pfad hinzu
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.models import Character, Item, Location
+from src.utils.blocking import BlockingIndex
+from src.utils.merger import EntityMerger
+
+
+CHARACTER_NAMES = ["Lyra", "Lyra Nightshade", "Herr Raenor", "Raenor", "Aelon", "Gareth",
+                   "Fremder", "Ein Fremder Mann Am Nachbartisch", "Morrakel", "Ly", "Plötzlich"]
+ITEM_NAMES = ["schwert", "magisches schwert", "schwerter", "kristallamulett", "amulett",
+              "das seil", "seile", "karte", "vergilbte karte", "runenklinge"]
+LOCATION_NAMES = ["Tempel", "Tempel von Morrakel", "Der Tempel", "Dorf", "Schwarzer Pass",
+                  "Schwarze Pass", "Aldermoor", "Taverne", "von der", "Dunkler Wald", "Wald"]
+
+
+def _snapshot(entities):
+    return sorted((name, entity.frequency, sorted(getattr(entity, 'aliases', ())))
+                  for name, entity in entities.items())
+
+
+def _merge_all(use_blocking: bool, threshold: int):
+    merger = EntityMerger(threshold, use_blocking=use_blocking)
+    characters = {name: Character(name=name) for name in CHARACTER_NAMES}
+    items = {name: Item(name=name) for name in ITEM_NAMES}
+    locations = {name: Location(name=name) for name in LOCATION_NAMES}
+    return (_snapshot(merger.merge_characters(copy.deepcopy(characters))),
+            _snapshot(merger.merge_items(copy.deepcopy(items))),
+            _snapshot(merger.merge_locations(copy.deepcopy(locations))))
+
+
+def test_blocking_matches_exhaustive_merge():
+    """Test: Blocking liefert dieselben Zusammenführungen wie der vollständige Abgleich"""
+    for threshold in (50, 70, 80, 95):
+        assert _merge_all(True, threshold) == _merge_all(False, threshold)
+
+
+def test_blocking_reduces_candidate_pairs():
+    """Test: Unähnliche Namen werden nicht als Kandidaten erzeugt"""
+    merger = EntityMerger(80)
+    table = merger._build_name_table(CHARACTER_NAMES, merger._normalize_character_name)
+    index = BlockingIndex(CHARACTER_NAMES, merger._normalize_character_name, 80,
+                          rule_keys=lambda name, _: merger._character_rule_keys(table[name]),
+                          substring=True)
+
+    candidates = index.candidate_names(CHARACTER_NAMES.index("Raenor"))
+    assert "Herr Raenor" in candidates
+    assert "Gareth" not in candidates
+    # "Ly" ist Teilstring von "Lyra"
+    assert "Ly" in index.candidate_names(CHARACTER_NAMES.index("Lyra"))
+    assert index.stats()["reduction_ratio"] > 0
+
+
+def test_empty_normalized_names_stay_separate():
+    """Test: Namen, die leer normalisiert werden ("..."), verbinden nicht alle anderen"""
+    names = ["Lyra", "Gareth", "Mira", "Herr", "...", "Thorne"]
+    for use_blocking in (True, False):
+        merger = EntityMerger(80, use_blocking=use_blocking)
+        merged = merger.merge_characters({name: Character(name=name) for name in names})
+        assert sorted(merged) == sorted(names)
+        locations = merger.merge_locations({name: Location(name=name) for name in ["Der ...", "Tempel", "Dorf"]})
+        assert sorted(locations) == ["Der ...", "Dorf", "Tempel"]
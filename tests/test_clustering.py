@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Tests für das Union-Find-Clustering des EntityMergers
+"""
+import json
+import random
+from pathlib import Path
+import sys
+
+# Füge src zum Python-Pfad hinzu
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.models import Character, Location
+from src.utils.cluster_index import ClusterIndex
+from src.utils.clustering import DisjointSet
+from src.utils.merge_pipeline import MergePipeline
+from src.utils.merger import EntityMerger
+
+
+CHARACTER_NAMES = ["Lyra", "Lyra Nightshade", "Herr Raenor", "Raenor", "Aelon", "Gareth",
+                   "Ly", "Nightshade", "Lyran"]
+
+
+def _snapshot(entities):
+    return sorted((name, entity.frequency, sorted(getattr(entity, 'aliases', ())))
+                  for name, entity in entities.items())
+
+
+def test_disjoint_set_components():
+    """Test: Komponenten sind die transitive Hülle der vereinigten Paare"""
+    clusters = DisjointSet(6)
+    assert clusters.union(4, 2)
+    assert clusters.union(0, 4)
+    assert not clusters.union(2, 0)
+    clusters.union(3, 5)
+    assert clusters.components() == [[0, 2, 4], [1], [3, 5]]
+
+
+def test_merge_is_order_independent():
+    """Test: Das Ergebnis hängt nicht von der Reihenfolge der Eingabe ab"""
+    merger = EntityMerger(80)
+    expected = None
+    for seed in range(5):
+        names = list(CHARACTER_NAMES)
+        random.Random(seed).shuffle(names)
+        characters = {name: Character(name=name, frequency=len(name)) for name in names}
+        result = _snapshot(merger.merge_characters(characters))
+        if expected is None:
+            expected = result
+        assert result == expected
+
+    # "Lyra Nightshade" verbindet "Lyra", "Ly", "Lyran" und "Nightshade" transitiv
+    names = [name for name, _, _ in expected]
+    assert "Lyra Nightshade" in names and "Nightshade" not in names
+
+
+def test_merge_does_not_mutate_input():
+    """Test: Die Original-Entitäten bleiben unverändert"""
+    locations = {name: Location(name=name, frequency=1) for name in ["Tempel", "Tempel von Morrakel"]}
+    merged = EntityMerger(80).merge_locations(locations)
+
+    assert list(merged) == ["Tempel von Morrakel"]
+    assert merged["Tempel von Morrakel"].frequency == 2
+    assert all(location.frequency == 1 for location in locations.values())
+
+
+def test_graph_reclusters_like_fresh_merge():
+    """Test: Neu-Clustern aus dem Graphen entspricht einer neuen Zusammenführung"""
+    characters = {name: Character(name=name) for name in CHARACTER_NAMES}
+    graph = EntityMerger(80).character_graph(characters, min_score=50)
+    counts = graph.component_counts(range(50, 101))
+
+    for threshold in (50, 70, 80, 95):
+        expected = EntityMerger(threshold).merge_characters(characters)
+        reclustered = EntityMerger(80).merge_characters(characters, graph, threshold)
+        assert _snapshot(reclustered) == _snapshot(expected)
+        assert counts[threshold] == len(graph.components(threshold))
+
+
+def test_incremental_merge_matches_full_merge():
+    """Test: Neue Entitäten inkrementell einordnen ergibt dieselben Cluster wie ein kompletter Lauf"""
+    names = CHARACTER_NAMES + ["Lyra Nightshade", "Aelonor", "Morrakel", "Garethan"]
+    old = {name: Character(name=name, frequency=2) for name in CHARACTER_NAMES[:5]}
+    new = {name: Character(name=name, frequency=1) for name in names[5:]}
+    combined = {name: Character(name=name, frequency=2 if name in old else 0) for name in names}
+    for name in new:
+        combined[name].frequency += 1
+
+    merger = EntityMerger(80)
+    merged, index = merger.build_cluster_index("characters", old)
+    # Über JSON gespeichert und wieder geladen
+    index = ClusterIndex.from_dict(json.loads(json.dumps(index.to_dict())))
+    merged = merger.merge_incremental("characters", index, merged, new)
+
+    assert _snapshot(merged) == _snapshot(merger.merge_characters(combined))
+    assert sorted(index.canonical.values()) == sorted(merged)
+
+
+def test_pipeline_blocks_match_sequential_merge():
+    """Test: Parallele Kantenblöcke ergeben dieselben Graphen und Cluster wie der einzelne Merger"""
+    entities = {
+        "characters": {name: Character(name=name, frequency=len(name)) for name in CHARACTER_NAMES},
+        "locations": {name: Location(name=name, frequency=1)
+                      for name in ["Tempel", "Tempel von Morrakel", "Wald", "Dunkler Wald", "Hafen"]}
+    }
+    merger = EntityMerger(80)
+    pipeline = MergePipeline(EntityMerger(80), workers=2, block_size=2, pool_min_names=0)
+    graphs = pipeline.build_graphs(entities, min_score=50)
+    assert pipeline.processes == 2
+    pool_stats = dict(pipeline.merger.blocking_stats)
+    merged, _ = pipeline.run(entities)
+
+    for entity_type, graph in graphs.items():
+        expected = merger.similarity_graph(entity_type, entities[entity_type], 50)
+        for threshold in (50, 80):
+            assert graph.components(threshold) == expected.components(threshold)
+        assert pipeline.report[entity_type]["blocks"] == (len(entities[entity_type]) + 1) // 2
+    assert _snapshot(merged["characters"]) == _snapshot(merger.merge_characters(entities["characters"]))
+    assert _snapshot(merged["locations"]) == _snapshot(merger.merge_locations(entities["locations"]))
+
+    # Kleine Eingaben ohne Pool, mit demselben Ergebnis
+    inline = MergePipeline(EntityMerger(80), workers=2, block_size=2)
+    inline_graphs = inline.build_graphs(entities, min_score=50)
+    assert inline.processes == 1
+    for entity_type, graph in inline_graphs.items():
+        assert graph.components(50) == graphs[entity_type].components(50)
+        assert inline.merger.blocking_stats[entity_type] == pool_stats[entity_type]
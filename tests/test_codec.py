@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Tests für den Codec der Story-Modelle
+"""
+from dataclasses import fields
+from datetime import datetime
+from pathlib import Path
+import sys
+
+import pytest
+
+# Füge src zum Python-Pfad hinzu
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.models import Character, Item, Location, codec
+
+
+def _entities():
+    """Je ein Element pro Modell mit allen Feldern befüllt"""
+    lyra = Character(name="Lyra Nightshade", description="Schattenweberin", frequency=2,
+                     created_at=datetime(2025, 1, 1, 12), updated_at=datetime(2025, 1, 2, 8, 30, 15, 250))
+    lyra.add_mention("Lyra lächelt.", "kapitel1.txt", 3)
+    lyra.add_mention("„Weiter“, sagt sie.", "kapitel2.txt")
+    lyra.add_behavior("neugierig")
+    lyra.add_item("Kristallkugel")
+    lyra.add_relationship("Raenor", "Mentor")
+    lyra.add_alias("Lyra")
+
+    dagger = Item(name="Dolch", description="Alt", item_type="Waffe", location="Turm")
+    dagger.add_owner("Raenor")
+    dagger.add_property("magisch", "ja")
+
+    temple = Location(name="Tempel von Morrakel", location_type="Tempel", significance="Ritual")
+    temple.add_atmosphere("düster")
+    temple.add_connected_location("Dorf")
+    temple.add_inhabitant("Morrakel")
+    temple.add_feature("Säulen")
+    return [lyra, dagger, temple]
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_round_trip_covers_all_fields(monkeypatch, use_orjson):
+    """Test: Kodieren und Dekodieren erhält jedes Feld, die Ausgabe entspricht to_dict"""
+    if use_orjson and not codec.ORJSON_AVAILABLE:
+        pytest.skip("orjson nicht installiert")
+    monkeypatch.setattr(codec, "ORJSON_AVAILABLE", use_orjson)
+
+    entities = _entities()
+    for entity in entities:
+        assert codec.to_record(entity) == entity.to_dict()
+
+    decoded = codec.decode_entities(codec.encode_entities(entities, indent=True))
+    assert [type(entity) for entity in decoded] == [Character, Item, Location]
+    for original, restored in zip(entities, decoded):
+        for field in fields(original):
+            assert getattr(restored, field.name) == getattr(original, field.name), field.name
+
+    # Nicht benötigte Felder überspringen
+    lyra = codec.decode_entities(codec.encode_entities(entities[:1]), Character, skip=["mentions"])[0]
+    assert len(lyra.mentions) == 0 and lyra.frequency == 4 and lyra.aliases == {"Lyra"}
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Tests für die Kookkurrenz-Matrix
+"""
+from pathlib import Path
+import sys
+
+import pytest
+
+# Füge src zum Python-Pfad hinzu
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.extractors.cooccurrence import CooccurrenceMatrix, load_cooccurrence, save_cooccurrence
+
+
+def test_window_counts_pairs_within_window():
+    """Test: Paare werden nur innerhalb des Zeilenfensters gezählt"""
+    matrix = CooccurrenceMatrix(window=2)
+    matrix.add_line("a.txt", 1, ["Lyra"])
+    matrix.add_line("a.txt", 2, ["Raenor"])
+    matrix.add_line("a.txt", 5, ["Aelon", "Raenor"])
+    matrix.add_line("b.txt", 6, ["Lyra"])
+    matrix.finish()
+
+    assert matrix.weight("Lyra", "Raenor") == 1
+    assert matrix.weight("Raenor", "Aelon") == 1
+    # Fenster endet an der Dateigrenze
+    assert matrix.weight("Lyra", "Aelon") == 0
+    assert len(matrix) == 2
+
+
+def test_scene_mode_counts_once_per_scene():
+    """Test: Im Szenen-Modus zählt jedes Paar einmal pro Szene"""
+    matrix = CooccurrenceMatrix(mode="scene", scene_gap=2)
+    matrix.add_line("a.txt", 1, ["Lyra"])
+    matrix.add_line("a.txt", 2, ["Raenor", "Lyra"])
+    matrix.add_line("a.txt", 4, ["Raenor"])
+    matrix.add_line("a.txt", 7, ["Raenor", "Lyra"])
+    matrix.finish()
+
+    assert matrix.weight("Lyra", "Raenor") == 2
+
+
+def test_compaction_and_aggregation():
+    """Test: Verdichtung des Puffers und Abbildung auf zusammengeführte Namen"""
+    matrix = CooccurrenceMatrix(window=1, buffer_size=3)
+    for line_number in range(1, 11):
+        matrix.add_line("a.txt", line_number, ["Lyra", "Gareth", "Fremder"])
+    matrix.finish()
+
+    assert matrix.weight("Lyra", "Gareth") == 10
+    assert list(matrix.pairs())[0][2] == 10
+
+    merged = matrix.aggregate({"Lyra": "Lyra", "Gareth": "Gareth", "Fremder": "Gareth"})
+    assert merged == {("Gareth", "Lyra"): 20}
+
+
+def test_scipy_export_is_symmetric():
+    """Test: Der Matrix-Export enthält jedes Paar in beiden Richtungen"""
+    pytest.importorskip("scipy")
+    matrix = CooccurrenceMatrix(window=1)
+    matrix.add_line("a.txt", 1, ["Lyra", "Raenor"])
+    matrix.add_line("a.txt", 2, ["Raenor", "Aelon"])
+    matrix.finish()
+
+    dense = matrix.to_scipy().toarray()
+    assert dense.shape == (3, 3)
+    assert (dense == dense.T).all()
+    lyra, raenor = matrix.names.index("Lyra"), matrix.names.index("Raenor")
+    assert dense[lyra, raenor] == matrix.weight("Lyra", "Raenor") == 1
+    assert dense.sum() == 2 * sum(weight for _, _, weight in matrix.pairs())
+
+
+def test_update_matches_single_run_and_survives_saving(tmp_path):
+    """Test: Über getrennte Dateien gezählte Matrizen ergeben addiert den gemeinsamen Lauf"""
+    lines = {"a.txt": [(1, ["Lyra", "Gareth"]), (2, ["Raenor"]), (9, ["Lyra"])],
+             "b.txt": [(1, ["Raenor"]), (2, ["Lyra", "Aelon"]), (3, ["Gareth", "Raenor"])]}
+    combined = CooccurrenceMatrix(window=2)
+    separate = []
+    for source_file, file_lines in lines.items():
+        matrix = CooccurrenceMatrix(window=2)
+        for line_number, names in file_lines:
+            matrix.add_line(source_file, line_number, names)
+            combined.add_line(source_file, line_number, names)
+        matrix.finish()
+        separate.append(matrix)
+    combined.finish()
+
+    save_cooccurrence(tmp_path / "cooccurrence.json", separate[0])
+    total = load_cooccurrence(tmp_path / "cooccurrence.json")
+    total.update(separate[1])
+    assert sorted(total.pairs()) == sorted(combined.pairs())
+    assert total.weight("Raenor", "Lyra") == combined.weight("Lyra", "Raenor") == 3
+
+    with pytest.raises(ValueError, match="anderen Einstellungen"):
+        total.update(CooccurrenceMatrix(mode="scene"))
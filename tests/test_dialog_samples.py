@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Tests für Gesprächs-Zeitachse und Dialog-Stichproben
+"""
+from pathlib import Path
+import sys
+
+# Füge src zum Python-Pfad hinzu
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.extractors.dialog_samples import DialogSampleHeap
+from src.extractors.timeline import ConversationTimeline, TurnSpillFile
+
+
+def test_timeline_neighbours():
+    """Test: Vorheriger und nächster Zug werden über Sprecher hinweg gefunden"""
+    timeline = ConversationTimeline()
+    first = timeline.add_turn("a.txt", 1, "Raenor", "Wohin gehen wir?", "dialog")
+    second = timeline.add_turn("a.txt", 3, "Lyra", "Zum Tempel.", "dialog")
+    other_file = timeline.add_turn("b.txt", 1, "Lyra", "Hallo.", "dialog")
+
+    assert timeline.previous_turn(second) == first
+    assert timeline.next_turn(first) == second
+    assert timeline.previous_turn(first) is None
+    assert timeline.previous_turn(other_file) is None
+    assert timeline.turn(second)["line_number"] == 3
+    assert timeline.speaker(timeline.previous_turn(second)) == "Raenor"
+    assert len(timeline) == 3
+
+
+def test_timeline_spills_contents_without_store():
+    """Test: Ohne Datenbank landen die Inhalte in einer temporären Datei statt im Speicher"""
+    timeline = ConversationTimeline(TurnSpillFile(batch_size=2))
+    refs = [timeline.add_turn("a.txt", 1, "Lyra", "Grüß dich, Wanderer.", "dialog"),
+            timeline.add_turn("b.txt", 1, "Raenor", "Wer bist du?", "dialog"),
+            timeline.add_turn("a.txt", 2, "Raenor", "*zieht das Schwert*", "action")]
+
+    # Nur der letzte Zug wartet noch auf die Auslagerung
+    assert sum(len(contents) for contents in timeline._contents) == 1
+    assert [timeline.content(ref) for ref in refs] == [
+        "Grüß dich, Wanderer.", "Wer bist du?", "*zieht das Schwert*"]
+    columns = {turns["source_file"]: turns["content"] for turns in timeline.file_columns()}
+    assert columns == {"a.txt": ["Grüß dich, Wanderer.", "*zieht das Schwert*"],
+                       "b.txt": ["Wer bist du?"]}
+
+
+def test_heap_is_bounded():
+    """Test: Es werden nur die besten k Kandidaten behalten"""
+    timeline = ConversationTimeline()
+    heap = DialogSampleHeap(max_first_messages=2, max_examples=2)
+    for i in range(50):
+        speaker = "Lyra" if i % 2 else "Raenor"
+        ref = timeline.add_turn("test.txt", i + 1, speaker, "x" * (21 + i), "dialog")
+        if speaker == "Lyra":
+            heap.offer(timeline, ref)
+
+    assert len(heap.first_messages()) == 2
+    assert len(heap.examples()) == 2
+    # Die längsten Zeilen gewinnen
+    assert timeline.turn(heap.first_messages()[0])["line_number"] == 50
+
+
+def test_examples_use_real_previous_speaker():
+    """Test: Beispiel-Dialoge enthalten den tatsächlichen Gesprächspartner"""
+    timeline = ConversationTimeline()
+    heap = DialogSampleHeap()
+    timeline.add_turn("test.txt", 1, "Raenor", "Wohin gehen wir?", "dialog")
+    answer = timeline.add_turn("test.txt", 2, "Lyra",
+                               "Zum alten Tempel von Morrakel, noch heute Nacht.", "dialog")
+    heap.offer(timeline, answer)
+
+    lines = heap.to_dialog_lines(timeline)
+    assert [line["sample_role"] for line in lines] == ["first_message", "example"]
+    assert lines[1]["reply_to"]["speaker"] == "Raenor"
+
+
+def test_actions_and_empty_lines_are_ignored():
+    """Test: Aktionen und leere Zeilen werden nicht als Kandidaten geführt"""
+    timeline = ConversationTimeline()
+    heap = DialogSampleHeap()
+    heap.offer(timeline, timeline.add_turn("test.txt", 1, "Lyra",
+                                           "öffnet langsam die schwere Tür", "action"))
+    heap.offer(timeline, timeline.add_turn("test.txt", 2, "Lyra", "", "dialog"))
+    assert len(heap) == 0
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Tests für den Entity-Extractor (Zwei-Pass-Modus)
+"""
+import pytest
+from pathlib import Path
+import sys
+
+# Füge src zum Python-Pfad hinzu
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.extractors.entity_extractor import EntityExtractor
+from src.extractors.gazetteer import NameGazetteer
+from src.parsers.chat_parser import ChatLine
+
+
+@pytest.fixture
+def extractor():
+    """Extractor ohne trainiertes Modell, mit Namensverzeichnis"""
+    extractor = EntityExtractor(spacy_model="blank:de")
+    extractor.gazetteer = NameGazetteer.from_names(["Lyra", "Raenor"], stopwords=extractor.common_words)
+    return extractor
+
+
+def needs_ner(extractor, content: str) -> bool:
+    return extractor._needs_ner(extractor._build_view(ChatLine(line_number=1, raw_text=content, content=content)))
+
+
+def test_german_nouns_do_not_trigger_ner(extractor):
+    """Test: Satzanfänge und Nomen (nach Begleitern, mit Endung oder bekannt) lösen kein NER aus"""
+    assert not needs_ner(extractor, "Der alte Wächter öffnete langsam die schwere Tür. "
+                                    "Draußen tobte ein Sturm über dem Hafen, und Lyra zog ihr Schwert.")
+    assert not needs_ner(extractor, "Raenor: Wir brauchen Hoffnung und Seile, sonst ist alles verloren!")
+
+
+def test_unknown_names_trigger_ner(extractor):
+    """Test: Unbekannte großgeschriebene Wörter mitten im Satz gehen weiter an NER"""
+    assert needs_ner(extractor, "Gestern hat Mara den Schlüssel gefunden.")
+    assert needs_ner(extractor, "Lyra sieht ihre Schwester Mara an.")
+    assert not needs_ner(extractor, "Lyra sieht Raenor an.")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Tests für den SQLite-Entitätsspeicher
+"""
+from dataclasses import fields
+from pathlib import Path
+import sys
+
+# Füge src zum Python-Pfad hinzu
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.extractors.timeline import ConversationTimeline
+from src.models import Character, begin_run, end_run
+from src.utils.entity_store import EntityStore
+from src.utils.merger import EntityMerger
+
+
+def _characters(store=None):
+    """Rohe Charaktere wie nach der Extraktion (mit Speicher: Erwähnungen in der Datenbank)"""
+    characters = {}
+    for line, name in enumerate(["Lyra", "Lyra Nightshade", "Raenor", "Gareth"]):
+        character = Character(name=name)
+        if store is not None:
+            character.mentions = store.mention_list("characters", name)
+        character.add_mention(f"{name} spricht.", "kapitel1.txt", line)
+        character.add_mention(f"{name} geht.", "kapitel2.txt")
+        characters[name] = character
+    characters["Lyra"].add_alias("Ly")
+    characters["Gareth"].mentions.append({"text": "Import", "source_file": "daten.json", "scene": 3})
+    return characters
+
+
+def _assert_same(first, second):
+    for field in fields(first):
+        assert getattr(first, field.name) == getattr(second, field.name), field.name
+
+
+def test_store_round_trip(tmp_path):
+    """Test: Zusammenführen, Speichern und Laden liefern dieselben Elemente wie im Speicher"""
+    begin_run()
+    merger = EntityMerger(80)
+    expected = merger.merge_characters(_characters())
+
+    store = EntityStore(tmp_path / "entities.sqlite", batch_size=2)
+    raw = _characters(store)
+    merged = merger.merge_characters(raw)
+    for name, entity in expected.items():
+        _assert_same(merged[name], entity)
+    store.save_entities(EntityStore.RAW, "characters", raw)
+    store.save_entities(EntityStore.MERGED, "characters", merged)
+    store.set_meta("similarity_threshold", 80)
+    store.close()
+
+    store = EntityStore(tmp_path / "entities.sqlite")
+    assert store.connection.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert store.get_meta("similarity_threshold") == 80
+    loaded = store.load_entities("characters")
+    assert list(loaded) == list(expected)
+    for name, entity in expected.items():
+        _assert_same(loaded[name], entity)
+    _assert_same(store.load_entities("characters", EntityStore.RAW)["Gareth"], _characters()["Gareth"])
+
+    # Abfragen über Namens- und Quelldatei-Index
+    assert list(store.load_entities("characters", names=["Raenor"])) == ["Raenor"]
+    assert store.names_in_file("characters", "daten.json") == ["Gareth"]
+    assert store.names_in_file("characters", "kapitel1.txt", EntityStore.RAW) == sorted(raw)
+    end_run()
+
+
+def test_timeline_spills_contents(tmp_path):
+    """Test: Ausgelagerte Inhalte der Zeitachse werden aus der Datenbank gelesen"""
+    store = EntityStore(tmp_path / "entities.sqlite", batch_size=2)
+    timeline = ConversationTimeline(store)
+    refs = [timeline.add_turn(source_file, line, "Lyra", f"{source_file} {line}", "dialog")
+            for source_file in ("a.txt", "b.txt") for line in range(3)]
+
+    assert [timeline.content(ref) for ref in refs] == [f"{s} {l}" for s in ("a.txt", "b.txt") for l in range(3)]
+    assert timeline.next_turn(refs[1]) == refs[2] and timeline.next_turn(refs[2]) is None
+    assert len(timeline) == 6 and list(timeline.turns("b.txt")) == refs[3:]
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Tests für den Filterindex des Charaktere-Tabs
+"""
+from pathlib import Path
+import random
+import sys
+
+# Füge src zum Python-Pfad hinzu
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.models import Character
+from src.utils.filter_index import CharacterFilterIndex
+
+ITEMS = ["Dolch", "Karte", "Amulett", "Schwert"]
+BEHAVIORS = ["mutig", "misstrauisch", "lacht"]
+
+
+def _characters(rng: random.Random):
+    characters = {}
+    for number in range(60):
+        character = Character(name=f"Figur {number}", description=rng.choice(["", "Händlerin"]))
+        character.frequency = rng.randint(0, 20)
+        for item in rng.sample(ITEMS, rng.randint(0, 2)):
+            character.add_item(item)
+        for behavior in rng.sample(BEHAVIORS, rng.randint(0, 2)):
+            character.add_behavior(behavior)
+        if rng.random() < 0.3:
+            character.add_relationship("Figur 0", "Freund")
+        characters[character.name] = character
+    return characters
+
+
+def _expected(characters, min_frequency, max_frequency, items, behaviors, has_relationships, has_description):
+    """Bisheriger Filter: alle Prüfungen für jeden Charakter"""
+    return [name for name, character in characters.items()
+            if min_frequency <= character.frequency <= max_frequency
+            and (not items or any(item in character.items for item in items))
+            and (not behaviors or any(behavior in character.behaviors for behavior in behaviors))
+            and (not has_relationships or character.relationships)
+            and (not has_description or character.description)]
+
+
+def _check(index, characters, rng):
+    for _ in range(50):
+        low, high = sorted(rng.randint(0, 20) for _ in range(2))
+        filters = (low, high, rng.sample(ITEMS, rng.randint(0, 2)), rng.sample(BEHAVIORS, rng.randint(0, 1)),
+                   rng.random() < 0.3, rng.random() < 0.3)
+        assert index.names(index.select(*filters)) == _expected(characters, *filters)
+
+
+def test_select_matches_predicates():
+    """Test: Index-Filter liefern dieselben Charaktere in derselben Reihenfolge"""
+    rng = random.Random(7)
+    characters = _characters(rng)
+    index = CharacterFilterIndex(characters, version=3)
+    _check(index, characters, rng)
+
+    assert index.version == 3
+    assert index.item_options() == sorted(ITEMS)
+    assert index.frequency_range() == (min(c.frequency for c in characters.values()),
+                                       max(c.frequency for c in characters.values()))
+    assert index.names(index.select(names=["Figur 5", "unbekannt"])) == ["Figur 5"]
+
+
+def test_updates_after_batch_changes():
+    """Test: Änderungen und Umbenennungen werden nachgetragen statt neu aufgebaut"""
+    rng = random.Random(11)
+    characters = _characters(rng)
+    index = CharacterFilterIndex(characters)
+
+    for name in rng.sample(sorted(characters), 20):
+        character = characters[name]
+        character.behaviors = [behavior for behavior in character.behaviors if behavior != "mutig"]
+        character.add_behavior("ängstlich")
+        character.description = ""
+        character.add_relationship("Figur 1", "Rivale")
+        if rng.random() < 0.5:
+            character.name = f"Sir {name}"
+            characters[character.name] = characters.pop(name)
+            index.rename(name, character.name, character)
+        index.update(character.name, character)
+
+    _check(index, characters, rng)
+    assert "ängstlich" in index.behavior_options()
+    ids = index.select()
+    assert index.without_relationships(ids) == [name for name, character in characters.items()
+                                                if not character.relationships]
+    assert index.top_by_frequency(ids, 3) == [name for name, _ in sorted(
+        characters.items(), key=lambda entry: entry[1].frequency, reverse=True)][:3]
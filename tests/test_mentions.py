@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Tests für die Erwähnungsblöcke der Story-Elemente
+"""
+from pathlib import Path
+import sys
+
+# Füge src zum Python-Pfad hinzu
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.models import Character, MentionList
+
+
+def test_merge_shares_mentions_without_leaking_appends():
+    """Test: Zusammenführen teilt Blöcke, spätere Erwähnungen bleiben getrennt"""
+    lyra = Character(name="Lyra")
+    lyra.add_mention("Lyra lächelt", "kapitel1.txt", 1)
+    nightshade = Character(name="Lyra Nightshade")
+    nightshade.add_mention("Lyra Nightshade zieht ihr Schwert", "kapitel1.txt", 2)
+
+    merged = Character(name="Lyra Nightshade")
+    merged.merge_with(lyra)
+    merged.merge_with(nightshade)
+    lyra.add_mention("Lyra geht", "kapitel2.txt", 3)
+    merged.add_mention("Sie kehrt zurück", "kapitel2.txt", 4)
+
+    assert [m["line_number"] for m in merged.to_dict()["mentions"]] == [1, 2, 4]
+    assert [m["line_number"] for m in lyra.mentions] == [1, 3]
+    assert len(merged.mentions) == 3 and merged.mentions[:1][0]["line_number"] == 1
+    assert Character.from_dict(merged.to_dict()).mentions == merged.mentions
+
+
+def test_many_chunks_are_compacted_in_order():
+    """Test: Viele kleine Blöcke werden zusammengefasst, die Reihenfolge bleibt"""
+    merged = MentionList()
+    for number in range(3 * MentionList.MAX_CHUNKS):
+        merged.extend(MentionList([{"line_number": number}]))
+
+    assert len(merged._chunks) <= MentionList.MAX_CHUNKS
+    assert [m["line_number"] for m in merged] == list(range(3 * MentionList.MAX_CHUNKS))
+    assert merged[-1]["line_number"] == 3 * MentionList.MAX_CHUNKS - 1
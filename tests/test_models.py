@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Tests für die Story-Modelle (Slots, Sammlungen bei Bedarf, Zeitstempel pro Lauf)
+"""
+from datetime import datetime
+from pathlib import Path
+import pickle
+import sys
+
+# Füge src zum Python-Pfad hinzu
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.models import Character, Location, begin_run, end_run, run_timestamp
+
+
+def test_slotted_models_allocate_collections_lazily():
+    """Test: Keine __dict__-Instanzen, leere Sammlungen werden erst bei Zugriff angelegt"""
+    timestamp = begin_run(datetime(2025, 1, 1))
+    lyra = Character(name="Lyra")
+    lyra.add_mention("Lyra lächelt.", "kapitel1.txt", 1)
+    nightshade = Character(name="Lyra Nightshade")
+    nightshade.add_alias("Die Schattenweberin")
+
+    assert not hasattr(lyra, '__dict__')
+    assert lyra.created_at == lyra.updated_at == timestamp
+
+    merged = Character(name="Lyra Nightshade")
+    merged.merge_with(lyra)
+    merged.merge_with(nightshade)
+    data = merged.to_dict()
+    assert data["aliases"] == ["Die Schattenweberin"] and data["items"] == []
+    assert merged._items is None and lyra._aliases is None
+
+    # Zugriff legt die Sammlung an, direkte Änderungen bleiben erhalten
+    merged.items.add("Kristallkugel")
+    restored = pickle.loads(pickle.dumps(merged))
+    assert restored.items == {"Kristallkugel"} and restored.frequency == 1
+
+    location = Location.from_dict({"name": "Tempel", "features": ["Säulen"]})
+    assert location.to_dict()["features"] == ["Säulen"]
+    end_run()
+
+
+def test_run_timestamp_ends_with_the_run():
+    """Test: Nach dem Lauf erhalten neue und geänderte Elemente wieder die aktuelle Uhrzeit"""
+    run = datetime(2025, 1, 1)
+    with run_timestamp(run):
+        lyra = Character(name="Lyra")
+        with run_timestamp(datetime(2025, 2, 1)):
+            Character(name="Raenor")
+        assert Character(name="Aelon").created_at == run
+
+    lyra.add_mention("Lyra lächelt.", "kapitel2.txt", 4)
+    assert lyra.created_at == run and lyra.updated_at > run
+    assert Character(name="Gareth").created_at > run
+
+    begin_run(run)
+    end_run()
+    assert Character(name="Morrakel").created_at > run
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Tests für die Namenssuche (Trigramm-Index über Namen und Aliase)
+"""
+from pathlib import Path
+import sys
+
+# Füge src zum Python-Pfad hinzu
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.models import Character
+from src.utils.name_index import NameTrigramIndex
+
+
+def _index() -> NameTrigramIndex:
+    lyra = Character(name="Lyra Nightshade")
+    lyra.add_alias("die Schattenweberin")
+    raenor = Character(name="Raenor")
+    raenor.add_alias("der Alte")
+    return NameTrigramIndex.build({character.name: character
+                                   for character in [lyra, raenor, Character(name="Lysander")]})
+
+
+def test_search_ranks_prefixes_and_aliases():
+    """Test: Wortanfänge vor unscharfen Treffern, Aliase zählen für ihren Charakter"""
+    index = _index()
+    assert {name for name, _ in index.search("ly")} == {"Lyra Nightshade", "Lysander"}
+    assert [name for name, _ in index.search("lyr")][0] == "Lyra Nightshade"
+    assert [name for name, _ in index.search("Schatten")] == ["Lyra Nightshade"]
+    assert [name for name, _ in index.search("alte")] == ["Raenor"]
+    assert index.search("lyr", limit=1) == index.search("lyr")[:1]
+
+
+def test_search_tolerates_typos():
+    """Test: Tippfehler finden den Namen noch, Unpassendes und Leeres nicht"""
+    index = _index()
+    assert [name for name, _ in index.search("Raenr")] == ["Raenor"]
+    assert [name for name, _ in index.search("nightshdae")] == ["Lyra Nightshade"]
+    # Kurze Anfrage mit vertauschtem Vokal: kaum gemeinsame Trigramme, aber Bigramme
+    assert [name for name, _ in index.search("Lira")] == ["Lyra Nightshade"]
+    assert [name for name, _ in index.search("Rainor")] == ["Raenor"]
+    assert index.search("x") == []
+    assert index.search("  ") == []
+    assert NameTrigramIndex({}).search("lyra") == []
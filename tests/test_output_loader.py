@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Tests für das Laden exportierter Ergebnisse
+"""
+from dataclasses import fields
+import json
+from pathlib import Path
+import sys
+
+# Füge src zum Python-Pfad hinzu
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.models import Character, Item, Location
+from src.utils.exporter import MENTIONS_FILE, JSONExporter
+from src.utils.merger import EntityMerger
+from src.utils.output_loader import MentionTable, load_entity_file, load_output
+
+
+def _export(output_dir: Path):
+    """Exportiert je ein Element pro Typ mit Erwähnungen und Sammlungen"""
+    lyra = Character(name="Lyra Nightshade", description="Schattenweberin")
+    lyra.add_mention("Lyra lächelt.", "kapitel1.txt", 3)
+    lyra.add_mention("Lyra geht.", "kapitel2.txt")
+    lyra.add_alias("Lyra")
+    lyra.add_relationship("Raenor", "Mentor")
+    dagger = Item(name="dolch", item_type="Waffe")
+    dagger.add_owner("Lyra Nightshade")
+    temple = Location(name="Tempel", location_type="Tempel")
+    temple.add_mention("Im Tempel.", "kapitel1.txt", 8)
+    entities = {"characters": {lyra.name: lyra}, "items": {dagger.name: dagger},
+                "locations": {temple.name: temple}}
+    JSONExporter(output_dir).export_all(entities["characters"], entities["items"], entities["locations"])
+    return entities
+
+
+def test_load_output_reads_entity_files_on_demand(tmp_path):
+    """Test: Elemente entstehen aus den Übersichten, Erwähnungen erst beim Zugriff"""
+    expected = _export(tmp_path)
+    loaded = load_output(tmp_path)
+
+    lyra = loaded["characters"]["Lyra Nightshade"]
+    assert len(lyra.mentions) == 2 and not lyra.mentions._chunks[0].loaded
+    for entity_type, entities in expected.items():
+        for name, entity in entities.items():
+            for field in fields(entity):
+                assert getattr(loaded[entity_type][name], field.name) == getattr(entity, field.name), field.name
+    assert lyra.mentions._chunks[0].loaded
+
+
+def test_load_output_with_old_overviews(tmp_path):
+    """Test: Übersichten ohne die zusätzlichen Felder führen zum vollständigen Laden"""
+    expected = _export(tmp_path)
+    overview_path = tmp_path / "characters_overview.json"
+    overview = json.loads(overview_path.read_text(encoding="utf-8"))
+    overview["characters"] = [{key: entry[key] for key in ("name", "aliases", "frequency", "items", "relationships")}
+                              for entry in overview["characters"]]
+    overview_path.write_text(json.dumps(overview), encoding="utf-8")
+
+    lyra = load_output(tmp_path, ["characters"])["characters"]["Lyra Nightshade"]
+    assert lyra.description == "Schattenweberin"
+    assert lyra.mentions == expected["characters"]["Lyra Nightshade"].mentions
+
+
+def test_normalized_export_writes_each_mention_once(tmp_path):
+    """Test: Gemeinsame Erwähnungen stehen einmal in mentions.ndjson und werden beim Laden aufgelöst"""
+    lyra = Character(name="Lyra")
+    raenor = Character(name="Raenor")
+    for character in (lyra, raenor):
+        character.add_mention("Lyra und Raenor betreten den Tempel.", "kapitel1.txt", 2)
+    raenor.add_mention("Raenor schweigt.", "kapitel1.txt", 5)
+    JSONExporter(tmp_path, normalized=True).export_all({"Lyra": lyra, "Raenor": raenor}, {}, {})
+
+    assert len((tmp_path / MENTIONS_FILE).read_text(encoding="utf-8").splitlines()) == 2
+    record = json.loads((tmp_path / "characters" / "raenor.json").read_text(encoding="utf-8"))
+    assert "mentions" not in record and record["mention_ids"] == [0, 1]
+    complete = json.loads((tmp_path / "complete_overview.json").read_text(encoding="utf-8"))
+    assert complete["characters"] == {"total": 2, "file": "characters_overview.json"}
+
+    loaded = load_output(tmp_path, ["characters"])["characters"]
+    assert loaded["Raenor"].mentions == raenor.mentions and loaded["Lyra"].mentions == lyra.mentions
+    table = MentionTable(tmp_path / MENTIONS_FILE)
+    assert load_entity_file(tmp_path / "characters" / "raenor.json", Character, table).mentions == raenor.mentions
+
+
+def test_incremental_merge_reads_and_writes_only_touched_clusters(tmp_path):
+    """Test: Inkrementell werden nur die Dateien der Cluster mit neuen Entitäten gelesen und geschrieben"""
+    old = {}
+    for name, line_number in (("Lyra", 1), ("Gareth", 2), ("Raenor", 3)):
+        old[name] = Character(name=name, frequency=1)
+        old[name].add_mention(f"{name} wartet.", "kapitel1.txt", line_number)
+    merger = EntityMerger(80)
+    merged, index = merger.build_cluster_index("characters", old)
+    JSONExporter(tmp_path, normalized=True).export_all(merged, {}, {})
+    gareth_file = tmp_path / "characters" / "gareth.json"
+    gareth_record = gareth_file.read_bytes()
+
+    table = MentionTable(tmp_path / MENTIONS_FILE)
+    previous = load_output(tmp_path, ["characters"], table)["characters"]
+    lyra = Character(name="Lyra", frequency=1)
+    lyra.add_mention("Lyra und Gareth reden.", "kapitel2.txt", 1)
+    merged = merger.merge_incremental("characters", index, previous, {"Lyra": lyra})
+    assert merger.changed_names["characters"] == {"Lyra"}
+    assert not merged["Gareth"].mentions._chunks[0].loaded
+
+    exporter = JSONExporter(tmp_path, normalized=True)
+    exporter.keep_mention_table(table.mentions())
+    exporter.export_all(merged, {}, {}, {"characters": merger.changed_names["characters"]})
+    assert gareth_file.read_bytes() == gareth_record
+    assert not merged["Raenor"].mentions._chunks[0].loaded
+
+    loaded = load_output(tmp_path, ["characters"])["characters"]
+    assert sorted(loaded) == ["Gareth", "Lyra", "Raenor"]
+    assert [mention["text"] for mention in loaded["Lyra"].mentions] == ["Lyra wartet.", "Lyra und Gareth reden."]
+    assert [mention["text"] for mention in loaded["Gareth"].mentions] == ["Gareth wartet."]
+
+
+def test_materialized_mentions_survive_removed_files(tmp_path):
+    """Test: Nach materialize werden die Einzeldateien nicht mehr gebraucht (z.B. vereinigte Cluster)"""
+    expected = _export(tmp_path)
+    loaded = load_output(tmp_path, ["characters"])["characters"]
+    lyra = loaded["Lyra Nightshade"]
+    # Wie beim inkrementellen Lauf: Erwähnungen eines anderen Elements übernehmen
+    merged = Character(name="Lyra")
+    merged.merge_with(lyra)
+
+    merged.mentions.materialize()
+    (tmp_path / "characters" / Character.json_filename("Lyra Nightshade")).unlink()
+    assert merged.mentions == expected["characters"]["Lyra Nightshade"].mentions
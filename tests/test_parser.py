@@ -10,6 +10,7 @@ import sys
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from src.parsers.chat_parser import ChatParser, ChatLine
+from src.extractors.gazetteer import NameGazetteer
 
 
 def test_parse_dialog_colon():
@@ -76,11 +77,33 @@ Erzähler: Die beiden trafen sich am Marktplatz."""
         temp_path.unlink()
 
 
+def test_action_actor_from_gazetteer():
+    """Test: Handelnde Figur wird über das Namensverzeichnis bestimmt"""
+    gazetteer = NameGazetteer.from_names(["Lyra", "Raenor"])
+    parser = ChatParser(gazetteer=gazetteer)
+    
+    assert parser._parse_line(1, "[Plötzlich zieht Lyra ihr Schwert]").speaker == "Lyra"
+    assert parser._parse_line(2, "*Ein Schatten huscht vorbei*").speaker is None
+
+
+def test_gazetteer_aliases_and_case():
+    """Test: Eindeutige Vornamen als Alias, kleingeschriebene Wörter zählen nicht"""
+    gazetteer = NameGazetteer.from_names(["Gareth Steinfaust", "Fremder"])
+    
+    hits = gazetteer.find_in_text("Gareth nickt Gareth Steinfaust zu.")
+    assert [hit.name for hit in hits] == ["Gareth Steinfaust", "Gareth Steinfaust"]
+    assert hits[1].end - hits[1].start == len("Gareth Steinfaust")
+    assert gazetteer.find_in_text("Ein fremder Mann betritt die Taverne.") == []
+    assert "gareth" in gazetteer
+
+
 if __name__ == "__main__":
     # Führe Tests aus
     test_parse_dialog_colon()
     test_parse_action_brackets()
     test_parse_narrator()
     test_parse_file()
+    test_action_actor_from_gazetteer()
+    test_gazetteer_aliases_and_case()
     
-    print("Alle Tests erfolgreich!") 
\ No newline at end of file
+    print("Alle Tests erfolgreich!")
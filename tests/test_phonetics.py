@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Tests für die phonetischen Schlüssel des EntityMergers
+"""
+from pathlib import Path
+import sys
+
+# Füge src zum Python-Pfad hinzu
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.models import Character
+from src.utils.merger import EntityMerger
+from src.utils.phonetics import PhoneticEncoder, cologne_phonetic
+
+
+def test_cologne_phonetic_reference_codes():
+    """Test: Kölner Phonetik liefert die Referenzcodes"""
+    assert cologne_phonetic("Müller-Lüdenscheidt") == "65752682"
+    assert cologne_phonetic("Wikipedia") == "3412"
+    assert cologne_phonetic("Breschnew") == "17863"
+    assert cologne_phonetic("Mayer") == cologne_phonetic("Meier") == cologne_phonetic("Maier") == "67"
+    assert cologne_phonetic("Christoph") == cologne_phonetic("Kristof")
+
+    # Zu kurze Codes ergeben keinen Schlüssel
+    encoder = PhoneticEncoder()
+    assert encoder.key("anna") is None
+    assert encoder.key("lena mayer") == encoder.key("lehna meier") == "56 67"
+
+
+def test_phonetic_index_merges_spelling_variants():
+    """Test: Gleich klingende Namen werden mit und ohne Blocking zusammengeführt"""
+    names = ["Mayer", "Meier", "Christoph", "Kristof", "Anna", "Enno", "Gareth"]
+    characters = {name: Character(name=name, frequency=1) for name in names}
+
+    plain = EntityMerger(80).merge_characters(characters)
+    assert "Meier" in plain and "Mayer" in plain
+
+    for use_blocking in (True, False):
+        merged = EntityMerger(80, use_blocking, phonetic="koelner").merge_characters(characters)
+        groups = sorted(sorted({name} | merged[name].aliases) for name in merged)
+        assert groups == [["Anna"], ["Christoph", "Kristof"], ["Enno"], ["Gareth"],
+                          ["Mayer", "Meier"]]
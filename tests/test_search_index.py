@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Tests für die Volltextsuche über Erwähnungen und Dialogzeilen
+"""
+from pathlib import Path
+import sys
+
+# Füge src zum Python-Pfad hinzu
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.models import Character, Location
+from src.extractors.dialog_samples import DialogSampleHeap
+from src.extractors.timeline import ConversationTimeline
+from src.utils.search_index import MentionSearchIndex, SearchHit
+
+
+def _index() -> MentionSearchIndex:
+    """Index über zwei Charaktere, einen Ort und zwei Dialogzeilen"""
+    lyra = Character(name="Lyra")
+    lyra.add_mention("Lyra betrat die Taverne im Dämmerlicht.", "kapitel1.txt", 3)
+    lyra.add_mention("Lyra zeigt Aelon eine vergilbte Karte.", "kapitel1.txt", 12)
+    aelon = Character(name="Aelon")
+    aelon.add_mention("Aelon wartet am Schwarzen Pass.", "kapitel2.txt")
+    pass_ = Location(name="Schwarzer Pass")
+    pass_.add_mention("Der Schwarze Pass liegt im Nebel.", "kapitel2.txt", 7)
+    dialog = {"Lyra": [{"content": "Ich bin auf dem Weg zum Schwarzen Pass.",
+                        "source_file": "kapitel2.txt", "line_number": 2}],
+              "Aelon": [{"content": "Die Karte ist alt.", "source_file": "kapitel1.txt", "line_number": 13}]}
+    return MentionSearchIndex.build(
+        {"characters": {"Lyra": lyra, "Aelon": aelon}, "locations": {pass_.name: pass_}}, dialog)
+
+
+def test_search_finds_words_with_owner_and_position():
+    """Test: Treffer nennen Element, Datei und Zeile; Groß-/Kleinschreibung egal"""
+    index = _index()
+    assert len(index) == 6
+    assert index.search("dämmerlicht") == [
+        SearchHit("characters", "Lyra", "Lyra betrat die Taverne im Dämmerlicht.", "kapitel1.txt", 3)]
+    assert [hit.line_number for hit in index.search("Aelon wartet")] == [None]
+    assert index.search("Karte Taverne") == []
+    assert index.search("  ") == []
+
+
+def test_search_prefixes_types_and_limit():
+    """Test: Wortanfänge ab drei Zeichen, Filter nach Typ und Höchstzahl"""
+    index = _index()
+    hits = index.search("schwarz pass")
+    assert [(hit.entity_type, hit.entity) for hit in hits] == [
+        ("characters", "Aelon"), ("locations", "Schwarzer Pass"), (MentionSearchIndex.DIALOG, "Lyra")]
+    assert index.search("ka") == []
+    assert [hit.entity for hit in index.search("kar", entity_types=[MentionSearchIndex.DIALOG])] == ["Aelon"]
+    assert len(index.search("schwarz", limit=2)) == 2
+
+
+def test_search_covers_all_turns_of_the_timeline():
+    """Test: Mit der Zeitachse werden auch Zeilen gefunden, die keine Dialog-Stichprobe sind"""
+    timeline = ConversationTimeline()
+    heap = DialogSampleHeap(max_first_messages=2, max_examples=2)
+    for line_number in range(1, 21):
+        content = f"Lyra spricht zum {line_number}. Mal über die alte Karte des Nordens."
+        if line_number == 5:
+            content = "Kurz: der Drache schläft."
+        heap.offer(timeline, timeline.add_turn("kapitel1.txt", line_number, "Lyra", content, "dialog"))
+    timeline.add_turn("kapitel1.txt", 21, "Lyra", "zieht leise das Schwert", "action")
+    dialog = {"Lyra": heap.to_dialog_lines(timeline)}
+    assert not any("Drache" in line["content"] for line in dialog["Lyra"])
+
+    assert MentionSearchIndex.build({}, dialog).search("drache") == []
+    index = MentionSearchIndex.build({}, dialog, timeline)
+    assert len(index) == len(timeline) == 21
+    assert index.search("drache") == [
+        SearchHit(MentionSearchIndex.DIALOG, "Lyra", "Kurz: der Drache schläft.", "kapitel1.txt", 5)]
+    assert [hit.line_number for hit in index.search("schwert")] == [21]
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Tests für die blockweise Ähnlichkeitsberechnung
+"""
+from pathlib import Path
+import sys
+
+from fuzzywuzzy import fuzz
+
+# Füge src zum Python-Pfad hinzu
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.utils.similarity import ScoreTable, SimilarityScorer
+
+
+NAMES = ["", "lyra", "lyra nightshade", "raenor", "raenör", "aelon", "gareth", "garret",
+         "tempel von morrakel", "tempel", "ab", "ba", "ß"]
+
+
+def test_matrix_matches_fuzz_ratio():
+    """Test: Die Matrix liefert exakt die Werte von fuzz.ratio (beide Backends)"""
+    expected = [[fuzz.ratio(first, second) for second in NAMES] for first in NAMES]
+    for use_rapidfuzz in (True, False):
+        scorer = SimilarityScorer(chunk_size=4, use_rapidfuzz=use_rapidfuzz)
+        assert scorer.score_matrix(NAMES, NAMES).tolist() == expected
+
+
+def test_score_table_rows():
+    """Test: Vorausberechnete und einzelne Zeilen stimmen überein"""
+    scorer = SimilarityScorer()
+    dense = ScoreTable(scorer, NAMES, dense=True, chunk_size=3)
+    sparse = ScoreTable(scorer, NAMES)
+    for position in range(len(NAMES)):
+        candidates = [other for other in range(len(NAMES)) if other % 2 != position % 2]
+        assert dense.row(position, candidates).tolist() == sparse.row(position, candidates).tolist()
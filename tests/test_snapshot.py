@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Tests für die Analyse-Snapshots
+"""
+from dataclasses import fields
+from pathlib import Path
+import sys
+
+import pytest
+
+# Füge src zum Python-Pfad hinzu
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.models import Character, Item, Location
+from src.extractors.timeline import ConversationTimeline
+from src.utils.merge_pipeline import MergePipeline
+from src.utils.merger import EntityMerger
+from src.utils.snapshot import AnalysisSnapshot, load_snapshot, save_snapshot
+
+
+def _raw_entities():
+    """Unzusammengeführte Entitäten mit Erwähnungen, Sammlungen und einer importierten Erwähnung"""
+    characters = {}
+    for line, name in enumerate(["Lyra", "Lyra Nightshade", "Raenor", "Herr Raenor", "Gareth"]):
+        character = Character(name=name, description=f"Figur {name}")
+        character.add_mention(f"{name} spricht.", "kapitel1.txt", line)
+        character.add_mention(f"{name} geht.", "kapitel2.txt")
+        characters[name] = character
+    characters["Lyra"].add_alias("Ly")
+    characters["Gareth"].add_relationship("Lyra", "Freund")
+    characters["Gareth"].mentions.append({"text": "Import", "source_file": "daten.json", "scene": 3})
+
+    items = {"Dolch": Item(name="Dolch", item_type="Waffe"), "Alter Dolch": Item(name="Alter Dolch")}
+    items["Dolch"].add_owner("Lyra")
+    items["Alter Dolch"].add_mention("Ein alter Dolch.", "kapitel1.txt", 7)
+    locations = {"Tempel": Location(name="Tempel", location_type="Tempel")}
+    locations["Tempel"].add_inhabitant("Morrakel")
+    return {"characters": characters, "items": items, "locations": locations}
+
+
+def _assert_same(first, second):
+    for field in fields(first):
+        assert getattr(first, field.name) == getattr(second, field.name), field.name
+
+
+def test_snapshot_round_trip(tmp_path):
+    """Test: Speichern und Laden erhält Entitäten, Graphen und geteilte Erwähnungen"""
+    raw = _raw_entities()
+    merger = EntityMerger(80, phonetic="koelner")
+    pipeline = MergePipeline(merger, workers=1)
+    merged, _ = pipeline.run(raw, AnalysisSnapshot.MIN_SCORE)
+    dialog = {"Lyra": [{"content": "Hallo", "source_file": "kapitel1.txt"}]}
+    timeline = ConversationTimeline()
+    timeline.add_turn("kapitel1.txt", 1, "Lyra", "Hallo", "dialog")
+    timeline.add_turn("kapitel1.txt", 2, "Raenor", "nickt stumm", "action")
+    timeline.add_turn("kapitel2.txt", 4, "Lyra", "Weiter!", "dialog")
+    snapshot = AnalysisSnapshot(merged, raw, pipeline.graphs, dialog, 80,
+                                AnalysisSnapshot.merger_settings(merger), pipeline.report, timeline)
+    save_snapshot(tmp_path / "analyse.swsnap", snapshot)
+    loaded = load_snapshot(tmp_path / "analyse.swsnap")
+
+    assert loaded.threshold == 80 and loaded.dialog_data == dialog and loaded.regroupable
+    assert list(loaded.timeline.file_columns()) == list(timeline.file_columns())
+    assert loaded.create_merger().phonetic.algorithm == "koelner"
+    for entity_type in raw:
+        assert list(loaded.merged[entity_type]) == list(merged[entity_type])
+        for name, entity in merged[entity_type].items():
+            _assert_same(loaded.merged[entity_type][name], entity)
+        assert list(loaded.raw_entities[entity_type]) == list(raw[entity_type])
+        for name, entity in raw[entity_type].items():
+            _assert_same(loaded.raw_entities[entity_type][name], entity)
+        graph = loaded.similarity_graphs[entity_type]
+        assert graph.components(60) == pipeline.graphs[entity_type].components(60)
+
+    # Zusammengeführte und rohe Entitäten teilen sich die Erwähnungen wie vor dem Speichern
+    lyra = loaded.merged["characters"]["Lyra Nightshade"]
+    assert any(mention is loaded.raw_entities["characters"]["Lyra"].mentions[0] for mention in lyra.mentions)
+
+
+def test_snapshot_rejects_foreign_files():
+    """Test: Fremde Dateien und unbekannte Versionen werden abgelehnt"""
+    data = AnalysisSnapshot({"characters": {}}).to_bytes()
+    assert not AnalysisSnapshot.from_bytes(data).regroupable
+    assert AnalysisSnapshot.from_bytes(data).timeline is None
+
+    with pytest.raises(ValueError, match="kein StoryWeaver-Snapshot"):
+        AnalysisSnapshot.from_bytes(b"{}" + data[2:])
+    with pytest.raises(ValueError, match="Version"):
+        AnalysisSnapshot.from_bytes(data[:8] + b"\x63\x00" + data[10:])
+
+
+def test_snapshot_rejects_damaged_files():
+    """Test: Abgeschnittene Tabellen und beschädigte Abschnitte ergeben einen ValueError"""
+    data = AnalysisSnapshot({"characters": {}}).to_bytes()
+
+    # Kopf mit drei Abschnitten, aber ohne Tabelle
+    with pytest.raises(ValueError, match="unvollständig"):
+        AnalysisSnapshot.from_bytes(data[:10] + b"\x03\x00")
+
+    # Komprimierte Daten des ersten Abschnitts ("meta") überschreiben
+    compression, payload, length = AnalysisSnapshot._read_sections(memoryview(data))["meta"]
+    start = data.index(bytes(payload))
+    damaged = data[:start] + b"\xff" * len(payload) + data[start + len(payload):]
+    with pytest.raises(ValueError, match="beschädigt"):
+        AnalysisSnapshot.from_bytes(damaged)
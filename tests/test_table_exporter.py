@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Tests für den Tabellen-Export (Parquet/Arrow)
+"""
+from pathlib import Path
+import sys
+
+import pytest
+
+# Füge src zum Python-Pfad hinzu
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+pytest.importorskip("pyarrow")
+import pandas as pd
+
+from src.models import Character, Item, Location
+from src.extractors.timeline import ConversationTimeline
+from src.utils.table_exporter import TableExporter
+
+
+def _read(exporter: TableExporter, table: str) -> pd.DataFrame:
+    path = exporter.table_path(table)
+    return pd.read_parquet(path) if exporter.table_format == "parquet" else pd.read_feather(path)
+
+
+def _timeline(source_file: str, lines) -> ConversationTimeline:
+    timeline = ConversationTimeline()
+    for line_number, speaker, content, line_type in lines:
+        timeline.add_turn(source_file, line_number, speaker, content, line_type)
+    return timeline
+
+
+@pytest.mark.parametrize("table_format", ["parquet", "arrow"])
+def test_tables_match_entities(tmp_path, table_format):
+    """Test: Elemente, Erwähnungen und Dialogzeilen landen vollständig in den Tabellen"""
+    lyra = Character(name="Lyra")
+    lyra.add_mention("Lyra zieht das Schwert", "kapitel1.txt", 3)
+    lyra.add_mention("Lyra und Raenor", "kapitel1.txt", 7)
+    lyra.add_relationship("Raenor", "Freund")
+    lyra.aliases.add("Ly")
+    raenor = Character(name="Raenor")
+    raenor.add_mention("Lyra und Raenor", "kapitel1.txt", 7)
+    sword = Item(name="Schwert", item_type="Waffe")
+    sword.add_mention("Lyra zieht das Schwert", "kapitel1.txt", 3)
+
+    exporter = TableExporter(tmp_path, table_format)
+    timeline = _timeline("kapitel1.txt", [(3, "Lyra", "*zieht das Schwert*", "action"),
+                                          (7, "Raenor", "Pass auf!", "dialog")])
+    rows = exporter.export_all({"Lyra": lyra, "Raenor": raenor}, {"Schwert": sword}, {}, timeline)
+    assert rows == {"characters": 2, "items": 1, "locations": 0, "mentions": 4, "dialog_lines": 2}
+
+    characters = _read(exporter, "characters").set_index("name")
+    assert characters.loc["Lyra", "mention_count"] == 2
+    assert list(characters.loc["Lyra", "aliases"]) == ["Ly"]
+    assert dict(characters.loc["Lyra", "relationships"]) == {"Raenor": "Freund"}
+    assert _read(exporter, "items").loc[0, "item_type"] == "Waffe"
+    # Leere Tabellen behalten die Spalten und Typen des Modells
+    locations = _read(exporter, "locations")
+    assert "location_type" in locations.columns and locations["frequency"].dtype == "int64"
+
+    mentions = _read(exporter, "mentions")
+    expected = sorted((entity_type, entity.name, mention["text"], mention["line_number"])
+                      for entity_type, entity in [("characters", lyra), ("characters", raenor), ("items", sword)]
+                      for mention in entity.mentions)
+    actual = mentions[["entity_type", "entity", "text", "line_number"]].itertuples(index=False, name=None)
+    assert sorted(actual) == expected
+
+    dialog_lines = _read(exporter, "dialog_lines")
+    assert dialog_lines.to_dict("records") == [timeline.turn(ref) for ref in timeline.turns("kapitel1.txt")]
+
+
+def test_incremental_run_keeps_dialog_lines_of_other_files(tmp_path):
+    """Test: Ein inkrementeller Lauf ersetzt nur die Dialogzeilen seiner Dateien"""
+    exporter = TableExporter(tmp_path)
+    exporter.export_dialog_lines(_timeline("a.txt", [(1, "Lyra", "Hallo", "dialog"),
+                                                     (2, "Raenor", "Hi", "dialog")]))
+    exporter.export_dialog_lines(_timeline("b.txt", [(1, "Aelon", "Wer da?", "dialog")]), keep_existing=True)
+    exporter.export_dialog_lines(_timeline("a.txt", [(1, "Lyra", "Hallo!", "dialog")]), keep_existing=True)
+
+    dialog_lines = _read(exporter, "dialog_lines")
+    assert sorted(zip(dialog_lines["source_file"], dialog_lines["content"])) == [("a.txt", "Hallo!"),
+                                                                                 ("b.txt", "Wer da?")]
+    assert not list(tmp_path.glob("tables/*.tmp"))